@@ -0,0 +1,97 @@
+# api_service/catalog_data.py
+"""
+API servisinin klinik / otel kayıtları
+
+/api/clinics ve /api/hotels uçlarının (id'ler dahil) kaynağı bu listelerdir.
+Action server'ın chatbot aramaları ayrı bir veri setini
+(rasa_service/actions/api_clients.py: MOCK_CLINICS / MOCK_HOTELS) kullanır;
+iki setin id'leri aynı klinikleri göstermez. compile_catalog.py bu
+listeleri api_clinics / api_hotels, action server'ınkileri clinics /
+hotels kataloğu olarak derler.
+
+Kanonik klinik kimliği: booking'lerin clinic_id'si ve /api/bookings?clinic_id=
+API'nin id'sidir. İki setteki aynı klinik sabit "key" alanını taşır;
+action server booking yazarken canonical_clinic_id(key) ile API id'sine çevirir.
+"""
+
+import logging
+from typing import Optional
+
+from api_service.catalog_mmap import API_CLINIC_SCHEMA, CatalogError, shared_catalog
+
+logger = logging.getLogger(__name__)
+
+CLINICS_DB = [
+    {
+        "id": 1,
+        "name": "Antmodern Oral & Dental Health Clinic",
+        "key": "antmodern-dental",
+        "address": "Fener Mah. Bülent Ecevit Blv. No:50 Muratpaşa/Antalya",
+        "city": "Antalya",
+        "district": "Muratpaşa",
+        "treatments": ["Dental Implant", "Teeth Whitening", "Veneers"],
+        "rating": 4.8,
+        "accreditations": ["JCI", "ISO 9001"],
+        "languages": ["Turkish", "English", "Russian"],
+        "price_range": "medium",
+        "lat": 36.8548,
+        "lon": 30.7609
+    },
+    {
+        "id": 2,
+        "name": "Dr. Gökhan Özerdem Clinic",
+        "key": "gokhan-ozerdem",
+        "address": "Yeşilbahçe Mah. Metin Kasapoğlu Cad. No: 48/11",
+        "city": "Antalya",
+        "district": "Muratpaşa",
+        "treatments": ["Rhinoplasty", "Face Lift", "Breast Surgery"],
+        "rating": 4.9,
+        "accreditations": ["JCI", "ISAPS"],
+        "languages": ["Turkish", "English", "Arabic"],
+        "price_range": "premium",
+        "lat": 36.8889,
+        "lon": 30.7123
+    }
+]
+
+HOTELS_DB = [
+    {
+        "id": 1,
+        "name": "Delphin Palace",
+        "region": "Lara",
+        "stars": 5,
+        "features": ["Spa", "Pool", "All Inclusive", "Beach"],
+        "price_per_night": 200,
+        "currency": "EUR",
+        "lat": 36.8503,
+        "lon": 30.8452
+    },
+    {
+        "id": 2,
+        "name": "Regnum Carya Golf & Spa Resort",
+        "region": "Belek",
+        "stars": 5,
+        "features": ["Spa", "Golf", "Pool"],
+        "price_per_night": 350,
+        "currency": "EUR",
+        "lat": 36.8517,
+        "lon": 31.0321
+    }
+]
+
+
+def canonical_clinic_id(key: Optional[str]) -> Optional[int]:
+    """Klinik key'inin API id'si (CATALOG_PATH varsa derlenmiş api_clinics); API'de yoksa None"""
+    if not key:
+        return None
+    catalog_file = shared_catalog()
+    if catalog_file is not None and API_CLINIC_SCHEMA.name in catalog_file:
+        catalog = catalog_file[API_CLINIC_SCHEMA.name]
+        try:
+            recnos = catalog.lookup("key", key)
+        except CatalogError as e:
+            # key index'i olmayan eski derleme - compile_catalog.py ile yeniden derlenmeli
+            logger.warning(f"⚠️ {e}")
+            return None
+        return catalog.field(recnos[0], "id") if recnos else None
+    return next((clinic["id"] for clinic in CLINICS_DB if clinic.get("key") == key), None)
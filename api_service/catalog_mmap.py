@@ -0,0 +1,485 @@
+# api_service/catalog_mmap.py
+"""
+Klinik / otel kataloğu için mmap'lenen ikili dosya formatı
+
+Her process'in katalog dict'lerini ayrı ayrı tutması yerine katalog bir kez
+derlenir (api_service/scripts/compile_catalog.py), process'ler dosyayı
+mmap ile açar. Sayfalar işletim sisteminin page cache'inden paylaşılır;
+açılış süresi kayıt sayısına değil sadece dizine (alan / index anahtarı
+sayısı) bağlıdır. Kayıtlar RecordView olarak döner, alanlar okundukça
+çözülür.
+
+Dosya düzeni (little-endian):
+
+    [catalog kayıtları]   kayıt başına sabit genişlikli struct
+    [id index'i]          sıralı id'ler (i64) + aynı sırada kayıt no'ları (u32)
+    [posting listeleri]   index anahtarı başına kayıt no'ları (u32)
+    [string tablosu]      u32 uzunluk + UTF-8; kayıtlarda ofset olarak tutulur
+    [liste tablosu]       u32 adet + adet x string ofseti
+    [dizin]               JSON: şema, ofsetler, index anahtarları, versiyon
+    [footer]              dizin ofseti (u64) + dizin uzunluğu (u32) + MAGIC
+
+Alan tipleri: int (i64), float (f64), str ve strlist (u32 ofset). None
+değerler ayrılmış sentinel'lerle saklanır; to_dict() None alanları
+yazmaz. Şemada olmayan alanlar derlemede atılır.
+"""
+
+import bisect
+import functools
+import hashlib
+import json
+import logging
+import math
+import mmap
+import os
+import struct
+import sys
+import threading
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CATALOG_PATH = os.getenv("CATALOG_PATH", "")
+# Liste elemanları (dil, tedavi, özellik adları) çok tekrarlanır; her seferinde çözülmesin
+CATALOG_STRING_CACHE = int(os.getenv("CATALOG_STRING_CACHE", "4096"))
+
+MAGIC = b"HTCATLG1"
+_FOOTER = struct.Struct("<QI8s")
+_U32 = struct.Struct("<I")
+
+INT_NULL = -(2 ** 63)
+REF_NULL = 0xFFFFFFFF
+
+_FIELD_CODES = {"int": "q", "float": "d", "str": "I", "strlist": "I"}
+
+
+class CatalogError(ValueError):
+    """Geçersiz katalog dosyası veya derlenemeyen kayıt"""
+
+
+class CatalogSchema:
+    """
+    Katalog adı, sıralı (alan, tip) listesi ve index'lenecek string alanlar
+
+    "category+city" gibi bileşik index'ler lookup'ta değer tuple'ı ile sorgulanır.
+    """
+
+    def __init__(self, name: str, fields: Sequence[Tuple[str, str]], indexes: Sequence[str]):
+        self.name = name
+        self.fields = list(fields)
+        self.indexes = list(indexes)
+        for field, kind in self.fields:
+            if kind not in _FIELD_CODES:
+                raise CatalogError(f"{name}.{field}: bilinmeyen tip {kind}")
+        if self.fields[0] != ("id", "int"):
+            raise CatalogError(f"{name}: ilk alan ('id', 'int') olmalı")
+
+
+CLINIC_SCHEMA = CatalogSchema(
+    "clinics",
+    [("id", "int"), ("name", "str"), ("key", "str"), ("address", "str"), ("city", "str"), ("district", "str"),
+     ("category", "str"), ("treatments", "strlist"), ("rating", "float"),
+     ("accreditations", "strlist"), ("languages", "strlist"), ("price_range", "str"),
+     ("lat", "float"), ("lon", "float")],
+    indexes=["city", "category", "category+city", "key"],
+)
+
+HOTEL_SCHEMA = CatalogSchema(
+    "hotels",
+    [("id", "int"), ("name", "str"), ("region", "str"), ("city", "str"), ("stars", "int"),
+     ("features", "strlist"), ("price_range", "str"), ("price_per_night", "int"), ("currency", "str"),
+     ("lat", "float"), ("lon", "float")],
+    indexes=["city", "region"],
+)
+
+# API servisinin kayıtları (catalog_data.py) aynı şemayla ayrı kataloglarda;
+# clinics / hotels action server'ın veri setidir, id'ler örtüşmez. İki setteki
+# aynı klinik "key" alanıyla eşleşir (catalog_data.canonical_clinic_id)
+API_CLINIC_SCHEMA = CatalogSchema("api_clinics", CLINIC_SCHEMA.fields, CLINIC_SCHEMA.indexes)
+API_HOTEL_SCHEMA = CatalogSchema("api_hotels", HOTEL_SCHEMA.fields, HOTEL_SCHEMA.indexes)
+
+
+# "İstanbul", "istanbul" ve "Istanbul" aynı anahtara düşsün
+_CASE_FOLD = str.maketrans({"İ": "i", "I": "i", "ı": "i"})
+
+
+def index_key(value: Any) -> Optional[str]:
+    """Index anahtarı - aramalar büyük / küçük harf (ve Türkçe I/İ/ı) duyarsız"""
+    if isinstance(value, (tuple, list)):
+        parts = [index_key(part) for part in value]
+        return None if None in parts else "|".join(parts)
+    return value.translate(_CASE_FOLD).lower() if value else None
+
+
+def _record_key(record: Dict[str, Any], index: str) -> Optional[str]:
+    if "+" in index:
+        return index_key(tuple(record.get(field) for field in index.split("+")))
+    return index_key(record.get(index))
+
+
+# ============================================
+# DERLEYİCİ
+# ============================================
+
+def _align(f, boundary: int = 8):
+    # Posting listeleri kopyasız (memoryview.cast) okunabilsin diye hizalı başlar
+    padding = -f.tell() % boundary
+    if padding:
+        f.write(b"\0" * padding)
+
+
+class _StringTable:
+    def __init__(self):
+        self.buffer = bytearray()
+        self.offsets: Dict[str, int] = {}
+
+    def add(self, value: Optional[str]) -> int:
+        if value is None:
+            return REF_NULL
+        value = str(value)
+        offset = self.offsets.get(value)
+        if offset is None:
+            encoded = value.encode("utf-8")
+            offset = len(self.buffer)
+            self.buffer += _U32.pack(len(encoded)) + encoded
+            self.offsets[value] = offset
+        return offset
+
+
+class _ListTable:
+    def __init__(self, strings: _StringTable):
+        self.strings = strings
+        self.buffer = bytearray()
+        self.offsets: Dict[Tuple[int, ...], int] = {}
+
+    def add(self, values: Optional[Iterable[str]]) -> int:
+        if values is None:
+            return REF_NULL
+        refs = tuple(self.strings.add(value) for value in values)
+        offset = self.offsets.get(refs)
+        if offset is None:
+            offset = len(self.buffer)
+            self.buffer += struct.pack(f"<I{len(refs)}I", len(refs), *refs)
+            self.offsets[refs] = offset
+        return offset
+
+
+def compile_catalog(path: str, catalogs: Dict[str, Iterable[Dict[str, Any]]],
+                    schemas: Sequence[CatalogSchema] = (CLINIC_SCHEMA, HOTEL_SCHEMA,
+                                                        API_CLINIC_SCHEMA, API_HOTEL_SCHEMA)) -> Dict[str, Any]:
+    """
+    Kayıtları ikili katalog dosyasına derle (önce .tmp'ye yazılır, sonra yerine taşınır)
+
+    Args:
+        path: Çıktı dosyası
+        catalogs: şema adı -> kayıt iterable'ı (ör. {"clinics": [...], "hotels": [...]})
+
+    Returns:
+        Dosyaya yazılan dizin
+    """
+    strings = _StringTable()
+    lists = _ListTable(strings)
+    directory: Dict[str, Any] = {"format": 1, "catalogs": {}}
+    tmp_path = path + ".tmp"
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    with open(tmp_path, "wb") as f:
+        for schema in schemas:
+            if schema.name not in catalogs:
+                continue
+            record_struct = struct.Struct("<" + "".join(_FIELD_CODES[kind] for _, kind in schema.fields))
+            ids: List[Tuple[int, int]] = []
+            postings: Dict[str, Dict[str, List[int]]] = {field: {} for field in schema.indexes}
+            digest = hashlib.sha1()
+            _align(f)
+            records_offset = f.tell()
+
+            for recno, record in enumerate(catalogs[schema.name]):
+                values = []
+                for field, kind in schema.fields:
+                    value = record.get(field)
+                    if kind == "int":
+                        if field == "id" and not isinstance(value, int):
+                            raise CatalogError(f"{schema.name}: id tamsayı olmalı ({value!r})")
+                        values.append(INT_NULL if value is None else int(value))
+                    elif kind == "float":
+                        values.append(math.nan if value is None else float(value))
+                    elif kind == "str":
+                        values.append(strings.add(value))
+                    else:
+                        values.append(lists.add(value))
+                f.write(record_struct.pack(*values))
+                ids.append((record["id"], recno))
+                for index in schema.indexes:
+                    key = _record_key(record, index)
+                    if key is not None:
+                        postings[index].setdefault(key, []).append(recno)
+                digest.update(json.dumps({field: record.get(field) for field, _ in schema.fields},
+                                         sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"))
+
+            ids.sort()
+            for (previous, _), (current, _) in zip(ids, ids[1:]):
+                if previous == current:
+                    raise CatalogError(f"{schema.name}: id {current} birden fazla kayıtta")
+            _align(f)
+            id_index_offset = f.tell()
+            f.write(struct.pack(f"<{len(ids)}q", *(record_id for record_id, _ in ids)))
+            _align(f)
+            id_recnos_offset = f.tell()
+            f.write(struct.pack(f"<{len(ids)}I", *(recno for _, recno in ids)))
+
+            indexes: Dict[str, Dict[str, List[int]]] = {}
+            _align(f)
+            postings_offset = f.tell()
+            position = 0
+            for field, keys in postings.items():
+                indexes[field] = {}
+                for key, recnos in sorted(keys.items()):
+                    f.write(struct.pack(f"<{len(recnos)}I", *recnos))
+                    indexes[field][key] = [position, len(recnos)]
+                    position += len(recnos)
+
+            directory["catalogs"][schema.name] = {
+                "fields": schema.fields,
+                "record_size": record_struct.size,
+                "count": len(ids),
+                "records_offset": records_offset,
+                "id_index_offset": id_index_offset,
+                "id_recnos_offset": id_recnos_offset,
+                "postings_offset": postings_offset,
+                "indexes": indexes,
+                "version": digest.hexdigest()[:16],
+            }
+
+        directory["strings_offset"] = f.tell()
+        f.write(strings.buffer)
+        directory["lists_offset"] = f.tell()
+        f.write(lists.buffer)
+
+        encoded = json.dumps(directory, ensure_ascii=False).encode("utf-8")
+        directory_offset = f.tell()
+        f.write(encoded)
+        f.write(_FOOTER.pack(directory_offset, len(encoded), MAGIC))
+
+    os.replace(tmp_path, path)
+    return directory
+
+
+# ============================================
+# OKUYUCU
+# ============================================
+
+class RecordView(Mapping):
+    """Tek kaydın mmap üzerindeki görünümü; alanlar erişildikçe çözülür"""
+
+    __slots__ = ("_catalog", "recno")
+
+    def __init__(self, catalog: "Catalog", recno: int):
+        self._catalog = catalog
+        self.recno = recno
+
+    def __getitem__(self, field: str) -> Any:
+        value = self._catalog.field(self.recno, field)
+        if value is None:
+            raise KeyError(field)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        for field in self._catalog.field_names:
+            if self._catalog.field(self.recno, field) is not None:
+                yield field
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON'a yazılabilir dict (None alanlar hariç)"""
+        return self._catalog.decode(self.recno)
+
+    def __repr__(self) -> str:
+        return f"RecordView({self._catalog.name}#{self.recno})"
+
+
+class Catalog:
+    """Dosyadaki tek katalog (clinics / hotels)"""
+
+    def __init__(self, source: "CatalogFile", name: str, meta: Dict[str, Any]):
+        self.source = source
+        self.name = name
+        self.count = meta["count"]
+        self.version = meta["version"]
+        self.field_names = [field for field, _ in meta["fields"]]
+        self.record_size = meta["record_size"]
+        self._records_offset = meta["records_offset"]
+        self._postings_offset = meta["postings_offset"]
+        self._indexes = meta["indexes"]
+        # id'ler üzerinde bisect (C'de) - kopyasız görünümler
+        self._ids = source.array(meta["id_index_offset"], self.count, "q")
+        self._id_recnos = source.array(meta["id_recnos_offset"], self.count, "I")
+
+        self._struct = struct.Struct("<" + "".join(_FIELD_CODES[kind] for _, kind in meta["fields"]))
+        # alan -> (kayıt içi ofset, struct, tip)
+        self._fields: Dict[str, Tuple[int, struct.Struct, str]] = {}
+        offset = 0
+        for field, kind in meta["fields"]:
+            field_struct = struct.Struct("<" + _FIELD_CODES[kind])
+            self._fields[field] = (offset, field_struct, kind)
+            offset += field_struct.size
+
+    def __len__(self) -> int:
+        return self.count
+
+    # ---------- alan çözme ----------
+
+    def _convert(self, kind: str, raw: Any) -> Any:
+        if kind == "int":
+            return None if raw == INT_NULL else raw
+        if kind == "float":
+            return None if math.isnan(raw) else raw
+        if kind == "str":
+            return self.source.string(raw)
+        return self.source.string_list(raw)
+
+    def field(self, recno: int, field: str) -> Any:
+        """Kaydın tek alanını çöz (diğer alanlara dokunmadan)"""
+        try:
+            offset, field_struct, kind = self._fields[field]
+        except KeyError:
+            return None
+        raw = field_struct.unpack_from(self.source.buffer, self._records_offset + recno * self.record_size + offset)[0]
+        return self._convert(kind, raw)
+
+    def decode(self, recno: int) -> Dict[str, Any]:
+        raw = self._struct.unpack_from(self.source.buffer, self._records_offset + recno * self.record_size)
+        record = {}
+        for field, value in zip(self.field_names, raw):
+            value = self._convert(self._fields[field][2], value)
+            if value is not None:
+                record[field] = value
+        return record
+
+    # ---------- erişim ----------
+
+    def view(self, recno: int) -> RecordView:
+        return RecordView(self, recno)
+
+    def views(self, recnos: Iterable[int]) -> List[RecordView]:
+        return [RecordView(self, recno) for recno in recnos]
+
+    def all(self) -> range:
+        """Tüm kayıt numaraları"""
+        return range(self.count)
+
+    def get(self, record_id: int) -> Optional[RecordView]:
+        """id ile ikili arama (id index'i üzerinde)"""
+        position = bisect.bisect_left(self._ids, record_id)
+        if position < self.count and self._ids[position] == record_id:
+            return RecordView(self, self._id_recnos[position])
+        return None
+
+    def lookup(self, index: str, value: Any) -> Sequence[int]:
+        """
+        Index'li alanda değere eşit kayıt numaraları (büyük / küçük harf duyarsız)
+
+        Bileşik index'te değer tuple'dır: lookup("category+city", ("dental", "Antalya"))
+        """
+        if index not in self._indexes:
+            raise CatalogError(f"{self.name}.{index} index'li değil")
+        entry = self._indexes[index].get(index_key(value))
+        if entry is None:
+            return ()
+        start, count = entry
+        return self.source.array(self._postings_offset + start * 4, count, "I")
+
+    def keys(self, field: str) -> List[str]:
+        """Index'teki (normalize) değerler"""
+        return list(self._indexes[field])
+
+
+class CatalogFile:
+    """mmap'lenmiş katalog dosyası; catalogs['clinics'] / catalogs['hotels']"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buffer = memoryview(self._mmap)
+
+        if len(self.buffer) < _FOOTER.size:
+            raise CatalogError(f"{path}: katalog dosyası değil")
+        directory_offset, directory_length, magic = _FOOTER.unpack_from(self.buffer, len(self.buffer) - _FOOTER.size)
+        if magic != MAGIC:
+            raise CatalogError(f"{path}: katalog dosyası değil")
+        self.directory = json.loads(bytes(self.buffer[directory_offset:directory_offset + directory_length]))
+        self._strings_offset = self.directory["strings_offset"]
+        self._lists_offset = self.directory["lists_offset"]
+        self._list_item = self.string
+        if CATALOG_STRING_CACHE > 0:
+            self._list_item = functools.lru_cache(maxsize=CATALOG_STRING_CACHE)(self.string)
+        self.catalogs = {name: Catalog(self, name, meta) for name, meta in self.directory["catalogs"].items()}
+
+    def __getitem__(self, name: str) -> Catalog:
+        return self.catalogs[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.catalogs
+
+    def string(self, offset: int) -> Optional[str]:
+        if offset == REF_NULL:
+            return None
+        start = self._strings_offset + offset
+        length = _U32.unpack_from(self._mmap, start)[0]
+        return self._mmap[start + 4:start + 4 + length].decode("utf-8")
+
+    def string_list(self, offset: int) -> Optional[List[str]]:
+        if offset == REF_NULL:
+            return None
+        start = self._lists_offset + offset
+        count = _U32.unpack_from(self._mmap, start)[0]
+        return [self._list_item(ref) for ref in struct.unpack_from(f"<{count}I", self._mmap, start + 4)]
+
+    def array(self, offset: int, count: int, code: str) -> Sequence[int]:
+        """Sayı dizisi ("I" / "q"); little-endian makinede kopyasız görünüm"""
+        size = struct.calcsize(code)
+        if sys.byteorder == "little" and offset % size == 0:
+            return self.buffer[offset:offset + count * size].cast(code)
+        return struct.unpack_from(f"<{count}{code}", self._mmap, offset)
+
+    def close(self):
+        """Dışarıda tutulan lookup sonuçları (memoryview) varken BufferError verir"""
+        for catalog in self.catalogs.values():
+            for view in (catalog._ids, catalog._id_recnos):
+                if isinstance(view, memoryview):
+                    view.release()
+        self.buffer.release()
+        self._mmap.close()
+
+
+def open_catalog(path: str) -> CatalogFile:
+    return CatalogFile(path)
+
+
+_shared: Dict[str, Optional[CatalogFile]] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_catalog(path: Optional[str] = None) -> Optional[CatalogFile]:
+    """
+    Process başına tek CatalogFile (api_clients ve main aynı mmap'i kullanır)
+
+    path verilmezse CATALOG_PATH; boşsa veya dosya açılamazsa None döner ve
+    çağıran dict kataloglara düşer.
+    """
+    path = path if path is not None else CATALOG_PATH
+    if not path:
+        return None
+    with _shared_lock:
+        if path not in _shared:
+            try:
+                _shared[path] = open_catalog(path)
+                logger.info(f"🗂️ Katalog mmap'lendi: {path}")
+            except (OSError, CatalogError, ValueError) as e:
+                logger.warning(f"⚠️ Katalog açılamadı ({path}), dict kataloglar kullanılacak: {e}")
+                _shared[path] = None
+        return _shared[path]
@@ -0,0 +1,223 @@
+# api_service/chat_gateway.py
+"""
+Tarayıcı ile Rasa arasında kalıcı WebSocket chat gateway'i
+
+Tarayıcı oturum başına tek bir WebSocket (/ws/chat?sender=<user_id>) açar;
+mesajlar Rasa'nın REST kanalına (/webhooks/rest/webhook?stream=true)
+keep-alive bağlantı havuzu olan tek bir httpx.AsyncClient ile iletilir.
+Rasa stream modunda her bot mesajını üretildiği anda satır satır (NDJSON)
+gönderir; gateway da her satırı beklemeden tarayıcıya iter.
+
+Protokol:
+    istemci -> {"message": "...", "metadata": {...}}
+    sunucu  -> {"type": "bot", "message": {...rasa mesajı...}}
+               {"type": "done", "count": n}
+               {"type": "error", "error": "..."}
+
+Bellek sınırları: boşta bekleyen bağlantı sadece soketi ve onu okuyan tek
+coroutine'i tutar. Mesaj geldiğinde bağlantıya ait en fazla
+CHAT_QUEUE_SIZE mesajlık kuyruk ve kuyruğu boşaltan kısa ömürlü bir task
+oluşur; kuyruk doluysa mesaj "busy" hatasıyla reddedilir. Rasa'ya aynı
+anda giden tur sayısı CHAT_MAX_INFLIGHT ile sınırlıdır. Sunucu tarafında
+UVICORN_WS_OPTIONS per-message deflate'i kapatır (bağlantı başına zlib
+durumu) ve frame boyutu / kuyruğunu küçültür.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from api_service.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+CHAT_QUEUE_SIZE = int(os.getenv("CHAT_QUEUE_SIZE", "4"))            # bağlantı başına bekleyen mesaj
+CHAT_MAX_INFLIGHT = int(os.getenv("CHAT_MAX_INFLIGHT", "64"))       # Rasa'ya eşzamanlı tur
+CHAT_MAX_MESSAGE_CHARS = int(os.getenv("CHAT_MAX_MESSAGE_CHARS", "2000"))
+CHAT_RASA_TIMEOUT = float(os.getenv("CHAT_RASA_TIMEOUT", "60"))     # saniye
+
+# uvicorn.run(..., **UVICORN_WS_OPTIONS) - chat mesajları küçük, sıkıştırma
+# bağlantı başına bellekten pahalı
+UVICORN_WS_OPTIONS = {
+    "ws_per_message_deflate": False,
+    "ws_max_size": 64 * 1024,
+    "ws_max_queue": CHAT_QUEUE_SIZE,
+}
+
+CHAT_CONNECTIONS = REGISTRY.gauge(
+    "chat_gateway_connections",
+    "Açık WebSocket chat bağlantıları"
+)
+CHAT_MESSAGES = REGISTRY.counter(
+    "chat_gateway_messages_total",
+    "Gateway'e gelen kullanıcı mesajları (ok / busy / invalid / error)",
+    ("result",)
+)
+CHAT_FIRST_MESSAGE_SECONDS = REGISTRY.histogram(
+    "chat_gateway_first_message_seconds",
+    "Kullanıcı mesajından ilk bot mesajının tarayıcıya gitmesine kadar geçen süre"
+)
+CHAT_TURN_SECONDS = REGISTRY.histogram(
+    "chat_gateway_turn_seconds",
+    "Rasa turunun toplam süresi"
+)
+
+
+class ChatGateway:
+    """
+    WebSocket bağlantılarını Rasa REST kanalına bağlayan gateway
+
+    Args:
+        rasa_url: Rasa sunucusu (ör. http://localhost:5005)
+        queue_size: Bağlantı başına kuyrukta bekleyebilecek mesaj sayısı
+        max_inflight: Rasa'ya aynı anda gönderilen tur sayısı (ve havuz boyutu)
+    """
+
+    def __init__(self,
+                 rasa_url: str,
+                 queue_size: int = CHAT_QUEUE_SIZE,
+                 max_inflight: int = CHAT_MAX_INFLIGHT,
+                 timeout: float = CHAT_RASA_TIMEOUT):
+        self.webhook_url = f"{rasa_url.rstrip('/')}/webhooks/rest/webhook"
+        self.queue_size = queue_size
+        self.max_inflight = max_inflight
+        self.timeout = timeout
+        self.connections = 0
+        # Client ve semaphore event loop'a bağlı; ilk kullanımda oluşturulur
+        self._client: Optional[httpx.AsyncClient] = None
+        self._inflight: Optional[asyncio.Semaphore] = None
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout, connect=5.0),
+                limits=httpx.Limits(max_connections=self.max_inflight,
+                                    max_keepalive_connections=self.max_inflight)
+            )
+            self._inflight = asyncio.Semaphore(self.max_inflight)
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    # ============================================
+    # BAĞLANTI
+    # ============================================
+
+    async def serve(self, websocket: WebSocket):
+        """Tek bir WebSocket bağlantısını kapanana kadar yönet"""
+        sender = websocket.query_params.get("sender")
+        if not sender:
+            await websocket.close(code=1008, reason="sender gerekli")
+            return
+
+        await websocket.accept()
+        self.connections += 1
+        CHAT_CONNECTIONS.set(self.connections)
+
+        queue: Optional[asyncio.Queue] = None
+        worker: Optional[asyncio.Task] = None
+        try:
+            while True:
+                raw = await websocket.receive_text()
+                payload = self._parse(raw)
+                if payload is None:
+                    CHAT_MESSAGES.inc(result="invalid")
+                    await self._send(websocket, {"type": "error", "error": "invalid"})
+                    continue
+
+                if queue is None:
+                    queue = asyncio.Queue(maxsize=self.queue_size)
+                try:
+                    queue.put_nowait(payload)
+                except asyncio.QueueFull:
+                    CHAT_MESSAGES.inc(result="busy")
+                    await self._send(websocket, {"type": "error", "error": "busy"})
+                    continue
+
+                # Kuyruğu boşaltan task sadece iş varken yaşar
+                if worker is None or worker.done():
+                    worker = asyncio.create_task(self._drain(websocket, sender, queue))
+        except WebSocketDisconnect:
+            pass
+        finally:
+            if worker is not None and not worker.done():
+                worker.cancel()
+            self.connections -= 1
+            CHAT_CONNECTIONS.set(self.connections)
+
+    @staticmethod
+    def _parse(raw: str) -> Optional[Dict[str, Any]]:
+        try:
+            payload = json.loads(raw)
+        except ValueError:
+            return None
+        if not isinstance(payload, dict):
+            return None
+        message = payload.get("message")
+        if not isinstance(message, str) or not message.strip() or len(message) > CHAT_MAX_MESSAGE_CHARS:
+            return None
+        metadata = payload.get("metadata")
+        return {"message": message, "metadata": metadata if isinstance(metadata, dict) else None}
+
+    @staticmethod
+    async def _send(websocket: WebSocket, frame: Dict[str, Any]) -> bool:
+        """Frame gönder; bağlantı kapandıysa False"""
+        try:
+            await websocket.send_text(json.dumps(frame, ensure_ascii=False))
+            return True
+        except (WebSocketDisconnect, RuntimeError):
+            return False
+
+    async def _drain(self, websocket: WebSocket, sender: str, queue: asyncio.Queue):
+        # Aynı kullanıcının mesajları Rasa'ya sırayla gider (tracker sırası korunur)
+        while not queue.empty():
+            payload = queue.get_nowait()
+            if not await self._turn(websocket, sender, payload):
+                return
+
+    # ============================================
+    # RASA TURU
+    # ============================================
+
+    async def _turn(self, websocket: WebSocket, sender: str, payload: Dict[str, Any]) -> bool:
+        """Mesajı Rasa'ya ilet, gelen her bot mesajını anında it; bağlantı koptuysa False"""
+        client = self._http()
+        body = {"sender": sender, "message": payload["message"]}
+        if payload["metadata"]:
+            body["metadata"] = payload["metadata"]
+
+        started = time.perf_counter()
+        count = 0
+        try:
+            async with self._inflight:
+                async with client.stream("POST", self.webhook_url, params={"stream": "true"}, json=body) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        line = line.strip()
+                        if not line:
+                            continue
+                        messages = json.loads(line)
+                        # stream desteklemeyen kanal tüm turu tek JSON listesi olarak döner
+                        for message in messages if isinstance(messages, list) else [messages]:
+                            if count == 0:
+                                CHAT_FIRST_MESSAGE_SECONDS.observe(time.perf_counter() - started)
+                            count += 1
+                            if not await self._send(websocket, {"type": "bot", "message": message}):
+                                return False
+        except (httpx.HTTPError, ValueError) as e:
+            CHAT_MESSAGES.inc(result="error")
+            logger.warning(f"⚠️ Chat gateway Rasa hatası ({sender}): {e}")
+            return await self._send(websocket, {"type": "error", "error": "upstream", "count": count})
+
+        CHAT_TURN_SECONDS.observe(time.perf_counter() - started)
+        CHAT_MESSAGES.inc(result="ok")
+        return await self._send(websocket, {"type": "done", "count": count})
@@ -0,0 +1,252 @@
+# api_service/conversation_buckets.py
+"""
+Bucketed conversation şeması
+
+Her mesaj için ayrı doküman yerine kullanıcı + gün başına bir "bucket"
+dokümanı tutulur; mesajlar kısa anahtarlı alt dokümanlar olarak messages
+dizisine $push ile eklenir:
+
+    {
+        "user_id": "u1",
+        "day": 2024-05-01T00:00:00,        # UTC gün başlangıcı
+        "count": 37,                       # messages dizisinin boyu
+        "first_ts": ..., "last_ts": ...,
+        "messages": [{"mid": ObjectId, "s": "user", "t": "...", "ts": ..., "i": "...", ...}]
+    }
+
+Bucket dolduğunda (count == BUCKET_CAP) upsert filtresi eşleşmez ve aynı
+gün için yeni bucket açılır. Okuma tarafı mesajları document şemasıyla
+aynı biçime geri açar; API'ler şemadan bağımsız çalışır.
+"""
+
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+from api_service.index_manager import IndexSpec
+
+BUCKET_CAP = int(os.getenv("CONVERSATION_BUCKET_CAP", "200"))
+
+# Upsert filtresi (user_id, day, count), en yeni bucket'lar (user_id, last_ts)
+# ve export'un tarih aralığı taraması (last_ts)
+BUCKET_INDEXES = [
+    IndexSpec([("user_id", ASCENDING), ("day", ASCENDING), ("count", ASCENDING)]),
+    IndexSpec([("user_id", ASCENDING), ("last_ts", DESCENDING)]),
+    IndexSpec("last_ts"),
+]
+
+# Tam alan adı -> bucket içindeki kısa anahtar
+SHORT_KEYS = {
+    "sender": "s",
+    "text": "t",
+    "timestamp": "ts",
+    "intent": "i",
+    "entities": "e",
+    "confidence": "c",
+    "bot_action": "a",
+    "metadata": "m",
+}
+_LONG_KEYS = {short: long for long, short in SHORT_KEYS.items()}
+
+
+def bucket_day(timestamp: datetime) -> datetime:
+    """Mesajın ait olduğu bucket günü"""
+    return datetime(timestamp.year, timestamp.month, timestamp.day)
+
+
+def compact_message(message: Dict[str, Any], message_id: Optional[ObjectId] = None) -> Dict[str, Any]:
+    """document şemasındaki mesajı bucket alt dokümanına çevir (user_id bucket'ta tutulur)"""
+    compact = {"mid": message_id or message.get("_id") or ObjectId()}
+    for long_key, short_key in SHORT_KEYS.items():
+        if long_key in message:
+            compact[short_key] = message[long_key]
+    return compact
+
+
+def expand_message(user_id: str, compact: Dict[str, Any]) -> Dict[str, Any]:
+    """Bucket alt dokümanını document şemasındaki biçime geri aç (_id'siz)"""
+    message = {"user_id": user_id}
+    for short_key, long_key in _LONG_KEYS.items():
+        if short_key in compact:
+            message[long_key] = compact[short_key]
+    return message
+
+
+def bucket_update(user_id: str, compact: Dict[str, Any], cap: int = BUCKET_CAP) -> Tuple[Dict, Dict]:
+    """
+    Mesajı kullanıcının o günkü açık bucket'ına ekleyen (filter, update) çifti
+
+    count < cap filtresi dolu bucket'ı dışarıda bırakır; upsert yeni bucket açar.
+    """
+    timestamp = compact["ts"]
+    query = {"user_id": user_id, "day": bucket_day(timestamp), "count": {"$lt": cap}}
+    update = {
+        "$push": {"messages": compact},
+        "$inc": {"count": 1},
+        "$min": {"first_ts": timestamp},
+        "$max": {"last_ts": timestamp},
+    }
+    return query, update
+
+
+class BucketedConversations:
+    """Bucket collection'ı üzerinde MongoDBLogger'ın conversation işlemleri"""
+
+    def __init__(self, collection, cap: int = BUCKET_CAP, preview_chars: Optional[int] = None):
+        self.collection = collection
+        self.cap = cap
+        # "preview" alanı saklanmaz, okurken metnin ilk preview_chars karakterinden türetilir
+        self.preview_chars = preview_chars
+
+    def create_indexes(self):
+        """BUCKET_INDEXES'i doğrudan kur (taşıma script'i; servisler IndexManager kullanır)"""
+        self.collection.create_indexes([spec.model() for spec in BUCKET_INDEXES])
+
+    # ============================================
+    # WRITE
+    # ============================================
+
+    def append(self, user_id: str, message: Dict[str, Any]) -> str:
+        compact = compact_message(message)
+        query, update = bucket_update(user_id, compact, self.cap)
+        self.collection.update_one(query, update, upsert=True)
+        return str(compact["mid"])
+
+    # ============================================
+    # READ
+    # ============================================
+
+    @staticmethod
+    def _bucket_projection(projection: Dict[str, int]) -> Dict[str, int]:
+        """Mesaj projection'ını bucket projection'ına çevir (ts filtre/sıralama için her zaman gelir)"""
+        fields = [field for field in projection if field != "_id"]
+        if not fields:
+            return {"_id": 0, "user_id": 1, "last_ts": 1, "messages": 1}
+        bucket_projection = {"_id": 0, "user_id": 1, "last_ts": 1, "messages.ts": 1}
+        for field in fields:
+            if field == "preview":
+                field = "text"
+            if field in SHORT_KEYS:
+                bucket_projection[f"messages.{SHORT_KEYS[field]}"] = 1
+        return bucket_projection
+
+    def _shape(self, user_id: str, compact: Dict[str, Any], projection: Dict[str, int]) -> Dict[str, Any]:
+        message = expand_message(user_id, compact)
+        wants_preview = "preview" in projection or len(projection) == 1
+        if wants_preview and isinstance(message.get("text"), str):
+            message["preview"] = message["text"][:self.preview_chars]
+        if len(projection) > 1:
+            message = {key: value for key, value in message.items() if key in projection}
+        return message
+
+    def latest(self, user_id: str, limit: int, projection: Dict[str, int]) -> List[Dict]:
+        """Kullanıcının en yeni limit mesajı (yeniden eskiye)"""
+        cursor = (self.collection
+                  .find({"user_id": user_id}, self._bucket_projection(projection))
+                  .sort("last_ts", DESCENDING))
+
+        collected: List[Dict[str, Any]] = []
+        threshold = None
+        for bucket in cursor:
+            # Daha eski bucket'lar, elimizdeki en eski mesajdan yeni mesaj içeremez
+            if threshold is not None and bucket["last_ts"] < threshold:
+                break
+            collected.extend(bucket.get("messages", []))
+            if len(collected) >= limit:
+                collected.sort(key=lambda m: m["ts"], reverse=True)
+                del collected[limit:]
+                threshold = collected[-1]["ts"]
+
+        collected.sort(key=lambda m: m["ts"], reverse=True)
+        return [self._shape(user_id, m, projection) for m in collected[:limit]]
+
+    def history(self,
+                user_id: str,
+                start_date: Optional[datetime],
+                end_date: Optional[datetime],
+                projection: Dict[str, int]) -> List[Dict]:
+        """Tarih aralığındaki mesajlar (eskiden yeniye)"""
+        query: Dict[str, Any] = {"user_id": user_id}
+        if start_date:
+            query["last_ts"] = {"$gte": start_date}
+        if end_date:
+            query["first_ts"] = {"$lte": end_date}
+
+        messages = []
+        for bucket in self.collection.find(query, self._bucket_projection(projection)):
+            for compact in bucket.get("messages", []):
+                if start_date and compact["ts"] < start_date:
+                    continue
+                if end_date and compact["ts"] > end_date:
+                    continue
+                messages.append(compact)
+
+        messages.sort(key=lambda m: m["ts"])
+        return [self._shape(user_id, m, projection) for m in messages]
+
+    def iter_range(self, start_date: datetime, end_date: datetime, batch_size: int):
+        """
+        [start_date, end_date) aralığındaki mesajlar, document biçiminde ("_id" = mid)
+
+        Bucket'ın last_ts'i kendi gününde olduğu için last_ts sırası gün sırasıdır;
+        gün içindeki mesajlar bucket bucket gelir.
+        """
+        cursor = (self.collection
+                  .find({"last_ts": {"$gte": start_date}, "first_ts": {"$lt": end_date}})
+                  .sort("last_ts", ASCENDING)
+                  .batch_size(max(1, batch_size // self.cap)))
+        for bucket in cursor:
+            for compact in bucket.get("messages", []):
+                if start_date <= compact["ts"] < end_date:
+                    message = expand_message(bucket["user_id"], compact)
+                    message["_id"] = compact["mid"]
+                    yield message
+
+    # ============================================
+    # ANALYTICS
+    # ============================================
+
+    def intent_statistics(self, cutoff_date: datetime) -> Dict[str, int]:
+        pipeline = [
+            {"$match": {"last_ts": {"$gte": cutoff_date}}},
+            {"$unwind": "$messages"},
+            {"$match": {
+                "messages.i": {"$exists": True, "$ne": None},
+                "messages.ts": {"$gte": cutoff_date}
+            }},
+            {"$group": {"_id": "$messages.i", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1}}
+        ]
+        return {item["_id"]: item["count"] for item in self.collection.aggregate(pipeline)}
+
+    def active_users(self, cutoff_date: datetime) -> List[str]:
+        # last_ts bucket'taki en yeni mesaj olduğu için sonuç document şemasıyla aynı
+        return self.collection.distinct("user_id", {"last_ts": {"$gte": cutoff_date}})
+
+    def total_messages(self) -> int:
+        results = list(self.collection.aggregate([{"$group": {"_id": None, "total": {"$sum": "$count"}}}]))
+        return results[0]["total"] if results else 0
+
+    def delete_older_than(self, cutoff_date: datetime) -> int:
+        """cutoff'tan eski mesajları sil; tamamen eski bucket'lar düşer, sınırdakiler kırpılır"""
+        deleted = 0
+        for bucket in self.collection.find({"last_ts": {"$lt": cutoff_date}}, {"count": 1}):
+            deleted += bucket.get("count", 0)
+        self.collection.delete_many({"last_ts": {"$lt": cutoff_date}})
+
+        straddling = self.collection.find({"first_ts": {"$lt": cutoff_date}}, {"messages.ts": 1})
+        for bucket in straddling:
+            remaining = [m["ts"] for m in bucket["messages"] if m["ts"] >= cutoff_date]
+            removed = len(bucket["messages"]) - len(remaining)
+            self.collection.update_one(
+                {"_id": bucket["_id"]},
+                {"$pull": {"messages": {"ts": {"$lt": cutoff_date}}},
+                 "$inc": {"count": -removed},
+                 "$set": {"first_ts": min(remaining)}}
+            )
+            deleted += removed
+        return deleted
+
@@ -0,0 +1,233 @@
+# api_service/conversation_export.py
+"""
+Conversation'ların kolon bazlı (Parquet / Arrow IPC) export'u
+
+MongoDBLogger.iter_messages ile tarih aralığı batch'li cursor üzerinden
+gezilir ve gün bazında partition'lanmış sıkıştırılmış dosyalara yazılır:
+
+    <output_dir>/date=2024-05-01/part-0.parquet
+    <output_dir>/date=2024-05-02/part-0.parquet
+    <output_dir>/_manifest.json
+
+Bellekte en fazla bir cursor batch'i ve batch_size satırlık kolon tamponu
+tutulur; aralığın büyüklüğü bellek kullanımını değiştirmez. Her gün önce
+geçici dosyaya yazılır, bitince yeniden adlandırılır ve manifest'e
+eklenir. Aynı export tekrar çalıştırılırsa tamamlanmış son günden sonrası
+yazılır.
+
+Düzleştirilen kolonlar: message_id, user_id, sender, text, timestamp,
+intent, confidence, bot_action, entity_names (list<string>).
+
+pyarrow opsiyoneldir; kurulu değilse export ExportUnavailable verir.
+"""
+
+import json
+import logging
+import os
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow opsiyonel - yoksa export kapalı
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+MANIFEST_NAME = "_manifest.json"
+
+if pa is not None:
+    CONVERSATION_SCHEMA = pa.schema([
+        ("message_id", pa.string()),
+        ("user_id", pa.string()),
+        ("sender", pa.string()),
+        ("text", pa.string()),
+        ("timestamp", pa.timestamp("ms")),
+        ("intent", pa.string()),
+        ("confidence", pa.float64()),
+        ("bot_action", pa.string()),
+        ("entity_names", pa.list_(pa.string())),
+    ])
+
+
+class ExportUnavailable(RuntimeError):
+    """pyarrow kurulu değil"""
+
+
+def flatten_message(message: Dict[str, Any]) -> Dict[str, Any]:
+    """Mongo mesajını export satırına çevir"""
+    entities = message.get("entities") or []
+    return {
+        "message_id": str(message["_id"]) if message.get("_id") is not None else None,
+        "user_id": message.get("user_id"),
+        "sender": message.get("sender"),
+        "text": message.get("text"),
+        "timestamp": message.get("timestamp"),
+        "intent": message.get("intent"),
+        "confidence": message.get("confidence"),
+        "bot_action": message.get("bot_action"),
+        "entity_names": [entity.get("entity") for entity in entities if isinstance(entity, dict)],
+    }
+
+
+class _PartitionWriter:
+    """Tek günün dosyası; batch'ler geldikçe yazılır, close() ile yerine taşınır"""
+
+    def __init__(self, path: str, file_format: str, compression: str):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.rows = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if file_format == "parquet":
+            self._writer = pq.ParquetWriter(self.tmp_path, CONVERSATION_SCHEMA, compression=compression)
+        else:
+            options = pa_ipc.IpcWriteOptions(compression=None if compression == "none" else compression)
+            self._writer = pa_ipc.new_file(self.tmp_path, CONVERSATION_SCHEMA, options=options)
+
+    def write(self, columns: Dict[str, List[Any]]):
+        batch = pa.RecordBatch.from_pydict(columns, schema=CONVERSATION_SCHEMA)
+        self._writer.write_batch(batch)
+        self.rows += batch.num_rows
+
+    def close(self):
+        self._writer.close()
+        os.replace(self.tmp_path, self.path)
+
+
+class ConversationExporter:
+    """
+    Tarih aralığını gün partition'larına stream eden export
+
+    Args:
+        mongo_logger: iter_messages sağlayan MongoDBLogger
+        output_dir: Partition klasörlerinin ve manifest'in yazılacağı yer
+        file_format: "parquet" veya "arrow"
+        compression: Parquet için zstd / snappy / gzip, Arrow için zstd / lz4 / none
+        batch_size: Cursor batch'i ve dosyaya yazılan batch satır sayısı
+    """
+
+    def __init__(self,
+                 mongo_logger,
+                 output_dir: str,
+                 file_format: str = "parquet",
+                 compression: str = "zstd",
+                 batch_size: int = 5000):
+        if pa is None:
+            raise ExportUnavailable("Export için pyarrow kurulu olmalı (pip install pyarrow)")
+        if file_format not in EXPORT_FORMATS:
+            raise ValueError(f"Geçersiz format: {file_format} ({', '.join(EXPORT_FORMATS)})")
+        self.mongo_logger = mongo_logger
+        self.output_dir = output_dir
+        self.file_format = file_format
+        self.compression = compression
+        self.batch_size = batch_size
+
+    # ============================================
+    # MANIFEST
+    # ============================================
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.output_dir, MANIFEST_NAME)
+
+    def load_manifest(self, start: date, end: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Var olan manifest'i yükle; farklı bir export'a aitse hata ver
+
+        end verilmezse manifest'teki end kullanılır (varsayılan "bugün" ile
+        başlamış export ertesi gün de devam edebilsin); manifest yoksa bugün.
+        """
+        settings = {"start": start.isoformat(), "format": self.file_format, "compression": self.compression}
+        if end is not None:
+            settings["end"] = end.isoformat()
+        if not os.path.exists(self.manifest_path):
+            return {"end": datetime.utcnow().date().isoformat(), **settings, "partitions": {}}
+        with open(self.manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        for key, value in settings.items():
+            if manifest.get(key) != value:
+                raise ValueError(f"{self.output_dir} farklı bir export'a ait ({key}: {manifest.get(key)} != {value})")
+        return manifest
+
+    def _save_manifest(self, manifest: Dict[str, Any]):
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _partition_path(self, day: date) -> str:
+        return os.path.join(self.output_dir, f"date={day.isoformat()}", f"part-0{EXPORT_FORMATS[self.file_format]}")
+
+    # ============================================
+    # EXPORT
+    # ============================================
+
+    def run(self, start: date, end: Optional[date] = None) -> Dict[str, Any]:
+        """
+        [start, end) günlerini export et (end varsayılan: bugün - tamamlanmamış gün yazılmaz;
+        devam eden export'ta manifest'teki end)
+
+        Returns:
+            Güncel manifest
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        manifest = self.load_manifest(start, end)
+        end = date.fromisoformat(manifest["end"])
+
+        # Tamamlanmış son günden devam et
+        resume_from = start
+        if manifest["partitions"]:
+            resume_from = max(date.fromisoformat(day) for day in manifest["partitions"]) + timedelta(days=1)
+            logger.info(f"↩️ Export {resume_from} gününden devam ediyor")
+        if resume_from >= end:
+            return manifest
+
+        range_start = datetime.combine(resume_from, datetime.min.time())
+        range_end = datetime.combine(end, datetime.min.time())
+
+        writer: Optional[_PartitionWriter] = None
+        current_day: Optional[date] = None
+        columns = self._empty_columns()
+
+        def finish_partition():
+            nonlocal writer, columns
+            if columns["message_id"]:
+                writer.write(columns)
+                columns = self._empty_columns()
+            writer.close()
+            manifest["partitions"][current_day.isoformat()] = {
+                "file": os.path.relpath(writer.path, self.output_dir),
+                "rows": writer.rows,
+            }
+            self._save_manifest(manifest)
+            logger.info(f"📦 {current_day}: {writer.rows} mesaj yazıldı")
+            writer = None
+
+        for message in self.mongo_logger.iter_messages(range_start, range_end, self.batch_size):
+            day = message["timestamp"].date()
+            if day != current_day:
+                if writer is not None:
+                    finish_partition()
+                current_day = day
+                writer = _PartitionWriter(self._partition_path(day), self.file_format, self.compression)
+
+            for key, value in flatten_message(message).items():
+                columns[key].append(value)
+            if len(columns["message_id"]) >= self.batch_size:
+                writer.write(columns)
+                columns = self._empty_columns()
+
+        if writer is not None:
+            finish_partition()
+
+        manifest["completed_at"] = datetime.utcnow().isoformat()
+        self._save_manifest(manifest)
+        logger.info(f"✅ Export tamamlandı: {len(manifest['partitions'])} gün, {self.output_dir}")
+        return manifest
+
+    @staticmethod
+    def _empty_columns() -> Dict[str, List[Any]]:
+        return {field.name: [] for field in CONVERSATION_SCHEMA}
@@ -0,0 +1,262 @@
+# api_service/geo_index.py
+"""
+Klinik / otel koordinatları için bellek içi mekânsal index
+
+Kayıtlar enlem / boylam derecesine göre sabit boyutlu hücrelere (grid)
+dağıtılır. En yakın k kayıt araması sorgu noktasının hücresinden başlayıp
+halka halka genişler; taranmamış halkalardaki bir noktanın sorguya olan
+en kısa mesafesi (alt sınır) k'ıncı adaydan büyük olduğunda durur. Sonuç
+tam taramayla aynıdır, sadece sorgunun çevresindeki hücrelere bakılır.
+
+Mesafeler haversine ile (km) hesaplanır. Hücre boyutu verilmezse nokta
+sayısı ve kapsanan alandan seçilir (hücre başına ~GEO_CELL_TARGET nokta).
+Boylamda 180. meridyen sarması yoktur - kataloglar bölgeseldir.
+
+Index değişmez; katalog değiştiğinde GeoIndexCache yenisini kurar.
+"""
+
+import heapq
+import math
+import os
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# Hücre kenarı (km, kuzey-güney); 0 = nokta yoğunluğundan otomatik
+GEO_CELL_KM = float(os.getenv("GEO_CELL_KM", "0"))
+GEO_CELL_TARGET = int(os.getenv("GEO_CELL_TARGET", "8"))
+_MIN_CELL_KM = 0.25
+_MAX_CELL_KM = 50.0
+
+# Paket oluştururken kliniğin çevresinde aranan oteller (API ve action server)
+BUNDLE_HOTEL_RADIUS_KM = float(os.getenv("BUNDLE_HOTEL_RADIUS_KM", "25"))
+BUNDLE_HOTEL_CANDIDATES = int(os.getenv("BUNDLE_HOTEL_CANDIDATES", "5"))
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """İki nokta arasındaki büyük çember mesafesi (km)"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _haversine_a(distance_km: float) -> float:
+    """Mesafenin haversine a terimi: sin²(d / 2R)"""
+    return math.sin(min(distance_km / EARTH_RADIUS_KM, math.pi) / 2) ** 2
+
+
+def coordinates(record: Any) -> Optional[Tuple[float, float]]:
+    """Kaydın (lat, lon) çifti; eksik veya geçersizse None"""
+    lat, lon = record.get("lat"), record.get("lon")
+    if lat is None or lon is None:
+        return None
+    lat, lon = float(lat), float(lon)
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lat, lon
+
+
+class GeoIndex:
+    """
+    (item, lat, lon) noktaları üzerinde grid index
+
+    item herhangi bir değer olabilir (kayıt dict'i, katalog kayıt no'su);
+    sorgular (mesafe_km, item) listesi döner, yakından uzağa.
+    """
+
+    def __init__(self, points: Iterable[Tuple[Any, float, float]], cell_km: Optional[float] = None):
+        points = list(points)
+        self.count = len(points)
+        if not cell_km:
+            cell_km = GEO_CELL_KM or self._auto_cell_km(points)
+        self.cell_km = cell_km
+        self._cell_deg = cell_km / KM_PER_DEGREE
+        self._cell_rad = math.radians(self._cell_deg)
+
+        # hücre -> [(lat_rad, lon_rad, cos(lat), item), ...]
+        self._cells = {}
+        for item, lat, lon in points:
+            phi = math.radians(lat)
+            self._cells.setdefault(self._cell(lat, lon), []).append((phi, math.radians(lon), math.cos(phi), item))
+        rows = [row for row, _ in self._cells] or [0]
+        cols = [col for _, col in self._cells] or [0]
+        self._bounds = (min(rows), max(rows), min(cols), max(cols))
+
+    @classmethod
+    def from_records(cls, records: Iterable[Any], cell_km: Optional[float] = None) -> "GeoIndex":
+        """Koordinatlı kayıtlar (item = kaydın kendisi); koordinatsızlar atlanır"""
+        points = []
+        for record in records:
+            point = coordinates(record)
+            if point is not None:
+                points.append((record, point[0], point[1]))
+        return cls(points, cell_km)
+
+    @classmethod
+    def from_catalog(cls, catalog, cell_km: Optional[float] = None) -> "GeoIndex":
+        """mmap'lenmiş katalog (catalog_mmap.Catalog); item = kayıt no, sadece lat / lon okunur"""
+        points = []
+        for recno in catalog.all():
+            lat, lon = catalog.field(recno, "lat"), catalog.field(recno, "lon")
+            if lat is not None and lon is not None:
+                points.append((recno, lat, lon))
+        return cls(points, cell_km)
+
+    @staticmethod
+    def _auto_cell_km(points: Sequence[Tuple[Any, float, float]]) -> float:
+        """
+        Bir noktanın hücresindeki ortalama nokta sayısı ~GEO_CELL_TARGET olacak hücre boyutu
+
+        İlk tahmin kapsanan alandan yapılır; kümelenmiş veride (sahil şeridindeki
+        oteller) boş alan yoğunluğu düşük gösterdiği için doluluk ölçülerek küçültülür.
+        """
+        if len(points) < 2:
+            return _MAX_CELL_KM
+        lats = [lat for _, lat, _ in points]
+        lons = [lon for _, _, lon in points]
+        height = (max(lats) - min(lats)) * KM_PER_DEGREE
+        width = (max(lons) - min(lons)) * KM_PER_DEGREE * math.cos(math.radians((max(lats) + min(lats)) / 2))
+        area = max(height, _MIN_CELL_KM) * max(width, _MIN_CELL_KM)
+        cell_km = min(_MAX_CELL_KM, max(_MIN_CELL_KM, math.sqrt(area * GEO_CELL_TARGET / len(points))))
+
+        for _ in range(3):
+            cell_deg = cell_km / KM_PER_DEGREE
+            counts: Dict[Tuple[int, int], int] = {}
+            for lat, lon in zip(lats, lons):
+                cell = (math.floor(lat / cell_deg), math.floor(lon / cell_deg))
+                counts[cell] = counts.get(cell, 0) + 1
+            occupancy = sum(count * count for count in counts.values()) / len(points)
+            if occupancy <= GEO_CELL_TARGET * 1.5 or cell_km <= _MIN_CELL_KM:
+                break
+            cell_km = max(_MIN_CELL_KM, cell_km * math.sqrt(GEO_CELL_TARGET / occupancy))
+        return cell_km
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self._cell_deg), math.floor(lon / self._cell_deg)
+
+    def _ring(self, row: int, col: int, ring: int) -> Iterable[Tuple[int, int]]:
+        """(row, col) etrafında Chebyshev uzaklığı tam ring olan hücreler"""
+        if ring == 0:
+            yield row, col
+            return
+        for c in range(col - ring, col + ring + 1):
+            yield row - ring, c
+            yield row + ring, c
+        for r in range(row - ring + 1, row + ring):
+            yield r, col - ring
+            yield r, col + ring
+
+    def _outside_bound(self, ring: int, cos_lat: float) -> float:
+        """
+        0..ring halkaları dışındaki herhangi bir noktanın en kısa mesafesi (km)
+
+        Bu noktalar enlemde veya boylamda en az ring hücre uzaktadır; enlem
+        farkı doğrudan açısal mesafedir, boylam farkı Δλ olan meridyene en kısa
+        açısal mesafe asin(cos φ · sin Δλ)'dir.
+        """
+        span = ring * self._cell_rad
+        lat_bound = span
+        lon_bound = math.asin(min(1.0, cos_lat * math.sin(min(span, math.pi / 2))))
+        return EARTH_RADIUS_KM * min(lat_bound, lon_bound)
+
+    def nearest(self,
+                lat: float,
+                lon: float,
+                k: Optional[int] = 1,
+                radius_km: Optional[float] = None,
+                accept: Optional[Callable[[Any], bool]] = None) -> List[Tuple[float, Any]]:
+        """
+        En yakın k nokta (yakından uzağa)
+
+        Args:
+            k: None ise radius_km içindeki tüm noktalar
+            radius_km: Verilirse daha uzaktaki noktalar dönmez
+            accept: item filtresi (ör. yıldız sayısı); sadece mesafe
+                adaylığına giren noktalar için çağrılır
+        """
+        if k is None and radius_km is None:
+            raise ValueError("k veya radius_km verilmeli")
+        if not self._cells or k == 0:
+            return []
+
+        phi, lam = math.radians(lat), math.radians(lon)
+        cos_lat = math.cos(phi)
+        row, col = self._cell(lat, lon)
+        min_row, max_row, min_col, max_col = self._bounds
+        last_ring = max(row - min_row, max_row - row, col - min_col, max_col - col)
+        # Karşılaştırmalar haversine'in a terimiyle yapılır (mesafeyle monoton, asin / sqrt yok)
+        limit = math.inf if radius_km is None else _haversine_a(radius_km)
+
+        # k'lı aramada en uzak aday başta olan max-heap (-a, sıra, item)
+        best: List[Tuple[float, int, Any]] = []
+        found: List[Tuple[float, Any]] = []
+        sequence = 0
+        sin, sqrt = math.sin, math.sqrt
+        for ring in range(last_ring + 1):
+            for cell in self._ring(row, col, ring):
+                points = self._cells.get(cell)
+                if not points:
+                    continue
+                for p_phi, p_lam, p_cos, item in points:
+                    a = sin((p_phi - phi) / 2) ** 2 + cos_lat * p_cos * sin((p_lam - lam) / 2) ** 2
+                    if a > limit:
+                        continue
+                    if k is not None and len(best) == k and a >= -best[0][0]:
+                        continue
+                    if accept is not None and not accept(item):
+                        continue
+                    if k is None:
+                        found.append((a, item))
+                        continue
+                    sequence += 1
+                    if len(best) < k:
+                        heapq.heappush(best, (-a, sequence, item))
+                    else:
+                        heapq.heapreplace(best, (-a, sequence, item))
+
+            bound = _haversine_a(self._outside_bound(ring, cos_lat))
+            if bound > limit:
+                break
+            if k is not None and len(best) == k and -best[0][0] <= bound:
+                break
+
+        if k is None:
+            found.sort(key=lambda pair: pair[0])
+        else:
+            found = [(-negative, item) for negative, _, item in sorted(best, key=lambda entry: (-entry[0], entry[1]))]
+        return [(2 * EARTH_RADIUS_KM * math.asin(min(1.0, sqrt(a))), item) for a, item in found]
+
+    def within(self, lat: float, lon: float, radius_km: float,
+               accept: Optional[Callable[[Any], bool]] = None) -> List[Tuple[float, Any]]:
+        """radius_km içindeki tüm noktalar (yakından uzağa)"""
+        return self.nearest(lat, lon, k=None, radius_km=radius_km, accept=accept)
+
+
+class GeoIndexCache:
+    """
+    Kaynak anahtarı (katalog versiyonu / kayıt koleksiyonu) değişince index'i yeniden kurar
+
+    Anahtar önce kimlikle karşılaştırılır; aynı nesne her istekte tekrar
+    karşılaştırılmaz.
+    """
+
+    def __init__(self):
+        self._key: Optional[Hashable] = None
+        self._index: Optional[GeoIndex] = None
+        self._lock = threading.Lock()
+
+    def get(self, key: Any, build: Callable[[], GeoIndex]) -> GeoIndex:
+        index, current = self._index, self._key
+        if index is not None and (key is current or key == current):
+            return index
+        with self._lock:
+            if self._index is None or not (key is self._key or key == self._key):
+                self._index = build()
+                self._key = key
+            return self._index
@@ -0,0 +1,173 @@
+# api_service/health_prober.py
+"""
+Bağımlılık sağlık kontrolü için tek arka plan prober'ı
+
+Frontend'in her sekmesi servisleri ayrı ayrı yoklamak yerine /health/all'u
+okur; o da sadece burada cache'lenen sonuçları döndürür. Prober tüm
+bağımlılıkları HEALTH_PROBE_INTERVAL saniyede bir, paralel ve
+HEALTH_PROBE_TIMEOUT süre sınırıyla yoklar. Probe yükü açık sekme
+sayısından bağımsızdır.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+
+from api_service.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+HEALTH_PROBE_INTERVAL = float(os.getenv("HEALTH_PROBE_INTERVAL", "10"))  # saniye
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", "2"))     # saniye
+
+RASA_URL = os.getenv("RASA_URL", "http://localhost:5005")
+ACTION_SERVER_URL = os.getenv("ACTION_SERVER_URL", "http://localhost:5055")
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+
+DEPENDENCY_UP = REGISTRY.gauge(
+    "dependency_up",
+    "Son probe sonucu (1 = çalışıyor)",
+    ("service",)
+)
+DEPENDENCY_PROBE_SECONDS = REGISTRY.histogram(
+    "dependency_probe_seconds",
+    "Bağımlılık probe süresi",
+    ("service",)
+)
+
+
+class HealthProber:
+    """
+    İsimli probe fonksiyonlarını periyodik çalıştırıp sonuçları saklar
+
+    Probe fonksiyonu hata fırlatmazsa servis "up" sayılır.
+    """
+
+    def __init__(self, interval: float = HEALTH_PROBE_INTERVAL, timeout: float = HEALTH_PROBE_TIMEOUT):
+        self.interval = interval
+        self.timeout = timeout
+        self._probes: Dict[str, Callable[[], Any]] = {}
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._probe_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._http: Optional[httpx.Client] = None
+
+    # ============================================
+    # PROBES
+    # ============================================
+
+    def add_probe(self, name: str, probe: Callable[[], Any]):
+        self._probes[name] = probe
+
+    def add_http_probe(self, name: str, url: str):
+        """GET url 2xx dönerse up"""
+        def probe():
+            self._http_client().get(url).raise_for_status()
+        self.add_probe(name, probe)
+
+    def _http_client(self) -> httpx.Client:
+        # Probe'lar paralel thread'lerde çalışır; bağlantı havuzu tek client'ta paylaşılır
+        with self._lock:
+            if self._http is None:
+                self._http = httpx.Client(timeout=self.timeout)
+            return self._http
+
+    def _run_probe(self, name: str, probe: Callable[[], Any]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        result: Dict[str, Any] = {"status": "up"}
+        try:
+            probe()
+        except Exception as e:
+            result = {"status": "down", "error": str(e) or type(e).__name__}
+        elapsed = time.perf_counter() - started
+        result["latency_ms"] = round(elapsed * 1000, 1)
+        result["checked_at"] = datetime.utcnow()
+        DEPENDENCY_PROBE_SECONDS.observe(elapsed, service=name)
+        DEPENDENCY_UP.set(1 if result["status"] == "up" else 0, service=name)
+        return result
+
+    def probe_once(self, if_empty: bool = False):
+        """Tüm probe'ları paralel çalıştır (aynı anda tek tur)"""
+        with self._probe_lock:
+            if if_empty and self._results:
+                return  # beklerken başka bir çağrı probe'ladı
+            with ThreadPoolExecutor(max_workers=max(1, len(self._probes)), thread_name_prefix="health-probe") as pool:
+                futures = {name: pool.submit(self._run_probe, name, probe) for name, probe in self._probes.items()}
+                results = {name: future.result() for name, future in futures.items()}
+            with self._lock:
+                for name, result in results.items():
+                    current = self._results.get(name)
+                    # Tur sürerken refresh() daha yeni sonuç yazdıysa ezilmesin
+                    if current is None or current["checked_at"] <= result["checked_at"]:
+                        self._results[name] = result
+
+    def refresh(self, name: str):
+        """Tek probe'u hemen tekrar çalıştır (ör. bağımlılık yeniden bağlandığında)"""
+        result = self._run_probe(name, self._probes[name])
+        with self._lock:
+            self._results[name] = result
+
+    # ============================================
+    # BACKGROUND LOOP
+    # ============================================
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="health-prober", daemon=True)
+        self._thread.start()
+        logger.info(f"🩺 Health prober başladı ({self.interval:.0f}s aralıkla: {', '.join(self._probes)})")
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+        with self._lock:
+            if self._http is not None:
+                self._http.close()
+                self._http = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.probe_once()
+            except Exception as e:
+                logger.error(f"❌ Health prober hatası: {e}")
+            self._stop.wait(self.interval)
+
+    # ============================================
+    # READ
+    # ============================================
+
+    def status(self, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            result = self._results.get(name)
+            return dict(result) if result else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Cache'teki son sonuçlar; hiç probe yapılmadıysa bir tur çalıştırılır"""
+        if not self._results:
+            self.probe_once(if_empty=True)
+
+        now = datetime.utcnow()
+        with self._lock:
+            services = {}
+            for name, result in self._results.items():
+                service = dict(result)
+                # Prober durduysa eski sonuç "stale" işaretlenir
+                service["stale"] = (now - result["checked_at"]).total_seconds() > self.interval * 3
+                services[name] = service
+        healthy = all(s["status"] == "up" and not s["stale"] for s in services.values())
+        return {
+            "status": "healthy" if healthy else "degraded",
+            "probe_interval": self.interval,
+            "services": services,
+        }
@@ -0,0 +1,235 @@
+# api_service/http_cache.py
+"""
+Katalog endpoint'leri için ETag / koşullu istek ve sıkıştırma
+
+- ETag, katalog versiyonu (verinin içerik hash'i) + normalize edilmiş sorgudan
+  üretilir; arama çalıştırılmadan önce hesaplanır. If-None-Match eşleşirse
+  arama hiç yapılmadan GET / HEAD için 304, diğer metodlar (POST arama) için
+  RFC 9110 gereği 412 döner.
+- 304 / 412, 200 yanıtının taşıyacağı ETag'i taşır. Eşik altındaki gövdeler
+  sıkıştırılmadığı için bu ETag gövde boyutuna bağlıdır; boyut bilinmiyorsa
+  (cache'te yok, istemci etiketinden de çıkmıyor) arama bir kez çalıştırılır.
+- Yanıt, boyutu COMPRESS_MIN_BYTES'ı aşıyorsa Accept-Encoding'e göre
+  brotli (kuruluysa) veya gzip ile sıkıştırılır. Sıkıştırılmış gövdeler
+  ETag + encoding anahtarıyla küçük bir LRU'da tutulur; aynı sorgu tekrar
+  sıkıştırılmaz.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # brotli opsiyonel - yoksa sadece gzip
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+ENCODED_CACHE_SIZE = int(os.getenv("ENCODED_CACHE_SIZE", "512"))
+
+# Her temsil (encoding) için ayrı strong ETag: "<hash>", "<hash>-gzip", "<hash>-br"
+_ENCODING_SUFFIX = {"identity": "", "gzip": "-gzip", "br": "-br"}
+
+
+def _canonical(value: Any) -> bytes:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class CatalogVersions:
+    """Katalog adı -> içerik hash'i; veri değiştiğinde register() tekrar çağrılır"""
+
+    def __init__(self):
+        self._versions: Dict[str, str] = {}
+
+    def register(self, name: str, records: Iterable[Dict[str, Any]]) -> str:
+        version = hashlib.sha1(_canonical(list(records))).hexdigest()[:16]
+        self._versions[name] = version
+        return version
+
+    def set(self, name: str, version: str) -> str:
+        """Versiyonu hazır gelen kataloglar için (ör. derlenmiş katalog dosyası)"""
+        self._versions[name] = version
+        return version
+
+    def get(self, name: str) -> str:
+        return self._versions[name]
+
+
+catalog_versions = CatalogVersions()
+
+
+def catalog_etag(catalog: Union[str, Tuple[str, ...]], query: Dict[str, Any]) -> str:
+    """
+    Katalog versiyonu + sorgudan strong ETag tabanı (tırnaksız)
+
+    Birden çok katalogdan beslenen yanıtlar (batch arama) için catalog bir
+    tuple olabilir; herhangi birinin versiyonu değişince ETag değişir.
+    """
+    names = (catalog,) if isinstance(catalog, str) else tuple(catalog)
+    version = "|".join(catalog_versions.get(name) for name in names)
+    digest = hashlib.sha1(version.encode() + b"|" + "+".join(names).encode() + b"|" + _canonical(query))
+    return digest.hexdigest()[:32]
+
+
+def _quoted(base: str, encoding: str) -> str:
+    return f'"{base}{_ENCODING_SUFFIX[encoding]}"'
+
+
+def if_none_match(request: Request, etag: str) -> bool:
+    """If-None-Match başlığı verilen (tırnaklı) ETag ile eşleşiyor mu"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):  # If-None-Match zayıf karşılaştırma kullanır
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> str:
+    """Accept-Encoding'den br > gzip > identity seçimi (q=0 dikkate alınır)"""
+    if not accept_encoding:
+        return "identity"
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        pieces = part.strip().split(";")
+        coding = pieces[0].strip().lower()
+        quality = 1.0
+        for param in pieces[1:]:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+
+    def allowed(coding: str) -> bool:
+        return accepted.get(coding, accepted.get("*", 0.0)) > 0
+
+    if brotli is not None and allowed("br"):
+        return "br"
+    if allowed("gzip"):
+        return "gzip"
+    return "identity"
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class _EncodedCache:
+    """
+    (etag, encoding) -> gönderilen gövde
+
+    Sıkıştırılmış gövdeler kendi encoding'iyle, sıkıştırma eşiğinin altında
+    kalan gövdeler "identity" ile tutulur (200'ün ETag'i de buradan bilinir).
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._items: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> Optional[bytes]:
+        with self._lock:
+            body = self._items.get(key)
+            if body is not None:
+                self._items.move_to_end(key)
+            return body
+
+    def put(self, key: Tuple[str, str], body: bytes):
+        if self.size <= 0:
+            return
+        with self._lock:
+            self._items[key] = body
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+
+_encoded_cache = _EncodedCache(ENCODED_CACHE_SIZE)
+
+
+def _known_encoding(request: Request, base: str, encoding: str) -> Optional[str]:
+    """
+    Aramayı çalıştırmadan 200 yanıtının gerçek encoding'i (bilinmiyorsa None)
+
+    Gövde boyutu aynı ETag tabanı için değişmez: istemci bu encoding'in
+    etiketini göndermişse veya gövde cache'teyse eşik sonucu bellidir.
+    """
+    if encoding == "identity":
+        return "identity"
+    if _encoded_cache.get((base, encoding)) is not None or if_none_match(request, _quoted(base, encoding)):
+        return encoding
+    if _encoded_cache.get((base, "identity")) is not None:
+        return "identity"
+    return None
+
+
+def _render(base: str, encoding: str, search: Callable[[], Any]) -> Tuple[bytes, str]:
+    """(gövde, gerçek encoding) - eşik altındaki gövdeler sıkıştırılmaz"""
+    if encoding != "identity":
+        for cached_encoding in (encoding, "identity"):
+            cached = _encoded_cache.get((base, cached_encoding))
+            if cached is not None:
+                return cached, cached_encoding
+
+    body = json.dumps(search(), ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+    if encoding == "identity":
+        return body, encoding
+    if len(body) >= COMPRESS_MIN_BYTES:
+        body = _compress(body, encoding)
+    else:
+        encoding = "identity"
+    _encoded_cache.put((base, encoding), body)
+    return body, encoding
+
+
+def catalog_response(request: Request,
+                     catalog: Union[str, Tuple[str, ...]],
+                     query: Dict[str, Any],
+                     search: Callable[[], Any]) -> Response:
+    """
+    Koşullu + sıkıştırılmış katalog yanıtı
+
+    Args:
+        catalog: catalog_versions'a kayıtlı katalog adı (veya adları)
+        query: ETag'e giren normalize sorgu (endpoint parametreleri)
+        search: Sadece gövde gerektiğinde çağrılır
+    """
+    base = catalog_etag(catalog, query)
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    headers = {"Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+
+    body = None
+    if request.headers.get("if-none-match"):
+        effective = _known_encoding(request, base, encoding)
+        if effective is None:
+            body, effective = _render(base, encoding, search)
+        if if_none_match(request, _quoted(base, effective)):
+            headers["ETag"] = _quoted(base, effective)
+            status_code = 304 if request.method in ("GET", "HEAD") else 412
+            return Response(status_code=status_code, headers=headers)
+
+    if body is None:
+        body, effective = _render(base, encoding, search)
+    if effective != "identity":
+        headers["Content-Encoding"] = effective
+    headers["ETag"] = _quoted(base, effective)
+    return Response(content=body, media_type="application/json", headers=headers)
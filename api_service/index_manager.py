@@ -0,0 +1,406 @@
+# api_service/index_manager.py
+"""
+Versiyonlu, deklaratif MongoDB index yönetimi
+
+Her collection'ın istenen index'leri bir versiyonla tanımlanır
+(CollectionIndexes). IndexManager:
+
+- Uygulanan versiyonu schema_meta'da tutar; açılışta tek find ile
+  kontrol eder, güncel collection'lara dokunmaz
+- Eskiyse collection başına lease alır (aynı anda açılan worker'lardan
+  sadece biri uygular) ve sadece farkı uygular: eksik index'ler tek
+  createIndexes komutuyla (collection tek taramada) oluşturulur, seçenekleri
+  değişenler yeniden kurulur, retired listesindekiler silinir
+- Tanımda olmayan index'lere dokunmaz (unmanaged); drop_unmanaged ile silinir
+- report(): $indexStats kullanımları ve collStats boyutlarıyla kullanılmayan,
+  başka bir index'in prefix'i olan (redundant) ve yönetilmeyen index'leri
+  ve her yazmada güncellenen index sayısını listeler
+
+Index'i kaldırmak için tanımdan çıkarıp retired'a eklemek ve versiyonu
+artırmak yeterlidir; bir sonraki deploy'da silinir.
+"""
+
+import logging
+import os
+import socket
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from pymongo import ASCENDING, IndexModel, ReturnDocument
+from pymongo.errors import CollectionInvalid, DuplicateKeyError, OperationFailure, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_META_COLLECTION = "schema_meta"
+# Lease süresi dolan (uygularken ölen) worker'ın yerine başkası devralır
+INDEX_BUILD_LEASE = float(os.getenv("INDEX_BUILD_LEASE", "600"))              # saniye
+# false ise açılışta uygulanmaz; deploy adımında scripts/manage_indexes.py --apply çalışır
+INDEX_AUTO_APPLY = os.getenv("INDEX_AUTO_APPLY", "true").lower() == "true"
+# $indexStats sayaçları mongod açılışında sıfırlanır; bundan kısa süredir sayılan index "unused" sayılmaz
+INDEX_UNUSED_MIN_AGE_HOURS = float(os.getenv("INDEX_UNUSED_MIN_AGE_HOURS", "24"))
+
+# Karşılaştırmada ad dışında dikkate alınan seçenekler
+INDEX_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")
+
+IndexKeys = Union[str, Sequence[Tuple[str, int]]]
+
+
+class IndexSpec:
+    """
+    Tek index tanımı
+
+    Args:
+        keys: Alan adı veya [(alan, yön), ...]
+        name: Verilmezse MongoDB'nin varsayılan adı (user_id_1_created_at_-1)
+        **options: unique, sparse, partialFilterExpression, expireAfterSeconds
+    """
+
+    def __init__(self, keys: IndexKeys, name: Optional[str] = None, **options):
+        self.keys = [(keys, ASCENDING)] if isinstance(keys, str) else [(field, direction) for field, direction in keys]
+        self.name = name or "_".join(f"{field}_{direction}" for field, direction in self.keys)
+        self.options = {key: value for key, value in options.items() if value is not None}
+
+    def model(self) -> IndexModel:
+        return IndexModel(self.keys, name=self.name, **self.options)
+
+    def same_keys(self, info: Dict[str, Any]) -> bool:
+        return _normalize_keys(info["key"]) == _normalize_keys(self.keys)
+
+    def same_options(self, info: Dict[str, Any]) -> bool:
+        return _options(info) == _options(self.options)
+
+    def describe(self) -> Dict[str, Any]:
+        return {"name": self.name, "key": dict(self.keys), **self.options}
+
+
+class CollectionIndexes:
+    """
+    Bir collection'ın istenen index'leri
+
+    Args:
+        collection: Collection adı
+        version: Tanım her değiştiğinde artırılır
+        indexes: İstenen index'ler (_id hariç)
+        retired: Artık istenmeyen, uygulamada silinecek index adları
+        create_options: Collection yoksa create_collection seçenekleri (ör. capped)
+    """
+
+    def __init__(self,
+                 collection: str,
+                 version: int,
+                 indexes: Iterable[IndexSpec],
+                 retired: Iterable[str] = (),
+                 create_options: Optional[Dict[str, Any]] = None):
+        self.collection = collection
+        self.version = version
+        self.indexes = list(indexes)
+        self.retired = list(retired)
+        self.create_options = create_options or {}
+
+    @property
+    def meta_id(self) -> str:
+        return f"indexes:{self.collection}"
+
+
+def _normalize_keys(keys) -> List[Tuple[str, Any]]:
+    items = keys.items() if isinstance(keys, dict) else keys
+    return [(field, int(direction) if isinstance(direction, (int, float)) else direction)
+            for field, direction in items]
+
+
+def _options(source: Dict[str, Any]) -> Dict[str, Any]:
+    options = {key: source[key] for key in INDEX_OPTIONS if source.get(key) not in (None, False)}
+    if "partialFilterExpression" in options:
+        options["partialFilterExpression"] = dict(options["partialFilterExpression"])
+    return options
+
+
+class IndexManager:
+    """
+    CollectionIndexes tanımlarını veritabanına uygular ve raporlar
+
+    Args:
+        db: pymongo Database
+        declarations: İstenen index'ler
+    """
+
+    def __init__(self, db, declarations: Iterable[CollectionIndexes]):
+        self.db = db
+        self.declarations = {declaration.collection: declaration for declaration in declarations}
+        self.meta = db[SCHEMA_META_COLLECTION]
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._thread: Optional[threading.Thread] = None
+        self.last_result: Optional[Dict[str, Any]] = None
+
+    # ============================================
+    # UYGULAMA
+    # ============================================
+
+    def applied_versions(self) -> Dict[str, int]:
+        ids = [declaration.meta_id for declaration in self.declarations.values()]
+        return {doc["_id"].split(":", 1)[1]: doc.get("version", 0)
+                for doc in self.meta.find({"_id": {"$in": ids}}, {"version": 1})}
+
+    def outdated(self) -> List[str]:
+        """Uygulanan versiyonu tanımdan eski collection'lar"""
+        applied = self.applied_versions()
+        return [name for name, declaration in self.declarations.items()
+                if applied.get(name, 0) < declaration.version]
+
+    def ensure(self, background: bool = True):
+        """
+        Eski tanımları uygula (açılışta çağrılır)
+
+        Güncelse sadece schema_meta okunur. Eskiyse index'ler arka plan
+        thread'inde kurulur; servis index build'ini beklemez.
+        """
+        if not INDEX_AUTO_APPLY:
+            return
+        try:
+            outdated = self.outdated()
+        except PyMongoError as e:
+            logger.error(f"❌ Index versiyonları okunamadı: {e}")
+            return
+        if not outdated:
+            return
+        if not background:
+            self.apply(outdated)
+            return
+        self._thread = threading.Thread(target=self.apply, args=(outdated,), name="index-manager", daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout: Optional[float] = None):
+        """Arka plan uygulamasının bitmesini bekle (script'ler ve benchmark'lar için)"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def plan(self, collections: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, List[str]]]:
+        """Uygulanacak fark: collection -> {"create", "rebuild", "drop", "unmanaged"}"""
+        return {name: self._diff(self.declarations[name])
+                for name in (collections or self.declarations)}
+
+    def _diff(self, declaration: CollectionIndexes) -> Dict[str, List[str]]:
+        existing = self.db[declaration.collection].index_information()
+        existing.pop("_id_", None)
+        diff = {"create": [], "rebuild": [], "drop": [], "unmanaged": []}
+        matched = set()
+        for spec in declaration.indexes:
+            by_name = existing.get(spec.name)
+            if by_name is not None and spec.same_keys(by_name) and spec.same_options(by_name):
+                matched.add(spec.name)
+                continue
+            # Aynı key'le farklı adla zaten varsa yeniden kurmaya gerek yok
+            same = next((name for name, info in existing.items()
+                         if name not in matched and spec.same_keys(info) and spec.same_options(info)), None)
+            if same is not None:
+                matched.add(same)
+            elif by_name is not None or any(spec.same_keys(info) for info in existing.values()):
+                diff["rebuild"].append(spec.name)
+            else:
+                diff["create"].append(spec.name)
+        rebuilt_keys = [spec for spec in declaration.indexes if spec.name in diff["rebuild"]]
+        for name, info in existing.items():
+            if name in matched:
+                continue
+            if name in declaration.retired:
+                diff["drop"].append(name)
+            elif any(spec.name == name or spec.same_keys(info) for spec in rebuilt_keys):
+                continue   # rebuild adımında silinir
+            else:
+                diff["unmanaged"].append(name)
+        return diff
+
+    def apply(self,
+              collections: Optional[Iterable[str]] = None,
+              force: bool = False,
+              drop_unmanaged: bool = False) -> Dict[str, Any]:
+        """
+        Tanımları uygula
+
+        Args:
+            collections: Sadece bunlar (varsayılan: hepsi)
+            force: Versiyon güncel olsa da farkı uygula
+            drop_unmanaged: Tanımda olmayan index'leri de sil
+
+        Returns:
+            collection -> {"status": applied / skipped / locked / error, ...}
+        """
+        results: Dict[str, Any] = {}
+        for name in list(collections or self.declarations):
+            declaration = self.declarations[name]
+            try:
+                results[name] = self._apply_collection(declaration, force, drop_unmanaged)
+            except PyMongoError as e:
+                logger.error(f"❌ {name} index'leri uygulanamadı: {e}")
+                self._release(declaration)
+                results[name] = {"status": "error", "error": str(e)}
+        self.last_result = {"finished_at": datetime.utcnow(), "collections": results}
+        return results
+
+    def _apply_collection(self, declaration: CollectionIndexes, force: bool, drop_unmanaged: bool) -> Dict[str, Any]:
+        lease = self._acquire(declaration)
+        if lease is None:
+            return {"status": "locked"}
+        if not force and lease.get("version", 0) >= declaration.version:
+            self._release(declaration)
+            return {"status": "skipped", "version": lease["version"]}
+
+        collection = self.db[declaration.collection]
+        if declaration.create_options and declaration.collection not in self.db.list_collection_names():
+            try:
+                self.db.create_collection(declaration.collection, **declaration.create_options)
+            except CollectionInvalid:
+                pass  # arada başka process oluşturdu
+
+        diff = self._diff(declaration)
+        drops = diff["drop"] + (diff["unmanaged"] if drop_unmanaged else [])
+        specs = {spec.name: spec for spec in declaration.indexes}
+        existing = collection.index_information()
+        for name in diff["rebuild"]:
+            spec = specs[name]
+            for existing_name, info in existing.items():
+                if existing_name != "_id_" and (existing_name == name or spec.same_keys(info)):
+                    collection.drop_index(existing_name)
+        for name in drops:
+            collection.drop_index(name)
+        to_build = [specs[name].model() for name in diff["create"] + diff["rebuild"]]
+        if to_build:
+            collection.create_indexes(to_build)
+
+        self._release(declaration, version=declaration.version,
+                      indexes=[spec.name for spec in declaration.indexes])
+        if to_build or drops:
+            logger.info(f"🗂️ {declaration.collection} index'leri v{declaration.version}: "
+                        f"{len(diff['create'])} yeni, {len(diff['rebuild'])} yeniden kuruldu, {len(drops)} silindi")
+        return {"status": "applied", "version": declaration.version, **diff, "dropped": drops}
+
+    def _acquire(self, declaration: CollectionIndexes) -> Optional[Dict[str, Any]]:
+        now = datetime.utcnow()
+        try:
+            return self.meta.find_one_and_update(
+                {"_id": declaration.meta_id,
+                 "$or": [{"lock_until": None}, {"lock_until": {"$lt": now}}]},
+                {"$set": {"lock_until": now + timedelta(seconds=INDEX_BUILD_LEASE), "locked_by": self.owner}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            return None   # başka process uyguluyor
+
+    def _release(self, declaration: CollectionIndexes, **fields):
+        update: Dict[str, Any] = {"$unset": {"lock_until": "", "locked_by": ""}}
+        if fields:
+            update["$set"] = {**fields, "applied_at": datetime.utcnow(), "applied_by": self.owner}
+        self.meta.update_one({"_id": declaration.meta_id, "locked_by": self.owner}, update)
+
+    # ============================================
+    # RAPOR
+    # ============================================
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Collection başına index'ler, boyutları, kullanımları ve öneriler
+
+        index status: ok / unused / redundant / unmanaged / retired / missing
+        write_amplification: Her insert'te güncellenen index sayısı (_id dahil)
+        """
+        applied = self.applied_versions()
+        collections = {}
+        recommendations = []
+        for name, declaration in self.declarations.items():
+            collection_report = self._collection_report(declaration, applied.get(name, 0))
+            collections[name] = collection_report
+            for index in collection_report["indexes"]:
+                if index["status"] in ("unused", "redundant", "unmanaged", "retired"):
+                    recommendations.append({"collection": name, **{k: index[k] for k in ("name", "status", "size_bytes")},
+                                            "reason": index.get("reason")})
+        recommendations.sort(key=lambda item: item["size_bytes"] or 0, reverse=True)
+        return {
+            "generated_at": datetime.utcnow(),
+            "collections": collections,
+            "recommendations": recommendations,
+            "last_apply": self.last_result,
+        }
+
+    def _collection_report(self, declaration: CollectionIndexes, applied_version: int) -> Dict[str, Any]:
+        collection = self.db[declaration.collection]
+        existing = collection.index_information()
+        stats = self._coll_stats(declaration.collection)
+        usage = self._index_usage(collection)
+        sizes = stats.get("indexSizes", {})
+        specs = {spec.name: spec for spec in declaration.indexes}
+        now = datetime.utcnow()
+
+        indexes = []
+        for name, info in existing.items():
+            spec = specs.get(name) or next((s for s in declaration.indexes if s.same_keys(info)), None)
+            access = usage.get(name)
+            entry = {
+                "name": name,
+                "key": dict(_normalize_keys(info["key"])),
+                "size_bytes": sizes.get(name),
+                "ops": access["ops"] if access else None,
+                "since": access["since"] if access else None,
+                "status": "ok",
+            }
+            if name == "_id_":
+                indexes.append(entry)
+                continue
+            redundant_with = _covering_index(name, info, existing)
+            if name in declaration.retired:
+                entry.update(status="retired", reason="Tanımdan çıkarıldı, bir sonraki uygulamada silinir")
+            elif spec is None:
+                prefix = f", {redundant_with} index'inin prefix'i" if redundant_with else ""
+                entry.update(status="unmanaged", reason=f"Tanımda yok{prefix}; drop_unmanaged ile silinir")
+            elif redundant_with:
+                entry.update(status="redundant", reason=f"{redundant_with} index'inin prefix'i")
+            elif (access and access["ops"] == 0 and not info.get("unique")
+                  and access["since"] and now - access["since"] > timedelta(hours=INDEX_UNUSED_MIN_AGE_HOURS)):
+                entry.update(status="unused", reason=f"{access['since']:%Y-%m-%d %H:%M} UTC'den beri kullanılmadı")
+            indexes.append(entry)
+
+        for spec in declaration.indexes:
+            if not any(spec.name == name or spec.same_keys(info) for name, info in existing.items()):
+                indexes.append({**spec.describe(), "size_bytes": None, "ops": None, "since": None,
+                                "status": "missing", "reason": "Henüz uygulanmadı"})
+
+        return {
+            "version": declaration.version,
+            "applied_version": applied_version,
+            "documents": stats.get("count"),
+            "data_bytes": stats.get("size"),
+            "index_bytes": stats.get("totalIndexSize"),
+            "capped": stats.get("capped"),
+            "write_amplification": len(existing),
+            "indexes": indexes,
+        }
+
+    def _coll_stats(self, name: str) -> Dict[str, Any]:
+        try:
+            return self.db.command({"collStats": name})
+        except (OperationFailure, NotImplementedError) as e:
+            logger.debug(f"collStats alınamadı ({name}): {e}")
+            return {}
+
+    @staticmethod
+    def _index_usage(collection) -> Dict[str, Dict[str, Any]]:
+        try:
+            return {doc["name"]: doc["accesses"] for doc in collection.aggregate([{"$indexStats": {}}])}
+        except (OperationFailure, NotImplementedError) as e:
+            logger.debug(f"$indexStats alınamadı ({collection.name}): {e}")
+            return {}
+
+
+def _covering_index(name: str, info: Dict[str, Any], existing: Dict[str, Dict[str, Any]]) -> Optional[str]:
+    """info'nun key'i başka bir index'in key'inin prefix'iyse o index'in adı"""
+    if info.get("unique") or _options(info):
+        return None   # kısıt veya partial/TTL index'i - prefix olsa da gerekli
+    keys = _normalize_keys(info["key"])
+    for other_name, other in existing.items():
+        if other_name in (name, "_id_") or other.get("partialFilterExpression") or other.get("sparse"):
+            continue
+        other_keys = _normalize_keys(other["key"])
+        if len(other_keys) > len(keys) and other_keys[:len(keys)] == keys:
+            return other_name
+    return None
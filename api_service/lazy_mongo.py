@@ -0,0 +1,195 @@
+# api_service/lazy_mongo.py
+"""
+MongoDBLogger'ın ilk kullanımda, arka planda kurulan process başına tek örneği
+
+MongoDBLogger() bağlanırken ping'i serverSelectionTimeoutMS (5 s) kadar
+bekler ve MongoDB kapalıysa hata fırlatır; import sırasında oluşturulunca
+servis ya geç açılır ya da hiç açılmaz. LazyMongoLogger:
+
+- Import'ta bağlanmaz; ilk kullanımda bağlantıyı arka plan thread'inde başlatır
+- İlk denemeyi en fazla MONGO_CONNECT_WAIT kadar bekler, sonra MongoUnavailable
+  fırlatır (istek MongoDB'yi beklemez)
+- Bağlanamazsa MONGO_RETRY_INTERVAL'de bir tekrar dener; bağlanınca
+  on_connect callback'leri (profil cache listener'ı, invalidation abonesi) çalışır
+- Fork sonrası child'da durumu sıfırlar (pymongo client'ı fork-safe değil)
+
+Bağlantı kurulduktan sonraki kopmaları pymongo kendisi toparlar.
+"""
+
+import logging
+import os
+import threading
+from typing import Any, Callable, List, Optional
+
+from api_service.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017/")
+MONGODB_DB = os.getenv("MONGODB_DB", "health_tourism")
+MONGO_CONNECT_WAIT = float(os.getenv("MONGO_CONNECT_WAIT", "1"))        # saniye
+MONGO_RETRY_INTERVAL = float(os.getenv("MONGO_RETRY_INTERVAL", "5"))    # saniye
+
+MONGO_CONNECTED = REGISTRY.gauge(
+    "mongodb_connected",
+    "MongoDBLogger bağlantısı kuruldu mu (1 = evet)"
+)
+MONGO_CONNECT_ATTEMPTS = REGISTRY.counter(
+    "mongodb_connect_attempts_total",
+    "Arka plan bağlantı denemeleri (ok / error)",
+    ("result",)
+)
+
+
+class MongoUnavailable(RuntimeError):
+    """MongoDB bağlantısı (henüz) yok - API 503 döner"""
+
+
+class LazyMongoLogger:
+    """
+    MongoDBLogger vekili; metotlar (get_user, log_message, ...) ilk çağrıda bağlanır
+
+    Args:
+        factory: Bağlı MongoDBLogger döndüren fonksiyon
+        connect_wait: İlk bağlantı denemesinin istek içinde beklenebileceği süre
+        retry_interval: Başarısız denemeden sonra bekleme
+    """
+
+    def __init__(self,
+                 factory: Optional[Callable[[], Any]] = None,
+                 connect_wait: float = MONGO_CONNECT_WAIT,
+                 retry_interval: float = MONGO_RETRY_INTERVAL):
+        self._factory = factory or _default_factory
+        self.connect_wait = connect_wait
+        self.retry_interval = retry_interval
+        self._callbacks: List[Callable[[Any], None]] = []
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._logger = None
+        self._error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._attempted = threading.Event()   # ilk deneme bitti (başarılı / başarısız)
+        self._closed = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def monitor(self):
+        """Bağlantıdan bağımsız komut istatistikleri (/admin/mongo/stats)"""
+        from api_service.mongo_monitor import default_monitor
+        return self._logger.monitor if self._logger is not None else default_monitor
+
+    @property
+    def available(self) -> bool:
+        return self._pid == os.getpid() and self._logger is not None
+
+    # ============================================
+    # BAĞLANTI
+    # ============================================
+
+    def start(self):
+        """Bağlantıyı beklemeden arka planda başlat"""
+        if self._pid != os.getpid():
+            self._reset()
+        if self._thread is not None or self._closed.is_set():
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._connect_loop, name="mongo-connect", daemon=True)
+                self._thread.start()
+
+    def get(self, wait: Optional[float] = None):
+        """
+        Bağlı MongoDBLogger
+
+        Raises:
+            MongoUnavailable: Bağlantı yok; ilk deneme sürüyorsa en fazla wait kadar beklenir
+        """
+        if self._pid != os.getpid():
+            self._reset()
+        if self._logger is not None:
+            return self._logger
+        self.start()
+        if self._error is None:
+            self._attempted.wait(self.connect_wait if wait is None else wait)
+        if self._logger is None:
+            raise MongoUnavailable(f"MongoDB kullanılamıyor: {self._error or 'bağlantı kuruluyor'}")
+        return self._logger
+
+    def _connect_loop(self):
+        while not self._closed.is_set():
+            try:
+                instance = self._factory()
+            except Exception as e:
+                self._error = str(e) or type(e).__name__
+                MONGO_CONNECT_ATTEMPTS.inc(result="error")
+                logger.warning(f"⚠️ MongoDB'ye bağlanılamadı, {self.retry_interval:.0f}s sonra "
+                               f"tekrar denenecek (degraded mode): {self._error}")
+                self._attempted.set()
+                self._closed.wait(self.retry_interval)
+                continue
+
+            if self._closed.is_set():
+                instance.close()
+                return
+            self._logger = instance
+            self._error = None
+            MONGO_CONNECT_ATTEMPTS.inc(result="ok")
+            MONGO_CONNECTED.set(1)
+            for callback in list(self._callbacks):
+                try:
+                    callback(instance)
+                except Exception as e:
+                    logger.warning(f"⚠️ MongoDB on_connect callback hatası: {e}")
+            self._attempted.set()
+            return
+
+    def on_connect(self, callback: Callable[[Any], None]):
+        """Bağlantı kurulunca callback(mongo_logger); zaten bağlıysa hemen çağrılır"""
+        self._callbacks.append(callback)
+        if self.available:
+            callback(self._logger)
+
+    # ============================================
+    # VEKİL
+    # ============================================
+
+    def __getattr__(self, name: str):
+        # Sadece burada tanımlı olmayan MongoDBLogger metotları için çağrılır
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.get(), name)
+
+    def health_check(self) -> bool:
+        """Bağlantı yoksa beklemeden False (ve arka planda bağlanmayı dener)"""
+        try:
+            return self.get(wait=0).health_check()
+        except MongoUnavailable:
+            return False
+
+    def close(self):
+        self._closed.set()
+        if self.available:
+            self._logger.close()
+        self._logger = None
+        MONGO_CONNECTED.set(0)
+
+
+def _default_factory():
+    from api_service.mongodb_logger import MongoDBLogger
+    return MongoDBLogger(MONGODB_URI, MONGODB_DB)
+
+
+_shared: Optional[LazyMongoLogger] = None
+_shared_lock = threading.Lock()
+
+
+def shared_mongo_logger() -> LazyMongoLogger:
+    """Process başına tek MongoDB bağlantısı (API, action'lar ve profil tamponu ortak kullanır)"""
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                _shared = LazyMongoLogger()
+    return _shared
@@ -1,15 +1,39 @@
 # api_service/main.py
-from fastapi import FastAPI, HTTPException
+from fastapi import BackgroundTasks, FastAPI, Header, HTTPException, Query, Request, Response, WebSocket
+from fastapi.responses import PlainTextResponse
+from starlette.routing import Match
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 import uvicorn
+import json
+import logging
 import sys
 import os
+import time
+import uuid
+from datetime import date, datetime
 
 # MongoDB logger'ı import et
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from api_service.mongodb_logger import MongoDBLogger
+from pymongo.errors import ConnectionFailure
+from api_service.mongodb_logger import PROCESS_ORIGIN, IdempotencyConflict
+from api_service.lazy_mongo import MongoUnavailable, shared_mongo_logger
+from api_service.profile_cache import InvalidationSubscriber, ProfileCache
+from api_service.health_prober import ACTION_SERVER_URL, OLLAMA_BASE_URL, RASA_URL, HealthProber
+from api_service.chat_gateway import ChatGateway, UVICORN_WS_OPTIONS
+from api_service.pricing import pricing_engine, build_quote
+from api_service.metrics import REGISTRY, PROMETHEUS_CONTENT_TYPE, current_scope, render_prometheus
+from api_service.http_cache import catalog_response, catalog_versions
+from api_service.catalog_mmap import API_CLINIC_SCHEMA, API_HOTEL_SCHEMA, shared_catalog
+from api_service.catalog_data import CLINICS_DB, HOTELS_DB
+from api_service.geo_index import (BUNDLE_HOTEL_CANDIDATES, BUNDLE_HOTEL_RADIUS_KM,
+                                   GeoIndex, GeoIndexCache, coordinates)
+from api_service.responses import MongoJSONResponse
+from api_service.conversation_export import ConversationExporter, EXPORT_FORMATS, ExportUnavailable
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Health Tourism API", version="1.0.0")
 
@@ -22,8 +46,75 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# MongoDB logger instance
-mongo_logger = MongoDBLogger()
+# Endpoint bazlı latency histogramı
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "FastAPI endpoint süresi",
+    ("method", "path", "status")
+)
+
+def _route_path(request: Request) -> str:
+    """İsteğin eşleştiği route şablonu - label kardinalitesi sabit kalsın diye"""
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Her isteğin süresini route şablonu (/api/profile/{user_id}) ile kaydet"""
+    start = time.perf_counter()
+    path = _route_path(request)
+    token = current_scope.set(f"{request.method} {path}")
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            path=path,
+            status=str(status)
+        )
+        current_scope.reset(token)
+
+# MongoDB logger - ilk kullanımda arka planda bağlanır; MongoDB kapalıyken API
+# degraded mode'da açılır (katalog endpoint'leri çalışır, MongoDB endpoint'leri 503)
+mongo_logger = shared_mongo_logger()
+MONGO_DOWN_ERRORS = (MongoUnavailable, ConnectionFailure)
+
+# Profil okumaları için read-through cache; bu process'teki yazmalar anında invalidate eder
+profile_cache = ProfileCache()
+# PROFILE_CACHE_INVALIDATION=mongo: diğer process'lerin yazmaları user_changes üzerinden gelir
+profile_invalidation = None
+
+def _on_mongo_connect(connected_logger):
+    global profile_invalidation
+    connected_logger.add_user_listener(profile_cache.invalidate)
+    if connected_logger.user_changes is not None:
+        profile_invalidation = InvalidationSubscriber(connected_logger.user_changes, profile_cache, PROCESS_ORIGIN)
+        profile_invalidation.start()
+
+mongo_logger.on_connect(_on_mongo_connect)
+
+# Bağımlılık durumları tek arka plan prober'ından okunur (/health, /health/all)
+def _mongo_probe():
+    if not mongo_logger.health_check():
+        raise RuntimeError("MongoDB ping başarısız")
+
+health_prober = HealthProber()
+health_prober.add_probe("mongodb", _mongo_probe)
+health_prober.add_http_probe("rasa", f"{RASA_URL}/")
+health_prober.add_http_probe("action_server", f"{ACTION_SERVER_URL}/health")
+health_prober.add_http_probe("ollama", f"{OLLAMA_BASE_URL}/api/version")
+# Bağlantı arka planda kurulunca durum bir sonraki tura kalmasın
+mongo_logger.on_connect(lambda _: health_prober.refresh("mongodb"))
+
+# Tarayıcı -> Rasa kalıcı chat bağlantısı (/ws/chat)
+chat_gateway = ChatGateway(RASA_URL)
 
 # ============ MODELS ============
 class Clinic(BaseModel):
@@ -37,6 +128,8 @@ class Clinic(BaseModel):
     accreditations: List[str]
     languages: List[str]
     price_range: str
+    lat: Optional[float] = None
+    lon: Optional[float] = None
 
 class Hotel(BaseModel):
     id: int
@@ -46,6 +139,8 @@ class Hotel(BaseModel):
     features: List[str]
     price_per_night: int
     currency: str
+    lat: Optional[float] = None
+    lon: Optional[float] = None
 
 class SearchRequest(BaseModel):
     treatment: Optional[str] = None
@@ -53,63 +148,137 @@ class SearchRequest(BaseModel):
     region: Optional[str] = None
     budget: Optional[int] = None
 
+class BatchSearchQuery(SearchRequest):
+    type: Literal["clinics", "hotels", "package"]
+    nights: int = 7                          # sadece package
+    radius_km: float = Field(default=BUNDLE_HOTEL_RADIUS_KM, gt=0)   # sadece package
+    limit: Optional[int] = Field(default=None, ge=0)   # sonuç listesini kısalt (total değişmez)
+
+class BatchSearchRequest(BaseModel):
+    queries: List[BatchSearchQuery]
+
+class ConversationExportRequest(BaseModel):
+    start_date: date
+    end_date: Optional[date] = None          # hariç; varsayılan bugün
+    name: str = "conversations"              # EXPORT_ROOT altındaki klasör
+    format: str = "parquet"
+    compression: str = "zstd"
+
+class BookingTransition(BaseModel):
+    booking_id: str
+    from_status: str = Field(alias="from")   # beklenen mevcut durum
+    to: str
+
+class BookingTransitionRequest(BaseModel):
+    transitions: List[BookingTransition]
+
 # ============ MOCK DATABASE ============
-CLINICS_DB = [
-    {
-        "id": 1,
-        "name": "Antmodern Oral & Dental Health Clinic",
-        "address": "Fener Mah. Bülent Ecevit Blv. No:50 Muratpaşa/Antalya",
-        "city": "Antalya",
-        "district": "Muratpaşa",
-        "treatments": ["Dental Implant", "Teeth Whitening", "Veneers"],
-        "rating": 4.8,
-        "accreditations": ["JCI", "ISO 9001"],
-        "languages": ["Turkish", "English", "Russian"],
-        "price_range": "medium"
-    },
-    {
-        "id": 2,
-        "name": "Dr. Gökhan Özerdem Clinic",
-        "address": "Yeşilbahçe Mah. Metin Kasapoğlu Cad. No: 48/11",
-        "city": "Antalya",
-        "district": "Muratpaşa",
-        "treatments": ["Rhinoplasty", "Face Lift", "Breast Surgery"],
-        "rating": 4.9,
-        "accreditations": ["JCI", "ISAPS"],
-        "languages": ["Turkish", "English", "Arabic"],
-        "price_range": "premium"
+# Kayıtlar catalog_data.py'de (compile_catalog.py de oradan derler)
+
+# CATALOG_PATH ile derlenmiş katalog verilmişse aramalar mmap'lenmiş dosyadan yapılır.
+# API kendi kayıtlarının kataloglarını (api_clinics / api_hotels) okur; action
+# server'ın clinics / hotels kataloğu farklı bir veri setidir
+catalog_file = shared_catalog()
+CLINIC_CATALOG = catalog_file[API_CLINIC_SCHEMA.name] if catalog_file and API_CLINIC_SCHEMA.name in catalog_file else None
+HOTEL_CATALOG = catalog_file[API_HOTEL_SCHEMA.name] if catalog_file and API_HOTEL_SCHEMA.name in catalog_file else None
+
+# Katalog versiyonları - ETag'ler bunlardan türetilir, katalog değişince tekrar register edilmeli.
+# Anahtarlar versiyonladıkları API kataloglarının adlarıdır
+CLINICS = API_CLINIC_SCHEMA.name
+HOTELS = API_HOTEL_SCHEMA.name
+if CLINIC_CATALOG is not None:
+    catalog_versions.set(CLINICS, CLINIC_CATALOG.version)
+else:
+    catalog_versions.register(CLINICS, CLINICS_DB)
+if HOTEL_CATALOG is not None:
+    catalog_versions.set(HOTELS, HOTEL_CATALOG.version)
+else:
+    catalog_versions.register(HOTELS, HOTELS_DB)
+
+def _clinic_query(request: SearchRequest) -> dict:
+    """ETag için normalize klinik sorgusu (sonucu etkilemeyen alanlar hariç)"""
+    return {
+        "city": request.city.lower() if request.city else None,
+        "treatment": request.treatment.lower() if request.treatment else None
     }
-]
-
-HOTELS_DB = [
-    {
-        "id": 1,
-        "name": "Delphin Palace",
-        "region": "Lara",
-        "stars": 5,
-        "features": ["Spa", "Pool", "All Inclusive", "Beach"],
-        "price_per_night": 200,
-        "currency": "EUR"
-    },
-    {
-        "id": 2,
-        "name": "Regnum Carya Golf & Spa Resort",
-        "region": "Belek",
-        "stars": 5,
-        "features": ["Spa", "Golf", "Pool"],
-        "price_per_night": 350,
-        "currency": "EUR"
+
+def _hotel_query(request: SearchRequest) -> dict:
+    return {
+        "region": request.region.lower() if request.region else None,
+        "budget": request.budget or None
     }
-]
 
-# ============ ENDPOINTS ============
-@app.get("/")
-def root():
-    return {"message": "Health Tourism API v1.0", "status": "running"}
+class CatalogSnapshot:
+    """
+    Bir isteğin tüm aramalarının kullandığı katalog görünümü
 
-@app.post("/api/clinics/search")
-def search_clinics(request: SearchRequest):
-    """Klinik arama"""
+    Katalog nesneleri ve versiyonları bir kez okunur; batch'teki alt sorgular
+    aynı veriyi görür. mmap kayıtları istek içinde bir kez dict'e çözülür.
+    """
+
+    def __init__(self):
+        self.clinics = CLINIC_CATALOG
+        self.hotels = HOTEL_CATALOG
+        self.hotel_records = HOTELS_DB
+        self.versions = {name: catalog_versions.get(name) for name in (CLINICS, HOTELS)}
+        self._decoded = {}
+
+    def decode(self, catalog, recno: int) -> dict:
+        key = (id(catalog), recno)
+        record = self._decoded.get(key)
+        if record is None:
+            record = self._decoded[key] = catalog.decode(recno)
+        return record
+
+    def hotel_geo(self) -> GeoIndex:
+        """Otel koordinat index'i (item: katalog kayıt no'su veya HOTELS_DB sırası)"""
+        if self.hotels is not None:
+            return _hotel_geo.get(self.versions[HOTELS], lambda: GeoIndex.from_catalog(self.hotels))
+        records = self.hotel_records
+        return _hotel_geo.get(self.versions[HOTELS], lambda: GeoIndex(
+            (position, *coordinates(hotel)) for position, hotel in enumerate(records) if coordinates(hotel)
+        ))
+
+    def hotel(self, item: int) -> dict:
+        return self.decode(self.hotels, item) if self.hotels is not None else self.hotel_records[item]
+
+# Otel geo index'i katalog versiyonu değişince yeniden kurulur
+_hotel_geo = GeoIndexCache()
+
+def _search_clinics_catalog(request: SearchRequest, snapshot: CatalogSnapshot) -> dict:
+    catalog = snapshot.clinics
+    recnos = catalog.lookup("city", request.city) if request.city else catalog.all()
+    
+    if request.treatment:
+        treatment_lower = request.treatment.lower()
+        recnos = [r for r in recnos
+                  if any(treatment_lower in t.lower() for t in catalog.field(r, "treatments") or ())]
+    
+    results = [snapshot.decode(catalog, r) for r in recnos]
+    return {
+        "total": len(results),
+        "results": results
+    }
+
+def _search_hotels_catalog(request: SearchRequest, snapshot: CatalogSnapshot) -> dict:
+    catalog = snapshot.hotels
+    recnos = catalog.lookup("region", request.region) if request.region else catalog.all()
+    
+    if request.budget:
+        recnos = [r for r in recnos
+                  if (catalog.field(r, "price_per_night") or 0) <= request.budget]
+    
+    results = [snapshot.decode(catalog, r) for r in recnos]
+    return {
+        "total": len(results),
+        "results": results
+    }
+
+def _search_clinics(request: SearchRequest, snapshot: Optional[CatalogSnapshot] = None) -> dict:
+    snapshot = snapshot or CatalogSnapshot()
+    if snapshot.clinics is not None:
+        return _search_clinics_catalog(request, snapshot)
+    
     results = CLINICS_DB.copy()
     
     if request.city:
@@ -124,17 +293,11 @@ def search_clinics(request: SearchRequest):
         "results": results
     }
 
-@app.get("/api/clinics/{clinic_id}")
-def get_clinic_details(clinic_id: int):
-    """Klinik detayları"""
-    clinic = next((c for c in CLINICS_DB if c["id"] == clinic_id), None)
-    if not clinic:
-        raise HTTPException(status_code=404, detail="Clinic not found")
-    return clinic
-
-@app.post("/api/hotels/search")
-def search_hotels(request: SearchRequest):
-    """Otel arama"""
+def _search_hotels(request: SearchRequest, snapshot: Optional[CatalogSnapshot] = None) -> dict:
+    snapshot = snapshot or CatalogSnapshot()
+    if snapshot.hotels is not None:
+        return _search_hotels_catalog(request, snapshot)
+    
     results = HOTELS_DB.copy()
     
     if request.region:
@@ -148,62 +311,223 @@ def search_hotels(request: SearchRequest):
         "results": results
     }
 
-@app.post("/api/packages/generate")
-def generate_package(
-    treatment: str,
-    city: str,
-    budget: int,
-    nights: int = 7
-):
-    """Paket önerisi oluştur"""
-    # Klinikleri filtrele
-    clinics = [c for c in CLINICS_DB if c["city"].lower() == city.lower()]
+def _package_candidates(clinics: List[dict], snapshot: CatalogSnapshot, radius_km: float) -> List[tuple]:
+    """
+    Her klinik için (klinik sırası, klinik, otel, mesafe_km) adayları
+
+    Koordinatlı klinikler için radius_km içindeki en yakın
+    BUNDLE_HOTEL_CANDIDATES otel, yakından uzağa. Koordinatsız klinik veya
+    koordinatsız katalog için eski eşleştirme (i'nci otel), mesafesiz.
+    """
+    geo = snapshot.hotel_geo()
+    candidates = []
+    fallback = None
+    for i, clinic in enumerate(clinics):
+        point = coordinates(clinic)
+        if point is not None and len(geo):
+            for distance, item in geo.nearest(*point, k=BUNDLE_HOTEL_CANDIDATES, radius_km=radius_km):
+                candidates.append((i, clinic, snapshot.hotel(item), round(distance, 1)))
+            continue
+        if fallback is None:
+            if snapshot.hotels is not None:
+                fallback = [snapshot.decode(snapshot.hotels, r) for r in snapshot.hotels.all()[:3]]
+            else:
+                fallback = list(snapshot.hotel_records)
+        if fallback:
+            candidates.append((i, clinic, fallback[i % len(fallback)], None))
+    return candidates
+
+def _generate_package(treatment: str, city: str, budget: int, nights: int,
+                      snapshot: Optional[CatalogSnapshot] = None,
+                      radius_km: float = BUNDLE_HOTEL_RADIUS_KM) -> dict:
+    snapshot = snapshot or CatalogSnapshot()
+    if snapshot.clinics is not None:
+        # En fazla 3 aday paket - sadece gereken kayıtlar çözülür
+        clinics = [snapshot.decode(snapshot.clinics, r) for r in snapshot.clinics.lookup("city", city)[:3]]
+    else:
+        # Klinikleri filtrele
+        clinics = [c for c in CLINICS_DB if c["city"].lower() == city.lower()][:3]
     
-    # Otelleri filtrele
-    hotels = HOTELS_DB.copy()
+    # Klinik başına yakındaki oteller; tüm adaylar tek seferde fiyatlanır
+    candidates = _package_candidates(clinics, snapshot, radius_km)
+    costs = pricing_engine.quote_batch([
+        build_quote(treatment, clinic, hotel, nights=nights)
+        for _, clinic, hotel, _ in candidates
+    ])
     
+    # Her klinik için bütçeye sığan en yakın otel
     packages = []
-    for i, clinic in enumerate(clinics[:3]):
-        hotel = hotels[i % len(hotels)]
-        
-        treatment_price = 2000 if clinic["price_range"] == "medium" else 3500
-        hotel_cost = hotel["price_per_night"] * nights
-        flight_cost = 600
-        transfer_cost = 150
-        
-        total = treatment_price + hotel_cost + flight_cost + transfer_cost
-        
-        if total <= budget:
-            packages.append({
-                "package_id": i + 1,
-                "clinic": clinic,
-                "hotel": hotel,
-                "costs": {
-                    "treatment": treatment_price,
-                    "hotel": hotel_cost,
-                    "flight": flight_cost,
-                    "transfer": transfer_cost,
-                    "total": total
-                },
-                "nights": nights
-            })
+    paired = set()
+    for (i, clinic, hotel, distance), package_costs in zip(candidates, costs):
+        if i in paired or package_costs["total"] > budget:
+            continue
+        paired.add(i)
+        packages.append({
+            "package_id": i + 1,
+            "clinic": clinic,
+            "hotel": hotel,
+            "distance_km": distance,
+            "costs": package_costs,
+            "nights": nights
+        })
     
     return {
         "total_packages": len(packages),
         "packages": packages
     }
 
+# Batch aramada izin verilen en fazla alt sorgu
+SEARCH_BATCH_MAX = int(os.getenv("SEARCH_BATCH_MAX", "50"))
+
+def _batch_query_key(query: "BatchSearchQuery") -> dict:
+    """Alt sorgunun normalize hali - aynı anahtarlı sorgular bir kez çalışır"""
+    if query.type == "clinics":
+        return {"type": "clinics", **_clinic_query(query), "limit": query.limit}
+    if query.type == "hotels":
+        return {"type": "hotels", **_hotel_query(query), "limit": query.limit}
+    return {"type": "package", "treatment": query.treatment, "city": query.city.lower(),
+            "budget": query.budget, "nights": query.nights, "radius_km": query.radius_km}
+
+def _run_batch_query(query: "BatchSearchQuery", snapshot: CatalogSnapshot) -> dict:
+    if query.type == "package":
+        return {"type": "package", **_generate_package(query.treatment, query.city, query.budget,
+                                                        query.nights, snapshot, query.radius_km)}
+    search = _search_clinics if query.type == "clinics" else _search_hotels
+    result = search(query, snapshot)
+    results = result["results"][:query.limit] if query.limit is not None else result["results"]
+    return {"type": query.type, "total": result["total"], "results": results}
+
+def _search_batch(queries: List["BatchSearchQuery"], snapshot: CatalogSnapshot) -> dict:
+    computed = {}
+    results = []
+    for query in queries:
+        key = json.dumps(_batch_query_key(query), sort_keys=True, ensure_ascii=False)
+        if key not in computed:
+            computed[key] = _run_batch_query(query, snapshot)
+        results.append(computed[key])
+    return {
+        "total": len(results),
+        "unique": len(computed),
+        "catalog_versions": snapshot.versions,
+        "results": results
+    }
+
+# ============ ENDPOINTS ============
+@app.get("/")
+def root():
+    return {"message": "Health Tourism API v1.0", "status": "running"}
+
+@app.post("/api/clinics/search")
+def search_clinics(request: SearchRequest, http_request: Request):
+    """Klinik arama (ETag + sıkıştırma; POST olduğundan eşleşen If-None-Match 412 döner)"""
+    return catalog_response(http_request, CLINICS, _clinic_query(request), lambda: _search_clinics(request))
+
+@app.get("/api/clinics/search")
+def search_clinics_get(http_request: Request, city: Optional[str] = None, treatment: Optional[str] = None):
+    """Klinik arama - GET (tarayıcı / CDN cache'lenebilir, If-None-Match ile 304)"""
+    request = SearchRequest(city=city, treatment=treatment)
+    return catalog_response(http_request, CLINICS, _clinic_query(request), lambda: _search_clinics(request))
+
+@app.get("/api/clinics/{clinic_id}")
+def get_clinic_details(clinic_id: int, http_request: Request):
+    """Klinik detayları"""
+    def lookup():
+        if CLINIC_CATALOG is not None:
+            view = CLINIC_CATALOG.get(clinic_id)
+            clinic = view.to_dict() if view is not None else None
+        else:
+            clinic = next((c for c in CLINICS_DB if c["id"] == clinic_id), None)
+        if not clinic:
+            raise HTTPException(status_code=404, detail="Clinic not found")
+        return clinic
+
+    return catalog_response(http_request, CLINICS, {"id": clinic_id}, lookup)
+
+@app.post("/api/hotels/search")
+def search_hotels(request: SearchRequest, http_request: Request):
+    """Otel arama (ETag + sıkıştırma; POST olduğundan eşleşen If-None-Match 412 döner)"""
+    return catalog_response(http_request, HOTELS, _hotel_query(request), lambda: _search_hotels(request))
+
+@app.get("/api/hotels/search")
+def search_hotels_get(http_request: Request, region: Optional[str] = None, budget: Optional[int] = None):
+    """Otel arama - GET (tarayıcı / CDN cache'lenebilir, If-None-Match ile 304)"""
+    request = SearchRequest(region=region, budget=budget)
+    return catalog_response(http_request, HOTELS, _hotel_query(request), lambda: _search_hotels(request))
+
+@app.post("/api/packages/generate")
+def generate_package(
+    treatment: str,
+    city: str,
+    budget: int,
+    nights: int = 7,
+    radius_km: float = Query(BUNDLE_HOTEL_RADIUS_KM, gt=0)
+):
+    """Paket önerisi oluştur - her kliniğe radius_km içindeki en yakın, bütçeye sığan otel"""
+    return _generate_package(treatment, city, budget, nights, radius_km=radius_km)
+
+@app.post("/api/search/batch")
+def search_batch(request: BatchSearchRequest, http_request: Request):
+    """
+    Çok sayıda klinik / otel / paket araması tek istekte
+
+    Tüm alt sorgular aynı katalog görünümünü kullanır, aynı sorgular bir kez
+    çalışır; sonuçlar istek sırasıyla döner. ETag iki katalog versiyonundan
+    ve normalize sorgulardan türetilir.
+    """
+    if not request.queries:
+        raise HTTPException(status_code=400, detail="En az bir sorgu gerekli")
+    if len(request.queries) > SEARCH_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"En fazla {SEARCH_BATCH_MAX} sorgu gönderilebilir")
+    for i, query in enumerate(request.queries):
+        if query.type == "package" and not (query.treatment and query.city and query.budget):
+            raise HTTPException(status_code=400, detail=f"queries[{i}]: package için treatment, city ve budget gerekli")
+
+    snapshot = CatalogSnapshot()
+    keys = [_batch_query_key(query) for query in request.queries]
+    return catalog_response(http_request, (CLINICS, HOTELS), {"batch": keys},
+                            lambda: _search_batch(request.queries, snapshot))
+
 # ============ MONGODB ENDPOINTS ============
 @app.get("/api/conversations/{user_id}")
-def get_user_conversations(user_id: str, limit: int = 50):
-    """Kullanıcının conversation geçmişini getir"""
+def get_user_conversations(user_id: str, limit: int = 50, fields: Optional[str] = None):
+    """
+    Kullanıcının conversation geçmişini getir
+
+    fields: "summary" (sender, preview, timestamp - covered query) veya virgülle ayrılmış alan listesi
+    """
     try:
-        conversations = mongo_logger.get_user_conversations(user_id, limit)
-        return {
+        conversations = mongo_logger.get_user_conversations(user_id, limit, fields=fields)
+        # Doğrudan Response döndürülür - jsonable_encoder atlanır
+        return MongoJSONResponse({
             "user_id": user_id,
             "total": len(conversations),
             "conversations": conversations
-        }
+        })
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except MONGO_DOWN_ERRORS as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/conversations/{user_id}/history")
+def get_conversation_history(user_id: str,
+                             start_date: Optional[datetime] = None,
+                             end_date: Optional[datetime] = None,
+                             fields: Optional[str] = None):
+    """Tarih aralığındaki conversation'ları getir (eskiden yeniye)"""
+    try:
+        conversations = mongo_logger.get_conversation_history(user_id, start_date, end_date, fields=fields)
+        return MongoJSONResponse({
+            "user_id": user_id,
+            "total": len(conversations),
+            "conversations": conversations
+        })
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except MONGO_DOWN_ERRORS as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -211,17 +535,22 @@ def get_user_conversations(user_id: str, limit: int = 50):
 def get_user_profile(user_id: str):
     """Kullanıcı profilini getir"""
     try:
-        user = mongo_logger.get_user(user_id)
+        # Cache'teki profiller MongoDB kapalıyken de döner. Action server tamponlarında bekleyen
+        # değerler flush'ta (PROFILE_FLUSH_QUIET) ya da uzun oturumlarda yayınlandıkça
+        # (PROFILE_PUBLISH_INTERVAL) görünür; bkz. profile_buffer.py
+        user = profile_cache.get(user_id, lambda uid: mongo_logger.get_user_with_pending(uid))
         if not user:
             return {
                 "user_id": user_id,
                 "message": "User not found",
                 "profile": None
             }
-        return {
+        return MongoJSONResponse({
             "user_id": user_id,
             "profile": user
-        }
+        })
+    except MONGO_DOWN_ERRORS as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -236,6 +565,8 @@ def update_user_profile(user_id: str, profile_data: dict):
             "message": "Profile updated",
             "user_id": user_id
         }
+    except MONGO_DOWN_ERRORS as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -248,6 +579,8 @@ def get_intent_statistics(days: int = 30):
             "period_days": days,
             "intent_stats": stats
         }
+    except MONGO_DOWN_ERRORS as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -262,23 +595,211 @@ def get_active_users(days: int = 7):
             "active_users": count,
             "total_conversations": total_conversations
         }
+    except MONGO_DOWN_ERRORS as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# ============ BOOKING ENDPOINTS ============
+@app.post("/api/bookings", status_code=201)
+def create_booking(booking_data: dict, response: Response,
+                   idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key")):
+    """
+    Booking oluştur
+
+    Idempotency-Key header'ı ile tekrar gönderilen istek yeni kayıt açmaz;
+    mevcut booking 200 ile döner. Key kullanıcı (user_id) bazındadır; aynı
+    key farklı içerikle tekrar gelirse 422.
+    """
+    try:
+        booking_id, created = mongo_logger.create_booking_once(booking_data, idempotency_key)
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except MONGO_DOWN_ERRORS as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if not created:
+        response.status_code = 200
+    return {"booking_id": booking_id, "created": created}
+
+@app.get("/api/bookings")
+def query_bookings(clinic_id: Optional[int] = None,
+                   status: Optional[List[str]] = Query(default=None),
+                   date_from: Optional[datetime] = None,
+                   date_to: Optional[datetime] = None,
+                   limit: int = 50,
+                   cursor: Optional[str] = None,
+                   fields: str = "summary"):
+    """
+    Koordinatör panosu: klinik / durum / tarih aralığına göre booking'ler
+
+    Sonraki sayfa için dönen next_cursor, cursor parametresiyle gönderilir.
+    """
+    try:
+        bookings, next_cursor = mongo_logger.query_bookings(
+            clinic_id=clinic_id, status=status, date_from=date_from, date_to=date_to,
+            limit=limit, cursor=cursor, fields=fields
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except MONGO_DOWN_ERRORS as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
+        logger.error(f"❌ Booking sorgusu başarısız: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    return MongoJSONResponse({"total": len(bookings), "bookings": bookings, "next_cursor": next_cursor})
+
+@app.post("/admin/bookings/transitions")
+def transition_bookings(request: BookingTransitionRequest):
+    """
+    Toplu durum geçişi (ör. koordinatörlerin gece onay çalıştırması)
+
+    Her geçiş sadece booking hâlâ "from" durumundaysa uygulanır; sonuçlar istek sırasıyla döner.
+    """
+    try:
+        results = mongo_logger.transition_bookings([
+            {"booking_id": t.booking_id, "from": t.from_status, "to": t.to}
+            for t in request.transitions
+        ])
+    except MONGO_DOWN_ERRORS as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    counts = {}
+    for result in results:
+        counts[result["result"]] = counts.get(result["result"], 0) + 1
+    return {"total": len(results), "counts": counts, "results": results}
 
 @app.get("/health")
 def health_check():
-    """Sistem sağlık kontrolü"""
-    mongo_health = mongo_logger.health_check()
+    """Sistem sağlık kontrolü (MongoDB durumu prober'ın son sonucundan)"""
+    mongo_status = health_prober.status("mongodb")
+    mongo_health = mongo_status["status"] == "up" if mongo_status else mongo_logger.health_check()
     return {
         "status": "healthy",
         "service": "api",
         "mongodb": "connected" if mongo_health else "disconnected"
     }
 
+@app.get("/health/all")
+def health_all():
+    """
+    Tüm bağımlılıkların cache'lenmiş durumu ve son probe gecikmesi
+
+    İstek başına probe yapılmaz; durumlar HEALTH_PROBE_INTERVAL'de bir yenilenir.
+    """
+    snapshot = health_prober.snapshot()
+    snapshot["services"]["api"] = {"status": "up"}
+    return MongoJSONResponse(snapshot)
+
+# ============ ADMIN ENDPOINTS ============
+@app.get("/admin/mongo/stats")
+def get_mongo_stats(slow_limit: int = 50, reset: bool = False):
+    """MongoDB komut istatistikleri, slow query'ler ve explain planları"""
+    summary = mongo_logger.monitor.summary(slow_limit)
+    if reset:
+        mongo_logger.monitor.reset()
+    return summary
+
+@app.get("/admin/indexes")
+def get_index_report():
+    """Index boyutları, $indexStats kullanımları ve kullanılmayan / gereksiz index önerileri"""
+    try:
+        return MongoJSONResponse(mongo_logger.index_manager.report())
+    except MONGO_DOWN_ERRORS as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@app.post("/admin/indexes/apply")
+def apply_indexes(force: bool = False, drop_unmanaged: bool = False):
+    """
+    Index tanımlarını şimdi uygula
+
+    force: versiyon güncel olsa da farkı uygula; drop_unmanaged: tanımda olmayan index'leri sil
+    """
+    try:
+        results = mongo_logger.index_manager.apply(force=force, drop_unmanaged=drop_unmanaged)
+    except MONGO_DOWN_ERRORS as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return MongoJSONResponse({"collections": results})
+
+# Export job'ları: job_id -> durum (process içinde tutulur)
+EXPORT_ROOT = os.getenv("EXPORT_ROOT", "exports")
+export_jobs = {}
+
+def _run_export(job_id: str, exporter: ConversationExporter, request: ConversationExportRequest):
+    job = export_jobs[job_id]
+    job["status"] = "running"
+    try:
+        manifest = exporter.run(request.start_date, request.end_date)
+        job.update(status="completed",
+                   partitions=len(manifest["partitions"]),
+                   rows=sum(p["rows"] for p in manifest["partitions"].values()))
+    except Exception as e:
+        job.update(status="failed", error=str(e))
+    job["finished_at"] = datetime.utcnow()
+
+@app.post("/admin/export/conversations", status_code=202)
+def export_conversations(request: ConversationExportRequest, background_tasks: BackgroundTasks):
+    """Conversation'ları arka planda Parquet / Arrow partition'larına export et"""
+    if request.format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Geçersiz format: {request.format}")
+    if not request.name or os.path.basename(request.name) != request.name or request.name.startswith("."):
+        raise HTTPException(status_code=400, detail="name tek bir klasör adı olmalı")
+
+    output_dir = os.path.join(EXPORT_ROOT, request.name)
+    if any(job["output_dir"] == output_dir and job["status"] in ("queued", "running")
+           for job in export_jobs.values()):
+        raise HTTPException(status_code=409, detail=f"{output_dir} için export zaten çalışıyor")
+    try:
+        exporter = ConversationExporter(mongo_logger.get(), output_dir, request.format, request.compression)
+    except (ExportUnavailable, MongoUnavailable) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    job_id = uuid.uuid4().hex[:12]
+    export_jobs[job_id] = {"job_id": job_id, "status": "queued", "output_dir": output_dir,
+                           "started_at": datetime.utcnow()}
+    background_tasks.add_task(_run_export, job_id, exporter, request)
+    return MongoJSONResponse(export_jobs[job_id], status_code=202)
+
+@app.get("/admin/export/conversations/{job_id}")
+def get_export_job(job_id: str):
+    """Export job durumu"""
+    job = export_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Export job bulunamadı")
+    return MongoJSONResponse(job)
+
+# ============ CHAT GATEWAY ============
+@app.websocket("/ws/chat")
+async def chat_socket(websocket: WebSocket):
+    """
+    Oturum başına kalıcı chat bağlantısı (/ws/chat?sender=<user_id>)
+
+    Rasa'nın ürettiği her bot mesajı tur bitmeden tarayıcıya gönderilir.
+    """
+    await chat_gateway.serve(websocket)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus metrikleri"""
+    return PlainTextResponse(render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.on_event("startup")
+def startup_event():
+    # MongoDB'yi beklemeden aç; bağlantı arka planda kurulur
+    mongo_logger.start()
+    health_prober.start()
+
 # Cleanup on shutdown
 @app.on_event("shutdown")
 def shutdown_event():
+    health_prober.stop()
+    if profile_invalidation is not None:
+        profile_invalidation.stop()
     mongo_logger.close()
 
+@app.on_event("shutdown")
+async def close_chat_gateway():
+    await chat_gateway.aclose()
+
 if __name__ == "__main__":
-    uvicorn.run(app, host="127.0.0.1", port=8000, log_level="info")
\ No newline at end of file
+    uvicorn.run(app, host="127.0.0.1", port=8000, log_level="info", **UVICORN_WS_OPTIONS)
\ No newline at end of file
@@ -0,0 +1,332 @@
+# api_service/metrics.py
+"""
+Hafif metrik katmanı - Prometheus text formatında histogram / counter / gauge
+
+Hem FastAPI servisi hem de Rasa action server bu modülü kullanır.
+Harici bağımlılık yoktur; her process kendi REGISTRY'sini tutar ve
+/metrics endpoint'inden render_prometheus() çıktısını sunar.
+"""
+
+import bisect
+import functools
+import inspect
+import json
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Saniye cinsinden varsayılan latency bucket'ları (Ollama 30s'ye kadar sürebilir)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Şu an çalışan action / endpoint - span'ler bu scope altında kaydedilir
+current_scope: ContextVar[str] = ContextVar("current_scope", default="none")
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+# ============================================
+# METRIC TYPES
+# ============================================
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+
+class Counter(_Metric):
+    """Sadece artan sayaç"""
+    type_name = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> Dict[Tuple[str, ...], float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key, value in sorted(self.samples().items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """Artıp azalabilen değer"""
+    type_name = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Kümülatif bucket'lı latency histogramı"""
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [bucket_counts..., sum, count]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def snapshot(self, **labels) -> Optional[Dict[str, float]]:
+        """Tek label seti için count / sum"""
+        series = self._series.get(self._key(labels))
+        if series is None:
+            return None
+        return {"count": series[-1], "sum": series[-2]}
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            inf = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, inf)} {int(series[-1])}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {int(series[-1])}")
+        return lines
+
+
+# ============================================
+# REGISTRY
+# ============================================
+
+class MetricsRegistry:
+    """Process içindeki tüm metrikler"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def metrics(self) -> Iterable[_Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for metric in self.metrics():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+SPAN_SECONDS = REGISTRY.histogram(
+    "span_duration_seconds",
+    "Action / endpoint içindeki alt çağrıların süresi (mongodb, api_clients, ollama)",
+    ("scope", "component", "operation")
+)
+
+
+def render_prometheus() -> str:
+    """Varsayılan registry'yi Prometheus text formatında döndür"""
+    return REGISTRY.render_prometheus()
+
+
+# ============================================
+# SPAN TIMING
+# ============================================
+
+class timed:
+    """
+    Alt çağrı süresini ölç - context manager veya decorator olarak
+
+    Örnek:
+        with timed("ollama", "generate"):
+            requests.post(...)
+
+        @timed("mongodb")
+        def get_user(self, user_id): ...
+    """
+
+    def __init__(self, component: str, operation: Optional[str] = None):
+        self.component = component
+        self.operation = operation
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        SPAN_SECONDS.observe(
+            time.perf_counter() - self._start,
+            scope=current_scope.get(),
+            component=self.component,
+            operation=self.operation or "call"
+        )
+        return False
+
+    def __call__(self, func):
+        operation = self.operation or func.__name__
+        component = self.component
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with timed(component, operation):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(component, operation):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+# ============================================
+# STANDALONE /metrics SERVER
+# ============================================
+
+_servers: Dict[int, ThreadingHTTPServer] = {}
+# path -> handler(query parametreleri); /metrics'in yanında küçük JSON özetleri için
+_json_routes: Dict[str, Callable[[Dict[str, List[str]]], Any]] = {}
+
+
+def register_json_route(path: str, handler: Callable[[Dict[str, List[str]]], Any]):
+    """
+    Standalone sunucuya JSON endpoint'i ekle
+
+    handler parse_qs çıktısını alır; ValueError 400 döner. Yanıt sınırlı
+    tutulmalı (sunucu scrape'lerle aynı thread havuzunu kullanır).
+    """
+    _json_routes[path] = handler
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/metrics":
+            self._send(200, PROMETHEUS_CONTENT_TYPE, self.registry.render_prometheus())
+            return
+        handler = _json_routes.get(url.path)
+        if handler is None:
+            self.send_error(404)
+            return
+        try:
+            payload = handler(parse_qs(url.query))
+        except ValueError as e:
+            self._send(400, "application/json", json.dumps({"error": str(e)}, ensure_ascii=False))
+            return
+        self._send(200, "application/json", json.dumps(payload, ensure_ascii=False, default=str))
+
+    def _send(self, status: int, content_type: str, text: str):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrape isteklerini loglama
+        pass
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> Optional[ThreadingHTTPServer]:
+    """
+    /metrics endpoint'ini ayrı bir thread'de sun (FastAPI dışındaki process'ler için)
+
+    Aynı port için ikinci çağrı mevcut sunucuyu döndürür.
+    """
+    if port in _servers:
+        return _servers[port]
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        logger.warning(f"⚠️ Metrics sunucusu başlatılamadı ({host}:{port}): {e}")
+        return None
+
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True)
+    thread.start()
+    _servers[port] = server
+    logger.info(f"📈 Metrics: http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,320 @@
+# api_service/mongo_monitor.py
+"""
+MongoDB command monitoring - collection / komut bazlı latency ve slow query kaydı
+
+MongoDBLogger, MongoClient'ı CommandMonitor ile oluşturur. Eşik değerini
+aşan işlemler filtre şekliyle (değerler maskelenmiş) loglanır ve örneklenen
+işlemler için arka planda explain() planı alınır.
+"""
+
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import MongoClient, monitoring
+
+from api_service.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+MONGO_SLOW_MS = float(os.getenv("MONGO_SLOW_MS", "100"))
+MONGO_SLOW_SAMPLE_RATE = float(os.getenv("MONGO_SLOW_SAMPLE_RATE", "0.1"))
+# Aynı filtre şekli için en fazla bu sıklıkta explain al (saniye)
+MONGO_EXPLAIN_INTERVAL = float(os.getenv("MONGO_EXPLAIN_INTERVAL", "300"))
+# succeeded / failed gelmeyen (bağlantı kopması vb.) started kayıtları bu süre sonra düşer (saniye)
+MONGO_PENDING_TTL = float(os.getenv("MONGO_PENDING_TTL", "600"))
+MONGO_PENDING_MAX = int(os.getenv("MONGO_PENDING_MAX", "10000"))
+
+# İzlenmeyecek yönetim / handshake komutları
+IGNORED_COMMANDS = {
+    "explain", "ping", "hello", "ismaster", "isMaster", "buildInfo", "buildinfo",
+    "saslStart", "saslContinue", "authenticate", "getnonce", "endSessions",
+    "killCursors", "listIndexes", "createIndexes", "serverStatus", "collStats"
+}
+
+# explain edilebilen komutlar
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+
+# explain'e gönderilmeyecek oturum / sürücü alanları
+_DRIVER_FIELDS = {"lsid", "$db", "$clusterTime", "$readPreference", "txnNumber",
+                  "autocommit", "startTransaction", "readConcern", "writeConcern", "cursor"}
+
+COMMAND_SECONDS = REGISTRY.histogram(
+    "mongodb_command_duration_seconds",
+    "MongoDB komut süresi (command monitoring)",
+    ("collection", "command")
+)
+COMMAND_FAILURES = REGISTRY.counter(
+    "mongodb_command_failures_total",
+    "Başarısız MongoDB komutları",
+    ("collection", "command")
+)
+
+
+def filter_shape(value: Any) -> Any:
+    """
+    Sorgu filtresinin şeklini çıkar - değerler maskelenir, operatörler kalır
+
+    {"user_id": "u1", "timestamp": {"$gte": dt}} -> {"user_id": "?", "timestamp": {"$gte": "?"}}
+    """
+    if isinstance(value, dict):
+        return {key: filter_shape(sub) for key, sub in value.items()}
+    if isinstance(value, (list, tuple)):
+        # $in / $and gibi listelerde tek eleman şekli yeterli
+        shapes = []
+        for item in value:
+            shape = filter_shape(item)
+            if shape not in shapes:
+                shapes.append(shape)
+        return shapes
+    return "?"
+
+
+def _command_filter(command_name: str, command: Dict[str, Any]) -> Any:
+    """Komuttan filtre kısmını al"""
+    if command_name in ("find", "count", "distinct"):
+        return command.get("filter") or command.get("query") or {}
+    if command_name == "aggregate":
+        pipeline = command.get("pipeline") or []
+        return [stage for stage in pipeline if "$match" in stage or "$sort" in stage][:2]
+    if command_name == "update":
+        return [u.get("q", {}) for u in command.get("updates", [])[:1]]
+    if command_name == "delete":
+        return [d.get("q", {}) for d in command.get("deletes", [])[:1]]
+    if command_name == "findAndModify":
+        return command.get("query", {})
+    return {}
+
+
+def plan_summary(explain_result: Dict[str, Any]) -> List[str]:
+    """explain() çıktısından kullanılan stage / index'leri çıkar (IXSCAN user_id_1, COLLSCAN...)"""
+    found: List[str] = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            if "winningPlan" in node:
+                walk(node["winningPlan"])
+                return
+            stage = node.get("stage")
+            if stage in ("IXSCAN", "COUNT_SCAN", "DISTINCT_SCAN"):
+                found.append(f"{stage} {node.get('indexName', '?')}")
+            elif stage == "COLLSCAN":
+                found.append("COLLSCAN")
+            for key, sub in node.items():
+                if key not in ("rejectedPlans",):
+                    walk(sub)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+
+    walk(explain_result.get("queryPlanner") or explain_result)
+    return found or ["UNKNOWN"]
+
+
+class CommandMonitor(monitoring.CommandListener):
+    """
+    pymongo command listener
+
+    Args:
+        slow_ms: Bu süreyi aşan işlemler slow query olarak kaydedilir
+        sample_rate: Slow işlemlerin ne kadarı için explain() alınacağı (0-1)
+    """
+
+    def __init__(self,
+                 slow_ms: float = MONGO_SLOW_MS,
+                 sample_rate: float = MONGO_SLOW_SAMPLE_RATE,
+                 explain_interval: float = MONGO_EXPLAIN_INTERVAL,
+                 max_slow_entries: int = 200,
+                 pending_ttl: float = MONGO_PENDING_TTL,
+                 max_pending: int = MONGO_PENDING_MAX):
+        self.slow_ms = slow_ms
+        self.sample_rate = sample_rate
+        self.explain_interval = explain_interval
+        self.uri: Optional[str] = None
+        self._explain_client = None
+
+        self._lock = threading.Lock()
+        # (request_id, connection_id) -> (başlangıç, collection, database, command); ekleme sırasıyla
+        self.pending_ttl = pending_ttl
+        self.max_pending = max_pending
+        self._pending_lock = threading.Lock()
+        self._pending: "OrderedDict[Tuple[int, Any], Tuple[float, str, str, Dict[str, Any]]]" = OrderedDict()
+        self.pending_dropped = 0
+        # (collection, command) -> [count, failures, total_ms, max_ms]
+        self._stats: Dict[Tuple[str, str], List[float]] = {}
+        self._slow: deque = deque(maxlen=max_slow_entries)
+        # shape key -> {"plan": [...], "explained_at": ts}
+        self._plans: Dict[str, Dict[str, Any]] = {}
+
+        self._explain_queue: "queue.Queue" = queue.Queue(maxsize=100)
+        self._explain_thread: Optional[threading.Thread] = None
+
+    def attach(self, uri: str):
+        """explain() çağrıları için bağlantı adresi (ayrı, izlenmeyen bir client açılır)"""
+        self.uri = uri
+
+    # ---------- CommandListener ----------
+
+    def started(self, event):
+        name = event.command_name
+        if name in IGNORED_COMMANDS:
+            return
+        collection = event.command.get(name) if name != "getMore" else event.command.get("collection")
+        if not isinstance(collection, str):
+            collection = "-"
+        now = time.monotonic()
+        with self._pending_lock:
+            self._pending[(event.request_id, event.connection_id)] = (now, collection, event.database_name,
+                                                                      event.command)
+            self._expire_pending(now)
+
+    def _expire_pending(self, now: float):
+        """Sonucu hiç gelmeyen en eski kayıtları düş (_pending_lock altında çağrılır)"""
+        pending = self._pending
+        while pending:
+            started_at = next(iter(pending.values()))[0]
+            if len(pending) <= self.max_pending and now - started_at <= self.pending_ttl:
+                break
+            pending.popitem(last=False)
+            self.pending_dropped += 1
+
+    def _pop_pending(self, event) -> Optional[Tuple[float, str, str, Dict[str, Any]]]:
+        with self._pending_lock:
+            return self._pending.pop((event.request_id, event.connection_id), None)
+
+    def succeeded(self, event):
+        entry = self._pop_pending(event)
+        if entry is None:
+            return
+        _, collection, database, command = entry
+        duration_ms = event.duration_micros / 1000.0
+        self._record(collection, event.command_name, duration_ms, failed=False)
+        if duration_ms >= self.slow_ms:
+            self._record_slow(collection, database, event.command_name, command, duration_ms)
+
+    def failed(self, event):
+        entry = self._pop_pending(event)
+        if entry is None:
+            return
+        collection = entry[1]
+        self._record(collection, event.command_name, event.duration_micros / 1000.0, failed=True)
+        COMMAND_FAILURES.inc(collection=collection, command=event.command_name)
+
+    # ---------- kayıt ----------
+
+    def _record(self, collection: str, command_name: str, duration_ms: float, failed: bool):
+        COMMAND_SECONDS.observe(duration_ms / 1000.0, collection=collection, command=command_name)
+        with self._lock:
+            stats = self._stats.get((collection, command_name))
+            if stats is None:
+                stats = self._stats[(collection, command_name)] = [0, 0, 0.0, 0.0]
+            stats[0] += 1
+            if failed:
+                stats[1] += 1
+            stats[2] += duration_ms
+            if duration_ms > stats[3]:
+                stats[3] = duration_ms
+
+    def _record_slow(self, collection, database, command_name, command, duration_ms):
+        shape = filter_shape(_command_filter(command_name, command))
+        shape_key = f"{collection}.{command_name} {shape}"
+        entry = {
+            "collection": collection,
+            "command": command_name,
+            "duration_ms": round(duration_ms, 2),
+            "filter_shape": shape,
+            "at": time.time()
+        }
+        with self._lock:
+            plan = self._plans.get(shape_key)
+            if plan:
+                entry["plan"] = plan["plan"]
+            self._slow.append(entry)
+
+        logger.warning(f"🐢 Slow MongoDB query ({duration_ms:.1f} ms): {collection}.{command_name} {shape}")
+
+        if (command_name in EXPLAINABLE_COMMANDS and self.uri is not None
+                and random.random() < self.sample_rate
+                and (not plan or time.time() - plan["explained_at"] > self.explain_interval)):
+            explain_cmd = {k: v for k, v in command.items() if k not in _DRIVER_FIELDS}
+            try:
+                self._explain_queue.put_nowait((shape_key, database, explain_cmd, entry))
+            except queue.Full:
+                return
+            self._ensure_explain_thread()
+
+    # ---------- explain worker ----------
+
+    def _ensure_explain_thread(self):
+        if self._explain_thread is None or not self._explain_thread.is_alive():
+            self._explain_thread = threading.Thread(
+                target=self._explain_worker, name="mongo-explain", daemon=True
+            )
+            self._explain_thread.start()
+
+    def _explain_worker(self):
+        while True:
+            try:
+                shape_key, database, command, entry = self._explain_queue.get(timeout=30)
+            except queue.Empty:
+                return
+            try:
+                if self._explain_client is None:
+                    self._explain_client = MongoClient(self.uri, serverSelectionTimeoutMS=5000)
+                result = self._explain_client[database].command(
+                    {"explain": command, "verbosity": "queryPlanner"}
+                )
+                plan = plan_summary(result)
+                with self._lock:
+                    self._plans[shape_key] = {"plan": plan, "explained_at": time.time()}
+                    entry["plan"] = plan
+                logger.warning(f"🔎 Plan {shape_key}: {', '.join(plan)}")
+            except Exception as e:
+                logger.warning(f"⚠️ explain() alınamadı ({shape_key}): {e}")
+
+    # ---------- özet ----------
+
+    def summary(self, slow_limit: int = 50) -> Dict[str, Any]:
+        """Admin endpoint'i için komut istatistikleri, son slow query'ler ve planlar"""
+        with self._lock:
+            commands = [
+                {
+                    "collection": collection,
+                    "command": command_name,
+                    "count": int(count),
+                    "failures": int(failures),
+                    "avg_ms": round(total_ms / count, 3) if count else 0.0,
+                    "max_ms": round(max_ms, 3)
+                }
+                for (collection, command_name), (count, failures, total_ms, max_ms) in self._stats.items()
+            ]
+            # [-0:] tüm listeyi döndürür; 0 ve negatif = slow query yok
+            slow = list(self._slow)[-slow_limit:] if slow_limit > 0 else []
+            plans = {key: value["plan"] for key, value in self._plans.items()}
+
+        commands.sort(key=lambda c: c["avg_ms"] * c["count"], reverse=True)
+        return {
+            "slow_threshold_ms": self.slow_ms,
+            "explain_sample_rate": self.sample_rate,
+            "pending_commands": len(self._pending),
+            "pending_dropped": self.pending_dropped,
+            "commands": commands,
+            "slow_queries": list(reversed(slow)),
+            "plans": plans
+        }
+
+    def reset(self):
+        """İstatistikleri sıfırla"""
+        with self._lock:
+            self._stats.clear()
+            self._slow.clear()
+            self._plans.clear()
+
+
+# Process genelinde paylaşılan monitor - her MongoDBLogger varsayılan olarak bunu kullanır
+default_monitor = CommandMonitor()
@@ -4,16 +4,292 @@ MongoDB Logger for Health Tourism Chatbot
 Hocanızın istediği JSON yapısında user profili ve conversation loglarını saklar
 """
 
-from pymongo import MongoClient, ASCENDING, DESCENDING
-from pymongo.errors import ConnectionFailure, DuplicateKeyError
-from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+from pymongo import MongoClient, ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import CollectionInvalid, ConnectionFailure, DuplicateKeyError
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, Any, List, Optional, Tuple, Union
+import base64
+import hashlib
+import json
 import logging
+import os
+import socket
+import uuid
+
+from api_service.conversation_buckets import BUCKET_INDEXES, BucketedConversations
+from api_service.index_manager import CollectionIndexes, IndexManager, IndexSpec
+from api_service.metrics import timed
+from api_service.mongo_monitor import CommandMonitor, default_monitor
 
-# Logging ayarla
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Conversation saklama şeması: "document" (mesaj başına doküman) veya
+# "bucketed" (kullanıcı + gün başına bucket, bkz. conversation_buckets.py)
+CONVERSATION_SCHEMA = os.getenv("CONVERSATION_SCHEMA", "document")
+CONVERSATION_SCHEMAS = ("document", "bucketed")
+
+# "mongo" ise user yazmaları capped user_changes collection'ına da yazılır;
+# diğer process'lerdeki profil cache'leri buradan invalidate edilir (bkz. profile_cache.py)
+PROFILE_CACHE_INVALIDATION = os.getenv("PROFILE_CACHE_INVALIDATION", "")
+USER_CHANGES_COLLECTION = "user_changes"
+USER_CHANGES_SIZE_BYTES = 1024 * 1024
+# Bu process'in user_changes kayıtlarındaki kimliği (kendi yazmalarını atlamak için)
+PROCESS_ORIGIN = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# profile_buffer'ların henüz users'a yazılmamış değişiklikleri - (process, user) başına bir
+# doküman. get_user_with_pending bunları profilin üzerine uygular (bkz. profile_buffer.py)
+PROFILE_PENDING_COLLECTION = "profile_pending"
+# Yazamadan ölen process'lerin kayıtları bu süre sonra silinir (saniye, TTL index)
+PROFILE_PENDING_TTL = int(os.getenv("PROFILE_PENDING_TTL", "900"))
+
+# preview: metnin ilk N karakteri - summary index'inde metin yerine bu tutulur (key boyutu sınırlı)
+CONVERSATION_PREVIEW_CHARS = int(os.getenv("CONVERSATION_PREVIEW_CHARS", "80"))
+
+# Conversation dokümanlarında projection'a izin verilen alanlar
+CONVERSATION_FIELDS = {
+    "user_id", "sender", "text", "preview", "timestamp", "intent",
+    "entities", "confidence", "bot_action", "metadata"
+}
+
+# İsimli projection'lar - "summary" sohbet geçmişi ekranının ihtiyacı kadar;
+# alanların hepsi CONVERSATION_SUMMARY_INDEX'te olduğu için covered query olur
+CONVERSATION_PROJECTIONS = {
+    "full": {"_id": 0},
+    "summary": {"_id": 0, "sender": 1, "preview": 1, "timestamp": 1},
+}
+
+BOOKING_STATUSES = ("pending", "confirmed", "completed", "cancelled")
+# Aynı kullanıcının aynı idempotency key ile tekrar gelen create_booking'i yeni kayıt
+# açmaz. Key kullanıcı bazındadır: başka kullanıcının key'i onun booking'ini döndürmez
+BOOKING_IDEMPOTENCY_INDEX = "booking_idempotency"
+# transition_bookings: tek bulk_write'a giren en fazla işlem
+BOOKING_TRANSITION_BATCH = int(os.getenv("BOOKING_TRANSITION_BATCH", "1000"))
+
+# Koordinatör panosu sorguları (klinik / durum + tarih aralığı, (appointment_date, _id)
+# sırasıyla keyset sayfalama). ESR sırası: eşitlik (clinic_id, status), sonra
+# aralık/sıralama (appointment_date, _id); summary alanları index'te olduğu için
+# summary projection'lı sorgular covered query olur.
+BOOKING_CLINIC_SCHEDULE_INDEX = "booking_clinic_schedule"
+BOOKING_STATUS_SCHEDULE_INDEX = "booking_status_schedule"
+BOOKING_USER_INDEX = "booking_user_recent"
+# Compound index'lere geçmeden önceki tek alanlı index'ler (IndexManager bookings v3'te siler)
+LEGACY_BOOKING_INDEXES = ("user_id_1", "status_1", "appointment_date_1")
+
+BOOKING_PROJECTIONS = {
+    "full": None,
+    "summary": {"_id": 1, "clinic_id": 1, "status": 1, "appointment_date": 1, "user_id": 1},
+}
+BOOKING_SORT = [("appointment_date", ASCENDING), ("_id", ASCENDING)]
+BOOKING_PAGE_MAX = 500
+# Tarih olarak kabul edilen string formatları (ISO dışındakiler)
+APPOINTMENT_DATE_FORMATS = ("%d.%m.%Y", "%d/%m/%Y", "%d.%m.%Y %H:%M")
+
+
+def parse_appointment_date(value: Any) -> Optional[datetime]:
+    """
+    appointment_date -> UTC naive datetime; tarih değilse ("Planlanacak" gibi) None
+    
+    "2025-11-15", "2025-11-15T10:30:00+03:00" ve "15.11.2025" kabul edilir.
+    """
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    elif isinstance(value, str) and value.strip():
+        text = value.strip()
+        try:
+            parsed = datetime.fromisoformat(text)
+        except ValueError:
+            for fmt in APPOINTMENT_DATE_FORMATS:
+                try:
+                    parsed = datetime.strptime(text, fmt)
+                    break
+                except ValueError:
+                    continue
+            else:
+                return None
+    else:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def appointment_fields(value: Any) -> Dict[str, Any]:
+    """Booking'e yazılacak tarih alanları; tarih olmayan metin appointment_date_text'te saklanır"""
+    parsed = parse_appointment_date(value)
+    if parsed is None and isinstance(value, str) and value.strip():
+        return {"appointment_date": None, "appointment_date_text": value.strip()}
+    return {"appointment_date": parsed}
+
+
+class IdempotencyConflict(ValueError):
+    """Idempotency key aynı kullanıcının farklı içerikli bir booking'i için kullanılmış"""
+
+
+def booking_fingerprint(booking_data: Dict[str, Any]) -> str:
+    """Çağıranın gönderdiği booking içeriğinin özeti (aynı key ile farklı içerik tespiti)"""
+    content = {k: v for k, v in booking_data.items() if k not in ("idempotency_key", "idempotency_fingerprint")}
+    raw = json.dumps(content, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def booking_filter(clinic_id: Optional[Any] = None,
+                   status: Union[str, List[str], None] = None,
+                   date_from: Optional[datetime] = None,
+                   date_to: Optional[datetime] = None,
+                   cursor: Optional[str] = None) -> Dict[str, Any]:
+    """MongoDBLogger.query_bookings filtresi (benchmark'ta explain için de kullanılır)"""
+    statuses = [status] if isinstance(status, str) else list(status or BOOKING_STATUSES)
+    invalid = [s for s in statuses if s not in BOOKING_STATUSES]
+    if invalid:
+        raise ValueError(f"Geçersiz durum: {', '.join(invalid)}")
+    
+    query: Dict[str, Any] = {"status": statuses[0] if len(statuses) == 1 else {"$in": statuses}}
+    if clinic_id is not None:
+        query["clinic_id"] = clinic_id
+    date_range: Dict[str, Any] = {}
+    if date_from is not None:
+        date_range["$gte"] = date_from
+    if date_to is not None:
+        date_range["$lt"] = date_to
+    
+    if cursor is None:
+        query["appointment_date"] = date_range or {"$type": "date"}
+        return query
+    # Her dal index'te tek aralık: aynı tarihte sonraki _id'ler, sonra sonraki tarihler
+    last_date, last_id = decode_booking_cursor(cursor)
+    return {"$or": [
+        {**query, "appointment_date": last_date, "_id": {"$gt": last_id}},
+        {**query, "appointment_date": {**date_range, "$gt": last_date}},
+    ]}
+
+
+def encode_booking_cursor(doc: Dict[str, Any]) -> str:
+    """Sayfanın son booking'inden opak keyset cursor'ı"""
+    raw = json.dumps([doc["appointment_date"].isoformat(), str(doc["_id"])])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_booking_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        appointment_date, booking_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(appointment_date), ObjectId(booking_id)
+    except (ValueError, TypeError, InvalidId) as e:
+        raise ValueError(f"Geçersiz cursor: {cursor}") from e
+
+
+def index_declarations(conversation_schema: str = CONVERSATION_SCHEMA) -> List[CollectionIndexes]:
+    """
+    MongoDBLogger collection'larının istenen index'leri (bkz. index_manager.py)
+    
+    Bir index eklenir, çıkarılır veya değişirse o collection'ın versiyonu artırılır.
+    """
+    declarations = [
+        CollectionIndexes("users", 1, [
+            IndexSpec("user_id", unique=True),
+            IndexSpec("created_at"),
+        ]),
+        CollectionIndexes(PROFILE_PENDING_COLLECTION, 1, [
+            IndexSpec("user_id"),
+            IndexSpec("updated_at", expireAfterSeconds=PROFILE_PENDING_TTL),
+        ]),
+        # v2'deki conversation_summary (user_id, timestamp, sender, text) her mesaj metnini
+        # index'e kopyalıyordu (yazma maliyeti, uzun metinlerde index key sınırı); v3 summary'yi
+        # fetch'e bırakmıştı. v4: metin yerine sınırlı preview - summary yine covered, index
+        # sayısı v3'le aynı (user_id_1_timestamp_-1 yeni index'in prefix'i olduğu için silinir).
+        # intent_1: hiçbir sorgu kullanmıyordu, her mesaj yazmasına ek index güncellemesiydi
+        CollectionIndexes("conversations", 4, [
+            IndexSpec([("user_id", ASCENDING), ("timestamp", DESCENDING), ("sender", ASCENDING),
+                       ("preview", ASCENDING)], name=CONVERSATION_SUMMARY_INDEX),
+            IndexSpec("timestamp"),
+        ], retired=["intent_1", LEGACY_CONVERSATION_SUMMARY_INDEX, LEGACY_CONVERSATION_USER_INDEX]),
+        CollectionIndexes("bookings", 4, [
+            IndexSpec([("user_id", ASCENDING), ("created_at", DESCENDING)], name=BOOKING_USER_INDEX),
+            IndexSpec([("clinic_id", ASCENDING), ("status", ASCENDING), ("appointment_date", ASCENDING),
+                       ("_id", ASCENDING), ("user_id", ASCENDING)], name=BOOKING_CLINIC_SCHEDULE_INDEX),
+            IndexSpec([("status", ASCENDING), ("appointment_date", ASCENDING), ("_id", ASCENDING),
+                       ("clinic_id", ASCENDING), ("user_id", ASCENDING)], name=BOOKING_STATUS_SCHEDULE_INDEX),
+            # Sadece key'i olan booking'ler index'e girer (eski kayıtlar ve key'siz çağrılar serbest)
+            # v4: (user_id, idempotency_key) - v3'te key tek başına unique'ti (kullanıcılar arası çakışma)
+            IndexSpec([("user_id", ASCENDING), ("idempotency_key", ASCENDING)], name=BOOKING_IDEMPOTENCY_INDEX,
+                      unique=True, partialFilterExpression={"idempotency_key": {"$type": "string"}}),
+        ], retired=LEGACY_BOOKING_INDEXES),
+    ]
+    if conversation_schema == "bucketed":
+        declarations.append(CollectionIndexes("conversation_buckets", 1, BUCKET_INDEXES))
+    if PROFILE_CACHE_INVALIDATION == "mongo":
+        # Tailable cursor doğal sırayla okur; capped collection'da ek index her yazmayı yavaşlatır
+        declarations.append(CollectionIndexes(
+            USER_CHANGES_COLLECTION, 1, [],
+            create_options={"capped": True, "size": USER_CHANGES_SIZE_BYTES}
+        ))
+    return declarations
+
+# Kullanıcı geçmişi sorguları (user_id eşitlik + timestamp sıralama) ve covered summary projection'ı
+CONVERSATION_SUMMARY_INDEX = "conversation_summary_preview"
+# v3'e kadarki (user_id, timestamp) index'i - CONVERSATION_SUMMARY_INDEX'in prefix'i (v4'te silinir)
+LEGACY_CONVERSATION_USER_INDEX = "user_id_1_timestamp_-1"
+# v2'de oluşturulan, tam metni içeren covered index (v3'te silinir)
+LEGACY_CONVERSATION_SUMMARY_INDEX = "conversation_summary"
+
+
+def conversation_preview(text: Any) -> Any:
+    """Mesaj metninin summary index'ine giren sınırlı önizlemesi"""
+    return text[:CONVERSATION_PREVIEW_CHARS] if isinstance(text, str) else text
+
+
+def overlay_profile(profile: Dict[str, Any],
+                    set_fields: Dict[str, Any],
+                    add_to_set: Optional[Dict[str, List[Any]]] = None) -> Dict[str, Any]:
+    """apply_profile_delta'nın $set (noktalı anahtarlar) / $addToSet etkisini profil kopyasına uygula"""
+    profile = dict(profile)
+    for key, value in set_fields.items():
+        *parents, leaf = key.split(".")
+        target = profile
+        for part in parents:
+            child = target.get(part)
+            child = dict(child) if isinstance(child, dict) else {}
+            target[part] = child
+            target = child
+        target[leaf] = value
+    for field, values in (add_to_set or {}).items():
+        current = list(profile.get(field) or [])
+        current.extend(value for value in values if value not in current)
+        profile[field] = current
+    return profile
+
+
+def conversation_projection(fields: Union[str, List[str], None]) -> Dict[str, int]:
+    """
+    fields parametresini Mongo projection'ına çevir
+
+    Args:
+        fields: None / "full" (tüm alanlar), "summary", "sender,text" veya ["sender", "text"]
+
+    Raises:
+        ValueError: Bilinmeyen alan adı
+    """
+    if fields is None:
+        return CONVERSATION_PROJECTIONS["full"]
+    if isinstance(fields, str):
+        if fields in CONVERSATION_PROJECTIONS:
+            return CONVERSATION_PROJECTIONS[fields]
+        fields = [f.strip() for f in fields.split(",") if f.strip()]
+
+    unknown = set(fields) - CONVERSATION_FIELDS
+    if unknown:
+        raise ValueError(f"Bilinmeyen alan(lar): {', '.join(sorted(unknown))}")
+    if not fields:
+        return CONVERSATION_PROJECTIONS["full"]
+
+    projection = {"_id": 0}
+    projection.update({field: 1 for field in fields})
+    return projection
+
 
 class MongoDBLogger:
     """
@@ -27,22 +303,37 @@ class MongoDBLogger:
     
     def __init__(self, 
                  uri: str = "mongodb://localhost:27017/",
-                 database: str = "health_tourism"):
+                 database: str = "health_tourism",
+                 monitor: Optional[CommandMonitor] = None,
+                 conversation_schema: Optional[str] = None):
         """
         MongoDB bağlantısını başlat
         
         Args:
             uri: MongoDB connection string
             database: Database adı
+            monitor: Command listener (varsayılan: process geneli default_monitor)
+            conversation_schema: "document" / "bucketed" (varsayılan: CONVERSATION_SCHEMA env)
         """
+        self.conversation_schema = conversation_schema or CONVERSATION_SCHEMA
+        if self.conversation_schema not in CONVERSATION_SCHEMAS:
+            raise ValueError(f"Geçersiz conversation şeması: {self.conversation_schema}")
+        
+        self.monitor = monitor or default_monitor
+        self.monitor.attach(uri)
+        
         try:
-            self.client = MongoClient(uri, serverSelectionTimeoutMS=5000)
+            self.client = MongoClient(uri, serverSelectionTimeoutMS=5000,
+                                      event_listeners=[self.monitor])
             # Bağlantıyı test et
-            self.client.admin.command('ping')
+            with timed("mongodb", "connect"):
+                self.client.admin.command('ping')
             logger.info("✅ MongoDB bağlantısı başarılı")
             
         except ConnectionFailure as e:
             logger.error(f"❌ MongoDB'ye bağlanılamadı: {e}")
+            # Client'ın arka plan monitor thread'leri açık kalmasın
+            self.client.close()
             raise
         
         # Database ve collections
@@ -50,38 +341,60 @@ class MongoDBLogger:
         self.users = self.db["users"]
         self.conversations = self.db["conversations"]
         self.bookings = self.db["bookings"]
+        self.profile_pending = self.db[PROFILE_PENDING_COLLECTION]
+        
+        # User profili değiştiğinde çağrılan fonksiyonlar (user_id ile)
+        self._user_listeners: List[Callable[[str], None]] = []
+        self.user_changes = None
+        if PROFILE_CACHE_INVALIDATION == "mongo":
+            self._setup_user_changes()
+        
+        # bucketed şemada conversation işlemleri bu collection'a yönlenir
+        self.buckets = None
+        if self.conversation_schema == "bucketed":
+            self.buckets = BucketedConversations(self.db["conversation_buckets"],
+                                                preview_chars=CONVERSATION_PREVIEW_CHARS)
         
-        # Index'leri oluştur
-        self._create_indexes()
+        # Index'ler deploy başına bir kez, versiyon değiştiyse arka planda kurulur
+        self.index_manager = IndexManager(self.db, index_declarations(self.conversation_schema))
+        self.index_manager.ensure()
+    
+    # ============================================
+    # USER CHANGE NOTIFICATIONS
+    # ============================================
+    
+    def add_user_listener(self, listener: Callable[[str], None]):
+        """User profili her değiştiğinde listener(user_id) çağrılır"""
+        self._user_listeners.append(listener)
     
-    def _create_indexes(self):
-        """Performans için index'ler oluştur"""
+    def _notify_user_changed(self, user_id: str):
+        for listener in self._user_listeners:
+            try:
+                listener(user_id)
+            except Exception as e:
+                logger.warning(f"⚠️ User listener hatası: {e}")
+    
+    def _setup_user_changes(self):
+        """Process'ler arası invalidation için capped collection"""
         try:
-            # Users collection indexes
-            self.users.create_index("user_id", unique=True)
-            self.users.create_index("created_at")
-            
-            # Conversations collection indexes
-            self.conversations.create_index([
-                ("user_id", ASCENDING),
-                ("timestamp", DESCENDING)
-            ])
-            self.conversations.create_index("intent")
-            self.conversations.create_index("timestamp")
-            
-            # Bookings collection indexes
-            self.bookings.create_index("user_id")
-            self.bookings.create_index("status")
-            self.bookings.create_index("appointment_date")
-            
-            logger.info("✅ MongoDB indexes oluşturuldu")
+            self.db.create_collection(USER_CHANGES_COLLECTION, capped=True, size=USER_CHANGES_SIZE_BYTES)
+        except CollectionInvalid:
+            pass  # zaten var
         except Exception as e:
-            logger.warning(f"⚠️ Index oluşturma hatası: {e}")
+            logger.warning(f"⚠️ user_changes kanalı kurulamadı, cache'ler sadece TTL ile yenilenir: {e}")
+            return
+        self.user_changes = changes = self.db[USER_CHANGES_COLLECTION]
+        
+        def publish(user_id: str):
+            changes.insert_one({"user_id": user_id, "origin": PROCESS_ORIGIN, "ts": datetime.utcnow()})
+        
+        self.add_user_listener(publish)
     
     # ============================================
     # USER PROFILE OPERATIONS
     # ============================================
     
+    @timed("mongodb")
     def create_user(self, user_data: Dict[str, Any]) -> str:
         """
         Yeni user profili oluştur
@@ -118,6 +431,7 @@ class MongoDBLogger:
         
         try:
             self.users.insert_one(user_data)
+            self._notify_user_changed(user_id)
             logger.info(f"✅ User oluşturuldu: {user_id}")
             return user_id
         
@@ -125,6 +439,7 @@ class MongoDBLogger:
             logger.warning(f"⚠️ User zaten mevcut: {user_id}")
             return user_id
     
+    @timed("mongodb")
     def update_user(self, user_id: str, updates: Dict[str, Any]) -> bool:
         """
         User profilini güncelle
@@ -142,6 +457,7 @@ class MongoDBLogger:
             {"user_id": user_id},
             {"$set": updates}
         )
+        self._notify_user_changed(user_id)
         
         if result.modified_count > 0:
             logger.info(f"✅ User güncellendi: {user_id}")
@@ -150,6 +466,7 @@ class MongoDBLogger:
             logger.warning(f"⚠️ User bulunamadı: {user_id}")
             return False
     
+    @timed("mongodb")
     def upsert_user(self, user_data: Dict[str, Any]) -> str:
         """
         User var ise güncelle, yoksa oluştur (Upsert)
@@ -179,18 +496,98 @@ class MongoDBLogger:
             {"$set": user_data},
             upsert=True
         )
+        self._notify_user_changed(user_id)
         
         logger.info(f"✅ User upsert: {user_id}")
         return user_id
     
+    @timed("mongodb")
+    def apply_profile_delta(self,
+                            user_id: str,
+                            set_fields: Dict[str, Any],
+                            add_to_set: Optional[Dict[str, List[Any]]] = None) -> str:
+        """
+        Birleştirilmiş profil değişikliğini tek update ile uygula (bkz. profile_buffer.py)
+        
+        Args:
+            user_id: User ID
+            set_fields: $set alanları; iç içe alanlar "preferences.city" gibi noktalı yazılır
+            add_to_set: Dizi alanlarına eklenecek değerler ({"health_conditions": [...]})
+        
+        Returns:
+            user_id
+        """
+        now = datetime.utcnow()
+        update: Dict[str, Any] = {
+            "$set": {**set_fields, "updated_at": now},
+            "$setOnInsert": {"created_at": now}
+        }
+        if add_to_set:
+            update["$addToSet"] = {field: {"$each": values} for field, values in add_to_set.items()}
+        
+        self.users.update_one({"user_id": user_id}, update, upsert=True)
+        self._notify_user_changed(user_id)
+        
+        logger.info(f"✅ User profil delta: {user_id} ({len(set_fields)} alan)")
+        return user_id
+    
+    @timed("mongodb")
     def get_user(self, user_id: str) -> Optional[Dict]:
         """User profilini getir"""
         user = self.users.find_one({"user_id": user_id}, {"_id": 0})
         return user
     
+    @timed("mongodb")
+    def get_user_with_pending(self, user_id: str) -> Optional[Dict]:
+        """
+        User profili + action server tamponlarında bekleyen (yayınlanmış) değişiklikler
+        
+        Tamponlar uzun süredir yazılmamış değerleri PROFILE_PUBLISH_INTERVAL'de bir
+        yayınlar (diğerleri quiet flush'ında users'a yazılır); okuma en fazla bu kadar geride kalır.
+        """
+        user = self.get_user(user_id)
+        pending = list(self.profile_pending.find({"user_id": user_id}).sort("updated_at", ASCENDING))
+        if not pending:
+            return user
+        profile = user or {"user_id": user_id}
+        for doc in pending:
+            # Noktalı anahtarlar doküman alanı olamayacağı için $set [anahtar, değer] listesi olarak saklanır
+            profile = overlay_profile(profile, dict(doc.get("set_fields") or []), doc.get("add_to_set"))
+        return profile
+    
+    @timed("mongodb")
+    def publish_pending_profile(self,
+                                user_id: str,
+                                set_fields: Dict[str, Any],
+                                add_to_set: Optional[Dict[str, List[Any]]],
+                                seq: int,
+                                origin: str = PROCESS_ORIGIN):
+        """Bu process'in yazılmamış profil değişikliklerini diğer process'lerin okumasına aç"""
+        self.profile_pending.replace_one(
+            {"_id": f"{origin}|{user_id}"},
+            {
+                "user_id": user_id,
+                "origin": origin,
+                "seq": seq,
+                "set_fields": [[key, value] for key, value in set_fields.items()],
+                "add_to_set": add_to_set or {},
+                "updated_at": datetime.utcnow()
+            },
+            upsert=True
+        )
+        self._notify_user_changed(user_id)
+    
+    @timed("mongodb")
+    def clear_pending_profile(self, user_id: str, seq: int, origin: str = PROCESS_ORIGIN):
+        """users'a yazılan (seq'e kadar yayınlanmış) değişiklikleri kaldır; daha yeni yayın kalır"""
+        self.profile_pending.delete_one({"_id": f"{origin}|{user_id}", "seq": {"$lte": seq}})
+    
+    @timed("mongodb")
     def delete_user(self, user_id: str) -> bool:
         """User'ı sil (GDPR için)"""
         result = self.users.delete_one({"user_id": user_id})
+        self.profile_pending.delete_many({"user_id": user_id})
+        self._notify_user_changed(user_id)
         if result.deleted_count > 0:
             logger.info(f"🗑️ User silindi: {user_id}")
             return True
@@ -200,6 +597,7 @@ class MongoDBLogger:
     # CONVERSATION LOGGING
     # ============================================
     
+    @timed("mongodb")
     def log_message(self, 
                     user_id: str,
                     sender: str,  # "user" veya "bot"
@@ -244,8 +642,13 @@ class MongoDBLogger:
         if metadata:
             message_data["metadata"] = metadata
         
-        result = self.conversations.insert_one(message_data)
-        message_id = str(result.inserted_id)
+        if self.buckets is not None:
+            message_id = self.buckets.append(user_id, message_data)
+        else:
+            # Bucket şeması preview'u okurken metinden türetir; sadece document şeması saklar
+            message_data["preview"] = conversation_preview(text)
+            result = self.conversations.insert_one(message_data)
+            message_id = str(result.inserted_id)
         
         logger.info(f"💬 Mesaj kaydedildi: {user_id} [{sender}]")
         return message_id
@@ -284,35 +687,49 @@ class MongoDBLogger:
         
         return [user_msg_id, bot_msg_id]
     
+    def _find_conversations(self, query: Dict, fields, sort_direction: int):
+        """Projection'lı conversation cursor'ı ("summary" index'ten okunur, doküman açılmaz)"""
+        projection = conversation_projection(fields)
+        return self.conversations.find(query, projection).sort("timestamp", sort_direction)
+    
+    @timed("mongodb")
     def get_user_conversations(self, 
                               user_id: str,
-                              limit: int = 50) -> List[Dict]:
+                              limit: int = 50,
+                              fields: Union[str, List[str], None] = None) -> List[Dict]:
         """
         User'ın son N mesajını getir
         
         Args:
             user_id: User ID
             limit: Kaç mesaj getirileceği
+            fields: "summary", alan listesi veya None (tüm alanlar)
         
         Returns:
             List of messages
         """
+        if self.buckets is not None:
+            return self.buckets.latest(user_id, limit, conversation_projection(fields))
+        
         conversations = list(
-            self.conversations
-            .find({"user_id": user_id}, {"_id": 0})
-            .sort("timestamp", DESCENDING)
+            self._find_conversations({"user_id": user_id}, fields, DESCENDING)
             .limit(limit)
         )
         
         return conversations
     
+    @timed("mongodb")
     def get_conversation_history(self,
                                 user_id: str,
                                 start_date: Optional[datetime] = None,
-                                end_date: Optional[datetime] = None) -> List[Dict]:
+                                end_date: Optional[datetime] = None,
+                                fields: Union[str, List[str], None] = None) -> List[Dict]:
         """
         Belirli tarih aralığındaki conversation'ları getir
         """
+        if self.buckets is not None:
+            return self.buckets.history(user_id, start_date, end_date, conversation_projection(fields))
+        
         query = {"user_id": user_id}
         
         if start_date or end_date:
@@ -322,11 +739,7 @@ class MongoDBLogger:
             if end_date:
                 query["timestamp"]["$lte"] = end_date
         
-        conversations = list(
-            self.conversations
-            .find(query, {"_id": 0})
-            .sort("timestamp", ASCENDING)
-        )
+        conversations = list(self._find_conversations(query, fields, ASCENDING))
         
         return conversations
     
@@ -334,7 +747,8 @@ class MongoDBLogger:
     # BOOKING OPERATIONS
     # ============================================
     
-    def create_booking(self, booking_data: Dict[str, Any]) -> str:
+    @timed("mongodb")
+    def create_booking(self, booking_data: Dict[str, Any], idempotency_key: Optional[str] = None) -> str:
         """
         Yeni booking kaydı oluştur
         
@@ -346,7 +760,7 @@ class MongoDBLogger:
                 "treatment": "dental implant",
                 "hotel_name": "Delphin Palace",
                 "hotel_id": 1,
-                "appointment_date": "2025-11-15",
+                "appointment_date": "2025-11-15",  # datetime olarak saklanır
                 "nights": 7,
                 "costs": {
                     "treatment": 2000,
@@ -359,13 +773,46 @@ class MongoDBLogger:
                 "status": "pending",  # pending, confirmed, completed, cancelled
                 "notes": "Extra bilgiler"
             }
+            idempotency_key: Verilirse aynı key ile tekrar çağrı mevcut booking'in id'sini döner
         
         Returns:
             booking_id
         """
+        booking_id, _ = self.create_booking_once(booking_data, idempotency_key)
+        return booking_id
+    
+    @timed("mongodb")
+    def create_booking_once(self,
+                            booking_data: Dict[str, Any],
+                            idempotency_key: Optional[str] = None) -> Tuple[str, bool]:
+        """
+        create_booking + yeni kayıt açılıp açılmadığı
+        
+        Key (user_id, idempotency_key) unique index'i ile korunur: yarışan iki
+        istekten biri insert eder, diğeri DuplicateKeyError alıp mevcut kaydı
+        okur. Aynı key farklı içerikle tekrar gelirse IdempotencyConflict.
+        
+        Returns:
+            (booking_id, created)
+        """
         if "user_id" not in booking_data:
             raise ValueError("user_id zorunludur!")
         
+        idempotency_key = idempotency_key or booking_data.get("idempotency_key")
+        if idempotency_key is not None:
+            if not isinstance(idempotency_key, str) or not idempotency_key:
+                raise ValueError("idempotency_key boş olmayan string olmalı")
+        
+        # Çağıranın dict'i değişmez (action mesajı girilen tarih metnini gösterir)
+        booking_data = dict(booking_data)
+        fingerprint = None
+        if idempotency_key is not None:
+            fingerprint = booking_fingerprint(booking_data)
+            booking_data["idempotency_key"] = idempotency_key
+            booking_data["idempotency_fingerprint"] = fingerprint
+        if "appointment_date" in booking_data:
+            booking_data.update(appointment_fields(booking_data["appointment_date"]))
+        
         # Timestamps
         booking_data["created_at"] = datetime.utcnow()
         booking_data["updated_at"] = datetime.utcnow()
@@ -374,26 +821,49 @@ class MongoDBLogger:
         if "status" not in booking_data:
             booking_data["status"] = "pending"
         
-        result = self.bookings.insert_one(booking_data)
-        booking_id = str(result.inserted_id)
+        try:
+            result = self.bookings.insert_one(booking_data)
+        except DuplicateKeyError:
+            if idempotency_key is None:
+                raise
+            existing = self.bookings.find_one(
+                {"user_id": booking_data["user_id"], "idempotency_key": idempotency_key},
+                {"_id": 1, "idempotency_fingerprint": 1}
+            )
+            if existing is None:
+                raise
+            # Parmak izi olmayan eski kayıtlar karşılaştırılamaz, kabul edilir
+            stored = existing.get("idempotency_fingerprint")
+            if stored is not None and stored != fingerprint:
+                raise IdempotencyConflict(
+                    f"idempotency_key {idempotency_key} farklı içerikli bir booking için kullanılmış"
+                )
+            logger.info(f"♻️ Booking zaten var (idempotency key {idempotency_key}): {existing['_id']}")
+            return str(existing["_id"]), False
         
+        booking_id = str(result.inserted_id)
         logger.info(f"📅 Booking oluşturuldu: {booking_id}")
-        return booking_id
+        return booking_id, True
     
+    @timed("mongodb")
     def update_booking_status(self, 
                             booking_id: str,
-                            new_status: str) -> bool:
+                            new_status: str,
+                            expected_status: Optional[str] = None) -> bool:
         """
         Booking durumunu güncelle
         
         Args:
             booking_id: MongoDB ObjectId (string)
             new_status: pending, confirmed, completed, cancelled
+            expected_status: Verilirse sadece booking bu durumdaysa güncellenir
         """
-        from bson.objectid import ObjectId
+        query = {"_id": ObjectId(booking_id)}
+        if expected_status is not None:
+            query["status"] = expected_status
         
         result = self.bookings.update_one(
-            {"_id": ObjectId(booking_id)},
+            query,
             {
                 "$set": {
                     "status": new_status,
@@ -404,6 +874,82 @@ class MongoDBLogger:
         
         return result.modified_count > 0
     
+    @timed("mongodb")
+    def transition_bookings(self, transitions: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Çok sayıda booking'i compare-and-set ile yeni durumuna taşı
+        
+        BOOKING_TRANSITION_BATCH'lik her parça için tek bulk_write (ordered=False)
+        ve sonuçları ayırmak için tek find yapılır. Her işlem booking'e bu
+        çağrıya özel bir transition id'si yazar; booking'de bu id görünüyorsa
+        işlem uygulanmıştır, görünmüyorsa beklenen durum tutmamıştır.
+        
+        Args:
+            transitions: [{"booking_id": "...", "from": "pending", "to": "confirmed"}, ...]
+        
+        Returns:
+            Girdi sırasıyla [{"booking_id", "result", "status"}]; result:
+            updated / conflict (durum farklı, status = mevcut durum) /
+            not_found / invalid (geçersiz id veya durum) / duplicate (aynı id listede tekrar)
+        """
+        results: List[Dict[str, Any]] = []
+        pending: List[Tuple[Dict[str, Any], ObjectId, Dict[str, str]]] = []
+        seen = set()
+        for item in transitions:
+            booking_id = item.get("booking_id")
+            result: Dict[str, Any] = {"booking_id": booking_id, "result": "invalid", "status": None}
+            results.append(result)
+            if item.get("from") not in BOOKING_STATUSES or item.get("to") not in BOOKING_STATUSES:
+                continue
+            try:
+                object_id = ObjectId(booking_id)
+            except (InvalidId, TypeError):
+                continue
+            if object_id in seen:
+                result["result"] = "duplicate"
+                continue
+            seen.add(object_id)
+            pending.append((result, object_id, item))
+        
+        for start in range(0, len(pending), BOOKING_TRANSITION_BATCH):
+            self._apply_transitions(pending[start:start + BOOKING_TRANSITION_BATCH])
+        
+        updated = sum(1 for r in results if r["result"] == "updated")
+        logger.info(f"🔁 Booking geçişi: {updated}/{len(results)} güncellendi")
+        return results
+    
+    def _apply_transitions(self, batch: List[Tuple[Dict[str, Any], ObjectId, Dict[str, str]]]):
+        transition_id = uuid.uuid4().hex
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {"_id": object_id, "status": item["from"]},
+                {"$set": {"status": item["to"], "updated_at": now, "last_transition": transition_id}}
+            )
+            for _, object_id, item in batch
+        ]
+        write = self.bookings.bulk_write(operations, ordered=False)
+        
+        if write.matched_count == len(batch):
+            for result, _, item in batch:
+                result.update(result="updated", status=item["to"])
+            return
+        
+        current = {
+            doc["_id"]: doc
+            for doc in self.bookings.find({"_id": {"$in": [object_id for _, object_id, _ in batch]}},
+                                          {"status": 1, "last_transition": 1})
+        }
+        for result, object_id, item in batch:
+            doc = current.get(object_id)
+            if doc is None:
+                result["result"] = "not_found"
+            elif doc.get("last_transition") == transition_id:
+                result.update(result="updated", status=doc["status"])
+            else:
+                result.update(result="conflict", status=doc.get("status"))
+    
+    @timed("mongodb")
     def get_user_bookings(self, user_id: str) -> List[Dict]:
         """User'ın tüm booking'lerini getir"""
         bookings = list(
@@ -413,10 +959,81 @@ class MongoDBLogger:
         )
         return bookings
     
+    @timed("mongodb")
+    def query_bookings(self,
+                       clinic_id: Optional[Any] = None,
+                       status: Union[str, List[str], None] = None,
+                       date_from: Optional[datetime] = None,
+                       date_to: Optional[datetime] = None,
+                       limit: int = 50,
+                       cursor: Optional[str] = None,
+                       fields: Optional[str] = "summary") -> Tuple[List[Dict], Optional[str]]:
+        """
+        Tarihi belli booking'ler, (appointment_date, _id) sırasıyla keyset sayfalı
+        
+        Ör. "klinik X'in önümüzdeki 30 gündeki onaylı booking'leri":
+            query_bookings(clinic_id=X, status="confirmed", date_from=now, date_to=now + 30 gün)
+        
+        Durum verilmezse tüm BOOKING_STATUSES'a $in uygulanır; böylece index'teki
+        status alanı sıralamayı bozmaz (durum başına index taraması birleştirilir).
+        Sonraki sayfa skip yerine son booking'den sonrasını index'ten okur.
+        
+        Args:
+            date_from: Dahil; date_to: hariç
+            cursor: Önceki sayfanın next_cursor'ı
+            fields: "summary" (covered query) veya "full"
+        
+        Returns:
+            (booking'ler, next_cursor - son sayfada None); "_id" yerine "booking_id" döner
+        
+        Raises:
+            ValueError: Geçersiz durum, fields veya cursor
+        """
+        if fields not in BOOKING_PROJECTIONS:
+            raise ValueError(f"Geçersiz fields: {fields} (seçenekler: {', '.join(BOOKING_PROJECTIONS)})")
+        limit = max(1, min(limit, BOOKING_PAGE_MAX))
+        query = booking_filter(clinic_id, status, date_from, date_to, cursor)
+        
+        documents = list(
+            self.bookings
+            .find(query, BOOKING_PROJECTIONS[fields])
+            .sort(BOOKING_SORT)
+            .limit(limit + 1)
+        )
+        next_cursor = encode_booking_cursor(documents[limit - 1]) if len(documents) > limit else None
+        bookings = []
+        for doc in documents[:limit]:
+            doc["booking_id"] = str(doc.pop("_id"))
+            bookings.append(doc)
+        return bookings, next_cursor
+    
+    def iter_messages(self,
+                      start_date: datetime,
+                      end_date: datetime,
+                      batch_size: int = 5000):
+        """
+        [start_date, end_date) aralığındaki tüm mesajları batch'li cursor ile gez
+        
+        Mesajlar gün sırasıyla gelir (export gün gün partition'lar); bellekte
+        en fazla bir cursor batch'i tutulur. "_id" alanı mesaj ID'sidir.
+        """
+        if self.buckets is not None:
+            yield from self.buckets.iter_range(start_date, end_date, batch_size)
+            return
+        
+        cursor = (
+            self.conversations
+            .find({"timestamp": {"$gte": start_date, "$lt": end_date}})
+            .sort("timestamp", ASCENDING)
+            .batch_size(batch_size)
+        )
+        yield from cursor
+    
     # ============================================
     # ANALYTICS & REPORTING
     # ============================================
     
+    @timed("mongodb")
     def get_intent_statistics(self, days: int = 30) -> Dict[str, int]:
         """
         Son N gün içindeki intent dağılımı
@@ -426,6 +1043,9 @@ class MongoDBLogger:
         """
         cutoff_date = datetime.utcnow() - timedelta(days=days)
         
+        if self.buckets is not None:
+            return self.buckets.intent_statistics(cutoff_date)
+        
         pipeline = [
             {"$match": {
                 "intent": {"$exists": True, "$ne": None},
@@ -441,10 +1061,14 @@ class MongoDBLogger:
         results = list(self.conversations.aggregate(pipeline))
         return {item["_id"]: item["count"] for item in results}
     
+    @timed("mongodb")
     def get_active_users(self, days: int = 7) -> int:
         """Son N gün içinde aktif olan user sayısı"""
         cutoff_date = datetime.utcnow() - timedelta(days=days)
         
+        if self.buckets is not None:
+            return len(self.buckets.active_users(cutoff_date))
+        
         active_users = self.conversations.distinct(
             "user_id",
             {"timestamp": {"$gte": cutoff_date}}
@@ -452,10 +1076,14 @@ class MongoDBLogger:
         
         return len(active_users)
     
+    @timed("mongodb")
     def get_total_conversations(self) -> int:
         """Toplam mesaj sayısı"""
+        if self.buckets is not None:
+            return self.buckets.total_messages()
         return self.conversations.count_documents({})
     
+    @timed("mongodb")
     def get_booking_stats(self) -> Dict[str, int]:
         """Booking istatistikleri"""
         pipeline = [
@@ -468,6 +1096,7 @@ class MongoDBLogger:
         results = list(self.bookings.aggregate(pipeline))
         return {item["_id"]: item["count"] for item in results}
     
+    @timed("mongodb")
     def get_popular_treatments(self, limit: int = 10) -> List[Dict]:
         """En popüler tedaviler"""
         pipeline = [
@@ -487,6 +1116,7 @@ class MongoDBLogger:
     # UTILITY METHODS
     # ============================================
     
+    @timed("mongodb")
     def health_check(self) -> bool:
         """MongoDB bağlantısını kontrol et"""
         try:
@@ -495,16 +1125,20 @@ class MongoDBLogger:
         except:
             return False
     
+    @timed("mongodb")
     def clear_old_conversations(self, days: int = 90):
         """90 günden eski conversation'ları sil (GDPR)"""
         cutoff_date = datetime.utcnow() - timedelta(days=days)
         
-        result = self.conversations.delete_many({
-            "timestamp": {"$lt": cutoff_date}
-        })
+        if self.buckets is not None:
+            deleted_count = self.buckets.delete_older_than(cutoff_date)
+        else:
+            deleted_count = self.conversations.delete_many({
+                "timestamp": {"$lt": cutoff_date}
+            }).deleted_count
         
-        logger.info(f"🗑️ {result.deleted_count} eski conversation silindi")
-        return result.deleted_count
+        logger.info(f"🗑️ {deleted_count} eski conversation silindi")
+        return deleted_count
     
     def close(self):
         """MongoDB bağlantısını kapat"""
@@ -524,6 +1158,7 @@ class MongoDBLogger:
 # TEST KODU
 # ============================================
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     print("🧪 MongoDB Logger Test Başlıyor...\n")
     
     # Logger oluştur
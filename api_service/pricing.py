@@ -0,0 +1,305 @@
+# api_service/pricing.py
+"""
+Pricing Engine - API servisi ve Rasa action server için ortak fiyat motoru
+
+Tüm tedavi, otel, uçuş ve transfer fiyatları tek bir tablo setinden hesaplanır.
+Tablolar engine oluşturulurken önceden hazırlanır (lowercase anahtarlar,
+rating çarpanları, gidiş-dönüş uçuş fiyatları) ve toplu (batch) fiyatlama
+bu tablolar üzerinde sütun bazlı çalışır.
+"""
+
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+# ============================================
+# PRICE TABLES (EUR)
+# ============================================
+
+# Tedavi adına göre baz fiyatlar
+TREATMENT_BASE_PRICES = {
+    "dental implant": 1500,
+    "rhinoplasty": 3500,
+    "cataract": 2000,
+    "sleeve gastrectomy": 4500,
+    "knee replacement": 8000,
+    "laser varicose vein": 1800,
+    "teeth whitening": 300,
+    "botox": 400,
+    "face lift": 5000,
+    "breast surgery": 4000
+}
+
+# Tedavi adı bilinmiyorsa klinik fiyat segmentine göre baz fiyat
+CLINIC_TIER_PRICES = {
+    "standard": 1500,
+    "medium": 2000,
+    "premium": 3500,
+    "luxury": 5000
+}
+DEFAULT_TREATMENT_PRICE = 2000
+
+# Otel gecelik fiyatları (otel kaydında price_per_night yoksa)
+HOTEL_TIER_PRICES = {
+    "standard": 100,
+    "premium": 200,
+    "luxury": 400
+}
+DEFAULT_HOTEL_NIGHTLY = 150
+
+# Tek yön uçuş fiyatları
+FLIGHT_CLASS_PRICES = {
+    "economy": 300,
+    "business": 1200
+}
+DIRECT_FLIGHT_MULTIPLIER = 1.3
+
+TRANSFER_PRICE = 150
+DEFAULT_NIGHTS = 7
+
+# Klinik rating'ine göre fiyat çarpanı: 1 + (rating - 4.5) * 0.2
+RATING_BASELINE = 4.5
+RATING_WEIGHT = 0.2
+
+COST_FIELDS = ("treatment", "hotel", "flight", "transfer", "total")
+
+
+class QuoteRequest(NamedTuple):
+    """Tek bir paket fiyat sorgusu (treatment, clinic, hotel, nights, flight class)"""
+    treatment: Optional[str] = None
+    clinic_rating: float = RATING_BASELINE
+    clinic_tier: Optional[str] = None
+    hotel_nightly: Optional[float] = None
+    hotel_tier: Optional[str] = None
+    nights: int = DEFAULT_NIGHTS
+    flight_class: str = "economy"
+    flight_type: str = "connecting"
+    flight_price: Optional[float] = None  # Tek yön, uçuş API'sinden gelirse
+
+
+def build_quote(treatment: Optional[str] = None,
+                clinic: Optional[Dict[str, Any]] = None,
+                hotel: Optional[Dict[str, Any]] = None,
+                nights: int = DEFAULT_NIGHTS,
+                flight_class: str = "economy",
+                flight_type: str = "connecting",
+                flight: Optional[Dict[str, Any]] = None) -> QuoteRequest:
+    """Klinik / otel / uçuş kayıtlarından QuoteRequest oluştur"""
+    clinic = clinic or {}
+    hotel = hotel or {}
+    return QuoteRequest(
+        treatment=treatment,
+        clinic_rating=clinic.get("rating", RATING_BASELINE),
+        clinic_tier=clinic.get("price_range"),
+        hotel_nightly=hotel.get("price_per_night"),
+        hotel_tier=hotel.get("price_range"),
+        nights=nights,
+        flight_class=flight_class,
+        flight_type=flight_type,
+        flight_price=flight.get("price") if flight else None
+    )
+
+
+# ============================================
+# PRICING ENGINE
+# ============================================
+
+class PricingEngine:
+    """
+    Önceden hesaplanmış fiyat tabloları ile tekil ve toplu fiyatlama
+
+    Örnek:
+        engine = PricingEngine()
+        costs = engine.quote(build_quote("Dental Implant", clinic, hotel))
+        columns = engine.price_columns(quotes)  # 100k sorgu tek çağrıda
+    """
+
+    def __init__(self,
+                 treatment_prices: Optional[Dict[str, int]] = None,
+                 clinic_tier_prices: Optional[Dict[str, int]] = None,
+                 hotel_tier_prices: Optional[Dict[str, int]] = None,
+                 flight_class_prices: Optional[Dict[str, int]] = None,
+                 transfer_price: int = TRANSFER_PRICE):
+        treatment_prices = treatment_prices or TREATMENT_BASE_PRICES
+        clinic_tier_prices = clinic_tier_prices or CLINIC_TIER_PRICES
+        hotel_tier_prices = hotel_tier_prices or HOTEL_TIER_PRICES
+        flight_class_prices = flight_class_prices or FLIGHT_CLASS_PRICES
+
+        self.transfer_price = transfer_price
+
+        # Lowercase anahtarlı tablolar - her sorguda .lower() maliyetini
+        # sadece bilinmeyen anahtarlar öder
+        self._treatment_prices = {k.lower(): v for k, v in treatment_prices.items()}
+        self._clinic_tier_prices = {k.lower(): v for k, v in clinic_tier_prices.items()}
+        self._hotel_tier_prices = {k.lower(): v for k, v in hotel_tier_prices.items()}
+
+        # Rating çarpanları 0.00 - 5.00 arası 0.01 adımlarla
+        self._rating_multipliers = [
+            1 + (step / 100 - RATING_BASELINE) * RATING_WEIGHT for step in range(501)
+        ]
+
+        # Tek yön uçuş fiyatı (class, type) -> int
+        self._flight_one_way = {}
+        for flight_class, price in flight_class_prices.items():
+            self._flight_one_way[(flight_class, "connecting")] = int(price)
+            self._flight_one_way[(flight_class, "direct")] = int(price * DIRECT_FLIGHT_MULTIPLIER)
+        self._default_flight_class = "economy" if "economy" in flight_class_prices \
+            else next(iter(flight_class_prices))
+
+    # ---------- tekil bileşenler ----------
+
+    def rating_multiplier(self, rating: Optional[float]) -> float:
+        """Klinik rating'ine göre fiyat çarpanı"""
+        if rating is None:
+            rating = RATING_BASELINE
+        step = int(round(rating * 100))
+        if step < 0:
+            step = 0
+        elif step > 500:
+            step = 500
+        return self._rating_multipliers[step]
+
+    def treatment_base(self, treatment: Optional[str], clinic_tier: Optional[str] = None) -> int:
+        """Tedavi baz fiyatı: tedavi adı > klinik segmenti > varsayılan"""
+        if treatment:
+            price = self._treatment_prices.get(treatment)
+            if price is None:
+                price = self._treatment_prices.get(treatment.lower())
+            if price is not None:
+                return price
+        if clinic_tier:
+            price = self._clinic_tier_prices.get(clinic_tier.lower())
+            if price is not None:
+                return price
+        return DEFAULT_TREATMENT_PRICE
+
+    def treatment_price(self,
+                        treatment: Optional[str],
+                        clinic_rating: Optional[float] = RATING_BASELINE,
+                        clinic_tier: Optional[str] = None) -> int:
+        """Tedavi fiyatı (klinik rating'i dahil)"""
+        return int(self.treatment_base(treatment, clinic_tier) * self.rating_multiplier(clinic_rating))
+
+    def hotel_nightly(self, nightly: Optional[float] = None, tier: Optional[str] = None) -> float:
+        """Gecelik otel fiyatı: kayıttaki fiyat > segment tablosu > varsayılan"""
+        if nightly is not None:
+            return nightly
+        if tier:
+            return self._hotel_tier_prices.get(tier.lower(), DEFAULT_HOTEL_NIGHTLY)
+        return DEFAULT_HOTEL_NIGHTLY
+
+    def hotel_price(self,
+                    nightly: Optional[float] = None,
+                    tier: Optional[str] = None,
+                    nights: int = DEFAULT_NIGHTS) -> int:
+        """Toplam konaklama fiyatı"""
+        return int(self.hotel_nightly(nightly, tier) * nights)
+
+    def flight_one_way(self, flight_class: str = "economy", flight_type: str = "connecting") -> int:
+        """Tek yön uçuş fiyatı"""
+        price = self._flight_one_way.get((flight_class, flight_type))
+        if price is None:
+            flight_type = "direct" if flight_type == "direct" else "connecting"
+            price = self._flight_one_way.get((flight_class, flight_type))
+            if price is None:
+                price = self._flight_one_way[(self._default_flight_class, flight_type)]
+        return price
+
+    # ---------- paket fiyatlama ----------
+
+    def quote(self, request: QuoteRequest) -> Dict[str, int]:
+        """Tek paket için maliyet kırılımı"""
+        treatment = self.treatment_price(request.treatment, request.clinic_rating, request.clinic_tier)
+        hotel = self.hotel_price(request.hotel_nightly, request.hotel_tier, request.nights)
+        if request.flight_price is not None:
+            flight = 2 * int(request.flight_price)
+        else:
+            flight = 2 * self.flight_one_way(request.flight_class, request.flight_type)
+        return {
+            "treatment": treatment,
+            "hotel": hotel,
+            "flight": flight,
+            "transfer": self.transfer_price,
+            "total": treatment + hotel + flight + self.transfer_price
+        }
+
+    def price_columns(self, requests: Sequence[QuoteRequest]) -> Dict[str, List[int]]:
+        """
+        Toplu fiyatlama - sütun bazlı
+
+        Args:
+            requests: QuoteRequest listesi
+
+        Returns:
+            {"treatment": [...], "hotel": [...], "flight": [...],
+             "transfer": [...], "total": [...]}  # requests ile aynı sırada
+        """
+        if not requests:
+            return {field: [] for field in COST_FIELDS}
+
+        (treatments, ratings, clinic_tiers, nightly, hotel_tiers,
+         nights, flight_classes, flight_types, flight_prices) = zip(*requests)
+
+        # Her sütundaki tekil değerler bir kez çözülür, satırlar tablo
+        # lookup'ı ile fiyatlanır (sorgular genelde az sayıda tekil değer içerir)
+        base_table = {key: self.treatment_base(*key) for key in set(zip(treatments, clinic_tiers))}
+        multiplier_table = {r: self.rating_multiplier(r) for r in set(ratings)}
+        treatment_col = [
+            int(base * multiplier)
+            for base, multiplier in zip(map(base_table.__getitem__, zip(treatments, clinic_tiers)),
+                                        map(multiplier_table.__getitem__, ratings))
+        ]
+
+        tier_table = {tier: self.hotel_nightly(None, tier) for tier in set(hotel_tiers)}
+        hotel_col = [
+            int((n if n is not None else tier_table[tier]) * count)
+            for n, tier, count in zip(nightly, hotel_tiers, nights)
+        ]
+
+        flight_table = {key: 2 * self.flight_one_way(*key) for key in set(zip(flight_classes, flight_types))}
+        flight_col = [
+            2 * int(p) if p is not None else flight_table[key]
+            for key, p in zip(zip(flight_classes, flight_types), flight_prices)
+        ]
+
+        transfer = self.transfer_price
+        transfer_col = [transfer] * len(requests)
+        total_col = [t + h + f + transfer for t, h, f in zip(treatment_col, hotel_col, flight_col)]
+
+        return {
+            "treatment": treatment_col,
+            "hotel": hotel_col,
+            "flight": flight_col,
+            "transfer": transfer_col,
+            "total": total_col
+        }
+
+    def quote_batch(self, requests: Sequence[QuoteRequest]) -> List[Dict[str, int]]:
+        """Toplu fiyatlama - her paket için ayrı maliyet sözlüğü"""
+        columns = self.price_columns(requests)
+        return [dict(zip(COST_FIELDS, row)) for row in zip(*(columns[f] for f in COST_FIELDS))]
+
+
+# Varsayılan engine - her iki servis de bunu kullanır
+pricing_engine = PricingEngine()
+
+
+# ============================================
+# GERİYE DÖNÜK UYUMLU YARDIMCILAR
+# ============================================
+
+def calculate_treatment_price(treatment_name, clinic_rating):
+    """Tedavi fiyatını hesapla"""
+    return pricing_engine.treatment_price(treatment_name, clinic_rating)
+
+
+def calculate_hotel_price(hotel_info, nights=DEFAULT_NIGHTS):
+    """Otel fiyatını hesapla"""
+    return pricing_engine.hotel_price(
+        hotel_info.get("price_per_night"),
+        hotel_info.get("price_range", "standard"),
+        nights
+    )
+
+
+def calculate_flight_price(flight_class, flight_type):
+    """Uçuş fiyatını hesapla (tek yön)"""
+    return pricing_engine.flight_one_way(flight_class, flight_type)
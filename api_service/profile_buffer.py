@@ -0,0 +1,360 @@
+# api_service/profile_buffer.py
+"""
+User profili için birleştirilmiş (coalesced) yazma tamponu
+
+Form doldurulurken her mesaj profile bir iki alan ekler. Bu değişiklikler
+user_id başına bellekte birleştirilir ve tek bir update olarak yazılır:
+
+- Kullanıcıdan PROFILE_FLUSH_QUIET saniye yeni değişiklik gelmezse
+- İlk bekleyen değişiklik PROFILE_FLUSH_MAX_AGE saniyeyi geçerse
+- Oturum sonunda (goodbye) flush(user_id) ile
+- Process kapanırken tüm bekleyenler: SIGTERM handler'ı sadece bayrak
+  koyup arka plan thread'ini uyandırır (sinyal, add() / flush() kilidi
+  tutulurken gelebilir; handler'da kilit alınmaz), son flush arka plan
+  thread'inde ve atexit'te yapılır
+
+Okumalar:
+- Action server'da profil profile_buffer.get_user() ile okunur; bekleyen
+  değerler Mongo'daki profilin üzerine uygulanır (gecikme yok).
+- Diğer process'ler (api_service /api/profile, get_user_with_pending)
+  bekleyen değerleri görmez; quiet flush'ı bekleyen kullanıcı en fazla
+  PROFILE_FLUSH_QUIET saniye geride kalır. Sessizliğe hiç girmeyen uzun
+  oturumlar için değerler PROFILE_PUBLISH_INTERVAL (varsayılan: quiet
+  süresi) saniyede bir profile_pending collection'ına yayınlanır ve profil
+  cache'leri invalidate edilir. Kullanıcı ancak değişiklikleri bu süreden
+  uzun süredir yazılmamışsa ve son yayınından bu kadar zaman geçtiyse
+  yayınlanır: kısa oturumlar hiç yayın yazmaz, uzunlar aralık başına en
+  fazla bir upsert (+ invalidation kaydı) yazar. Okumalar böylece en fazla
+  bu aralık (+ invalidation kanalı gecikmesi; kanal kapalıysa
+  PROFILE_CACHE_TTL) geride kalır; PROFILE_PUBLISH_INTERVAL=0 ise yayın
+  yapılmaz ve bu süre flush süresine (QUIET / MAX_AGE) çıkar.
+"""
+
+import atexit
+import itertools
+import logging
+import os
+import signal
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from api_service.metrics import REGISTRY
+from api_service.mongodb_logger import overlay_profile
+
+logger = logging.getLogger(__name__)
+
+PROFILE_FLUSH_QUIET = float(os.getenv("PROFILE_FLUSH_QUIET", "30"))      # saniye
+PROFILE_FLUSH_MAX_AGE = float(os.getenv("PROFILE_FLUSH_MAX_AGE", "300"))  # saniye
+# Bekleyen değerlerin diğer process'lere yayınlanma aralığı (saniye, 0 = kapalı; varsayılan quiet)
+PROFILE_PUBLISH_INTERVAL = float(os.getenv("PROFILE_PUBLISH_INTERVAL", str(PROFILE_FLUSH_QUIET)))
+
+PROFILE_DELTAS = REGISTRY.counter(
+    "profile_buffer_deltas_total",
+    "Tampona eklenen profil değişiklikleri"
+)
+PROFILE_FLUSHES = REGISTRY.counter(
+    "profile_buffer_flushes_total",
+    "Mongo'ya yazılan birleştirilmiş profil update'leri (quiet / max_age / session_end / explicit / shutdown)",
+    ("reason",)
+)
+PROFILE_FLUSH_ERRORS = REGISTRY.counter(
+    "profile_buffer_flush_errors_total",
+    "Başarısız flush (değişiklikler tampona geri konur)"
+)
+PROFILE_PUBLISHES = REGISTRY.counter(
+    "profile_buffer_publishes_total",
+    "Diğer process'lere yayınlanan bekleyen profil değişiklikleri (ok / error)",
+    ("result",)
+)
+PROFILE_PENDING = REGISTRY.gauge(
+    "profile_buffer_pending_users",
+    "Yazılmamış değişikliği olan kullanıcı sayısı"
+)
+
+
+class _PendingProfile:
+    """Bir kullanıcının henüz yazılmamış değişiklikleri"""
+
+    __slots__ = ("set_fields", "add_to_set", "first_at", "last_at", "dirty", "published", "published_at")
+
+    def __init__(self, now: float):
+        self.set_fields: Dict[str, Any] = {}
+        self.add_to_set: Dict[str, List[Any]] = {}
+        self.first_at = now
+        self.last_at = now
+        self.dirty = True       # son yayından sonra değişti
+        self.published = 0      # son yayının seq'i (0 = yayınlanmadı)
+        self.published_at: Optional[float] = None  # son başarılı yayının zamanı
+
+    def merge(self, set_fields: Dict[str, Any], add_to_set: Dict[str, List[Any]]):
+        self.set_fields.update(set_fields)
+        for field, values in add_to_set.items():
+            existing = self.add_to_set.setdefault(field, [])
+            existing.extend(value for value in values if value not in existing)
+
+
+class ProfileBuffer:
+    """
+    user_id başına profil değişikliklerini birleştirip arka planda yazar
+
+    Args:
+        writer_factory: apply_profile_delta / get_user sağlayan logger'ı döndürür
+                        (ilk flush'ta bir kez çağrılır)
+        quiet: Son değişiklikten sonra beklenen sessizlik (saniye)
+        max_age: Bekleyen değişikliğin en uzun yaşı (saniye)
+        publish_interval: Bir kullanıcının bekleyen değerlerinin en sık yayın aralığı (saniye, 0 = kapalı)
+        clock: Test / benchmark için zaman kaynağı
+    """
+
+    def __init__(self,
+                 writer_factory: Optional[Callable[[], Any]] = None,
+                 quiet: float = PROFILE_FLUSH_QUIET,
+                 max_age: float = PROFILE_FLUSH_MAX_AGE,
+                 publish_interval: float = PROFILE_PUBLISH_INTERVAL,
+                 clock: Callable[[], float] = time.monotonic):
+        self.quiet = quiet
+        self.max_age = max_age
+        self.publish_interval = publish_interval
+        self.clock = clock
+        self._writer_factory = writer_factory
+        self._writer = None
+        self._pending: Dict[str, _PendingProfile] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._publish_seq = itertools.count(1)
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._shutdown_requested = False
+
+    # ============================================
+    # WRITE SIDE
+    # ============================================
+
+    def add(self,
+            user_id: str,
+            set_fields: Optional[Dict[str, Any]] = None,
+            add_to_set: Optional[Dict[str, List[Any]]] = None):
+        """Değişikliği tampona ekle (aynı alanın yeni değeri eskisini ezer)"""
+        if not set_fields and not add_to_set:
+            return
+        now = self.clock()
+        with self._lock:
+            pending = self._pending.get(user_id)
+            if pending is None:
+                pending = self._pending[user_id] = _PendingProfile(now)
+            pending.merge(set_fields or {}, add_to_set or {})
+            pending.last_at = now
+            pending.dirty = True
+            PROFILE_PENDING.set(len(self._pending))
+        PROFILE_DELTAS.inc()
+        self._ensure_worker()
+
+    def flush(self, user_id: Optional[str] = None, reason: str = "explicit") -> int:
+        """Bir kullanıcının (None ise herkesin) bekleyen değişikliklerini yaz"""
+        with self._lock:
+            if user_id is None:
+                batch = self._pending
+                self._pending = {}
+            else:
+                pending = self._pending.pop(user_id, None)
+                batch = {user_id: pending} if pending else {}
+            PROFILE_PENDING.set(len(self._pending))
+        return self._write(batch, reason)
+
+    def flush_due(self) -> int:
+        """Sessizlik veya yaş sınırını geçen kullanıcıları yaz"""
+        now = self.clock()
+        due: Dict[str, Dict[str, _PendingProfile]] = {"quiet": {}, "max_age": {}}
+        with self._lock:
+            for user_id, pending in list(self._pending.items()):
+                if now - pending.last_at >= self.quiet:
+                    due["quiet"][user_id] = self._pending.pop(user_id)
+                elif now - pending.first_at >= self.max_age:
+                    due["max_age"][user_id] = self._pending.pop(user_id)
+            PROFILE_PENDING.set(len(self._pending))
+        return sum(self._write(batch, reason) for reason, batch in due.items())
+
+    def _write(self, batch: Dict[str, _PendingProfile], reason: str) -> int:
+        written = 0
+        with self._flush_lock:
+            items = list(batch.items())
+            for index, (user_id, pending) in enumerate(items):
+                try:
+                    self._get_writer().apply_profile_delta(user_id, pending.set_fields, pending.add_to_set)
+                    written += 1
+                    PROFILE_FLUSHES.inc(reason=reason)
+                except Exception as e:
+                    logger.error(f"❌ Profil flush hatası ({user_id}): {e}")
+                    PROFILE_FLUSH_ERRORS.inc()
+                    self._requeue(user_id, pending)
+                    continue
+                except BaseException:
+                    # SIGTERM -> SystemExit yazma sırasında geldi: kalanlar atexit'teki close()'a kalsın
+                    for rest_id, rest in items[index:]:
+                        self._requeue(rest_id, rest)
+                    raise
+                if pending.published:
+                    try:
+                        self._get_writer().clear_pending_profile(user_id, pending.published)
+                    except Exception as e:
+                        # Değerler users'ta; kalan kayıt aynı değerleri gösterir, TTL ile silinir
+                        logger.warning(f"⚠️ Yayınlanan profil kaydı silinemedi ({user_id}): {e}")
+        return written
+
+    def publish_pending(self) -> int:
+        """
+        publish_interval'dir yazılmamış ve o kadar süredir yayınlanmamış
+        kullanıcıların (son yayından sonra değişen) bekleyen değerlerini yayınla
+
+        _flush_lock altında çalışır: yayın, aynı kullanıcının flush'ından
+        (clear_pending_profile) sonra eski değerleri geri yazamaz.
+        """
+        published = 0
+        now = self.clock()
+        with self._flush_lock:
+            with self._lock:
+                batch = []
+                for user_id, pending in self._pending.items():
+                    since = pending.first_at if pending.published_at is None else pending.published_at
+                    if pending.dirty and now - since >= self.publish_interval:
+                        pending.dirty = False
+                        pending.published = next(self._publish_seq)
+                        batch.append((user_id, pending, pending.published, dict(pending.set_fields),
+                                      {k: list(v) for k, v in pending.add_to_set.items()}))
+            for user_id, pending, seq, set_fields, add_to_set in batch:
+                try:
+                    self._get_writer().publish_pending_profile(user_id, set_fields, add_to_set, seq)
+                    pending.published_at = now
+                    published += 1
+                    PROFILE_PUBLISHES.inc(result="ok")
+                except Exception as e:
+                    logger.warning(f"⚠️ Bekleyen profil yayınlanamadı ({user_id}): {e}")
+                    PROFILE_PUBLISHES.inc(result="error")
+                    pending.dirty = True
+        return published
+
+    def _requeue(self, user_id: str, failed: _PendingProfile):
+        """Yazılamayan değişiklikleri geri koy; bu arada gelen yeni değerler öncelikli"""
+        with self._lock:
+            newer = self._pending.get(user_id)
+            if newer is not None:
+                failed.merge(newer.set_fields, newer.add_to_set)
+                failed.last_at = newer.last_at
+                failed.published = max(failed.published, newer.published)
+                if newer.published_at is not None:
+                    failed.published_at = newer.published_at
+            failed.dirty = True
+            self._pending[user_id] = failed
+            PROFILE_PENDING.set(len(self._pending))
+
+    def _get_writer(self):
+        if self._writer is None:
+            if self._writer_factory is None:
+                # Action'larla aynı bağlantı; MongoDB kapalıyken yazma hata verir, değişiklik tamponda kalır
+                from api_service.lazy_mongo import shared_mongo_logger
+                self._writer_factory = shared_mongo_logger
+            self._writer = self._writer_factory()
+        return self._writer
+
+    # ============================================
+    # READ SIDE
+    # ============================================
+
+    def pending(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Bekleyen değişikliklerin kopyası (yoksa None)"""
+        with self._lock:
+            pending = self._pending.get(user_id)
+            if pending is None:
+                return None
+            return {"set_fields": dict(pending.set_fields),
+                    "add_to_set": {k: list(v) for k, v in pending.add_to_set.items()}}
+
+    def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Mongo'daki profil (diğer process'lerin yayınladıkları dahil) + bu process'te bekleyenler"""
+        profile = self._get_writer().get_user_with_pending(user_id)
+        with self._lock:
+            pending = self._pending.get(user_id)
+            if pending is None:
+                return profile
+            return overlay_profile(profile or {"user_id": user_id}, pending.set_fields, pending.add_to_set)
+
+    # ============================================
+    # BACKGROUND FLUSH & SHUTDOWN
+    # ============================================
+
+    def _ensure_worker(self):
+        if self._thread is not None or self._closed:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="profile-buffer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        interval = max(0.5, min(self.quiet, self.max_age) / 4)
+        if self.publish_interval > 0:
+            interval = min(interval, self.publish_interval)
+        while not self._wakeup.wait(interval):
+            try:
+                self.flush_due()
+                if self.publish_interval > 0:
+                    self.publish_pending()
+            except Exception as e:
+                logger.error(f"❌ Profil tampon döngüsü hatası: {e}")
+        if self._shutdown_requested and not self._closed:
+            # SIGTERM: sunucu kapanırken beklemeden yaz; sonradan eklenenleri atexit'teki close() yazar
+            try:
+                written = self.flush(reason="shutdown")
+                if written:
+                    logger.info(f"💾 SIGTERM sonrası {written} profil yazıldı")
+            except Exception as e:
+                logger.error(f"❌ Kapanış flush hatası: {e}")
+
+    def request_shutdown(self):
+        """
+        Sinyal handler'ından güvenle çağrılabilir: kilit almaz, sadece bayrak
+        koyar ve arka plan thread'ini son flush için uyandırır
+        """
+        self._shutdown_requested = True
+        self._wakeup.set()
+
+    def close(self):
+        """Arka plan döngüsünü durdur ve her şeyi yaz (sinyal handler'ından çağrılmamalı)"""
+        self._closed = True
+        self._wakeup.set()
+        written = self.flush(reason="shutdown")
+        if written:
+            logger.info(f"💾 Kapanışta {written} profil yazıldı")
+
+
+profile_buffer = ProfileBuffer()
+atexit.register(profile_buffer.close)
+
+
+def _install_sigterm_flush():
+    """
+    SIGTERM'de tamponun yazılmasını başlat, sonra önceki handler'a devret
+
+    Handler kesilen kodun ortasında (ör. add() kilidi tutulurken) ana thread'de
+    çalışır; kilit alan close() burada çağrılırsa process kilitlenir. Handler
+    sadece request_shutdown() çağırır. Önceki handler yoksa (SIG_DFL) process
+    SystemExit ile normal kapanır ki atexit'teki close() çalışsın.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def handler(signum, frame):
+        profile_buffer.request_shutdown()
+        if callable(previous):
+            previous(signum, frame)
+        elif previous != signal.SIG_IGN:
+            raise SystemExit(128 + signum)
+
+    signal.signal(signal.SIGTERM, handler)
+
+
+_install_sigterm_flush()
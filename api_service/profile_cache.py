@@ -0,0 +1,174 @@
+# api_service/profile_cache.py
+"""
+FastAPI servisi için read-through user profil cache'i
+
+- LRU + TTL: en fazla PROFILE_CACHE_SIZE profil, her biri PROFILE_CACHE_TTL
+  saniye. Bulunamayan kullanıcılar da (None) cache'lenir.
+- Aynı process'teki yazmalar MongoDBLogger.add_user_listener ile anında
+  invalidate eder.
+- Birden fazla worker / process için PROFILE_CACHE_INVALIDATION=mongo:
+  her MongoDBLogger user yazmalarını capped user_changes collection'ına
+  ekler, InvalidationSubscriber tailable cursor ile izleyip diğer
+  process'lerin yazdığı kullanıcıları siler. Kanal kapalıysa diğer
+  process'lerin yazmaları en geç TTL sonunda görünür.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from pymongo import CursorType
+from pymongo.errors import PyMongoError
+
+from api_service.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "10000"))
+PROFILE_CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", "60"))  # saniye
+
+PROFILE_CACHE_REQUESTS = REGISTRY.counter(
+    "profile_cache_requests_total",
+    "Profil cache okumaları (hit / miss / expired)",
+    ("result",)
+)
+PROFILE_CACHE_INVALIDATIONS = REGISTRY.counter(
+    "profile_cache_invalidations_total",
+    "Profil cache invalidation'ları (local / remote / resync)",
+    ("source",)
+)
+PROFILE_CACHE_ENTRIES = REGISTRY.gauge(
+    "profile_cache_entries",
+    "Cache'teki profil sayısı"
+)
+
+
+class ProfileCache:
+    """
+    user_id -> profil (LRU + TTL)
+
+    Dönen dict'ler cache'le paylaşılır; çağıran değiştirmemeli.
+    """
+
+    def __init__(self,
+                 maxsize: int = PROFILE_CACHE_SIZE,
+                 ttl: float = PROFILE_CACHE_TTL,
+                 clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._items: "OrderedDict[str, Tuple[float, Optional[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Yükleme sırasında invalidation olduysa eski değer cache'e yazılmaz
+        self._epoch = 0
+
+    def get(self, user_id: str, loader: Callable[[str], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """Cache'ten oku, yoksa loader(user_id) ile yükle ve sakla"""
+        now = self.clock()
+        with self._lock:
+            entry = self._items.get(user_id)
+            if entry is not None:
+                expires_at, profile = entry
+                if expires_at > now:
+                    self._items.move_to_end(user_id)
+                    PROFILE_CACHE_REQUESTS.inc(result="hit")
+                    return profile
+                del self._items[user_id]
+                PROFILE_CACHE_REQUESTS.inc(result="expired")
+            else:
+                PROFILE_CACHE_REQUESTS.inc(result="miss")
+            epoch = self._epoch
+
+        profile = loader(user_id)
+
+        with self._lock:
+            if self._epoch == epoch and self.maxsize > 0:
+                self._items[user_id] = (self.clock() + self.ttl, profile)
+                self._items.move_to_end(user_id)
+                while len(self._items) > self.maxsize:
+                    self._items.popitem(last=False)
+            PROFILE_CACHE_ENTRIES.set(len(self._items))
+        return profile
+
+    def invalidate(self, user_id: str, source: str = "local"):
+        with self._lock:
+            self._epoch += 1
+            self._items.pop(user_id, None)
+            PROFILE_CACHE_ENTRIES.set(len(self._items))
+        PROFILE_CACHE_INVALIDATIONS.inc(source=source)
+
+    def clear(self, source: str = "local"):
+        with self._lock:
+            self._epoch += 1
+            self._items.clear()
+            PROFILE_CACHE_ENTRIES.set(0)
+        PROFILE_CACHE_INVALIDATIONS.inc(source=source)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._items), "maxsize": self.maxsize, "ttl": self.ttl}
+
+
+class InvalidationSubscriber:
+    """
+    user_changes capped collection'ını tailable cursor ile izler
+
+    Kendi process'inin kayıtlarını (origin) atlar; onlar listener ile zaten
+    invalidate edildi. Farklı process'lerin ObjectId'leri aynı saniye içinde
+    sıralı olmadığı için _id ile filtrelenmez: cursor her seferinde doğal
+    (ekleme) sırasıyla baştan açılır, işlenen son kayda kadar olanlar atlanır.
+    Son kayıt capped collection'dan düşmüşse aradaki kayıtlar kaçmış olabilir;
+    cache tamamen temizlenir. Bağlantı hatasında da cache temizlenir ve en son
+    kayıttan devam edilir.
+    """
+
+    def __init__(self, collection, cache: ProfileCache, origin: str, retry_seconds: float = 1.0):
+        self.collection = collection
+        self.cache = cache
+        self.origin = origin
+        self.retry_seconds = retry_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profile-cache-invalidation", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _latest_id(self):
+        latest = list(self.collection.find({}, {"_id": 1}).sort("$natural", -1).limit(1))
+        return latest[0]["_id"] if latest else None
+
+    def _run(self):
+        last_id = None
+        first = True
+        while not self._stop.is_set():
+            try:
+                if first:
+                    last_id = self._latest_id()
+                    first = False
+                # last_id görülene kadar olan kayıtlar daha önce işlendi
+                skipping = last_id is not None
+                cursor = self.collection.find({}, cursor_type=CursorType.TAILABLE_AWAIT).max_await_time_ms(1000)
+                while cursor.alive and not self._stop.is_set():
+                    for change in cursor:
+                        if skipping:
+                            skipping = change["_id"] != last_id
+                            continue
+                        last_id = change["_id"]
+                        if change.get("origin") != self.origin:
+                            self.cache.invalidate(change["user_id"], source="remote")
+                    if skipping:
+                        # Mevcut kayıtlar bitti, last_id yok: capped collection biz okumadan döndü
+                        self.cache.clear(source="resync")
+                        skipping = False
+            except PyMongoError as e:
+                logger.warning(f"⚠️ Profil invalidation kanalı koptu: {e}")
+                self.cache.clear(source="resync")
+                first = True
+            self._stop.wait(self.retry_seconds)
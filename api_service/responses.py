@@ -0,0 +1,54 @@
+# api_service/responses.py
+"""
+MongoDB dokümanları için hızlı JSON yanıtı
+
+FastAPI, endpoint'in döndürdüğü dict'i önce jsonable_encoder ile alan alan
+dolaşıp kopyalar, sonra stdlib json ile yazar. MongoJSONResponse ile
+döndürülen içerik bu adımı atlar ve doğrudan byte'a çevrilir:
+
+- orjson kuruluysa: datetime / date / UUID native, ObjectId default ile
+- Değilse stdlib json + aynı tipler için default fonksiyonu
+
+datetime değerleri her iki yolda da jsonable_encoder ile aynı ISO 8601
+biçiminde yazılır.
+"""
+
+import json
+from datetime import date, datetime
+from typing import Any
+from uuid import UUID
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson opsiyonel - yoksa stdlib json
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    """orjson / json'un tanımadığı Mongo tipleri"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"JSON'a çevrilemeyen tip: {type(value).__name__}")
+
+
+def dumps_mongo(content: Any) -> bytes:
+    """Mongo dokümanını (datetime, ObjectId dahil) JSON byte'larına çevir"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class MongoJSONResponse(JSONResponse):
+    """jsonable_encoder'ı atlayan, Mongo tiplerini doğrudan yazan JSON yanıtı"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_mongo(content)
@@ -0,0 +1,98 @@
+# api_service/scripts/backfill_conversation_previews.py
+"""
+conversations.preview alanını eski mesajlar için doldur
+
+conversations v4 index'i (user_id, timestamp, sender, preview) "summary"
+projection'ını covered yapar; log_message preview'u yeni mesajlara yazar.
+Bu alan eklenmeden önce kaydedilmiş mesajlarda preview yoktur ve summary
+yanıtında boş gelir. Script:
+
+- preview'u olmayan mesajları _id sırasıyla batch batch okur
+- preview = metnin ilk CONVERSATION_PREVIEW_CHARS karakteri yazar
+- Her güncelleme sadece preview hâlâ yoksa uygulanır
+
+Uygulama çalışırken çalıştırılabilir ve tekrar çalıştırılabilir: doldurulan
+mesajlar filtreye bir daha girmez. Bucket şeması preview'u okurken metinden
+türettiği için sadece document şemasında gerekir.
+
+Kullanım:
+    python api_service/scripts/backfill_conversation_previews.py
+    python api_service/scripts/backfill_conversation_previews.py --batch-size 5000 --sleep-ms 20
+    python api_service/scripts/backfill_conversation_previews.py --verify
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+from pymongo import ASCENDING, MongoClient, UpdateOne
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from api_service.mongodb_logger import conversation_preview
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
+MISSING_PREVIEW = {"preview": {"$exists": False}}
+
+
+def backfill(conversations, batch_size: int, sleep_ms: float) -> int:
+    filled = 0
+    last_id = None
+    while True:
+        query = dict(MISSING_PREVIEW)
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = list(conversations.find(query, {"text": 1}).sort("_id", ASCENDING).limit(batch_size))
+        if not batch:
+            break
+
+        operations = [
+            UpdateOne({"_id": doc["_id"], **MISSING_PREVIEW},
+                      {"$set": {"preview": conversation_preview(doc.get("text"))}})
+            for doc in batch
+        ]
+        conversations.bulk_write(operations, ordered=False)
+
+        last_id = batch[-1]["_id"]
+        filled += len(operations)
+        logger.info(f"📝 {filled} mesajın preview'u yazıldı (son _id {last_id})")
+
+        if sleep_ms:
+            time.sleep(sleep_ms / 1000)
+
+    logger.info(f"✅ Backfill tamamlandı: {filled} mesaj")
+    return filled
+
+
+def verify(conversations) -> bool:
+    remaining = conversations.count_documents(MISSING_PREVIEW)
+    if remaining:
+        logger.warning(f"⚠️ {remaining} mesajda preview yok")
+        return False
+    logger.info("✅ Tüm mesajlarda preview var")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Eski conversation mesajlarına preview alanı ekle")
+    parser.add_argument("--uri", default=os.getenv("MONGODB_URI", "mongodb://localhost:27017/"))
+    parser.add_argument("--database", default=os.getenv("MONGODB_DB", "health_tourism"))
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--sleep-ms", type=float, default=0, help="Batch'ler arası bekleme (canlı yükü korumak için)")
+    parser.add_argument("--verify", action="store_true", help="Sadece preview'u olmayan mesajları say")
+    args = parser.parse_args()
+
+    conversations = MongoClient(args.uri)[args.database]["conversations"]
+    if args.verify:
+        ok = verify(conversations)
+    else:
+        backfill(conversations, args.batch_size, args.sleep_ms)
+        ok = verify(conversations)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
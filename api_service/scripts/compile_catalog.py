@@ -0,0 +1,105 @@
+# api_service/scripts/compile_catalog.py
+"""
+Klinik / otel kataloğunu mmap'lenen ikili dosyaya derle
+
+İki servisin veri setleri ayrıdır ve aynı dosyada ayrı kataloglara derlenir:
+
+    clinics / hotels          action server (chatbot aramaları); varsayılan
+                              api_clients'taki MOCK_CLINICS / MOCK_HOTELS (gruplama
+                              anahtarları kategori / şehir / bölge alanı olarak yazılır)
+    api_clinics / api_hotels  API (/api/clinics, /api/hotels, paketler); varsayılan
+                              catalog_data.py'deki CLINICS_DB / HOTELS_DB
+
+Her servis için kendi kaynağı esastır; id'ler iki set arasında aynı kaydı
+göstermez. Aynı klinik iki sette aynı "key" alanını taşır; booking'lerin
+kanonik clinic_id'si API id'sidir (catalog_data.canonical_clinic_id). Büyük kataloglar JSON dizi veya JSONL (satır başına kayıt)
+dosyasından verilir; iki servis aynı veriyi kullanacaksa aynı dosya iki
+seçeneğe de verilir. Çıktı CATALOG_PATH ile API ve action server'a gösterilir.
+
+Kullanım:
+    python api_service/scripts/compile_catalog.py --out api_service/data/catalog.bin
+    python api_service/scripts/compile_catalog.py --clinics clinics.jsonl --hotels hotels.jsonl \
+        --api-clinics clinics.jsonl --api-hotels hotels.jsonl --out catalog.bin
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from api_service.catalog_mmap import API_CLINIC_SCHEMA, API_HOTEL_SCHEMA, CatalogError, compile_catalog, open_catalog
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
+DEFAULT_OUT = os.getenv("CATALOG_PATH") or os.path.join("api_service", "data", "catalog.bin")
+
+
+def mock_clinics() -> Iterator[Dict[str, Any]]:
+    from rasa_service.actions.api_clients import MOCK_CLINICS
+    for category, cities in MOCK_CLINICS.items():
+        for city, clinics in cities.items():
+            for clinic in clinics:
+                yield dict(clinic, category=category, city=clinic.get("city") or city)
+
+
+def mock_hotels() -> Iterator[Dict[str, Any]]:
+    from rasa_service.actions.api_clients import MOCK_HOTELS
+    for region, hotels in MOCK_HOTELS.items():
+        for hotel in hotels:
+            yield dict(hotel, region=hotel.get("region") or region)
+
+
+def api_records(name: str) -> Iterator[Dict[str, Any]]:
+    from api_service import catalog_data
+    yield from getattr(catalog_data, name)
+
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    """JSON dizi veya JSONL dosyası"""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Katalog derleyici (mmap ikili format)")
+    parser.add_argument("--clinics", help="Klinik kayıtları (.json / .jsonl); varsayılan MOCK_CLINICS")
+    parser.add_argument("--hotels", help="Otel kayıtları (.json / .jsonl); varsayılan MOCK_HOTELS")
+    parser.add_argument("--api-clinics", help="API klinik kayıtları (.json / .jsonl); varsayılan CLINICS_DB")
+    parser.add_argument("--api-hotels", help="API otel kayıtları (.json / .jsonl); varsayılan HOTELS_DB")
+    parser.add_argument("--out", default=DEFAULT_OUT)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    try:
+        directory = compile_catalog(args.out, {
+            "clinics": read_records(args.clinics) if args.clinics else mock_clinics(),
+            "hotels": read_records(args.hotels) if args.hotels else mock_hotels(),
+            API_CLINIC_SCHEMA.name: read_records(args.api_clinics) if args.api_clinics else api_records("CLINICS_DB"),
+            API_HOTEL_SCHEMA.name: read_records(args.api_hotels) if args.api_hotels else api_records("HOTELS_DB"),
+        })
+        catalog = open_catalog(args.out)
+    except (OSError, CatalogError, ValueError) as e:
+        logger.error(f"❌ {e}")
+        sys.exit(1)
+
+    for name, meta in directory["catalogs"].items():
+        indexes = ", ".join(f"{field}: {len(keys)}" for field, keys in meta["indexes"].items())
+        logger.info(f"📦 {name}: {len(catalog[name])} kayıt, {meta['record_size']} byte/kayıt, "
+                    f"index anahtarları ({indexes}), versiyon {meta['version']}")
+    catalog.close()
+    logger.info(f"✅ {args.out} ({os.path.getsize(args.out) / 2**20:.2f} MB, "
+                f"{time.perf_counter() - started:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# api_service/scripts/export_conversations.py
+"""
+Conversation'ları gün partition'lı Parquet / Arrow dosyalarına export et
+
+Aynı komut tekrar çalıştırılırsa _manifest.json'daki tamamlanmış son
+günden devam eder. CONVERSATION_SCHEMA (document / bucketed) env'den okunur.
+
+Kullanım:
+    python api_service/scripts/export_conversations.py --start 2024-05-01 --end 2024-06-01 --out exports/conversations
+    python api_service/scripts/export_conversations.py --start 2024-05-01 --format arrow --compression lz4
+"""
+
+import argparse
+import logging
+import os
+import sys
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from api_service.conversation_export import EXPORT_FORMATS, ConversationExporter, ExportUnavailable
+from api_service.mongodb_logger import MongoDBLogger
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Conversation export (Parquet / Arrow IPC)")
+    parser.add_argument("--start", type=date.fromisoformat, required=True, help="İlk gün (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Bitiş günü, hariç (varsayılan: bugün; devam eden export'ta manifest'teki gün)")
+    parser.add_argument("--out", default="exports/conversations")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="parquet")
+    parser.add_argument("--compression", default="zstd")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--uri", default=os.getenv("MONGODB_URI", "mongodb://localhost:27017/"))
+    parser.add_argument("--database", default=os.getenv("MONGODB_DB", "health_tourism"))
+    args = parser.parse_args()
+
+    mongo_logger = MongoDBLogger(uri=args.uri, database=args.database)
+    try:
+        exporter = ConversationExporter(mongo_logger, args.out, args.format, args.compression, args.batch_size)
+        manifest = exporter.run(args.start, args.end)
+    except (ExportUnavailable, ValueError) as e:
+        logger.error(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        mongo_logger.close()
+
+    rows = sum(partition["rows"] for partition in manifest["partitions"].values())
+    logger.info(f"📊 {len(manifest['partitions'])} partition, {rows} mesaj -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# api_service/scripts/manage_indexes.py
+"""
+MongoDB index tanımlarını uygula ve kullanım raporu al (bkz. api_service/index_manager.py)
+
+Servisler açılışta eski tanımları arka planda uygular; INDEX_AUTO_APPLY=false
+ise bu script deploy adımında çalıştırılır.
+
+Kullanım:
+    python api_service/scripts/manage_indexes.py              # rapor
+    python api_service/scripts/manage_indexes.py --plan       # uygulanacak fark
+    python api_service/scripts/manage_indexes.py --apply
+    python api_service/scripts/manage_indexes.py --apply --force --drop-unmanaged
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+
+from pymongo import MongoClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from api_service.index_manager import IndexManager
+from api_service.mongodb_logger import CONVERSATION_SCHEMA, index_declarations
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
+
+def format_bytes(value) -> str:
+    if value is None:
+        return "-"
+    if value < 1024 * 1024:
+        return f"{value / 1024:.1f} KB"
+    return f"{value / 2**20:.1f} MB"
+
+
+def print_report(report):
+    for name, collection in report["collections"].items():
+        print(f"\n📁 {name}  v{collection['applied_version']}/{collection['version']}  "
+              f"{collection['documents'] if collection['documents'] is not None else '-'} doküman  "
+              f"index {format_bytes(collection['index_bytes'])}  "
+              f"yazma başına {collection['write_amplification']} index")
+        for index in collection["indexes"]:
+            ops = "-" if index["ops"] is None else index["ops"]
+            marker = "  " if index["status"] == "ok" else "⚠️"
+            print(f"  {marker} {index['name']:<40}{format_bytes(index['size_bytes']):>10}{ops:>12} ops  "
+                  f"{index['status']}{'  - ' + index['reason'] if index.get('reason') else ''}")
+    if report["recommendations"]:
+        print(f"\n💡 {len(report['recommendations'])} index gözden geçirilmeli (boyuta göre sıralı)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MongoDB index yöneticisi")
+    parser.add_argument("--uri", default=os.getenv("MONGODB_URI", "mongodb://localhost:27017/"))
+    parser.add_argument("--database", default=os.getenv("MONGODB_DB", "health_tourism"))
+    parser.add_argument("--conversation-schema", default=CONVERSATION_SCHEMA)
+    parser.add_argument("--plan", action="store_true", help="Sadece uygulanacak farkı göster")
+    parser.add_argument("--apply", action="store_true", help="Eski tanımları uygula")
+    parser.add_argument("--force", action="store_true", help="Versiyon güncel olsa da farkı uygula")
+    parser.add_argument("--drop-unmanaged", action="store_true", help="Tanımda olmayan index'leri sil")
+    parser.add_argument("--json", action="store_true", help="Raporu JSON yaz")
+    args = parser.parse_args()
+
+    db = MongoClient(args.uri)[args.database]
+    manager = IndexManager(db, index_declarations(args.conversation_schema))
+
+    if args.plan:
+        print(json.dumps(manager.plan(), indent=2, ensure_ascii=False))
+        return
+    if args.apply:
+        results = manager.apply(force=args.force, drop_unmanaged=args.drop_unmanaged)
+        for name, result in results.items():
+            logger.info(f"🗂️ {name}: {result['status']}")
+        if any(result["status"] == "error" for result in results.values()):
+            sys.exit(1)
+        return
+
+    report = manager.report()
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False, default=str))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
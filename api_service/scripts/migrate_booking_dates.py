@@ -0,0 +1,122 @@
+# api_service/scripts/migrate_booking_dates.py
+"""
+bookings.appointment_date: string -> native date (BSON datetime)
+
+Eski booking'lerde tarih "2025-11-15" gibi string saklanıyordu; string
+aralık sorguları yanlış sıralar ("15.11.2025") ve compound index'lerde
+tarih aralığı olarak kullanılamaz. Script:
+
+- appointment_date'i string olan booking'leri _id sırasıyla batch batch
+  okur ve parse_appointment_date ile datetime'a çevirir
+- Tarih olmayan metinleri ("Planlanacak") appointment_date_text'e taşır,
+  appointment_date'i null yapar
+- Her güncelleme sadece alan hâlâ aynı string ise uygulanır (çalışırken
+  değişen booking'ler ezilmez)
+
+Uygulama çalışırken çalıştırılabilir ve tekrar çalıştırılabilir: çevrilen
+kayıtlar filtreye bir daha girmez. --drop-legacy-indexes, compound
+index'ler oluştuktan sonra eski tek alanlı index'leri siler.
+
+Kullanım:
+    python api_service/scripts/migrate_booking_dates.py
+    python api_service/scripts/migrate_booking_dates.py --batch-size 5000 --sleep-ms 20
+    python api_service/scripts/migrate_booking_dates.py --verify --drop-legacy-indexes
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+from pymongo import ASCENDING, MongoClient, UpdateOne
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from api_service.mongodb_logger import (
+    BOOKING_CLINIC_SCHEDULE_INDEX, BOOKING_STATUS_SCHEDULE_INDEX, LEGACY_BOOKING_INDEXES, appointment_fields
+)
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
+STRING_DATES = {"appointment_date": {"$type": "string"}}
+
+
+def migrate(bookings, batch_size: int, sleep_ms: float) -> int:
+    converted = 0
+    unparsed = 0
+    last_id = None
+    while True:
+        query = dict(STRING_DATES)
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = list(bookings.find(query, {"appointment_date": 1}).sort("_id", ASCENDING).limit(batch_size))
+        if not batch:
+            break
+
+        operations = []
+        for doc in batch:
+            fields = appointment_fields(doc["appointment_date"])
+            if fields["appointment_date"] is None:
+                unparsed += 1
+            operations.append(UpdateOne({"_id": doc["_id"], "appointment_date": doc["appointment_date"]},
+                                        {"$set": fields}))
+        bookings.bulk_write(operations, ordered=False)
+
+        last_id = batch[-1]["_id"]
+        converted += len(operations)
+        logger.info(f"📅 {converted} booking çevrildi (son _id {last_id})")
+
+        if sleep_ms:
+            time.sleep(sleep_ms / 1000)
+
+    logger.info(f"✅ Çevirme tamamlandı: {converted} booking ({unparsed} tanesi tarih değil, "
+                f"appointment_date_text'e taşındı)")
+    return converted
+
+
+def verify(bookings) -> bool:
+    remaining = bookings.count_documents(STRING_DATES)
+    if remaining:
+        logger.warning(f"⚠️ {remaining} booking'de appointment_date hâlâ string")
+        return False
+    logger.info("✅ Tüm appointment_date değerleri date veya null")
+    return True
+
+
+def drop_legacy_indexes(bookings):
+    existing = bookings.index_information()
+    missing = [name for name in (BOOKING_CLINIC_SCHEDULE_INDEX, BOOKING_STATUS_SCHEDULE_INDEX) if name not in existing]
+    if missing:
+        logger.warning(f"⚠️ Compound index'ler yok ({', '.join(missing)}); eski index'ler silinmedi")
+        return
+    for name in LEGACY_BOOKING_INDEXES:
+        if name in existing:
+            bookings.drop_index(name)
+            logger.info(f"🗑️ {name} silindi")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Booking tarihlerini native date tipine çevir")
+    parser.add_argument("--uri", default=os.getenv("MONGODB_URI", "mongodb://localhost:27017/"))
+    parser.add_argument("--database", default=os.getenv("MONGODB_DB", "health_tourism"))
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--sleep-ms", type=float, default=0, help="Batch'ler arası bekleme (canlı yükü korumak için)")
+    parser.add_argument("--verify", action="store_true", help="Sadece string kalan tarihleri say")
+    parser.add_argument("--drop-legacy-indexes", action="store_true",
+                        help="Eski tek alanlı user_id / status / appointment_date index'lerini sil")
+    args = parser.parse_args()
+
+    bookings = MongoClient(args.uri)[args.database]["bookings"]
+    if args.verify:
+        ok = verify(bookings)
+    else:
+        migrate(bookings, args.batch_size, args.sleep_ms)
+        ok = verify(bookings)
+    if args.drop_legacy_indexes:
+        drop_legacy_indexes(bookings)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+# api_service/scripts/migrate_conversations_to_buckets.py
+"""
+conversations (mesaj başına doküman) -> conversation_buckets taşıma aracı
+
+Uygulama çalışırken çalıştırılabilir (online):
+    1. CONVERSATION_SCHEMA=document iken script'i çalıştır; _id sırasıyla
+       batch batch taşır ve her batch'ten sonra checkpoint yazar.
+       Yarıda kalırsa aynı komut kaldığı yerden devam eder.
+    2. Servisleri CONVERSATION_SCHEMA=bucketed ile yeniden başlat.
+    3. Hiçbir instance conversations'a yazmadığında --final-sweep, sonra --verify.
+
+Yazmalar devam ederken checkpoint'in gerisinde kalan mesajlar gelebilir
+(sunucular arası saat farkı, geç commit olan batch'ler daha küçük ObjectId
+taşır). Bu yüzden normal çalıştırma sadece --safety-window saniyeden eski
+_id'leri taşır; --final-sweep yazmalar kesildikten sonra tüm kaynağı tarar
+ve bucket'ta olmayan mesajları taşır.
+
+Kaynak collection silinmez (geri dönüş için); doğrulamadan sonra elle
+bırakılabilir. Mesajların orijinal _id'leri bucket'ta "mid" olarak saklanır;
+checkpoint yazılmadan kesilen batch tekrar çalıştığında zaten taşınmış
+mesajlar atlanır. --reset checkpoint'i siler ve baştan başlar; bucket'larda
+cutover'dan sonra yazılmış canlı mesajlar olabileceği için bucket'lar
+silinmez, bunun yerine her batch'te zaten taşınmış mid'ler atlanır.
+
+--verify sadece checkpoint'e kadar (_id <= last_id) taşınan mesajları
+karşılaştırır; cutover'dan sonra bucket'lara yazılan mesajlar daha yeni
+ObjectId'ler taşır ve sayılmaz. Checkpoint'in gerisine geç yazılmış ve
+atlanmış mesajlar sayı farkı olarak görünür (--final-sweep ile taşınır).
+
+Kullanım:
+    python api_service/scripts/migrate_conversations_to_buckets.py
+    python api_service/scripts/migrate_conversations_to_buckets.py --batch-size 2000 --sleep-ms 50
+    python api_service/scripts/migrate_conversations_to_buckets.py --final-sweep
+    python api_service/scripts/migrate_conversations_to_buckets.py --verify
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from bson.objectid import ObjectId
+from pymongo import ASCENDING, MongoClient, UpdateOne
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from api_service.conversation_buckets import (
+    BUCKET_CAP, BucketedConversations, bucket_update, compact_message
+)
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
+MIGRATION_ID = "conversations_to_buckets"
+# Bu kadar saniyeden yeni _id'ler taşınmaz (geç gelen küçük ObjectId'ler checkpoint'in gerisinde kalmasın)
+MIGRATION_SAFETY_WINDOW = float(os.getenv("MIGRATION_SAFETY_WINDOW", "300"))
+
+
+def load_checkpoint(db) -> Dict[str, Any]:
+    return db["schema_migrations"].find_one({"_id": MIGRATION_ID}) or {}
+
+
+def save_checkpoint(db, last_id, migrated: int):
+    db["schema_migrations"].update_one(
+        {"_id": MIGRATION_ID},
+        {"$set": {"last_id": last_id, "migrated": migrated, "updated_at": datetime.utcnow()}},
+        upsert=True
+    )
+
+
+def already_migrated(buckets, batch: List[Dict[str, Any]]) -> set:
+    """Checkpoint'ten önce yazılmış olabilecek mesajların _id'leri"""
+    ids = [doc["_id"] for doc in batch]
+    users = list({doc["user_id"] for doc in batch})
+    found = set()
+    cursor = buckets.find({"user_id": {"$in": users}, "messages.mid": {"$in": ids}}, {"messages.mid": 1})
+    for bucket in cursor:
+        found.update(message["mid"] for message in bucket["messages"])
+    return found & set(ids)
+
+
+def migrate(db, batch_size: int, sleep_ms: float, cap: int, dedupe_all: bool = False,
+            safety_window: float = MIGRATION_SAFETY_WINDOW, final_sweep: bool = False) -> int:
+    """
+    Checkpoint'ten devam ederek taşı
+
+    dedupe_all: Her batch'te zaten taşınmış mesajları ara (--reset sonrası;
+        normalde sadece kesintiden sonraki ilk batch kontrol edilir)
+    safety_window: Sadece bu kadar saniyeden eski _id'ler taşınır
+    final_sweep: Yazmalar kesildikten sonra: tüm kaynak baştan, pencere
+        olmadan taranır; bucket'ta olmayan mesajlar taşınır
+    """
+    source = db["conversations"]
+    bucketed = BucketedConversations(db["conversation_buckets"], cap=cap)
+    bucketed.create_indexes()
+
+    checkpoint = load_checkpoint(db)
+    checkpoint_id = checkpoint.get("last_id")
+    migrated = checkpoint.get("migrated", 0)
+    last_id = None if final_sweep else checkpoint_id
+    check_duplicates = last_id is not None
+    dedupe_all = dedupe_all or final_sweep
+    if final_sweep:
+        logger.info("🧹 Son tarama: tüm conversations taranıyor, bucket'ta olmayan mesajlar taşınacak")
+    elif check_duplicates:
+        logger.info(f"↩️ Checkpoint'ten devam: {migrated} mesaj taşınmış, son _id {last_id}")
+
+    while True:
+        id_range: Dict[str, Any] = {}
+        if last_id is not None:
+            id_range["$gt"] = last_id
+        if not final_sweep:
+            id_range["$lt"] = ObjectId.from_datetime(datetime.utcnow() - timedelta(seconds=safety_window))
+        query = {"_id": id_range} if id_range else {}
+        batch = list(source.find(query).sort("_id", ASCENDING).limit(batch_size))
+        if not batch:
+            break
+
+        # Normalde sadece kesintiden sonraki ilk batch kısmen yazılmış olabilir
+        skip = already_migrated(bucketed.collection, batch) if check_duplicates or dedupe_all else set()
+        check_duplicates = False
+
+        operations = []
+        for doc in batch:
+            if doc["_id"] in skip:
+                continue
+            query, update = bucket_update(doc["user_id"], compact_message(doc), cap)
+            operations.append(UpdateOne(query, update, upsert=True))
+        # ordered=True: aynı bucket'a giden upsert'ler sırayla uygulanır, cap korunur
+        if operations:
+            bucketed.collection.bulk_write(operations, ordered=True)
+
+        last_id = batch[-1]["_id"]
+        migrated += len(operations)
+        # Son tarama baştan başlar; checkpoint geri gitmesin
+        if not final_sweep or checkpoint_id is None or last_id > checkpoint_id:
+            save_checkpoint(db, last_id, migrated)
+        logger.info(f"📦 {migrated} mesaj taşındı (son _id {last_id})")
+
+        if sleep_ms:
+            time.sleep(sleep_ms / 1000)
+
+    logger.info(f"✅ Taşıma tamamlandı: {migrated} mesaj")
+    return migrated
+
+
+def verify(db) -> bool:
+    """Checkpoint'e kadar taşınan mesajların kullanıcı başına sayılarını karşılaştır"""
+    last_id = load_checkpoint(db).get("last_id")
+    if last_id is None:
+        logger.warning("⚠️ Checkpoint yok - önce taşımayı çalıştırın")
+        return False
+
+    source_counts = {
+        item["_id"]: item["count"]
+        for item in db["conversations"].aggregate([
+            {"$match": {"_id": {"$lte": last_id}}},
+            {"$group": {"_id": "$user_id", "count": {"$sum": 1}}},
+        ])
+    }
+    bucket_counts = {
+        item["_id"]: item["count"]
+        for item in db["conversation_buckets"].aggregate([
+            {"$unwind": "$messages"},
+            {"$match": {"messages.mid": {"$lte": last_id}}},
+            {"$group": {"_id": "$user_id", "count": {"$sum": 1}}},
+        ])
+    }
+    pending = db["conversations"].count_documents({"_id": {"$gt": last_id}})
+    if pending:
+        logger.warning(f"⚠️ Checkpoint'ten sonra {pending} mesaj henüz taşınmadı "
+                       f"(yazmalar kesildiyse --final-sweep çalıştırın)")
+
+    mismatched = {
+        user_id for user_id in set(source_counts) | set(bucket_counts)
+        if source_counts.get(user_id, 0) != bucket_counts.get(user_id, 0)
+    }
+    if mismatched:
+        sample = ", ".join(sorted(mismatched)[:10])
+        logger.warning(f"⚠️ {len(mismatched)} kullanıcıda sayı farkı: {sample} "
+                       f"(checkpoint'in gerisine geç yazılmış mesajlar için --final-sweep)")
+        return False
+    logger.info(f"✅ {len(source_counts)} kullanıcı, {sum(source_counts.values())} mesaj eşleşiyor "
+                f"(son _id {last_id})")
+    return not pending
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Conversation'ları bucketed şemaya taşı")
+    parser.add_argument("--uri", default=os.getenv("MONGODB_URI", "mongodb://localhost:27017/"))
+    parser.add_argument("--database", default=os.getenv("MONGODB_DB", "health_tourism"))
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--sleep-ms", type=float, default=0, help="Batch'ler arası bekleme (canlı yükü korumak için)")
+    parser.add_argument("--cap", type=int, default=BUCKET_CAP, help="Bucket başına en fazla mesaj")
+    parser.add_argument("--reset", action="store_true",
+                        help="Checkpoint'i sil ve baştan başla (taşınmış mesajlar tekrar yazılmaz)")
+    parser.add_argument("--safety-window", type=float, default=MIGRATION_SAFETY_WINDOW,
+                        help="Bu kadar saniyeden yeni mesajlar taşınmaz (geç yazılan küçük _id'ler için)")
+    parser.add_argument("--final-sweep", action="store_true",
+                        help="Tüm instance'lar bucketed'a geçtikten sonra: tüm kaynağı tara, eksikleri taşı")
+    parser.add_argument("--verify", action="store_true", help="Sadece checkpoint'e kadarki sayıları karşılaştır")
+    args = parser.parse_args()
+
+    db = MongoClient(args.uri)[args.database]
+    if args.verify:
+        sys.exit(0 if verify(db) else 1)
+    if args.reset:
+        db["schema_migrations"].delete_one({"_id": MIGRATION_ID})
+        logger.info("🔄 Checkpoint silindi; zaten taşınmış mesajlar atlanacak")
+    migrate(db, args.batch_size, args.sleep_ms, args.cap, dedupe_all=args.reset,
+            safety_window=args.safety_window, final_sweep=args.final_sweep)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+# benchmarks/bench_action_workers.py
+"""
+Pre-fork action server: worker sayısına göre tur throughput'u ve paylaşılan bellek
+
+1) Throughput: rasa_service/actions_server.py ayrı process olarak farklı
+   --workers değerleriyle başlatılır. Action, senkron bir MongoDB / Ollama
+   çağrısı gibi event loop'u --io-ms boyunca bloklar ve biraz CPU harcar.
+   --concurrency kadar eşzamanlı istemci /webhook'a tur gönderir.
+2) Bellek: gerçek `actions` paketiyle master + worker'ların toplam RSS'i ve
+   PSS'i (paylaşılan sayfalar process'lere bölünmüş) okunur. Fork öncesi
+   ısınma ve gc.freeze sayesinde PSS toplamı RSS toplamından çok düşük kalır.
+
+Linux gerekir (/proc/<pid>/smaps_rollup).
+
+Kullanım:
+    python benchmarks/bench_action_workers.py --workers 1 2 4 8 --duration 10
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import httpx
+
+from common import ROOT_DIR, percentile
+
+SERVER = os.path.join(ROOT_DIR, "rasa_service", "actions_server.py")
+
+BENCH_ACTIONS = '''
+import os
+import time
+
+from rasa_sdk import Action
+
+IO_SECONDS = float(os.getenv("BENCH_IO_MS", "50")) / 1000
+CPU_LOOPS = int(os.getenv("BENCH_CPU_LOOPS", "20000"))
+
+
+class ActionBenchTurn(Action):
+    def name(self):
+        return "action_bench_turn"
+
+    def run(self, dispatcher, tracker, domain):
+        time.sleep(IO_SECONDS)  # senkron MongoDB / partner API / Ollama çağrısı
+        total = sum(i * i for i in range(CPU_LOOPS))
+        dispatcher.utter_message(text=f"tamam {total % 97}")
+        return []
+'''
+
+TURN = {
+    "next_action": "action_bench_turn",
+    "sender_id": "bench",
+    "tracker": {"sender_id": "bench", "slots": {}, "latest_message": {"text": "merhaba"}, "events": []},
+    "domain": {},
+}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers: int, package: str, env: Dict[str, str]):
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, SERVER, "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--actions", package],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            httpx.get(f"{url}/health", timeout=1)
+            # Tüm worker'lar ayağa kalksın
+            time.sleep(1.0)
+            return process, url
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("Action server ayağa kalkmadı")
+
+
+def stop_server(process):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+async def load(url: str, concurrency: int, duration: float):
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(timeout=30, limits=limits) as client:
+        async def user():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await client.post(f"{url}/webhook", json=TURN)
+                    response.raise_for_status()
+                    latencies.append(time.perf_counter() - started)
+                except httpx.HTTPError:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+
+def process_tree(pid: int) -> List[int]:
+    pids = [pid]
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        pids.extend(int(child) for child in f.read().split())
+    return pids
+
+
+def memory_kb(pid: int) -> Dict[str, int]:
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                values[key.lower()] = int(rest.split()[0])
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork action server benchmark'ı")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5.0, help="Worker sayısı başına ölçüm (s)")
+    parser.add_argument("--io-ms", type=float, default=50, help="Action'ın blokladığı süre")
+    parser.add_argument("--cpu-loops", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_actions_") as tmp:
+        package_dir = os.path.join(tmp, "bench_actions")
+        os.makedirs(package_dir)
+        open(os.path.join(package_dir, "__init__.py"), "w").close()
+        with open(os.path.join(package_dir, "actions.py"), "w") as f:
+            f.write(BENCH_ACTIONS)
+
+        env = dict(os.environ, PYTHONPATH=tmp, ACTION_METRICS_PORT="0",
+                   BENCH_IO_MS=str(args.io_ms), BENCH_CPU_LOOPS=str(args.cpu_loops))
+
+        print(f"📊 Tur throughput'u (action {args.io_ms:.0f} ms bloklar, {args.concurrency} eşzamanlı istemci)\n")
+        print(f"{'worker':>7}{'tur/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'hata':>6}")
+        for workers in args.workers:
+            process, url = start_server(workers, "bench_actions", env)
+            try:
+                latencies, errors, elapsed = asyncio.run(load(url, args.concurrency, args.duration))
+            finally:
+                stop_server(process)
+            print(f"{workers:>7}{len(latencies) / elapsed:>10.1f}"
+                  f"{statistics.median(latencies) * 1000:>9.0f}"
+                  f"{percentile(sorted(latencies), 95) * 1000:>9.0f}{errors:>6}")
+
+        print("\n🧠 Gerçek actions paketiyle bellek (master + worker'lar)\n")
+        print(f"{'worker':>7}{'RSS MB':>10}{'PSS MB':>10}")
+        for workers in args.workers:
+            process, url = start_server(workers, "actions", dict(env, USE_MOCK_API="true"))
+            try:
+                totals = {"rss": 0, "pss": 0}
+                for pid in process_tree(process.pid):
+                    for key, value in memory_kb(pid).items():
+                        totals[key] += value
+            finally:
+                stop_server(process)
+            print(f"{workers:>7}{totals['rss'] / 1024:>10.1f}{totals['pss'] / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
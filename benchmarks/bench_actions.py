@@ -0,0 +1,148 @@
+# benchmarks/bench_actions.py
+"""
+Action server sıcak yolları için micro-benchmark'lar
+
+Ölçülenler: ClinicAPIClient._mock_search, HotelAPIClient._mock_search,
+normalize_city, calculate_*_price, paket oluşturma (assemble_bundles ve
+ActionGenerateBundleRecommendation.run) ve build_ollama_prompt. Katalog
+bağımlı olanlar 10 / 1k / 100k klinik ile çalıştırılır.
+
+Kullanım:
+    python benchmarks/bench_actions.py --save benchmarks/results/actions.json
+    python benchmarks/bench_actions.py --baseline benchmarks/results/actions.json
+    python benchmarks/bench_actions.py --sizes 10 1000 --filter mock_search
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+# Benchmark sırasında /metrics sunucusu açılmasın
+os.environ.setdefault("ACTION_METRICS_PORT", "0")
+
+from common import find_regressions, load_results, measure, print_result, save_results
+from fixtures import (FakeDispatcher, FakeTracker, group_clinics, group_hotels,
+                      make_clinics, make_events, make_hotels)
+
+from rasa_service.actions import actions, api_clients
+
+DEFAULT_SIZES = [10, 1_000, 100_000]
+
+BUNDLE_SLOTS = {
+    "tedavi_turu": "dental",
+    "tedavi_adi": "dental implant",
+    "sehir": "antalya'da",
+    "bolge": "Lara",
+    "butce": "5000",
+    "ucus_sinifi": "economy",
+}
+
+
+def _repeat_for(size: int) -> int:
+    """Büyük kataloglarda tekrar sayısını azalt"""
+    if size >= 100_000:
+        return 5
+    if size >= 1_000:
+        return 50
+    return 500
+
+
+def catalog_cases(size: int):
+    """Katalog boyutuna bağlı benchmark'lar: (isim, fn, number)"""
+    api_clients.MOCK_CLINICS = group_clinics(make_clinics(size))
+    api_clients.MOCK_HOTELS = group_hotels(make_hotels(max(10, size // 10)))
+
+    clinic_client = api_clients.ClinicAPIClient()
+    hotel_client = api_clients.HotelAPIClient()
+    number = _repeat_for(size)
+
+    yield ("clinic_mock_search[category+city]",
+           lambda: clinic_client._mock_search("dental", "Antalya", None), number)
+    yield ("clinic_mock_search[all+treatment_name]",
+           lambda: clinic_client._mock_search(None, None, "implant"), number)
+    yield ("hotel_mock_search[region]",
+           lambda: hotel_client._mock_search("Lara", 4), number)
+    yield ("hotel_mock_search[all]",
+           lambda: hotel_client._mock_search(None, 5), number)
+
+    clinics = clinic_client._mock_search("dental", "Antalya", None)["results"][:3]
+    hotels = hotel_client._mock_search("Lara", 5)["results"][:3]
+    flights = api_clients.MOCK_FLIGHTS
+    profile = dict(BUNDLE_SLOTS, ucus_tipi="connecting", sehir="Antalya")
+    yield ("assemble_bundles", lambda: actions.assemble_bundles(profile, clinics, hotels, flights), 2000)
+
+    bundle_action = actions.ActionGenerateBundleRecommendation()
+    tracker = FakeTracker(slots=BUNDLE_SLOTS)
+    yield ("bundle_action.run",
+           lambda: bundle_action.run(FakeDispatcher(), tracker, {}), number)
+
+
+def static_cases():
+    """Katalogdan bağımsız benchmark'lar"""
+    yield "normalize_city[hit]", lambda: actions.normalize_city("Antalya'da"), 100_000
+    yield "normalize_city[miss]", lambda: actions.normalize_city("Muğla"), 100_000
+    yield "calculate_treatment_price", lambda: actions.calculate_treatment_price("Dental Implant", 4.8), 100_000
+    yield "calculate_hotel_price", lambda: actions.calculate_hotel_price({"price_range": "premium"}, 7), 100_000
+    yield "calculate_flight_price", lambda: actions.calculate_flight_price("business", "direct"), 100_000
+
+    for events in (10, 500):
+        tracker = FakeTracker(slots=BUNDLE_SLOTS, events=make_events(events))
+        yield f"build_ollama_prompt[{events} events]", lambda t=tracker: actions.build_ollama_prompt(t), 5_000
+
+
+REGRESSION_CHECKS = {"per_call_s": ("higher_is_worse", 0.2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Action server micro-benchmark'ları")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Klinik sayıları")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", default="", help="Sadece adı bu metni içeren benchmark'lar")
+    parser.add_argument("--save", help="Sonuçları JSON olarak kaydet")
+    parser.add_argument("--baseline", help="Karşılaştırılacak önceki sonuç dosyası")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Çağrı başı süre artış toleransı")
+    args = parser.parse_args()
+
+    # Log formatlama / handler maliyeti ölçüme girmesin
+    logging.disable(logging.INFO)
+
+    results = {}
+
+    def run(name, fn, number):
+        if args.filter and args.filter not in name:
+            return
+        result = measure(fn, repeat=args.repeat, number=number)
+        print_result(name, result)
+        results[name] = {"per_call_s": result["median"], "best_s": result["best"]}
+
+    print("📊 Action hot path benchmark'ları\n")
+    for name, fn, number in static_cases():
+        run(name, fn, number)
+
+    original = (api_clients.MOCK_CLINICS, api_clients.MOCK_HOTELS)
+    try:
+        for size in args.sizes:
+            print(f"\n— {size} klinik —")
+            for name, fn, number in catalog_cases(size):
+                run(f"{name}@{size}", fn, number)
+    finally:
+        api_clients.MOCK_CLINICS, api_clients.MOCK_HOTELS = original
+
+    if args.save:
+        save_results(args.save, {"benchmarks": results})
+
+    if args.baseline:
+        baseline = load_results(args.baseline)["benchmarks"]
+        checks = {metric: (direction, args.tolerance) for metric, (direction, _) in REGRESSION_CHECKS.items()}
+        regressions = find_regressions(results, baseline, checks)
+        if regressions:
+            print("\n❌ Regresyonlar:", file=sys.stderr)
+            for line in regressions:
+                print(f"   • {line}", file=sys.stderr)
+            sys.exit(1)
+        print("\n✅ Baseline'a göre regresyon yok", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
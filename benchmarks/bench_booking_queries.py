@@ -0,0 +1,216 @@
+# benchmarks/bench_booking_queries.py
+"""
+Koordinatör panosu sorguları: string tarih + tek alanlı index'ler vs
+native date + compound index'ler + keyset sayfalama
+
+Sentetik booking'ler eski şemayla (appointment_date "2025-11-15" string,
+user_id / status / appointment_date tek alanlı index'ler) yüklenir, sonra:
+
+    önce     klinik + "confirmed" + 30 günlük aralık, skip/limit sayfalama
+    taşıma   scripts/migrate_booking_dates.py + IndexManager (compound index'ler,
+             eski tek alanlı index'ler silinir)
+    sonra    MongoDBLogger.query_bookings (summary projection, keyset cursor)
+
+Her sorgu için ilk sayfa ve --deep-page'inci sayfa ölçülür. --mongo-uri ile
+explain("executionStats")'tan incelenen index girişi / doküman sayısı ve
+sorgunun covered olup olmadığı (totalDocsExamined == 0) da yazılır.
+mongomock'ta index ve explain yoktur, sadece sonuçların aynı olduğu
+doğrulanır; varsayılan boyut da küçüktür.
+
+Kullanım:
+    python benchmarks/bench_booking_queries.py --mongo-uri mongodb://localhost:27017 --bookings 10000000
+    python benchmarks/bench_booking_queries.py --bookings 20000
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List
+
+from pymongo import ASCENDING
+
+from common import ROOT_DIR, measure, print_result
+
+from api_service import mongodb_logger
+
+sys.path.append(os.path.join(ROOT_DIR, "api_service", "scripts"))
+from migrate_booking_dates import migrate  # noqa: E402
+
+STATUS_WEIGHTS = {"pending": 20, "confirmed": 50, "completed": 25, "cancelled": 5}
+TREATMENTS = ["dental implant", "rhinoplasty", "hair transplant", "botox", "lasik"]
+EPOCH = datetime(2025, 1, 1)
+INSERT_BATCH = 10000
+PAGE_SIZE = 50
+
+
+def make_bookings(count: int, clinics: int, days: int, seed: int) -> Iterator[List[Dict[str, Any]]]:
+    """Eski şemada (string tarih) booking batch'leri"""
+    rng = random.Random(seed)
+    statuses = list(STATUS_WEIGHTS)
+    weights = list(STATUS_WEIGHTS.values())
+    batch = []
+    for i in range(count):
+        appointment = EPOCH + timedelta(days=rng.randrange(days))
+        batch.append({
+            "user_id": f"user_{rng.randrange(count // 3 + 1)}",
+            "clinic_id": rng.randrange(1, clinics + 1),
+            "treatment": rng.choice(TREATMENTS),
+            "appointment_date": appointment.strftime("%Y-%m-%d"),
+            "status": rng.choices(statuses, weights)[0],
+            "costs": {"total": rng.randrange(500, 8000)},
+            "currency": "EUR",
+            "created_at": appointment - timedelta(days=rng.randrange(1, 90)),
+        })
+        if len(batch) == INSERT_BATCH:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class SequentialBulkWrite:
+    """mongomock'un bulk_write'ı kurulu pymongo ile çalışmıyor: işlemleri tek tek uygula"""
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+    def bulk_write(self, operations, ordered=True):
+        matched = sum(self._collection.update_one(op._filter, op._doc).matched_count for op in operations)
+        return SimpleNamespace(matched_count=matched)
+
+
+def explain_stats(cursor) -> str:
+    stats = cursor.explain()["executionStats"]
+    covered = "covered" if stats["totalDocsExamined"] == 0 else "fetch"
+    return (f"   keys {stats['totalKeysExamined']:>8}   docs {stats['totalDocsExamined']:>8}   "
+            f"{stats['executionTimeMillis']:>5} ms   {covered}")
+
+
+def legacy_page(bookings, clinic_id: int, start: datetime, end: datetime, page: int):
+    """Eski yol: string aralık + skip"""
+    return (bookings
+            .find({"clinic_id": clinic_id, "status": "confirmed",
+                   "appointment_date": {"$gte": start.strftime("%Y-%m-%d"), "$lt": end.strftime("%Y-%m-%d")}})
+            .sort([("appointment_date", ASCENDING), ("_id", ASCENDING)])
+            .skip(page * PAGE_SIZE)
+            .limit(PAGE_SIZE))
+
+
+def cursor_for_page(mongo, page: int, **filters):
+    """page'inci sayfanın cursor'ı (önceki sayfalar keyset ile gezilir)"""
+    cursor = None
+    for _ in range(page):
+        _, cursor = mongo.query_bookings(limit=PAGE_SIZE, cursor=cursor, **filters)
+        if cursor is None:
+            break
+    return cursor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Booking sorgu API'si benchmark'ı")
+    parser.add_argument("--bookings", type=int, help="Varsayılan: --mongo-uri ile 10M, mongomock'ta 20000")
+    parser.add_argument("--clinics", type=int, default=100)
+    parser.add_argument("--days", type=int, default=730, help="Randevuların yayıldığı gün sayısı")
+    parser.add_argument("--deep-page", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--mongo-uri", help="Gerçek MongoDB (verilmezse mongomock)")
+    parser.add_argument("--database", default="health_tourism_bench")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    real_mongo = bool(args.mongo_uri)
+    count = args.bookings or (10_000_000 if real_mongo else 20000)
+    if not real_mongo:
+        import mongomock
+        # Eski şema ve MongoDBLogger aynı bellek içi sunucuyu görsün
+        shared_client = mongomock.MongoClient()
+        mongodb_logger.MongoClient = lambda *args, **kwargs: shared_client
+        print("⚠️ mongomock: index'ler gerçek değil ve sorgular collection'ı tarar; explain yok.\n"
+              "   10M booking ve index istatistikleri için --mongo-uri kullanın.\n")
+
+    client = mongodb_logger.MongoClient(args.mongo_uri or "mongodb://localhost:27017/")
+    db = client[args.database]
+    bookings = db["bookings"]
+
+    bookings.drop()
+    db["schema_meta"].delete_many({})
+    for name in mongodb_logger.LEGACY_BOOKING_INDEXES:
+        bookings.create_index(name.rsplit("_", 1)[0])
+    started = time.perf_counter()
+    for batch in make_bookings(count, args.clinics, args.days, args.seed):
+        bookings.insert_many(batch, ordered=False)
+    print(f"📦 {count} booking yüklendi ({time.perf_counter() - started:.1f}s), "
+          f"{args.clinics} klinik, {args.days} gün\n")
+
+    clinic_id = 1
+    start = EPOCH + timedelta(days=args.days // 2)
+    end = start + timedelta(days=30)
+    filters = {"clinic_id": clinic_id, "status": "confirmed", "date_from": start, "date_to": end}
+
+    print(f"— önce: string tarih, tek alanlı index'ler (klinik {clinic_id}, confirmed, 30 gün) —")
+    legacy_ids = [str(doc["_id"]) for doc in legacy_page(bookings, clinic_id, start, end, 0)]
+    legacy_deep = [str(doc["_id"]) for doc in legacy_page(bookings, clinic_id, start, end, args.deep_page)]
+    print_result("ilk sayfa (skip 0)", measure(lambda: list(legacy_page(bookings, clinic_id, start, end, 0)),
+                                               repeat=args.repeat))
+    if real_mongo:
+        print(explain_stats(legacy_page(bookings, clinic_id, start, end, 0)))
+    print_result(f"{args.deep_page}. sayfa (skip {args.deep_page * PAGE_SIZE})",
+                 measure(lambda: list(legacy_page(bookings, clinic_id, start, end, args.deep_page)),
+                         repeat=args.repeat))
+    if real_mongo:
+        print(explain_stats(legacy_page(bookings, clinic_id, start, end, args.deep_page)))
+
+    print("\n— taşıma —")
+    started = time.perf_counter()
+    migrate(bookings if real_mongo else SequentialBulkWrite(bookings), batch_size=5000, sleep_ms=0)
+    migrated = time.perf_counter() - started
+    started = time.perf_counter()
+    mongo = mongodb_logger.MongoDBLogger(uri=args.mongo_uri or "mongodb://localhost:27017/", database=args.database)
+    mongo.index_manager.wait()
+    print(f"{'tarih çevirme':<46}{migrated:10.1f} s")
+    print(f"{'compound index oluşturma':<46}{time.perf_counter() - started:10.1f} s")
+
+    print("\n— sonra: native date, compound index, keyset —")
+    page, _ = mongo.query_bookings(limit=PAGE_SIZE, **filters)
+    same = [b["booking_id"] for b in page] == legacy_ids
+    print_result("ilk sayfa", measure(lambda: mongo.query_bookings(limit=PAGE_SIZE, **filters), repeat=args.repeat))
+    if real_mongo:
+        query = mongodb_logger.booking_filter(**filters)
+        print(explain_stats(bookings.find(query, mongodb_logger.BOOKING_PROJECTIONS["summary"])
+                            .sort(mongodb_logger.BOOKING_SORT).limit(PAGE_SIZE + 1)))
+    deep_cursor = cursor_for_page(mongo, args.deep_page, **filters)
+    if deep_cursor is None:
+        print(f"   (aralıkta {args.deep_page} sayfa yok)")
+    else:
+        print_result(f"{args.deep_page}. sayfa (keyset cursor)",
+                     measure(lambda: mongo.query_bookings(limit=PAGE_SIZE, cursor=deep_cursor, **filters),
+                             repeat=args.repeat))
+        if real_mongo:
+            query = mongodb_logger.booking_filter(cursor=deep_cursor, **filters)
+            print(explain_stats(bookings.find(query, mongodb_logger.BOOKING_PROJECTIONS["summary"])
+                                .sort(mongodb_logger.BOOKING_SORT).limit(PAGE_SIZE + 1)))
+        deep_page, _ = mongo.query_bookings(limit=PAGE_SIZE, cursor=deep_cursor, **filters)
+        same = same and [b["booking_id"] for b in deep_page] == legacy_deep
+
+    status_filters = {"status": "pending", "date_from": start, "date_to": end}
+    print_result("tüm klinikler, pending, 30 gün", measure(lambda: mongo.query_bookings(limit=PAGE_SIZE, **status_filters),
+                                                           repeat=args.repeat))
+    if real_mongo:
+        query = mongodb_logger.booking_filter(**status_filters)
+        print(explain_stats(bookings.find(query, mongodb_logger.BOOKING_PROJECTIONS["summary"])
+                            .sort(mongodb_logger.BOOKING_SORT).limit(PAGE_SIZE + 1)))
+
+    print(f"\n{'✅' if same else '❌'} önce / sonra sayfaları {'aynı' if same else 'farklı'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# benchmarks/bench_booking_transitions.py
+"""
+Booking durum geçişleri: tek tek update_booking_status vs transition_bookings
+
+Gece onay çalıştırması gibi N pending booking'in bir kısmı (--conflicts
+oranında) araya giren iptallerle başka duruma geçmiş olarak hazırlanır,
+sonra hepsi pending -> confirmed taşınır:
+
+    tek tek      booking başına update_booking_status(expected_status=...)
+    toplu        transition_bookings (BOOKING_TRANSITION_BATCH'lik bulk_write'lar)
+
+bookings collection'ı round trip sayan bir vekille sarılır; --rtt-ms her
+round trip'e ağ gecikmesi ekler (mongomock'ta ağ yok). Ayrıca aynı
+idempotency key ile tekrarlanan create_booking çağrılarının tek kayıt
+açtığı ve chatbot'un (action_schedule_appointment) açtığı booking'in klinik
+panosunda API'nin clinic_id'siyle bulunduğu kontrol edilir.
+
+mongomock'un bulk_write'ı kurulu pymongo sürümüyle çalışmıyorsa vekil
+işlemleri tek tek uygular ama sunucuya tek istek gibi bir round trip sayar.
+mongomock her sorguda collection'ı baştan taradığı için süreler gerçek
+MongoDB'den çok yüksektir; asıl karşılaştırma round trip sayısıdır.
+
+Kullanım:
+    python benchmarks/bench_booking_transitions.py --bookings 2000 --rtt-ms 1
+    python benchmarks/bench_booking_transitions.py --mongo-uri mongodb://localhost:27017
+"""
+
+import argparse
+import logging
+import random
+import time
+from types import SimpleNamespace
+
+import common  # noqa: F401  (proje kökünü sys.path'e ekler)
+
+from api_service import mongodb_logger
+
+ROUND_TRIP_METHODS = {"insert_one", "find_one", "find", "update_one", "bulk_write", "insert_many"}
+
+
+class RoundTripCounter:
+    """Collection vekili: her sunucu çağrısını sayar ve rtt kadar bekler"""
+
+    def __init__(self, collection, rtt: float):
+        self._collection = collection
+        self.rtt = rtt
+        self.round_trips = 0
+
+    def __getattr__(self, name):
+        attribute = getattr(self._collection, name)
+        if name not in ROUND_TRIP_METHODS:
+            return attribute
+
+        def call(*args, **kwargs):
+            self.round_trips += 1
+            if self.rtt:
+                time.sleep(self.rtt)
+            if name == "bulk_write":
+                return self._bulk_write(*args, **kwargs)
+            return attribute(*args, **kwargs)
+        return call
+
+    def _bulk_write(self, operations, ordered=True):
+        try:
+            return self._collection.bulk_write(operations, ordered=ordered)
+        except TypeError:
+            # mongomock: işlemleri sırayla uygula (sunucu tarafı yürütmenin karşılığı)
+            matched = 0
+            for operation in operations:
+                matched += self._collection.update_one(operation._filter, operation._doc).matched_count
+            return SimpleNamespace(matched_count=matched)
+
+
+def prepare(mongo, count: int, conflicts: float, seed: int):
+    rng = random.Random(seed)
+    mongo.bookings.delete_many({})
+    result = mongo.bookings.insert_many([
+        {"user_id": f"user_{i}", "treatment": "dental implant", "status": "pending"}
+        for i in range(count)
+    ])
+    ids = [str(object_id) for object_id in result.inserted_ids]
+    cancelled = rng.sample(ids, int(count * conflicts))
+    mongo.bookings.update_many({"_id": {"$in": [mongodb_logger.ObjectId(i) for i in cancelled]}},
+                               {"$set": {"status": "cancelled"}})
+    return ids
+
+
+def check_chatbot_clinic_ids(mongo) -> bool:
+    """API kataloğundaki her klinik için chatbot booking'i /api/bookings?clinic_id=<API id> ile görünmeli"""
+    from fixtures import FakeDispatcher, FakeTracker
+    from api_service.catalog_data import CLINICS_DB
+    from rasa_service.actions import actions
+
+    actions.shared_mongo_logger = lambda: mongo
+    ok = True
+    for clinic in CLINICS_DB:
+        tracker = FakeTracker(slots={"klinik_adi": clinic["name"], "tarih": "2030-01-15"},
+                              sender_id=f"chatbot_{clinic['id']}")
+        actions.ActionScheduleAppointment().run(FakeDispatcher(), tracker, {})
+        bookings, _ = mongo.query_bookings(clinic_id=clinic["id"])
+        found = any(booking["user_id"] == tracker.sender_id for booking in bookings)
+        ok = ok and found
+        print(f"{'✅' if found else '❌'} {clinic['name']} (API id {clinic['id']}): chatbot booking "
+              f"{'panoda' if found else 'panoda yok'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Toplu booking geçişi benchmark'ı")
+    parser.add_argument("--bookings", type=int, default=2000)
+    parser.add_argument("--conflicts", type=float, default=0.05, help="Araya iptal girmiş booking oranı")
+    parser.add_argument("--rtt-ms", type=float, default=1.0, help="Round trip başına eklenen gecikme")
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--mongo-uri", help="Gerçek MongoDB (verilmezse mongomock)")
+    parser.add_argument("--database", default="health_tourism_bench")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    if not args.mongo_uri:
+        import mongomock
+        mongodb_logger.MongoClient = mongomock.MongoClient
+    mongo = mongodb_logger.MongoDBLogger(uri=args.mongo_uri or "mongodb://localhost:27017/",
+                                         database=args.database)
+    counter = RoundTripCounter(mongo.bookings, args.rtt_ms / 1000)
+    mongo.bookings = counter
+
+    print(f"📊 {args.bookings} booking pending -> confirmed, %{args.conflicts * 100:.0f} çakışma, "
+          f"round trip başına {args.rtt_ms} ms\n")
+    print(f"{'yol':<12}{'süre':>10}{'round trip':>12}{'güncellenen':>13}{'çakışan':>9}")
+
+    ids = prepare(mongo, args.bookings, args.conflicts, args.seed)
+    counter.round_trips = 0
+    started = time.perf_counter()
+    updated = sum(mongo.update_booking_status(i, "confirmed", expected_status="pending") for i in ids)
+    elapsed = time.perf_counter() - started
+    print(f"{'tek tek':<12}{elapsed:>9.2f}s{counter.round_trips:>12}{updated:>13}{len(ids) - updated:>9}")
+
+    ids = prepare(mongo, args.bookings, args.conflicts, args.seed)
+    counter.round_trips = 0
+    started = time.perf_counter()
+    results = mongo.transition_bookings([{"booking_id": i, "from": "pending", "to": "confirmed"} for i in ids])
+    elapsed = time.perf_counter() - started
+    updated = sum(1 for r in results if r["result"] == "updated")
+    conflicts = sum(1 for r in results if r["result"] == "conflict")
+    print(f"{'toplu':<12}{elapsed:>9.2f}s{counter.round_trips:>12}{updated:>13}{conflicts:>9}")
+
+    # Idempotency: her isteği 3 kez tekrarlayan istemci
+    mongo.bookings.delete_many({})
+    for i in range(200):
+        for _ in range(3):
+            mongo.create_booking({"user_id": f"user_{i}", "treatment": "botox"}, idempotency_key=f"retry-{i}")
+    print(f"\n♻️ 200 istek x 3 tekrar -> {mongo.bookings.count_documents({})} booking\n")
+
+    mongo.bookings.delete_many({})
+    check_chatbot_clinic_ids(mongo)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# benchmarks/bench_catalog_http.py
+"""
+Katalog endpoint'leri: kablodaki byte ve istek başı sunucu CPU'su
+
+main.py process içinde (mongomock ile) yüklenir, katalog sentetik
+kliniklerle büyütülür ve aynı arama farklı koşullarda tekrarlanır:
+
+    plain            Eski davranış - sıkıştırmasız FastAPI JSON yanıtı
+    identity         catalog_response, Accept-Encoding: identity
+    gzip[cold]       gzip, sıkıştırılmış gövde cache'i kapalı
+    gzip[cached]     gzip, aynı sorgu için cache'ten
+    br[cached]       brotli (kuruluysa)
+    revalidate_304   GET + If-None-Match (gzip ETag'i) - arama çalışmaz, gövde yok
+
+CPU, istemci tarafı da dahil process CPU süresidir (time.process_time);
+senaryolar arasındaki fark sunucu tarafındaki işi gösterir.
+
+Kullanım:
+    python benchmarks/bench_catalog_http.py --clinics 500 --requests 500
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from typing import Any, Dict
+
+import httpx
+
+import common  # noqa: F401  (proje kökünü sys.path'e ekler)
+from fixtures import make_clinics
+
+
+def build_app(clinic_count: int):
+    import mongomock
+
+    import api_service.mongodb_logger as mongodb_logger
+    mongodb_logger.MongoClient = mongomock.MongoClient
+
+    from api_service import http_cache, main
+
+    main.CLINICS_DB[:] = [dict(c, city="Antalya") for c in make_clinics(clinic_count)]
+    http_cache.catalog_versions.register(main.CLINICS, main.CLINICS_DB)
+
+    @main.app.post("/bench/plain_search")
+    def plain_search(request: main.SearchRequest):
+        return main._search_clinics(request)
+
+    return main.app, http_cache
+
+
+async def run_case(client: httpx.AsyncClient, path: str, headers: Dict[str, str], requests: int) -> Dict[str, Any]:
+    body = {"city": "Antalya"}
+    wire_bytes = 0
+    statuses = set()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    for _ in range(requests):
+        if path.startswith("GET "):
+            response = await client.get(path[4:], params=body, headers=headers)
+        else:
+            response = await client.post(path, json=body, headers=headers)
+        wire_bytes += response.num_bytes_downloaded
+        statuses.add(response.status_code)
+    return {
+        "bytes_per_request": wire_bytes / requests,
+        "cpu_us_per_request": (time.process_time() - cpu_start) / requests * 1e6,
+        "wall_us_per_request": (time.perf_counter() - wall_start) / requests * 1e6,
+        "status": sorted(statuses),
+    }
+
+
+async def main_async(args):
+    app, http_cache = build_app(args.clinics)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        first = await client.get("/api/clinics/search", params={"city": "Antalya"},
+                                 headers={"Accept-Encoding": "gzip"})
+        etag = first.headers["etag"]
+
+        cases = [
+            ("plain", "/bench/plain_search", {"Accept-Encoding": "identity"}, None),
+            ("identity", "/api/clinics/search", {"Accept-Encoding": "identity"}, None),
+            ("gzip[cold]", "/api/clinics/search", {"Accept-Encoding": "gzip"}, 0),
+            ("gzip[cached]", "/api/clinics/search", {"Accept-Encoding": "gzip"}, None),
+        ]
+        if http_cache.brotli is not None:
+            cases.append(("br[cached]", "/api/clinics/search", {"Accept-Encoding": "br, gzip"}, None))
+        cases.append(("revalidate_304", "GET /api/clinics/search",
+                      {"Accept-Encoding": "gzip", "If-None-Match": etag}, None))
+
+        print(f"📊 Katalog yanıtları ({args.clinics} klinik, {args.requests} istek)\n")
+        print(f"{'senaryo':<16}{'byte/istek':>12}{'CPU µs':>10}{'süre µs':>10}  durum")
+        default_size = http_cache._encoded_cache.size
+        for name, path, headers, cache_size in cases:
+            http_cache._encoded_cache.size = default_size if cache_size is None else cache_size
+            http_cache._encoded_cache._items.clear()
+            result = await run_case(client, path, headers, args.requests)
+            print(f"{name:<16}{result['bytes_per_request']:>12.0f}{result['cpu_us_per_request']:>10.0f}"
+                  f"{result['wall_us_per_request']:>10.0f}  {result['status']}")
+        http_cache._encoded_cache.size = default_size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Katalog ETag / sıkıştırma benchmark'ı")
+    parser.add_argument("--clinics", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# benchmarks/bench_catalog_mmap.py
+"""
+Dict kataloglar vs mmap'lenmiş ikili katalog (api_service/catalog_mmap.py)
+
+1) Bellek: --workers kadar process kataloğu yükler ve tüm kayıtları bir kez
+   okur; toplam RSS ve PSS (paylaşılan sayfalar process'lere bölünmüş)
+   karşılaştırılır. Dict modunda her process kendi kopyasını tutar, mmap
+   modunda sayfalar page cache'ten paylaşılır.
+2) Açılış: process başına katalog yükleme süresi (JSON -> dict vs mmap).
+3) Arama: kategori + şehir araması, id ile kayıt ve sonuçların dict'e çözülmesi.
+
+Linux gerekir (/proc/<pid>/smaps_rollup).
+
+Kullanım:
+    python benchmarks/bench_catalog_mmap.py --clinics 200000 --hotels 50000 --workers 4
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import ROOT_DIR, measure, print_result
+from fixtures import group_clinics, group_hotels, make_clinics, make_hotels
+
+from api_service.catalog_mmap import compile_catalog, open_catalog
+
+WORKER = '''
+import json, sys, time
+sys.path.append({root!r})
+mode, path = sys.argv[1], sys.argv[2]
+started = time.perf_counter()
+if mode == "dict":
+    with open(path, encoding="utf-8") as f:
+        catalog = json.load(f)
+    loaded = time.perf_counter() - started
+    touched = sum(len(c["name"]) for cities in catalog["clinics"].values()
+                  for clinics in cities.values() for c in clinics)
+else:
+    from api_service.catalog_mmap import open_catalog
+    catalog = open_catalog(path)
+    loaded = time.perf_counter() - started
+    clinics = catalog["clinics"]
+    touched = sum(len(clinics.field(recno, "name")) for recno in clinics.all())
+print(f"{{loaded}} {{touched}}", flush=True)
+sys.stdin.readline()
+'''
+
+
+def memory_kb(pid: int):
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                values[key.lower()] = int(rest.split()[0])
+    return values
+
+
+def run_workers(mode: str, path: str, workers: int):
+    code = WORKER.format(root=ROOT_DIR)
+    processes = [subprocess.Popen([sys.executable, "-c", code, mode, path],
+                                  stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+                 for _ in range(workers)]
+    load_times = []
+    totals = {"rss": 0, "pss": 0}
+    try:
+        for process in processes:
+            load_times.append(float(process.stdout.readline().split()[0]))
+        for process in processes:
+            for key, value in memory_kb(process.pid).items():
+                totals[key] += value
+    finally:
+        for process in processes:
+            process.stdin.close()
+            process.wait()
+    return max(load_times), totals
+
+
+def dict_search(grouped, category, city):
+    category_clinics = grouped[category]
+    return category_clinics.get(city) or [c for clinics in category_clinics.values() for c in clinics]
+
+
+def mmap_search(catalog, category, city):
+    return catalog.lookup("category+city", (category, city)) or catalog.lookup("category", category)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dict vs mmap katalog benchmark'ı")
+    parser.add_argument("--clinics", type=int, default=100000)
+    parser.add_argument("--hotels", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    clinics = make_clinics(args.clinics)
+    hotels = make_hotels(args.hotels)
+    grouped_clinics = group_clinics(clinics)
+
+    with tempfile.TemporaryDirectory(prefix="bench_catalog_") as tmp:
+        json_path = os.path.join(tmp, "catalog.json")
+        bin_path = os.path.join(tmp, "catalog.bin")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({"clinics": grouped_clinics, "hotels": group_hotels(hotels)}, f, ensure_ascii=False)
+
+        started = time.perf_counter()
+        compile_catalog(bin_path, {"clinics": clinics, "hotels": hotels})
+        print(f"📦 {args.clinics} klinik + {args.hotels} otel: derleme {time.perf_counter() - started:.2f}s, "
+              f"JSON {os.path.getsize(json_path) / 2**20:.1f} MB, katalog {os.path.getsize(bin_path) / 2**20:.1f} MB\n")
+
+        print(f"🧠 {args.workers} process, tüm kayıtlar bir kez okunduktan sonra\n")
+        print(f"{'mod':>6}{'açılış':>12}{'RSS MB':>10}{'PSS MB':>10}")
+        for mode, path in (("dict", json_path), ("mmap", bin_path)):
+            load_time, totals = run_workers(mode, path, args.workers)
+            print(f"{mode:>6}{load_time * 1000:>10.1f}ms{totals['rss'] / 1024:>10.1f}{totals['pss'] / 1024:>10.1f}")
+
+        catalog = open_catalog(bin_path)
+        clinic_catalog = catalog["clinics"]
+        clinics_by_id = {c["id"]: c for c in clinics}
+        ids = [c["id"] for c in clinics[::max(1, len(clinics) // 1000)]]
+
+        print("\n⚡ Arama\n")
+        print_result("dict: kategori + şehir", measure(lambda: dict_search(grouped_clinics, "dental", "Ankara"), number=20))
+        print_result("mmap: kategori + şehir (kayıt no)",
+                     measure(lambda: mmap_search(clinic_catalog, "dental", "Ankara"), number=20))
+        recnos = mmap_search(clinic_catalog, "dental", "Ankara")[:50]
+        print_result("mmap: ilk 50 sonucu dict'e çöz", measure(lambda: [clinic_catalog.decode(r) for r in recnos],
+                                                               number=200), items=len(recnos))
+        print_result("dict: id ile", measure(lambda: [clinics_by_id[i] for i in ids], number=20), items=len(ids))
+        print_result("mmap: id ile (ikili arama)", measure(lambda: [clinic_catalog.get(i) for i in ids], number=20),
+                     items=len(ids))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+# benchmarks/bench_chat_gateway.py
+"""
+Chat gateway: ilk bot mesajı gecikmesi ve boşta bağlantı başına bellek
+
+1) Stand-in Rasa her turda birkaç mesaj, aralarında action / LLM süresi
+   kadar beklemeyle üretir. Frontend'in önceki yolu (tur başına fetch POST,
+   yanıt tur bitince) ile /ws/chat gateway'i (mesaj üretildiği anda) için
+   ilk mesaj ve tur sonu süreleri karşılaştırılır.
+2) Gateway ayrı bir process'te çalışır; --idle kadar boşta WebSocket açılıp
+   process'in RSS artışı bağlantı sayısına bölünür.
+
+Gateway sunucusu WebSocket için uvicorn'un websockets (veya wsproto)
+bağımlılığını kullanır; istemci tarafı da websockets ile bağlanır.
+
+Kullanım:
+    python benchmarks/bench_chat_gateway.py --turns 30 --idle 2000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+import websockets
+
+import common  # noqa: F401  (proje kökünü sys.path'e ekler)
+
+from standin_server import StandinServer, load_profile
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve(port: int, rasa_url: str):
+    """Sadece gateway route'u olan uygulama (--serve ile alt process olarak)"""
+    import uvicorn
+    from fastapi import FastAPI, WebSocket
+
+    from api_service.chat_gateway import ChatGateway, UVICORN_WS_OPTIONS
+
+    app = FastAPI()
+    gateway = ChatGateway(rasa_url)
+
+    @app.websocket("/ws/chat")
+    async def chat_socket(websocket: WebSocket):
+        await gateway.serve(websocket)
+
+    @app.get("/rss")
+    def rss():
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return {"rss_kb": int(line.split()[1]), "connections": gateway.connections}
+        return {"rss_kb": None, "connections": gateway.connections}
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", ws_ping_interval=None,
+                **UVICORN_WS_OPTIONS)
+
+
+async def fetch_turns(rasa_url: str, turns: int):
+    first, total = [], []
+    async with httpx.AsyncClient(timeout=60) as client:
+        for i in range(turns):
+            started = time.perf_counter()
+            response = await client.post(f"{rasa_url}/webhooks/rest/webhook",
+                                         json={"sender": "bench_fetch", "message": f"merhaba {i}"})
+            response.json()
+            elapsed = time.perf_counter() - started
+            # Tarayıcı tüm mesajları ancak tur bitince görür
+            first.append(elapsed)
+            total.append(elapsed)
+    return first, total
+
+
+async def gateway_turns(ws_url: str, turns: int):
+    first, total = [], []
+    async with websockets.connect(f"{ws_url}?sender=bench_ws") as ws:
+        for i in range(turns):
+            started = time.perf_counter()
+            await ws.send(json.dumps({"message": f"merhaba {i}"}))
+            got_first = None
+            while True:
+                frame = json.loads(await ws.recv())
+                if frame["type"] == "bot" and got_first is None:
+                    got_first = time.perf_counter() - started
+                if frame["type"] in ("done", "error"):
+                    break
+            first.append(got_first if got_first is not None else time.perf_counter() - started)
+            total.append(time.perf_counter() - started)
+    return first, total
+
+
+async def idle_connections(ws_url: str, rss_url: str, count: int):
+    async with httpx.AsyncClient() as client:
+        before = (await client.get(rss_url)).json()
+        sockets = []
+        try:
+            for i in range(count):
+                sockets.append(await websockets.connect(f"{ws_url}?sender=idle_{i}", ping_interval=None))
+            await asyncio.sleep(1)
+            after = (await client.get(rss_url)).json()
+        finally:
+            await asyncio.gather(*(ws.close() for ws in sockets), return_exceptions=True)
+    return before, after
+
+
+def wait_for(url: str, timeout: float = 15):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} ayağa kalkmadı")
+
+
+def ms(values) -> str:
+    return f"{statistics.median(values) * 1000:>9.0f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chat gateway benchmark'ı")
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--idle", type=int, default=1000, help="Açılacak boşta bağlantı sayısı")
+    parser.add_argument("--messages", type=int, default=3, help="Tur başına bot mesajı")
+    parser.add_argument("--message-delay", type=float, default=0.3, help="Mesajlar arası süre (s)")
+    parser.add_argument("--serve", nargs=2, metavar=("PORT", "RASA_URL"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(int(args.serve[0]), args.serve[1])
+        return
+
+    profile = load_profile(None)
+    profile["/webhooks/rest/webhook"].update(
+        latency={"dist": "fixed", "value": 0.05},
+        messages={"dist": "fixed", "value": args.messages},
+        message_delay={"dist": "fixed", "value": args.message_delay})
+
+    with StandinServer(profile, port=free_port(), seed=1) as rasa:
+        port = free_port()
+        gateway = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", str(port), rasa.url])
+        try:
+            wait_for(f"http://127.0.0.1:{port}/rss")
+            ws_url = f"ws://127.0.0.1:{port}/ws/chat"
+
+            print(f"📊 Tur başına {args.messages} mesaj, aralarında {args.message_delay}s ({args.turns} tur)\n")
+            print(f"{'yol':<12}{'ilk mesaj ms':>14}{'tur ms':>9}")
+            for name, run in (("fetch", lambda: fetch_turns(rasa.url, args.turns)),
+                              ("websocket", lambda: gateway_turns(ws_url, args.turns))):
+                first, total = asyncio.run(run())
+                print(f"{name:<12}{ms(first):>14}{ms(total)}")
+
+            before, after = asyncio.run(idle_connections(ws_url, f"http://127.0.0.1:{port}/rss", args.idle))
+            per_connection = (after["rss_kb"] - before["rss_kb"]) / max(1, after["connections"])
+            print(f"\n🔌 {after['connections']} boşta bağlantı: RSS {before['rss_kb'] / 1024:.1f} -> "
+                  f"{after['rss_kb'] / 1024:.1f} MB ({per_connection:.1f} KB / bağlantı)")
+        finally:
+            gateway.terminate()
+            gateway.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
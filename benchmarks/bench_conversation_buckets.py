@@ -0,0 +1,105 @@
+# benchmarks/bench_conversation_buckets.py
+"""
+document vs bucketed conversation şeması
+
+Her şema için boş bir veritabanına MongoDBLogger.log_message ile aynı mesaj
+akışı yazılır, sonra:
+
+    yazma        mesaj / saniye (log_message)
+    son 50       get_user_conversations(limit=50)
+    geçmiş       get_conversation_history (kullanıcının tüm geçmişi)
+    depolama     doküman sayısı, veri ve index boyutu
+
+--mongo-uri ile boyutlar collStats'tan gelir. mongomock'ta veri boyutu
+dokümanların BSON toplamı, index için sadece index girişi sayısı
+(doküman x index) yazılır.
+
+Kullanım:
+    python benchmarks/bench_conversation_buckets.py --users 50 --messages 20000
+    python benchmarks/bench_conversation_buckets.py --mongo-uri mongodb://localhost:27017
+"""
+
+import argparse
+import logging
+import random
+import time
+from typing import Any, Dict
+
+import bson
+
+from common import measure, print_result
+
+from api_service import mongodb_logger
+
+SCHEMAS = {"document": "conversations", "bucketed": "conversation_buckets"}
+
+
+def build_logger(args, schema: str) -> mongodb_logger.MongoDBLogger:
+    uri = args.mongo_uri or "mongodb://localhost:27017/"
+    database = f"{args.database}_{schema}"
+    if args.mongo_uri:
+        mongodb_logger.MongoClient(uri).drop_database(database)
+    return mongodb_logger.MongoDBLogger(uri=uri, database=database, conversation_schema=schema)
+
+
+def write_messages(mongo, args) -> float:
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    for i in range(args.messages):
+        user_id = f"user_{rng.randrange(args.users)}"
+        if i % 2 == 0:
+            mongo.log_message(user_id, "user", "Antalya'da diş implantı fiyatları nedir?",
+                              intent="tedavi_arama_dental", confidence=round(rng.random(), 4),
+                              entities=[{"entity": "sehir", "value": "Antalya"}])
+        else:
+            mongo.log_message(user_id, "bot", "Antalya'da 12 klinik buldum. " * rng.randint(1, 3),
+                              bot_action="action_search_clinics")
+    return args.messages / (time.perf_counter() - start)
+
+
+def storage(mongo, collection_name: str, real_mongo: bool) -> Dict[str, Any]:
+    collection = mongo.db[collection_name]
+    if real_mongo:
+        stats = mongo.db.command("collStats", collection_name)
+        return {"docs": stats["count"], "data_kb": stats["size"] / 1024,
+                "index_kb": stats["totalIndexSize"] / 1024}
+    docs = list(collection.find())
+    index_count = len(collection.index_information())
+    return {"docs": len(docs), "data_kb": sum(len(bson.encode(d)) for d in docs) / 1024,
+            "index_entries": len(docs) * index_count}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bucketed conversation şeması benchmark'ı")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--mongo-uri", help="Gerçek MongoDB (verilmezse mongomock)")
+    parser.add_argument("--database", default="health_tourism_bench")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    if not args.mongo_uri:
+        import mongomock
+        mongodb_logger.MongoClient = mongomock.MongoClient
+        print("⚠️ mongomock: index'ler gerçek değil ve sorgular collection'ı tarar; süreler doküman\n"
+              "   sayısıyla büyür. Index boyutu ve anlamlı süreler için --mongo-uri kullanın.\n")
+
+    print(f"📊 Conversation şeması ({args.messages} mesaj, {args.users} kullanıcı)\n")
+    for schema, collection_name in SCHEMAS.items():
+        mongo = build_logger(args, schema)
+        rate = write_messages(mongo, args)
+        sizes = storage(mongo, collection_name, bool(args.mongo_uri))
+
+        print(f"— {schema} —")
+        print(f"{'yazma':<46}{rate:10.0f} mesaj/s")
+        print_result("son 50", measure(lambda: mongo.get_user_conversations("user_0", 50), repeat=args.repeat))
+        print_result("geçmiş", measure(lambda: mongo.get_conversation_history("user_0"), repeat=args.repeat))
+        index = (f"index {sizes['index_kb']:8.1f} KB" if "index_kb" in sizes
+                 else f"index girişi {sizes['index_entries']}")
+        print(f"{'depolama':<46}{sizes['docs']} doküman   veri {sizes['data_kb']:8.1f} KB   {index}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# benchmarks/bench_conversation_export.py
+"""
+Conversation export: süre, dosya boyutu ve tepe bellek
+
+Aynı mesaj akışı farklı aralık büyüklükleriyle export edilir. Streaming
+export'ta tepe bellek (tracemalloc) mesaj sayısıyla büyümemeli; karşılaştırma
+için "load_all" eski yöntemi (her şeyi listeye yükleyip JSON'a yazmak) ölçer.
+Mesajlar Mongo yerine cursor gibi davranan bir üreticiden gelir.
+
+Kullanım:
+    python benchmarks/bench_conversation_export.py --messages 20000 80000
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+import common  # noqa: F401  (proje kökünü sys.path'e ekler)
+
+from bson import ObjectId
+
+from api_service.conversation_export import ConversationExporter, ExportUnavailable
+
+START = datetime(2024, 5, 1)
+
+
+class StreamingSource:
+    """
+    iter_messages'ı mesajları tek tek üreterek sağlar (gerçek cursor gibi)
+
+    mongomock find() sonucun tamamını belleğe aldığı için exporter'ın kendi
+    bellek kullanımı onunla ölçülemez.
+    """
+
+    def __init__(self, count: int):
+        self.count = count
+        self.step = timedelta(days=30) / count
+
+    def iter_messages(self, start_date, end_date, batch_size=5000):
+        for i in range(self.count):
+            timestamp = START + self.step * i
+            if not start_date <= timestamp < end_date:
+                continue
+            message = {"_id": ObjectId(), "user_id": f"user_{i % 500}",
+                       "sender": "user" if i % 2 == 0 else "bot",
+                       "text": "Antalya'da diş implantı fiyatları nedir?", "timestamp": timestamp}
+            if i % 2 == 0:
+                message.update(intent="tedavi_arama_dental", confidence=0.93,
+                               entities=[{"entity": "sehir", "value": "Antalya"},
+                                         {"entity": "tedavi_adi", "value": "implant"}])
+            yield message
+
+
+def load_all(source, out_dir: str):
+    """Önceki ad-hoc yöntem: tüm aralığı belleğe al, tek dosyaya yaz"""
+    messages = list(source.iter_messages(START, datetime(2024, 6, 1)))
+    with open(os.path.join(out_dir, "dump.json"), "w", encoding="utf-8") as f:
+        json.dump(messages, f, default=str)
+
+
+def measure(fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def dir_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Conversation export benchmark'ı")
+    parser.add_argument("--messages", type=int, nargs="+", default=[10000, 40000])
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    print("📊 Conversation export (30 güne yayılmış mesajlar)\n")
+    print(f"{'yöntem':<16}{'mesaj':>8}{'süre s':>9}{'tepe MB':>10}{'dosya MB':>10}")
+    for count in args.messages:
+        source = StreamingSource(count)
+        cases = [("load_all", lambda out: load_all(source, out))]
+        for file_format, compression in (("parquet", "zstd"), ("arrow", "lz4")):
+            cases.append((f"{file_format}[{compression}]",
+                          lambda out, f=file_format, c=compression: ConversationExporter(
+                              source, out, f, c, args.batch_size).run(START.date(), date(2024, 6, 1))))
+        for name, fn in cases:
+            out_dir = tempfile.mkdtemp(prefix="export_bench_")
+            try:
+                elapsed, peak = measure(lambda: fn(out_dir))
+                print(f"{name:<16}{count:>8}{elapsed:>9.2f}{peak / 2**20:>10.1f}{dir_size(out_dir) / 2**20:>10.2f}")
+            except ExportUnavailable as e:
+                print(f"{name:<16}{'':>8}  atlandı: {e}")
+            finally:
+                shutil.rmtree(out_dir, ignore_errors=True)
+        print()
+
+
+if __name__ == "__main__":
+    main()
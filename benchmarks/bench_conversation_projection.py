@@ -0,0 +1,114 @@
+# benchmarks/bench_conversation_projection.py
+"""
+Conversation sorgularında projection: okunan / gönderilen byte ve süre
+
+Aynı kullanıcı geçmişi farklı fields değerleriyle okunur:
+
+    full          Tüm alanlar (önceki davranış)
+    text,intent   Alan listesi projection'ı
+    summary       sender + preview + timestamp
+
+"Mongo byte" sürücünün döndürdüğü dokümanların BSON boyutu, "yanıt byte"
+MongoJSONResponse gövdesidir. --mongo-uri verilirse summary sorgusunun
+explain çıktısından okunan key / doküman sayısı da yazılır (summary alanları
+CONVERSATION_SUMMARY_INDEX'te olduğu için covered olmalı: 0 doküman).
+
+Kullanım:
+    python benchmarks/bench_conversation_projection.py                 # mongomock
+    python benchmarks/bench_conversation_projection.py --mongo-uri mongodb://localhost:27017
+"""
+
+import argparse
+import logging
+from typing import Any, Dict
+
+import bson
+
+from common import measure, print_result
+
+from api_service import mongodb_logger
+from api_service.responses import MongoJSONResponse
+from bench_serialization import make_conversation
+
+USER_ID = "bench_user"
+
+
+def build_logger(args) -> mongodb_logger.MongoDBLogger:
+    if args.mongo_uri:
+        uri = args.mongo_uri
+    else:
+        import mongomock
+        mongodb_logger.MongoClient = mongomock.MongoClient
+        uri = "mongodb://localhost:27017/"
+        print("⚠️ mongomock: index'ler gerçek değil, plan ölçülemez; byte karşılaştırması geçerli.\n"
+              "   Süre ve explain için --mongo-uri kullanın.\n")
+
+    mongo = mongodb_logger.MongoDBLogger(uri=uri, database=args.database)
+    mongo.conversations.delete_many({"user_id": USER_ID})
+    messages = make_conversation(args.messages)
+    for message in messages:
+        message["preview"] = mongodb_logger.conversation_preview(message["text"])
+    mongo.conversations.insert_many(messages)
+    return mongo
+
+
+def payload_sizes(mongo, fields, limit: int) -> Dict[str, Any]:
+    conversations = mongo.get_user_conversations(USER_ID, limit, fields=fields)
+    body = MongoJSONResponse({"user_id": USER_ID, "total": len(conversations),
+                              "conversations": conversations}).body
+    return {
+        "mongo_bytes": sum(len(bson.encode(doc)) for doc in conversations),
+        "response_bytes": len(body),
+    }
+
+
+def explain_summary(mongo, limit: int) -> Dict[str, Any]:
+    explain = mongo.db.command(
+        "explain",
+        {"find": mongo.conversations.name,
+         "filter": {"user_id": USER_ID},
+         "projection": mongodb_logger.CONVERSATION_PROJECTIONS["summary"],
+         "sort": {"timestamp": -1},
+         "limit": limit,
+         "hint": mongodb_logger.CONVERSATION_SUMMARY_INDEX},
+        verbosity="executionStats",
+    )
+    stats = explain["executionStats"]
+    return {"docs_examined": stats["totalDocsExamined"], "keys_examined": stats["totalKeysExamined"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Conversation projection benchmark'ı")
+    parser.add_argument("--messages", type=int, default=2000, help="Kullanıcının toplam mesaj sayısı")
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--mongo-uri", help="Gerçek MongoDB (verilmezse mongomock)")
+    parser.add_argument("--database", default="health_tourism_bench")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    mongo = build_logger(args)
+
+    print(f"📊 /api/conversations/{{user_id}} ({args.messages} mesaj, limit {args.limit})\n")
+    baseline = None
+    for fields in (None, "text,intent", "summary"):
+        name = fields or "full"
+        sizes = payload_sizes(mongo, fields, args.limit)
+        baseline = baseline or sizes
+        result = measure(lambda: mongo.get_user_conversations(USER_ID, args.limit, fields=fields),
+                         repeat=args.repeat)
+        print_result(name, result)
+        print(f"{'':<46}Mongo {sizes['mongo_bytes'] / 1024:8.1f} KB "
+              f"(x{baseline['mongo_bytes'] / sizes['mongo_bytes']:.1f})   "
+              f"yanıt {sizes['response_bytes'] / 1024:8.1f} KB "
+              f"(x{baseline['response_bytes'] / sizes['response_bytes']:.1f})")
+
+    if args.mongo_uri:
+        plan = explain_summary(mongo, args.limit)
+        covered = "✅ covered" if plan["docs_examined"] == 0 else "❌ doküman okundu (covered değil)"
+        print(f"\nsummary explain: {plan['keys_examined']} key, {plan['docs_examined']} doküman {covered}")
+        mongo.conversations.delete_many({"user_id": USER_ID})
+
+
+if __name__ == "__main__":
+    main()
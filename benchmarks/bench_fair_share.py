@@ -0,0 +1,113 @@
+# benchmarks/bench_fair_share.py
+"""
+LLM fallback adil paylaşım benchmark'ı
+
+Bir "ağır" sender (webhook'a yüklenen bot) ile birkaç normal kullanıcı aynı
+anda üretim ister. Üretim süresi asyncio.sleep ile simüle edilir, böylece
+sadece zamanlama politikası ölçülür. Karşılaştırılan modlar:
+
+    fifo        asyncio.Semaphore - gelen sırayla (önceki davranış)
+    wfq         FairShareScheduler, kota kapalı (sadece adil sıra)
+    wfq+bucket  FairShareScheduler, varsayılan token bucket ve kuyruk sınırı
+
+Kullanım:
+    python benchmarks/bench_fair_share.py
+    python benchmarks/bench_fair_share.py --heavy-rps 40 --light-users 20 --duration 10
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List
+
+from common import percentile
+
+from rasa_service.actions.fair_share import FairShareScheduler, OverQuota
+
+
+class FifoScheduler:
+    def __init__(self, concurrency: int):
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    @asynccontextmanager
+    async def slot(self, sender_id: str):
+        async with self._semaphore:
+            yield
+
+
+async def run_mode(scheduler_factory, args) -> Dict[str, Any]:
+    scheduler = scheduler_factory()
+    # Üretim süreleri; varış zamanları her modda aynı olsun diye sender başına ayrı RNG'den gelir
+    service_rng = random.Random(args.seed)
+    latencies: Dict[str, List[float]] = {"heavy": [], "light": []}
+    rejected = {"heavy": 0, "light": 0}
+
+    async def generate(sender_id: str, kind: str):
+        start = time.perf_counter()
+        try:
+            async with scheduler.slot(sender_id):
+                await asyncio.sleep(service_rng.uniform(args.service_ms * 0.5, args.service_ms * 1.5) / 1000)
+        except OverQuota:
+            rejected[kind] += 1
+            return
+        latencies[kind].append(time.perf_counter() - start)
+
+    async def sender_loop(sender_id: str, kind: str, rps: float):
+        rng = random.Random(f"{args.seed}:{sender_id}")
+        tasks = []
+        elapsed = 0.0
+        start = time.perf_counter()
+        while elapsed < args.duration:
+            tasks.append(asyncio.ensure_future(generate(sender_id, kind)))
+            elapsed += rng.expovariate(rps)
+            await asyncio.sleep(max(0.0, start + elapsed - time.perf_counter()))
+        await asyncio.gather(*tasks)
+
+    await asyncio.gather(
+        sender_loop("heavy_bot", "heavy", args.heavy_rps),
+        *(sender_loop(f"user_{i}", "light", args.light_rps) for i in range(args.light_users))
+    )
+
+    result = {}
+    for kind, values in latencies.items():
+        values.sort()
+        result[kind] = {
+            "served": len(values),
+            "rejected": rejected[kind],
+            "p50_ms": percentile(values, 50) * 1000 if values else 0.0,
+            "p99_ms": percentile(values, 99) * 1000 if values else 0.0,
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM fallback adil paylaşım benchmark'ı")
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--service-ms", type=float, default=100, help="Ortalama üretim süresi")
+    parser.add_argument("--heavy-rps", type=float, default=20)
+    parser.add_argument("--light-users", type=int, default=10)
+    parser.add_argument("--light-rps", type=float, default=0.5, help="Normal kullanıcı başına istek / saniye")
+    parser.add_argument("--duration", type=float, default=8)
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    no_quota = dict(rate_per_minute=1e9, burst=1e9, max_queued_per_sender=1_000_000, queue_timeout=3600)
+    modes = {
+        "fifo": lambda: FifoScheduler(args.concurrency),
+        "wfq": lambda: FairShareScheduler(concurrency=args.concurrency, **no_quota),
+        "wfq+bucket": lambda: FairShareScheduler(concurrency=args.concurrency),
+    }
+
+    print(f"📊 Adil paylaşım: 1 ağır sender ({args.heavy_rps} rps) + {args.light_users} kullanıcı "
+          f"({args.light_rps} rps), {args.concurrency} slot, ~{args.service_ms:.0f} ms üretim\n")
+    print(f"{'mod':<12}{'sender':<8}{'servis':>8}{'red':>6}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, factory in modes.items():
+        result = asyncio.run(run_mode(factory, args))
+        for kind, row in result.items():
+            print(f"{name:<12}{kind:<8}{row['served']:>8}{row['rejected']:>6}{row['p50_ms']:>10.1f}{row['p99_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# benchmarks/bench_geo_index.py
+"""
+Klinik -> en yakın otel sorguları: düz tarama vs GeoIndex (api_service/geo_index.py)
+
+Sentetik oteller bölge merkezlerine, Antalya klinikleri ilçe merkezlerine
+dağılır (fixtures.py). Her klinik için radius_km içindeki en yakın k otel
+(yıldız filtresiyle) aranır:
+
+    düz tarama       tüm otellerde haversine + sıralama
+    GeoIndex[dict]   kayıt dict'leri üzerinde grid index
+    GeoIndex[mmap]   derlenmiş katalog (compile_catalog) üzerinde, item = kayıt no
+
+Sonuçların düz taramayla aynı olduğu doğrulanır. Ayrıca eski paket
+eşleştirmesinin (bölge verilmezse "Lara") klinik - otel mesafesi yakınlık
+eşleştirmesiyle karşılaştırılır.
+
+Kullanım:
+    python benchmarks/bench_geo_index.py --hotels 50000 --clinics 2000
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from typing import Any, Callable, List, Tuple
+
+from common import percentile
+from fixtures import make_clinics, make_hotels
+
+from api_service.catalog_mmap import compile_catalog, open_catalog
+from api_service.geo_index import GeoIndex, haversine_km
+
+
+def linear_nearest(hotels, lat: float, lon: float, k: int, radius_km: float, stars: int) -> List[Tuple[float, Any]]:
+    ranked = []
+    for hotel in hotels:
+        if hotel["stars"] < stars:
+            continue
+        distance = haversine_km(lat, lon, hotel["lat"], hotel["lon"])
+        if distance <= radius_km:
+            ranked.append((distance, hotel))
+    ranked.sort(key=lambda pair: pair[0])
+    return ranked[:k]
+
+
+def time_queries(fn: Callable[[float, float], Any], points) -> Tuple[List[float], List[Any]]:
+    samples, results = [], []
+    for lat, lon in points:
+        started = time.perf_counter()
+        results.append(fn(lat, lon))
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return samples, results
+
+
+def print_latency(name: str, samples: List[float]):
+    print(f"{name:<22}{percentile(samples, 50) * 1e6:>10.1f}{percentile(samples, 95) * 1e6:>10.1f}"
+          f"{percentile(samples, 99) * 1e6:>10.1f}")
+
+
+def distances(results) -> List[List[float]]:
+    return [[round(distance, 6) for distance, _ in found] for found in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mekânsal otel index'i benchmark'ı")
+    parser.add_argument("--hotels", type=int, default=50000)
+    parser.add_argument("--clinics", type=int, default=2000, help="Sorgu sayısı (Antalya klinikleri)")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--radius-km", type=float, default=25)
+    parser.add_argument("--stars", type=int, default=4)
+    parser.add_argument("--linear-queries", type=int, default=200, help="Düz tarama yavaş; daha az sorgu")
+    args = parser.parse_args()
+
+    hotels = make_hotels(args.hotels)
+    clinics = [c for c in make_clinics(args.clinics * 4) if c["city"] == "Antalya"][:args.clinics]
+    points = [(c["lat"], c["lon"]) for c in clinics]
+    print(f"📍 {len(hotels)} otel, {len(points)} klinik sorgusu, k={args.k}, "
+          f"{args.radius_km:g} km, {args.stars}+ yıldız\n")
+
+    started = time.perf_counter()
+    dict_index = GeoIndex.from_records(hotels)
+    dict_build = time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "catalog.bin")
+        compile_catalog(path, {"hotels": hotels})
+        catalog_file = open_catalog(path)
+        catalog = catalog_file["hotels"]
+        started = time.perf_counter()
+        mmap_index = GeoIndex.from_catalog(catalog)
+        mmap_build = time.perf_counter() - started
+
+        print(f"{'index kurulumu':<22}{'süre':>10}{'hücre km':>10}")
+        print(f"{'GeoIndex[dict]':<22}{dict_build * 1000:>8.0f}ms{dict_index.cell_km:>10.2f}")
+        print(f"{'GeoIndex[mmap]':<22}{mmap_build * 1000:>8.0f}ms{mmap_index.cell_km:>10.2f}\n")
+
+        stars = args.stars
+        print(f"{'sorgu':<22}{'p50 µs':>10}{'p95 µs':>10}{'p99 µs':>10}")
+        linear_points = points[:args.linear_queries]
+        linear_samples, linear_results = time_queries(
+            lambda lat, lon: linear_nearest(hotels, lat, lon, args.k, args.radius_km, stars), linear_points)
+        print_latency("düz tarama", linear_samples)
+
+        dict_samples, dict_results = time_queries(
+            lambda lat, lon: dict_index.nearest(lat, lon, k=args.k, radius_km=args.radius_km,
+                                                accept=lambda hotel: hotel["stars"] >= stars), points)
+        print_latency("GeoIndex[dict]", dict_samples)
+
+        mmap_samples, mmap_results = time_queries(
+            lambda lat, lon: mmap_index.nearest(lat, lon, k=args.k, radius_km=args.radius_km,
+                                                accept=lambda recno: catalog.field(recno, "stars") >= stars), points)
+        print_latency("GeoIndex[mmap]", mmap_samples)
+
+        expected = distances(linear_results)
+        same = (distances(dict_results[:len(linear_points)]) == expected
+                and distances(mmap_results[:len(linear_points)]) == expected
+                and distances(dict_results) == distances(mmap_results))
+        del mmap_results, mmap_index, catalog
+        catalog_file.close()
+
+    print(f"\n{'✅' if same else '❌'} GeoIndex sonuçları düz taramayla {'aynı' if same else 'farklı'}")
+
+    # Eski eşleştirme: bölge verilmezse Lara'nın ilk otelleri
+    lara = [h for h in hotels if h["region"] == "Lara" and h["stars"] >= stars][:3]
+    old = [haversine_km(lat, lon, lara[i % len(lara)]["lat"], lara[i % len(lara)]["lon"])
+           for i, (lat, lon) in enumerate(points)]
+    new = [found[0][0] for found in dict_results if found]
+    print(f"\n{'klinik -> otel mesafesi':<26}{'ort km':>8}{'maks km':>9}{'eşleşen':>9}")
+    print(f"{'eski (bölge = Lara)':<26}{statistics.mean(old):>8.1f}{max(old):>9.1f}{len(old):>9}")
+    if new:
+        print(f"{'en yakın otel':<26}{statistics.mean(new):>8.1f}{max(new):>9.1f}{len(new):>9}")
+
+
+if __name__ == "__main__":
+    main()
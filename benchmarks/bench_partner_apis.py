@@ -0,0 +1,229 @@
+# benchmarks/bench_partner_apis.py
+"""
+Partner API client'ları ve ActionAskOllama için timeout / fallback / eşzamanlılık benchmark'ı
+
+standin_server.py thread içinde başlatılır, client'lar gerçek API moduna
+alınıp stand-in'e yönlendirilir. Her senaryo aynı seed ile aynı gecikme ve
+hata dizisini üretir; böylece sonuçlar çalıştırmalar arasında karşılaştırılabilir.
+
+Kullanım:
+    python benchmarks/bench_partner_apis.py
+    python benchmarks/bench_partner_apis.py --concurrency 32 --calls 400 --save benchmarks/results/partner.json
+    python benchmarks/bench_partner_apis.py --scenario flaky --baseline benchmarks/results/partner.json
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+PORT = int(os.getenv("STANDIN_PORT", "11500"))
+STANDIN_URL = f"http://127.0.0.1:{PORT}"
+
+# api_clients / actions modül seviyesinde okuduğu için import'tan önce ayarlanmalı
+os.environ.setdefault("ACTION_METRICS_PORT", "0")
+os.environ["USE_MOCK_API"] = "false"
+os.environ.setdefault("API_TIMEOUT", "1")
+os.environ.setdefault("OLLAMA_TIMEOUT", "2")
+os.environ.setdefault("OLLAMA_CONCURRENCY", "8")
+os.environ["OLLAMA_API_URL"] = f"{STANDIN_URL}/api/generate"
+for _service in ("CLINIC", "HOTEL", "FLIGHT"):
+    os.environ[f"{_service}_API_URL"] = STANDIN_URL
+    os.environ[f"{_service}_API_KEY"] = "standin"
+
+from common import find_regressions, load_results, percentile, save_results
+from fixtures import FakeDispatcher, FakeTracker
+from standin_server import StandinServer, load_profile
+
+from rasa_service.actions import actions, api_clients
+
+# ============================================
+# SENARYOLAR
+# ============================================
+
+_FAST = {"dist": "lognormal", "median": 0.03, "sigma": 0.3}
+
+
+def _scenario(**overrides) -> Dict[str, Dict[str, Any]]:
+    profile = load_profile(None)
+    for route in ("/clinics/search", "/hotels/search", "/flights/search"):
+        profile[route].update(latency=_FAST, hang_seconds=3.0)
+        profile[route].update(overrides)
+    profile["/api/generate"].update(latency={"dist": "lognormal", "median": 0.2, "sigma": 0.3},
+                                    token_rate=400.0, tokens={"dist": "uniform", "low": 40, "high": 120},
+                                    hang_seconds=3.0)
+    profile["/api/generate"].update(overrides)
+    return profile
+
+
+SCENARIOS = {
+    "healthy": lambda: _scenario(),
+    "flaky": lambda: _scenario(error_rate=0.1),
+    "hanging": lambda: _scenario(hang_rate=0.05),
+    "slowloris": lambda: _scenario(slowloris_rate=0.05, slowloris_bytes_per_second=200),
+}
+
+
+# ============================================
+# ÇAĞRILAR
+# ============================================
+
+class FallbackCounter:
+    """_mock_search çağrılarını say (gerçek API hatası -> mock fallback)"""
+
+    def __init__(self):
+        self.count = 0
+        self._originals = []
+
+    def __enter__(self):
+        for cls in (api_clients.ClinicAPIClient, api_clients.HotelAPIClient, api_clients.FlightAPIClient):
+            original = cls._mock_search
+            self._originals.append((cls, original))
+
+            def wrapper(client, *args, _original=original):
+                self.count += 1
+                return _original(client, *args)
+
+            cls._mock_search = wrapper
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        for cls, original in self._originals:
+            cls._mock_search = original
+
+
+async def _ollama_call(action, call: int) -> str:
+    # Her çağrı farklı sender'dan - kullanıcı kotası ölçümü etkilemesin
+    tracker = FakeTracker(slots={"tedavi_turu": "dental", "sehir": "Antalya"}, sender_id=f"bench_{call}")
+    dispatcher = FakeDispatcher()
+    await action.run(dispatcher, tracker, {})
+    last = dispatcher.messages[-1]["text"] if dispatcher.messages else ""
+    if last.startswith("💡"):
+        return "ok"
+    if last.startswith("⏱️"):
+        return "timeout"
+    return "error"
+
+
+def workloads() -> Dict[str, Callable[[], str]]:
+    clinic_client = api_clients.ClinicAPIClient()
+    hotel_client = api_clients.HotelAPIClient()
+    flight_client = api_clients.FlightAPIClient()
+    ollama = actions.ActionAskOllama()
+
+    def call(fn):
+        def run(_):
+            fn()
+            return "ok"
+        return run
+
+    return {
+        "clinic_search": call(lambda: clinic_client.search_clinics("dental", "Antalya", "implant")),
+        "hotel_search": call(lambda: hotel_client.search_hotels("Lara", 5)),
+        "flight_search": call(lambda: flight_client.search_flights("economy")),
+        "ask_ollama": lambda call: _ollama_call(ollama, call),
+    }
+
+
+def run_workload(fn: Callable[[int], Any], calls: int, concurrency: int, is_async: bool) -> Dict[str, Any]:
+    latencies = []
+    outcomes: Dict[str, int] = {}
+
+    def record(start: float, outcome: str):
+        latencies.append(time.perf_counter() - start)
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+    def one(call: int):
+        start = time.perf_counter()
+        record(start, fn(call))
+
+    async def run_async():
+        # Async action'lar (ActionAskOllama) action server'daki gibi tek event loop'ta çalışır
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one_async(call: int):
+            async with semaphore:
+                start = time.perf_counter()
+                record(start, await fn(call))
+
+        await asyncio.gather(*(one_async(call) for call in range(calls)))
+
+    with FallbackCounter() as fallbacks:
+        start = time.perf_counter()
+        if is_async:
+            asyncio.run(run_async())
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(one, range(calls)))
+        elapsed = time.perf_counter() - start
+
+    values = sorted(latencies)
+    return {
+        "calls": calls,
+        "throughput_rps": calls / elapsed,
+        "p50_ms": percentile(values, 50) * 1000,
+        "p95_ms": percentile(values, 95) * 1000,
+        "p99_ms": percentile(values, 99) * 1000,
+        "max_ms": values[-1] * 1000,
+        "fallback_rate_abs": fallbacks.count / calls,
+        "outcomes": outcomes,
+    }
+
+
+REGRESSION_CHECKS = {
+    "p50_ms": ("higher_is_worse", 0.25),
+    "p99_ms": ("higher_is_worse", 0.5),
+    "throughput_rps": ("lower_is_worse", 0.15),
+    "fallback_rate_abs": ("higher_is_worse", 0.02),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Partner API / Ollama stand-in benchmark'ı")
+    parser.add_argument("--scenario", nargs="+", choices=sorted(SCENARIOS), default=sorted(SCENARIOS))
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--filter", default="", help="Sadece adı bu metni içeren workload'lar")
+    parser.add_argument("--save", help="Sonuçları JSON olarak kaydet")
+    parser.add_argument("--baseline", help="Karşılaştırılacak önceki sonuç dosyası")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    results = {}
+    print(f"📊 Partner API benchmark'ı (timeout: API {api_clients.API_TIMEOUT}s, "
+          f"Ollama {actions.OLLAMA_TIMEOUT}s, eşzamanlılık {args.concurrency})\n")
+    for scenario in args.scenario:
+        with StandinServer(SCENARIOS[scenario](), port=PORT, seed=args.seed):
+            for name, fn in workloads().items():
+                if args.filter and args.filter not in name:
+                    continue
+                calls = args.calls if name != "ask_ollama" else max(1, args.calls // 4)
+                result = run_workload(fn, calls, args.concurrency, is_async=name == "ask_ollama")
+                key = f"{name}@{scenario}"
+                results[key] = result
+                print(f"{key:<28} p50 {result['p50_ms']:8.1f} ms  p99 {result['p99_ms']:8.1f} ms  "
+                      f"{result['throughput_rps']:8.1f} req/s  fallback {result['fallback_rate_abs']:.1%}  "
+                      f"{result['outcomes']}")
+
+    if args.save:
+        save_results(args.save, {"benchmarks": results})
+
+    if args.baseline:
+        baseline = load_results(args.baseline)["benchmarks"]
+        regressions = find_regressions(results, baseline, REGRESSION_CHECKS)
+        if regressions:
+            print("\n❌ Regresyonlar:", file=sys.stderr)
+            for line in regressions:
+                print(f"   • {line}", file=sys.stderr)
+            sys.exit(1)
+        print("\n✅ Baseline'a göre regresyon yok", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/bench_pricing.py
+"""
+Pricing engine micro-benchmark
+
+Kullanım:
+    python benchmarks/bench_pricing.py [--quotes 100000]
+"""
+
+import argparse
+import random
+
+from common import measure, print_result
+
+from api_service.pricing import (
+    FLIGHT_CLASS_PRICES,
+    HOTEL_TIER_PRICES,
+    TREATMENT_BASE_PRICES,
+    PricingEngine,
+    QuoteRequest,
+)
+
+
+def make_quotes(count: int, seed: int = 42):
+    """Rastgele ama tekrarlanabilir (treatment, clinic, hotel, nights, flight) sorguları"""
+    rng = random.Random(seed)
+    treatments = list(TREATMENT_BASE_PRICES) + ["Dental Implant", "unknown treatment", None]
+    tiers = ["standard", "medium", "premium", "luxury", None]
+    hotel_tiers = list(HOTEL_TIER_PRICES) + [None]
+    flight_classes = list(FLIGHT_CLASS_PRICES)
+
+    return [
+        QuoteRequest(
+            treatment=rng.choice(treatments),
+            clinic_rating=round(rng.uniform(3.5, 5.0), 2),
+            clinic_tier=rng.choice(tiers),
+            hotel_nightly=rng.choice([None, rng.randint(80, 500)]),
+            hotel_tier=rng.choice(hotel_tiers),
+            nights=rng.randint(3, 14),
+            flight_class=rng.choice(flight_classes),
+            flight_type=rng.choice(["direct", "connecting"]),
+            flight_price=rng.choice([None, None, rng.randint(150, 900)])
+        )
+        for _ in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pricing engine benchmark")
+    parser.add_argument("--quotes", type=int, default=100_000, help="Çağrı başına sorgu sayısı")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = PricingEngine()
+    quotes = make_quotes(args.quotes)
+
+    print(f"📊 Pricing benchmark - {args.quotes} sorgu / çağrı\n")
+
+    print_result("price_columns (batch, sütun)",
+                 measure(lambda: engine.price_columns(quotes), repeat=args.repeat),
+                 items=len(quotes))
+    print_result("quote_batch (batch, dict listesi)",
+                 measure(lambda: engine.quote_batch(quotes), repeat=args.repeat),
+                 items=len(quotes))
+    print_result("quote (tekil döngü)",
+                 measure(lambda: [engine.quote(q) for q in quotes], repeat=args.repeat),
+                 items=len(quotes))
+
+
+if __name__ == "__main__":
+    main()
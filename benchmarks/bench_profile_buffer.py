@@ -0,0 +1,139 @@
+# benchmarks/bench_profile_buffer.py
+"""
+Profil yazma sayısı: mesaj başına upsert vs ProfileBuffer
+
+Form dolduran kullanıcı oturumları simüle edilir; her mesaj 1-2 profil
+entity'si taşır, mesajlar arası süre rastgeledir. Zaman sanal bir saatle
+ilerler, arka plan döngüsü yerine flush_due() her saniye çağrılır.
+
+    per_message   ActionLogConversation'ın önceki davranışı (her mesajda yazma)
+    buffered      ProfileBuffer; goodbye ile oturum sonu flush'ı
+    no_goodbye    ProfileBuffer; oturum goodbye'sız biter (sadece quiet / max_age)
+
+"toplam" tüm collection yazmalarıdır: users update'leri + profile_pending
+(uzun oturumlarda bekleyen değerlerin yayını: upsert / flush sonrası silme)
++ user_changes (her users yazması ve yayın bir invalidation kaydı ekler;
+PROFILE_CACHE_INVALIDATION=mongo varsayılır). Yayın --publish-interval 0
+ile kapatılır.
+
+Kullanım:
+    python benchmarks/bench_profile_buffer.py --sessions 500
+"""
+
+import argparse
+import random
+from typing import Any, Dict, List
+
+import common  # noqa: F401  (proje kökünü sys.path'e ekler)
+
+from api_service.profile_buffer import ProfileBuffer
+
+PROFILE_FIELDS = ["age", "gender", "preferences.treatment", "preferences.city",
+                  "preferences.budget", "preferences.region"]
+
+
+class CountingWriter:
+    """Collection başına yazma sayısı (MongoDBLogger'daki _notify_user_changed dahil)"""
+
+    def __init__(self):
+        self.writes = 0
+        self.fields_written = 0
+        self.pending_writes = 0
+        self.user_changes = 0
+
+    @property
+    def total(self) -> int:
+        return self.writes + self.pending_writes + self.user_changes
+
+    def apply_profile_delta(self, user_id: str, set_fields: Dict[str, Any], add_to_set=None) -> str:
+        self.writes += 1
+        self.user_changes += 1
+        self.fields_written += len(set_fields)
+        return user_id
+
+    def publish_pending_profile(self, user_id: str, set_fields, add_to_set, seq: int):
+        self.pending_writes += 1
+        self.user_changes += 1
+
+    def clear_pending_profile(self, user_id: str, seq: int):
+        self.pending_writes += 1
+
+    def get_user_with_pending(self, user_id: str):
+        return None
+
+
+def make_sessions(args) -> List[Dict[str, Any]]:
+    """(zaman, user_id, alanlar, goodbye mu) olayları, zamana göre sıralı"""
+    rng = random.Random(args.seed)
+    events = []
+    for session in range(args.sessions):
+        user_id = f"user_{session}"
+        now = rng.uniform(0, args.window)
+        for turn in range(rng.randint(args.min_turns, args.max_turns)):
+            fields = {field: f"v{turn}" for field in rng.sample(PROFILE_FIELDS, rng.randint(1, 2))}
+            events.append((now, user_id, fields, False))
+            now += rng.uniform(2, args.think_seconds)
+        events.append((now, user_id, {}, True))
+    events.sort(key=lambda event: event[0])
+    return events
+
+
+def run(events, mode: str, args) -> CountingWriter:
+    writer = CountingWriter()
+    if mode == "per_message":
+        for _, user_id, fields, _ in events:
+            if fields:
+                writer.apply_profile_delta(user_id, fields)
+        return writer
+
+    clock = [0.0]
+    buffer = ProfileBuffer(lambda: writer, quiet=args.quiet, max_age=args.max_age,
+                           publish_interval=args.publish_interval, clock=lambda: clock[0])
+    buffer._ensure_worker = lambda: None  # arka plan thread'i yerine sanal saat
+    next_tick = 1.0
+    for at, user_id, fields, goodbye in events:
+        while next_tick <= at:
+            clock[0] = next_tick
+            buffer.flush_due()
+            if args.publish_interval > 0:
+                buffer.publish_pending()
+            next_tick += 1.0
+        clock[0] = at
+        buffer.add(user_id, fields)
+        if goodbye and mode == "buffered":
+            buffer.flush(user_id, reason="session_end")
+    buffer.flush(reason="shutdown")
+    return writer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profil tamponu yazma sayısı benchmark'ı")
+    parser.add_argument("--sessions", type=int, default=300)
+    parser.add_argument("--min-turns", type=int, default=4)
+    parser.add_argument("--max-turns", type=int, default=12)
+    parser.add_argument("--think-seconds", type=float, default=25, help="Mesajlar arası en uzun süre")
+    parser.add_argument("--window", type=float, default=3600, help="Oturumların başladığı zaman aralığı (s)")
+    parser.add_argument("--quiet", type=float, default=30)
+    parser.add_argument("--max-age", type=float, default=300)
+    parser.add_argument("--publish-interval", type=float, default=None,
+                        help="Bekleyen değerlerin profile_pending'e yayın aralığı (s, 0 = kapalı; varsayılan quiet)")
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    if args.publish_interval is None:
+        args.publish_interval = args.quiet
+    events = make_sessions(args)
+    messages = sum(1 for event in events if event[2])
+    print(f"📊 Profil yazmaları ({args.sessions} oturum, {messages} profil mesajı, "
+          f"quiet {args.quiet:.0f}s, max_age {args.max_age:.0f}s, yayın {args.publish_interval:.0f}s)\n")
+    print(f"{'mod':<14}{'toplam':>8}{'oturum başı':>13}{'users':>8}{'pending':>9}{'user_changes':>14}"
+          f"{'alan/yazma':>12}")
+    for mode in ("per_message", "buffered", "no_goodbye"):
+        writer = run(events, mode, args)
+        print(f"{mode:<14}{writer.total:>8}{writer.total / args.sessions:>13.2f}{writer.writes:>8}"
+              f"{writer.pending_writes:>9}{writer.user_changes:>14}"
+              f"{writer.fields_written / max(writer.writes, 1):>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+# benchmarks/bench_search_batch.py
+"""
+Paket oluşturucu iş yükü: ayrı arama istekleri vs tek /api/search/batch
+
+Bir paket önerisi için istemci birkaç klinik araması (tedavi x şehir), otel
+araması (bölge x bütçe) ve paket fiyatlaması yapar; istekler arasında aynı
+sorgular tekrar eder. Senaryolar:
+
+    ayrı istekler    her sorgu kendi POST'u (/api/clinics/search, ...)
+    batch            tek POST /api/search/batch (aynı sorgular bir kez çalışır)
+
+main.py process içinde (mongomock ile) yüklenir, kataloglar sentetik
+kayıtlarla büyütülür. --rtt-ms her HTTP round trip'e gecikme ekler
+(mobil istemci / farklı bölgedeki gateway).
+
+Kullanım:
+    python benchmarks/bench_search_batch.py --clinics 2000 --hotels 500 --queries 24 --rtt-ms 40
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Dict, List, Tuple
+
+import httpx
+
+import common  # noqa: F401  (proje kökünü sys.path'e ekler)
+from common import percentile
+from fixtures import CATEGORIES, CITIES, REGIONS, make_clinics, make_hotels
+
+
+class DelayedTransport(httpx.ASGITransport):
+    """Her isteğe sabit ağ gecikmesi ekleyen ASGI transport"""
+
+    def __init__(self, app, rtt_ms: float):
+        super().__init__(app=app)
+        self.rtt = rtt_ms / 1000
+        self.round_trips = 0
+
+    async def handle_async_request(self, request):
+        self.round_trips += 1
+        if self.rtt:
+            await asyncio.sleep(self.rtt)
+        return await super().handle_async_request(request)
+
+
+def build_app(clinic_count: int, hotel_count: int):
+    import mongomock
+
+    import api_service.mongodb_logger as mongodb_logger
+    mongodb_logger.MongoClient = mongomock.MongoClient
+
+    from api_service import http_cache, main
+
+    main.CLINICS_DB[:] = make_clinics(clinic_count)
+    main.HOTELS_DB[:] = make_hotels(hotel_count)
+    http_cache.catalog_versions.register(main.CLINICS, main.CLINICS_DB)
+    http_cache.catalog_versions.register(main.HOTELS, main.HOTELS_DB)
+    return main.app
+
+
+def make_workload(count: int, duplicate_ratio: float, seed: int) -> List[Dict[str, Any]]:
+    """Paket oluşturucunun sorguları; duplicate_ratio kadarı önceki bir sorgunun tekrarı"""
+    rng = random.Random(seed)
+    queries: List[Dict[str, Any]] = []
+    while len(queries) < count:
+        if queries and rng.random() < duplicate_ratio:
+            queries.append(dict(rng.choice(queries)))
+            continue
+        kind = rng.choice(["clinics", "clinics", "hotels", "package"])
+        treatment = rng.choice(CATEGORIES[rng.choice(list(CATEGORIES))])
+        city = rng.choice(CITIES)
+        if kind == "clinics":
+            queries.append({"type": "clinics", "treatment": treatment, "city": city})
+        elif kind == "hotels":
+            queries.append({"type": "hotels", "region": rng.choice(REGIONS), "budget": rng.choice([150, 250, 400])})
+        else:
+            queries.append({"type": "package", "treatment": treatment, "city": city,
+                            "budget": rng.choice([3000, 6000, 12000]), "nights": rng.choice([5, 7, 10])})
+    return queries
+
+
+def single_request(query: Dict[str, Any]) -> Tuple[str, Dict[str, Any], Dict[str, Any]]:
+    """Batch alt sorgusunun eşdeğeri olan tekil endpoint çağrısı (path, json, params)"""
+    body = {key: value for key, value in query.items() if key != "type"}
+    if query["type"] == "clinics":
+        return "/api/clinics/search", body, {}
+    if query["type"] == "hotels":
+        return "/api/hotels/search", body, {}
+    return "/api/packages/generate", {}, body
+
+
+async def run_separate(client: httpx.AsyncClient, queries: List[Dict[str, Any]]) -> List[Any]:
+    results = []
+    for query in queries:
+        path, body, params = single_request(query)
+        response = await client.post(path, json=body or None, params=params)
+        response.raise_for_status()
+        results.append(response.json())
+    return results
+
+
+async def run_batch(client: httpx.AsyncClient, queries: List[Dict[str, Any]]) -> List[Any]:
+    response = await client.post("/api/search/batch", json={"queries": queries})
+    response.raise_for_status()
+    return response.json()["results"]
+
+
+def same_results(separate: List[Any], batch: List[Any]) -> bool:
+    for single, item in zip(separate, batch):
+        item = {key: value for key, value in item.items() if key != "type"}
+        if single != item:
+            return False
+    return len(separate) == len(batch)
+
+
+async def time_case(fn, repeat: int) -> Dict[str, float]:
+    samples = []
+    cpu_start = time.process_time()
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return {
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "cpu": (time.process_time() - cpu_start) / repeat,
+    }
+
+
+async def main_async(args):
+    app = build_app(args.clinics, args.hotels)
+    transport = DelayedTransport(app, args.rtt_ms)
+    headers = {"Accept-Encoding": "identity"}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+        print(f"📊 Paket oluşturucu ({args.clinics} klinik, {args.hotels} otel, {args.queries} sorgu, "
+              f"RTT {args.rtt_ms:g} ms)\n")
+        print(f"{'senaryo':<28}{'p50 ms':>10}{'p95 ms':>10}{'CPU ms':>10}{'round trip':>12}{'benzersiz':>11}")
+        for ratio in args.duplicates:
+            queries = make_workload(args.queries, ratio, args.seed)
+            separate = await run_separate(client, queries)
+            batch = await run_batch(client, queries)
+            if not same_results(separate, batch):
+                print(f"❌ %{ratio * 100:.0f} tekrar: batch sonuçları ayrı isteklerle aynı değil")
+                continue
+            unique = len({str(sorted(q.items())) for q in queries})
+
+            for name, fn in ((f"ayrı istekler (%{ratio * 100:.0f} tekrar)", lambda: run_separate(client, queries)),
+                             (f"batch (%{ratio * 100:.0f} tekrar)", lambda: run_batch(client, queries))):
+                before = transport.round_trips
+                result = await time_case(fn, args.repeat)
+                round_trips = (transport.round_trips - before) // args.repeat
+                print(f"{name:<28}{result['p50'] * 1000:>10.1f}{result['p95'] * 1000:>10.1f}"
+                      f"{result['cpu'] * 1000:>10.1f}{round_trips:>12}{unique:>11}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch arama endpoint'i benchmark'ı")
+    parser.add_argument("--clinics", type=int, default=2000)
+    parser.add_argument("--hotels", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=24)
+    parser.add_argument("--duplicates", type=float, nargs="+", default=[0.0, 0.5],
+                        help="Tekrar eden sorgu oranları")
+    parser.add_argument("--rtt-ms", type=float, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# benchmarks/bench_serialization.py
+"""
+Mongo dokümanlı yanıtların serileştirme süresi ve bellek kullanımı
+
+Karşılaştırılan yollar:
+    fastapi        jsonable_encoder + JSONResponse.render (önceki davranış)
+    mongo[json]    MongoJSONResponse, stdlib json fallback
+    mongo[orjson]  MongoJSONResponse, orjson (kuruluysa)
+
+Bellek, tracemalloc ile tek bir yanıt üretilirken görülen tepe (peak)
+ayrım miktarı olarak ölçülür.
+
+Kullanım:
+    python benchmarks/bench_serialization.py --messages 50 200
+"""
+
+import argparse
+import random
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from common import measure, print_result
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from api_service import responses
+
+
+def make_conversation(count: int, seed: int = 4, with_object_id: bool = False) -> List[Dict[str, Any]]:
+    """log_message ile yazılan dokümanlara benzer mesajlar"""
+    rng = random.Random(seed)
+    start = datetime(2024, 5, 1, 9, 0, 0)
+    messages = []
+    for i in range(count):
+        message = {
+            "user_id": "bench_user",
+            "sender": "user" if i % 2 == 0 else "bot",
+            "text": "Antalya'da diş implantı fiyatları nedir? " * rng.randint(1, 4),
+            "timestamp": start + timedelta(seconds=i * 37, microseconds=rng.randint(0, 999_999)),
+        }
+        if i % 2 == 0:
+            message.update(
+                intent="tedavi_arama_dental",
+                confidence=round(rng.random(), 4),
+                entities=[
+                    {"entity": "sehir", "value": "Antalya", "start": 0, "end": 7,
+                     "extractor": "DIETClassifier", "confidence_entity": 0.99,
+                     "processors": ["EntitySynonymMapper"]},
+                    {"entity": "tedavi_adi", "value": "implant", "start": 12, "end": 26,
+                     "extractor": "DIETClassifier", "confidence_entity": 0.97},
+                ],
+                metadata={"channel": "rest", "received_at": start + timedelta(seconds=i * 37)},
+            )
+        else:
+            message["bot_action"] = "action_search_clinics"
+        if with_object_id:
+            message["_id"] = ObjectId()
+        messages.append(message)
+    return messages
+
+
+def paths():
+    def fastapi_path(content):
+        return JSONResponse(jsonable_encoder(content)).body
+
+    def mongo_json(content):
+        original = responses.orjson
+        responses.orjson = None
+        try:
+            return responses.MongoJSONResponse(content).body
+        finally:
+            responses.orjson = original
+
+    yield "fastapi", fastapi_path
+    yield "mongo[json]", mongo_json
+    if responses.orjson is not None:
+        yield "mongo[orjson]", lambda content: responses.MongoJSONResponse(content).body
+
+
+def allocations(fn, content) -> Dict[str, float]:
+    fn(content)  # ısınma
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    body = fn(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"peak_kb": (peak - before) / 1024, "body_kb": len(body) / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mongo yanıt serileştirme benchmark'ı")
+    parser.add_argument("--messages", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print("📊 Yanıt serileştirme (/api/conversations/{user_id} gövdesi)\n")
+    for count in args.messages:
+        content = {"user_id": "bench_user", "total": count, "conversations": make_conversation(count)}
+        print(f"— {count} mesaj —")
+        for name, fn in paths():
+            result = measure(lambda: fn(content), repeat=args.repeat, number=max(20, 4000 // count))
+            memory = allocations(fn, content)
+            print_result(name, result)
+            print(f"{'':<46}tepe bellek {memory['peak_kb']:8.1f} KB   gövde {memory['body_kb']:6.1f} KB")
+
+        # Ham pymongo dokümanı (_id: ObjectId) - jsonable_encoder bunu çeviremez
+        raw = {"conversations": make_conversation(count, with_object_id=True)}
+        result = measure(lambda: responses.MongoJSONResponse(raw).body, repeat=args.repeat,
+                         number=max(20, 4000 // count))
+        print_result("mongo[ObjectId]", result)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# benchmarks/bench_startup.py
+"""
+Servis açılış süresi: process başlangıcından ilk sağlıklı yanıta kadar
+
+API (uvicorn api_service.main:app) ve action server (actions_server.py,
+tek worker) ayrı process olarak başlatılır; şu anlar ölçülür:
+
+- API: ilk /health 200, ilk katalog yanıtı (/api/clinics/search) ve ilk
+  MongoDB endpoint'i yanıtı (/api/profile/...; MongoDB kapalıyken 503)
+- Action server: ilk /health 200 ve ilk action_log_conversation turu
+
+Senaryolar:
+    down  MONGODB_URI erişilemeyen bir porta gösterilir (degraded mode)
+    mock  pymongo MongoClient yerine mongomock (MongoDB açık gibi; mongomock gerekir)
+
+Kullanım:
+    python benchmarks/bench_startup.py --runs 3
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from common import ROOT_DIR
+
+# mongomock senaryosu için: MongoClient değiştirildikten sonra asıl komut çalışır
+MOCK_WRAPPER = '''
+import runpy, sys
+import mongomock, pymongo
+pymongo.MongoClient = mongomock.MongoClient
+sys.path.insert(0, {root!r})
+import api_service.mongodb_logger as mongodb_logger
+mongodb_logger.MongoClient = mongomock.MongoClient
+sys.argv = sys.argv[1:]
+if sys.argv[0] == "-m":
+    sys.argv = sys.argv[1:]
+    runpy.run_module(sys.argv[0], run_name="__main__", alter_sys=True)
+else:
+    runpy.run_path(sys.argv[0], run_name="__main__")
+'''
+
+TURN = {
+    "next_action": "action_log_conversation",
+    "sender_id": "bench_startup",
+    "tracker": {"sender_id": "bench_startup", "slots": {}, "events": [],
+                "latest_message": {"text": "merhaba", "intent": {"name": "greet", "confidence": 1.0},
+                                   "entities": []}},
+    "domain": {},
+}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn(command: List[str], scenario: str, env: Dict[str, str]) -> subprocess.Popen:
+    if scenario == "mock":
+        command = [sys.executable, "-c", MOCK_WRAPPER.format(root=ROOT_DIR)] + command[1:]
+    return subprocess.Popen(command, cwd=ROOT_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_for(client: httpx.Client, method: str, url: str, started: float,
+             deadline: float, statuses=(200,), **kwargs) -> Optional[float]:
+    """İlk kabul edilen yanıta kadar geçen süre (başlangıçtan itibaren)"""
+    while time.perf_counter() < deadline:
+        try:
+            response = client.request(method, url, **kwargs)
+            if response.status_code in statuses:
+                return time.perf_counter() - started
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.01)
+    return None
+
+
+def stop(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def measure_api(scenario: str, env: Dict[str, str], timeout: float) -> Dict[str, Optional[float]]:
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = spawn([sys.executable, "-m", "uvicorn", "api_service.main:app",
+                     "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"], scenario, env)
+    deadline = started + timeout
+    try:
+        with httpx.Client(timeout=10) as client:
+            return {
+                "health": wait_for(client, "GET", f"{url}/health", started, deadline),
+                "catalog": wait_for(client, "GET", f"{url}/api/clinics/search", started, deadline),
+                "mongo": wait_for(client, "GET", f"{url}/api/profile/bench_startup", started, deadline,
+                                  statuses=(200, 503)),
+            }
+    finally:
+        stop(process)
+
+
+def measure_actions(scenario: str, env: Dict[str, str], timeout: float) -> Dict[str, Optional[float]]:
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = spawn([sys.executable, os.path.join("rasa_service", "actions_server.py"),
+                     "--host", "127.0.0.1", "--port", str(port), "--workers", "1"], scenario, env)
+    deadline = started + timeout
+    try:
+        with httpx.Client(timeout=30) as client:
+            return {
+                "health": wait_for(client, "GET", f"{url}/health", started, deadline),
+                "turn": wait_for(client, "POST", f"{url}/webhook", started, deadline, json=TURN),
+            }
+    finally:
+        stop(process)
+
+
+def fmt(values: List[Optional[float]]) -> str:
+    if any(value is None for value in values):
+        return f"{'zaman aşımı':>12}"
+    return f"{statistics.median(values) * 1000:>10.0f}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API ve action server açılış süresi")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--scenarios", nargs="+", default=["down", "mock"], choices=["down", "mock"])
+    args = parser.parse_args()
+
+    env = dict(os.environ, USE_MOCK_API="true", ACTION_METRICS_PORT="0", HEALTH_PROBE_TIMEOUT="0.5",
+               MONGODB_URI=f"mongodb://127.0.0.1:{free_port()}/?serverSelectionTimeoutMS=5000")
+
+    print(f"⏱️ İlk yanıta kadar geçen süre (medyan, {args.runs} tekrar)\n")
+    print(f"{'senaryo':<9}{'API /health':>13}{'katalog':>12}{'MongoDB ep.':>12}"
+          f"{'actions /health':>17}{'ilk tur':>12}")
+    for scenario in args.scenarios:
+        api = [measure_api(scenario, env, args.timeout) for _ in range(args.runs)]
+        actions = [measure_actions(scenario, env, args.timeout) for _ in range(args.runs)]
+        print(f"{scenario:<9}{fmt([r['health'] for r in api]):>13}{fmt([r['catalog'] for r in api]):>12}"
+              f"{fmt([r['mongo'] for r in api]):>12}{fmt([r['health'] for r in actions]):>17}"
+              f"{fmt([r['turn'] for r in actions]):>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+# benchmarks/bench_tracker_store.py
+"""
+Tracker store tur başı latency benchmark'ı - stok mongod store vs DeltaEventLog
+
+Her turda (retrieve + 4 yeni event ile save) geçen süre, oturum 500 event'e
+kadar büyürken ölçülür. Stok store, Rasa 3.x MongoTrackerStore'un yaptığı
+gibi her retrieve ve save'de sender dokümanının tamamını okur ve yeni
+event'leri $push ile ekler. Event <-> DialogueStateTracker dönüşümü her iki
+store'da aynı olduğundan ölçüme dahil değildir.
+
+Kullanım:
+    python benchmarks/bench_tracker_store.py                  # mongomock
+    python benchmarks/bench_tracker_store.py --mongo-uri mongodb://localhost:27017
+    python benchmarks/bench_tracker_store.py --max-events 500 --senders 20 --save benchmarks/results/tracker.json
+"""
+
+import argparse
+import logging
+import random
+import sys
+import time
+from typing import Any, Dict, List
+
+from common import find_regressions, load_results, percentile, save_results
+
+from rasa_service.tracker_store import DeltaEventLog, session_start_index
+
+INTENTS = ["greet", "tedavi_arama_dental", "otel_arama", "fiyat_sorgulama", "paket_onerisi",
+           "randevu_alma", "ucus_arama", "nlu_fallback", "goodbye", "affirm"]
+
+
+def make_turn(rng: random.Random, turn: int, timestamp: float) -> List[Dict[str, Any]]:
+    """Rasa'nın bir kullanıcı turunda yazdığı event'lere benzer 4 event"""
+    ranking = [{"name": name, "confidence": rng.random()} for name in INTENTS]
+    intent = max(ranking, key=lambda r: r["confidence"])
+    return [
+        {"event": "user", "timestamp": timestamp, "text": f"Antalya'da implant fiyatı nedir? ({turn})",
+         "parse_data": {"intent": intent, "intent_ranking": ranking,
+                        "entities": [{"entity": "sehir", "value": "Antalya", "start": 0, "end": 7,
+                                      "extractor": "DIETClassifier", "confidence_entity": 0.99}],
+                        "text": "Antalya'da implant fiyatı nedir?", "message_id": f"m{turn}"},
+         "input_channel": "rest", "message_id": f"m{turn}"},
+        {"event": "action", "timestamp": timestamp + 0.01, "name": "action_search_clinics",
+         "policy": "RulePolicy", "confidence": 1.0},
+        {"event": "bot", "timestamp": timestamp + 0.02, "text": "x" * rng.randint(100, 600),
+         "data": {"buttons": None, "custom": None}},
+        {"event": "action", "timestamp": timestamp + 0.03, "name": "action_listen",
+         "policy": "RulePolicy", "confidence": 1.0},
+    ]
+
+
+def session_start(timestamp: float) -> List[Dict[str, Any]]:
+    return [
+        {"event": "action", "timestamp": timestamp, "name": "action_session_start"},
+        {"event": "session_started", "timestamp": timestamp},
+        {"event": "action", "timestamp": timestamp, "name": "action_listen"},
+    ]
+
+
+class StockStyleStore:
+    """Rasa 3.x MongoTrackerStore'un okuma / yazma deseni (serileştirilmiş event'lerle)"""
+
+    def __init__(self, db):
+        self.conversations = db["conversations_stock"]
+        self.conversations.create_index("sender_id")
+
+    def _session_events(self, sender_id: str):
+        stored = self.conversations.find_one({"sender_id": sender_id})
+        if stored is None:
+            return None
+        events = stored["events"]
+        return events[session_start_index(events):]
+
+    def load_events(self, sender_id: str):
+        return self._session_events(sender_id)
+
+    def append(self, sender_id: str, session_events: List[Dict[str, Any]]):
+        # _additional_events: kayıtlı tracker'ı tekrar okuyup farkı bul
+        stored = self._session_events(sender_id) or []
+        additional = session_events[len(stored):]
+        self.conversations.update_one(
+            {"sender_id": sender_id},
+            {"$set": {"sender_id": sender_id, "latest_event_time": session_events[-1]["timestamp"]},
+             "$push": {"events": {"$each": additional}}},
+            upsert=True
+        )
+        return additional
+
+
+def run_store(store, senders: int, max_events: int, seed: int, bucket: int) -> Dict[str, Dict[str, List[float]]]:
+    """Sender'ları sırayla konuşturarak tur başı (retrieve, save) sürelerini event sayısına göre grupla"""
+    rng = random.Random(seed)
+    durations: Dict[int, Dict[str, List[float]]] = {}
+    sessions = {f"bench_{i}": 0 for i in range(senders)}
+    turn = 0
+    timestamp = 1_700_000_000.0
+
+    while sessions:
+        for sender_id in list(sessions):
+            turn += 1
+            timestamp += 1
+            new_events = make_turn(rng, turn, timestamp)
+
+            start = time.perf_counter()
+            events = store.load_events(sender_id)
+            loaded = time.perf_counter()
+            events = list(events) if events is not None else session_start(timestamp)
+            events.extend(new_events)
+            saving = time.perf_counter()
+            store.append(sender_id, events)
+            end = time.perf_counter()
+
+            count = sessions[sender_id] = sessions[sender_id] + len(new_events)
+            group = durations.setdefault(min(count // bucket, max_events // bucket - 1),
+                                         {"turn": [], "retrieve": [], "save": []})
+            group["turn"].append(loaded - start + end - saving)
+            group["retrieve"].append(loaded - start)
+            group["save"].append(end - saving)
+            if count >= max_events:
+                del sessions[sender_id]
+
+    return {f"{k * bucket}-{(k + 1) * bucket}": v for k, v in sorted(durations.items())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tracker store tur başı latency benchmark'ı")
+    parser.add_argument("--mongo-uri", help="Gerçek MongoDB (verilmezse mongomock)")
+    parser.add_argument("--db", default="bench_tracker_store")
+    parser.add_argument("--senders", type=int, default=20)
+    parser.add_argument("--max-events", type=int, default=500)
+    parser.add_argument("--bucket", type=int, default=100, help="Event sayısı grup genişliği")
+    parser.add_argument("--cache-size", type=int, default=1000)
+    parser.add_argument("--compact-every", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--save", help="Sonuçları JSON olarak kaydet")
+    parser.add_argument("--baseline", help="Karşılaştırılacak önceki sonuç dosyası")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    if args.mongo_uri:
+        from pymongo import MongoClient
+        client = MongoClient(args.mongo_uri)
+    else:
+        import mongomock
+        client = mongomock.MongoClient()
+        print("⚠️ mongomock: index'ler gerçek değil, unique index kontrolü ve sorgular collection'ı baştan\n"
+              "   tarar; save süreleri delta kaydı sayısıyla büyür. Anlamlı sonuç için --mongo-uri kullanın.\n")
+    client.drop_database(args.db)
+    db = client[args.db]
+
+    stores = {
+        "stock": lambda: StockStyleStore(db),
+        "delta_cached": lambda: DeltaEventLog(db, cache_size=args.cache_size, compact_every=args.compact_every),
+        "delta_uncached": lambda: DeltaEventLog(db, cache_size=0, compact_every=args.compact_every),
+    }
+
+    results: Dict[str, Dict[str, Any]] = {}
+    print(f"📊 Tracker store tur başı latency ({args.senders} sender, {args.max_events} event'e kadar)\n")
+    print(f"{'store':<16}{'event':>10}{'p50 ms':>10}{'p95 ms':>10}{'retrieve':>10}{'save':>10}{'turlar':>8}")
+    for name, factory in stores.items():
+        for collection in ("conversations_stock", "tracker_snapshots", "tracker_events"):
+            db[collection].drop()
+        by_bucket = run_store(factory(), args.senders, args.max_events, args.seed, args.bucket)
+        for bucket_name, groups in by_bucket.items():
+            values = sorted(groups["turn"])
+            row = {"p50_ms": percentile(values, 50) * 1000, "p95_ms": percentile(values, 95) * 1000,
+                   "retrieve_p50_ms": percentile(sorted(groups["retrieve"]), 50) * 1000,
+                   "save_p50_ms": percentile(sorted(groups["save"]), 50) * 1000,
+                   "turns": len(values)}
+            results[f"{name}@{bucket_name}"] = row
+            print(f"{name:<16}{bucket_name:>10}{row['p50_ms']:>10.3f}{row['p95_ms']:>10.3f}"
+                  f"{row['retrieve_p50_ms']:>10.3f}{row['save_p50_ms']:>10.3f}{row['turns']:>8}")
+        print()
+
+    client.drop_database(args.db)
+
+    if args.save:
+        save_results(args.save, {"benchmarks": results})
+
+    if args.baseline:
+        baseline = load_results(args.baseline)["benchmarks"]
+        checks = {"p50_ms": ("higher_is_worse", 0.25), "p95_ms": ("higher_is_worse", 0.5)}
+        regressions = find_regressions(results, baseline, checks)
+        if regressions:
+            print("❌ Regresyonlar:", file=sys.stderr)
+            for line in regressions:
+                print(f"   • {line}", file=sys.stderr)
+            sys.exit(1)
+        print("✅ Baseline'a göre regresyon yok", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# benchmarks/common.py
+"""
+Benchmark yardımcıları - tüm benchmark script'leri tarafından kullanılır
+"""
+
+import json
+import math
+import os
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+# Proje kökünü path'e ekle (api_service / rasa_service import edilebilsin)
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+
+def measure(fn: Callable[[], Any], repeat: int = 5, number: int = 1, warmup: int = 1) -> Dict[str, float]:
+    """
+    fn'i repeat x number kez çalıştır, çağrı başına süreleri döndür
+
+    Returns:
+        {"best": s, "median": s, "mean": s, "calls": n}  # saniye / çağrı
+    """
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+
+    return {
+        "best": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.mean(samples),
+        "calls": repeat * number
+    }
+
+
+def format_duration(seconds: float) -> str:
+    """Süreyi okunabilir birimle yaz"""
+    if seconds < 1e-6:
+        return f"{seconds * 1e9:.0f} ns"
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds:.3f} s"
+
+
+def print_result(name: str, result: Dict[str, float], items: int = 1):
+    """Tek benchmark satırını yazdır"""
+    line = f"{name:<45} best {format_duration(result['best']):>10}   median {format_duration(result['median']):>10}"
+    if items > 1:
+        line += f"   {format_duration(result['best'] / items):>10}/item"
+    print(line)
+
+
+def percentile(sorted_values, pct: float) -> float:
+    """Sıralı listede nearest-rank yüzdelik değeri"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+# ============================================
+# SONUÇ KAYDETME / KARŞILAŞTIRMA
+# ============================================
+
+def save_results(path: str, data: Dict[str, Any]):
+    """Benchmark sonucunu JSON olarak kaydet"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    print(f"💾 Sonuçlar kaydedildi: {path}")
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def find_regressions(current: Dict[str, Dict[str, float]],
+                     baseline: Dict[str, Dict[str, float]],
+                     checks: Dict[str, Tuple[str, float]]) -> List[str]:
+    """
+    İki sonuç setini karşılaştır
+
+    Args:
+        current / baseline: {"isim": {"metrik": değer, ...}, ...}
+        checks: {"metrik": ("higher_is_worse" | "lower_is_worse", tolerans)}
+            tolerans oransaldır (0.2 = %20); "_abs" ile biten metrikler için mutlak
+
+    Returns:
+        Regresyon açıklamaları (boş liste = regresyon yok)
+    """
+    regressions = []
+    for name, base_metrics in baseline.items():
+        metrics = current.get(name)
+        if metrics is None:
+            continue
+        for metric, (direction, tolerance) in checks.items():
+            if metric not in metrics or metric not in base_metrics:
+                continue
+            old, new = base_metrics[metric], metrics[metric]
+            absolute = metric.endswith("_abs") or old == 0
+            delta = new - old if direction == "higher_is_worse" else old - new
+            limit = tolerance if absolute else abs(old) * tolerance
+            if delta > limit:
+                regressions.append(f"{name}: {metric} {old:.4g} -> {new:.4g}")
+    return regressions
@@ -0,0 +1,159 @@
+# benchmarks/fixtures.py
+"""
+Benchmark fixture'ları - sentetik klinik / otel katalogları ve sahte Rasa nesneleri
+"""
+
+import random
+from typing import Any, Dict, List, Optional
+
+CATEGORIES = {
+    "dental": ["Dental Implants", "Teeth Whitening", "Porcelain Veneers", "Zirconium Crowns",
+               "Root Canal Treatment", "Orthodontics", "Invisalign", "Composite Bonding"],
+    "aesthetic": ["Rhinoplasty", "Botox", "Face Lift", "Breast Surgery", "Liposuction",
+                  "Lip Lift", "Chin Filler", "Septoplasty"],
+    "eye_care": ["Cataract", "Glaucoma", "Retinal Diseases", "Lazy Eye",
+                 "Intraocular Lens Implants", "Keratoplasty"],
+}
+CITIES = ["Antalya", "İstanbul", "İzmir", "Ankara"]
+DISTRICTS = ["Muratpaşa", "Konyaaltı", "Kepez", "Manavgat", "Alanya", "Kemer"]
+REGIONS = ["Belek", "Lara", "Side", "Alanya", "Kemer", "Konyaaltı"]
+LANGUAGES = ["Turkish", "English", "Russian", "German", "Arabic"]
+
+# Koordinat üretimi için merkezler (lat, lon); Antalya klinikleri ilçe merkezine dağılır
+CITY_CENTERS = {"Antalya": (36.8969, 30.7133), "İstanbul": (41.0082, 28.9784),
+                "İzmir": (38.4237, 27.1428), "Ankara": (39.9334, 32.8597)}
+DISTRICT_CENTERS = {"Muratpaşa": (36.8841, 30.7056), "Konyaaltı": (36.8780, 30.6370),
+                    "Kepez": (36.9420, 30.7100), "Manavgat": (36.7870, 31.4430),
+                    "Alanya": (36.5440, 31.9990), "Kemer": (36.5970, 30.5600)}
+REGION_CENTERS = {"Belek": (36.8625, 31.0556), "Lara": (36.8530, 30.8350), "Side": (36.7675, 31.3890),
+                  "Alanya": (36.5440, 31.9990), "Kemer": (36.6020, 30.5590), "Konyaaltı": (36.8740, 30.6400)}
+
+
+def _scatter(rng: random.Random, center, spread_km: float) -> Dict[str, float]:
+    """Merkez etrafında normal dağılımlı nokta (spread_km ~ standart sapma)"""
+    lat, lon = center
+    return {"lat": round(rng.gauss(lat, spread_km / 111.2), 5),
+            "lon": round(rng.gauss(lon, spread_km / 89.0), 5)}
+
+
+PRICE_RANGES = ["standard", "medium", "premium", "luxury"]
+
+
+def make_clinics(count: int, seed: int = 1) -> List[Dict[str, Any]]:
+    """api_clients.MOCK_CLINICS kayıtlarıyla aynı şekilde sentetik klinikler"""
+    rng = random.Random(seed)
+    # Koordinatlar ayrı RNG'den - diğer alanlar koordinatsız sürümle aynı kalsın
+    geo_rng = random.Random(seed + 1000)
+    clinics = []
+    for i in range(count):
+        category = rng.choice(list(CATEGORIES))
+        city = rng.choice(CITIES)
+        district = rng.choice(DISTRICTS)
+        clinics.append({
+            "id": i + 1,
+            "name": f"Synthetic {category.title()} Clinic {i + 1}",
+            "address": f"{rng.randint(1, 999)}. Sokak No:{rng.randint(1, 99)} {district}/{city}",
+            "city": city,
+            "district": district,
+            "category": category,
+            "treatments": rng.sample(CATEGORIES[category], k=rng.randint(3, 6)),
+            "rating": round(rng.uniform(3.8, 5.0), 1),
+            "accreditations": rng.sample(["JCI", "ISO 9001", "ISAPS", "TSAPS"], k=rng.randint(1, 3)),
+            "languages": rng.sample(LANGUAGES, k=rng.randint(2, 4)),
+            "price_range": rng.choice(PRICE_RANGES[:3]),
+            **_scatter(geo_rng, DISTRICT_CENTERS[district] if city == "Antalya" else CITY_CENTERS[city], 3.0),
+        })
+    return clinics
+
+
+def make_hotels(count: int, seed: int = 2) -> List[Dict[str, Any]]:
+    """api_clients.MOCK_HOTELS kayıtlarıyla aynı şekilde sentetik oteller"""
+    rng = random.Random(seed)
+    geo_rng = random.Random(seed + 1000)
+    hotels = []
+    for i in range(count):
+        region = rng.choice(REGIONS)
+        hotels.append({
+            "id": i + 1,
+            "name": f"Synthetic Resort {i + 1}",
+            "region": region,
+            "city": "Antalya",
+            "stars": rng.choice([3, 4, 4, 5, 5, 5]),
+            "features": rng.sample(["Spa", "Pool", "All Inclusive", "Beach", "Golf", "Aquapark"], k=3),
+            "price_range": rng.choice(["standard", "premium", "luxury"]),
+            "price_per_night": rng.randint(80, 500),
+            **_scatter(geo_rng, REGION_CENTERS[region], 4.0),
+        })
+    return hotels
+
+
+def group_clinics(clinics: List[Dict[str, Any]]) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
+    """MOCK_CLINICS yapısı: {kategori: {şehir: [klinik, ...]}}"""
+    grouped: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+    for clinic in clinics:
+        grouped.setdefault(clinic["category"], {}).setdefault(clinic["city"], []).append(clinic)
+    return grouped
+
+
+def group_hotels(hotels: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """MOCK_HOTELS yapısı: {bölge: [otel, ...]}"""
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    for hotel in hotels:
+        grouped.setdefault(hotel["region"], []).append(hotel)
+    return grouped
+
+
+# ============================================
+# SAHTE RASA NESNELERİ
+# ============================================
+
+class FakeTracker:
+    """rasa_sdk.Tracker'ın action'ların kullandığı kısmı"""
+
+    def __init__(self,
+                 slots: Optional[Dict[str, Any]] = None,
+                 text: str = "Antalya'da diş implantı fiyatları nedir?",
+                 events: Optional[List[Dict[str, Any]]] = None,
+                 sender_id: str = "bench_user",
+                 intent: str = "nlu_fallback",
+                 entities: Optional[List[Dict[str, Any]]] = None):
+        self.sender_id = sender_id
+        self.slots = slots or {}
+        self.latest_message = {
+            "text": text,
+            "intent": {"name": intent, "confidence": 0.42},
+            "entities": entities or [],
+            "message_id": "bench_message",
+        }
+        self.events = events if events is not None else []
+
+    def get_slot(self, key: str) -> Any:
+        return self.slots.get(key)
+
+
+class FakeDispatcher:
+    """CollectingDispatcher yerine - mesajları sadece listede tutar"""
+
+    def __init__(self):
+        self.messages: List[Dict[str, Any]] = []
+
+    def utter_message(self, text: Optional[str] = None, **kwargs):
+        self.messages.append(dict(kwargs, text=text))
+
+
+def make_events(count: int, seed: int = 3) -> List[Dict[str, Any]]:
+    """Kullanıcı / bot / slot / action event'lerinden oluşan sahte geçmiş"""
+    rng = random.Random(seed)
+    kinds = ["user", "bot", "action", "slot"]
+    events = []
+    for i in range(count):
+        kind = kinds[i % len(kinds)]
+        event = {"event": kind, "timestamp": 1_700_000_000 + i}
+        if kind in ("user", "bot"):
+            event["text"] = f"{kind} mesajı {i} " + "x" * rng.randint(10, 200)
+        elif kind == "action":
+            event["name"] = "action_listen"
+        else:
+            event.update(name="sehir", value="Antalya")
+        events.append(event)
+    return events
@@ -0,0 +1,289 @@
+# benchmarks/loadtest.py
+"""
+FastAPI servisi için tekrarlanabilir HTTP yük testi
+
+Sabit RPS ile (open-loop) gerçekçi bir endpoint karışımı üretir ve endpoint
+bazında p50/p95/p99 latency, throughput ve hata oranını JSON olarak raporlar.
+Latency, isteğin planlanan başlangıç zamanından ölçülür; böylece servis
+yavaşladığında bekleyen istekler de sonuca yansır (coordinated omission yok).
+
+Kullanım:
+    # Çalışan servise karşı (yerel mongod ile)
+    python benchmarks/loadtest.py --url http://127.0.0.1:8000 --rps 200 --duration 30
+
+    # Process içinde, MongoDB yerine in-memory mongomock ile
+    python benchmarks/loadtest.py --in-process --rps 200 --duration 30 --save benchmarks/results/load.json
+
+    # Kaydedilmiş baseline ile karşılaştır (regresyon varsa exit code 1)
+    python benchmarks/loadtest.py --in-process --baseline benchmarks/results/load.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+import httpx
+
+from common import find_regressions, load_results, percentile, save_results
+
+# ============================================
+# ENDPOINT KARIŞIMI
+# ============================================
+
+USER_COUNT = 200
+CITIES = ["Antalya", "antalya", "İstanbul", "İzmir"]
+TREATMENTS = ["Dental Implant", "Rhinoplasty", "Veneers", "Face Lift", None]
+REGIONS = ["Lara", "Belek", "Side", None]
+
+
+def _user(rng: random.Random) -> str:
+    return f"load_user_{rng.randrange(USER_COUNT)}"
+
+
+def _clinic_search(rng):
+    return "POST", "/api/clinics/search", {"json": {"city": rng.choice(CITIES), "treatment": rng.choice(TREATMENTS)}}
+
+
+def _hotel_search(rng):
+    return "POST", "/api/hotels/search", {"json": {"region": rng.choice(REGIONS), "budget": rng.choice([None, 250, 400])}}
+
+
+def _package(rng):
+    return "POST", "/api/packages/generate", {"params": {
+        "treatment": rng.choice(TREATMENTS[:-1]),
+        "city": "Antalya",
+        "budget": rng.choice([3000, 5000, 10000]),
+        "nights": rng.choice([5, 7, 10])
+    }}
+
+
+def _conversations(rng):
+    return "GET", f"/api/conversations/{_user(rng)}", {"params": {"limit": 50}}
+
+
+def _profile_get(rng):
+    return "GET", f"/api/profile/{_user(rng)}", {}
+
+
+def _profile_post(rng):
+    return "POST", f"/api/profile/{_user(rng)}", {"json": {
+        "age": rng.randint(20, 70),
+        "preferences": {"city": rng.choice(CITIES), "budget": rng.choice([3000, 5000])}
+    }}
+
+
+def _analytics_intents(rng):
+    return "GET", "/api/analytics/intents", {"params": {"days": 30}}
+
+
+def _analytics_users(rng):
+    return "GET", "/api/analytics/users", {"params": {"days": 7}}
+
+
+# (isim, ağırlık, istek üretici)
+DEFAULT_MIX: List[Tuple[str, int, Callable]] = [
+    ("clinic_search", 30, _clinic_search),
+    ("hotel_search", 20, _hotel_search),
+    ("package_generate", 15, _package),
+    ("conversations", 15, _conversations),
+    ("profile_get", 10, _profile_get),
+    ("profile_post", 4, _profile_post),
+    ("analytics_intents", 3, _analytics_intents),
+    ("analytics_users", 3, _analytics_users),
+]
+
+
+# ============================================
+# IN-PROCESS APP (mongomock stand-in)
+# ============================================
+
+def build_in_process_app(seed_users: int = USER_COUNT, messages_per_user: int = 20):
+    """main.py'yi MongoDB yerine mongomock ile yükle ve örnek veri ekle"""
+    import mongomock
+
+    import api_service.mongodb_logger as mongodb_logger
+    mongodb_logger.MongoClient = mongomock.MongoClient
+
+    from api_service import main
+
+    rng = random.Random(0)
+    intents = ["greet", "tedavi_arama_dental", "otel_arama", "fiyat_sorgulama", "goodbye"]
+    logger = main.mongo_logger
+    for i in range(seed_users):
+        user_id = f"load_user_{i}"
+        logger.upsert_user({"user_id": user_id, "age": rng.randint(20, 70),
+                            "preferences": {"city": "Antalya", "treatment": "dental implant"}})
+        for j in range(messages_per_user):
+            if j % 2 == 0:
+                logger.log_message(user_id, "user", f"mesaj {j}", intent=rng.choice(intents),
+                                   entities=[{"entity": "sehir", "value": "Antalya", "start": 0, "end": 7,
+                                              "extractor": "DIETClassifier", "confidence_entity": 0.99}],
+                                   confidence=round(rng.random(), 3))
+            else:
+                logger.log_message(user_id, "bot", f"cevap {j}", bot_action="utter_greet")
+    return main.app
+
+
+# ============================================
+# LOAD GENERATOR
+# ============================================
+
+async def run_load(client: httpx.AsyncClient,
+                   rps: float,
+                   duration: float,
+                   mix: List[Tuple[str, int, Callable]],
+                   seed: int,
+                   max_in_flight: int) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    names = [name for name, _, _ in mix]
+    weights = [weight for _, weight, _ in mix]
+    builders = {name: builder for name, _, builder in mix}
+
+    latencies: Dict[str, List[float]] = {name: [] for name in names}
+    errors: Dict[str, int] = {name: 0 for name in names}
+    semaphore = asyncio.Semaphore(max_in_flight)
+    # Servis yetişemezse bekleyen istek kuyruğu sınırsız büyümesin
+    max_backlog = max_in_flight * 4
+    backlog = 0
+    dropped = 0
+
+    async def fire(name: str, scheduled: float, method: str, path: str, kwargs: Dict[str, Any]):
+        nonlocal backlog
+        try:
+            async with semaphore:
+                try:
+                    response = await client.request(method, path, **kwargs)
+                    if response.status_code >= 400:
+                        errors[name] += 1
+                except Exception:
+                    errors[name] += 1
+                latencies[name].append(time.perf_counter() - scheduled)
+        finally:
+            backlog -= 1
+
+    total_requests = int(rps * duration)
+    interval = 1.0 / rps
+    tasks = []
+    start = time.perf_counter()
+
+    for i in range(total_requests):
+        scheduled = start + i * interval
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        name = rng.choices(names, weights)[0]
+        method, path, kwargs = builders[name](rng)
+        if backlog >= max_backlog:
+            dropped += 1
+            continue
+        backlog += 1
+        tasks.append(asyncio.ensure_future(fire(name, scheduled, method, path, kwargs)))
+
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    endpoints = {}
+    for name in names:
+        values = sorted(latencies[name])
+        count = len(values)
+        if not count:
+            continue
+        endpoints[name] = {
+            "count": count,
+            "errors": errors[name],
+            "error_rate_abs": errors[name] / count,
+            "throughput_rps": count / elapsed,
+            "mean_ms": sum(values) / count * 1000,
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+        }
+
+    all_values = sorted(v for values in latencies.values() for v in values)
+    total = len(all_values)
+    total_errors = sum(errors.values())
+    overall = {
+        "count": total,
+        "errors": total_errors,
+        "error_rate_abs": total_errors / total if total else 0.0,
+        "throughput_rps": total / elapsed,
+        "p50_ms": percentile(all_values, 50) * 1000,
+        "p95_ms": percentile(all_values, 95) * 1000,
+        "p99_ms": percentile(all_values, 99) * 1000,
+        "dropped": dropped,
+    }
+    return {"endpoints": endpoints, "overall": overall, "elapsed_s": elapsed}
+
+
+REGRESSION_CHECKS = {
+    "p50_ms": ("higher_is_worse", 0.25),
+    "p95_ms": ("higher_is_worse", 0.25),
+    "p99_ms": ("higher_is_worse", 0.5),
+    "error_rate_abs": ("higher_is_worse", 0.01),
+    "throughput_rps": ("lower_is_worse", 0.1),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FastAPI servisi için HTTP yük testi")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", default="http://127.0.0.1:8000", help="Çalışan servisin adresi")
+    target.add_argument("--in-process", action="store_true", help="main.py'yi mongomock ile process içinde çalıştır")
+    parser.add_argument("--rps", type=float, default=100)
+    parser.add_argument("--duration", type=float, default=20, help="Saniye")
+    parser.add_argument("--max-in-flight", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", help="Sonucu bu dosyaya kaydet (baseline olarak kullanılabilir)")
+    parser.add_argument("--baseline", help="Karşılaştırılacak baseline JSON")
+    parser.add_argument("--tolerance-scale", type=float, default=1.0,
+                        help="Regresyon toleranslarını ölçekle (gürültülü ortamlar için > 1)")
+    args = parser.parse_args()
+
+    if args.in_process:
+        app = build_in_process_app()
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://loadtest"
+    else:
+        transport = None
+        base_url = args.url
+
+    async def runner():
+        limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+        async with httpx.AsyncClient(base_url=base_url, transport=transport, limits=limits, timeout=30) as client:
+            return await run_load(client, args.rps, args.duration, DEFAULT_MIX, args.seed, args.max_in_flight)
+
+    result = asyncio.run(runner())
+    result["config"] = {
+        "target": "in-process" if args.in_process else args.url,
+        "rps": args.rps,
+        "duration_s": args.duration,
+        "seed": args.seed,
+        "max_in_flight": args.max_in_flight,
+    }
+
+    print(json.dumps(result, indent=2))
+
+    if args.save:
+        save_results(args.save, result)
+
+    if args.baseline:
+        baseline = load_results(args.baseline)
+        checks = {metric: (direction, tolerance * args.tolerance_scale)
+                  for metric, (direction, tolerance) in REGRESSION_CHECKS.items()}
+        current = dict(result["endpoints"], overall=result["overall"])
+        previous = dict(baseline["endpoints"], overall=baseline["overall"])
+        regressions = find_regressions(current, previous, checks)
+        if regressions:
+            print("\n❌ Regresyonlar:", file=sys.stderr)
+            for line in regressions:
+                print(f"   • {line}", file=sys.stderr)
+            sys.exit(1)
+        print("\n✅ Baseline'a göre regresyon yok", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,458 @@
+# benchmarks/standin_server.py
+"""
+Ollama, Rasa REST kanalı ve partner API'leri için yerel stand-in sunucu
+
+Taklit edilen endpoint'ler:
+    POST /api/generate        Ollama (stream=true NDJSON / stream=false JSON)
+    GET  /api/version         Ollama sürüm kontrolü
+    POST /clinics/search      ClinicAPIClient._real_search
+    POST /hotels/search       HotelAPIClient._real_search / _real_nearest (lat, lon, radius_km)
+    POST /flights/search      FlightAPIClient._real_search
+    POST /webhooks/rest/webhook  Rasa REST kanalı (?stream=true ile mesaj başına NDJSON satırı)
+
+Her route için gecikme dağılımı, hata enjeksiyonu, asılı kalma (timeout)
+ve slow-loris (yanıtı çok yavaş damla damla gönderme) ayarlanabilir; Ollama
+için ilk token gecikmesi ve token hızı ayrıca ayarlanır. Gerçek servislerden
+gelen yanıtlar kaydedilip (--record) sonra birebir tekrar oynatılabilir (--replay).
+
+Kullanım:
+    python benchmarks/standin_server.py --port 11500 --profile profile.json --seed 1
+    python benchmarks/standin_server.py --record http://127.0.0.1:11434 --cassette ollama.jsonl
+    python benchmarks/standin_server.py --replay ollama.jsonl
+
+    # Servisleri stand-in'e yönlendir
+    OLLAMA_API_URL=http://127.0.0.1:11500/api/generate
+    USE_MOCK_API=false CLINIC_API_URL=http://127.0.0.1:11500 CLINIC_API_KEY=standin ...
+
+Profil dosyası örneği (eksik alanlar DEFAULT_PROFILE'dan gelir):
+    {
+      "/api/generate": {"latency": {"dist": "lognormal", "median": 0.4, "sigma": 0.5},
+                        "token_rate": 25, "tokens": {"dist": "uniform", "low": 40, "high": 160},
+                        "error_rate": 0.02},
+      "/clinics/search": {"latency": {"dist": "fixed", "value": 0.05},
+                          "hang_rate": 0.01, "slowloris_rate": 0.01}
+    }
+"""
+
+import argparse
+import asyncio
+import copy
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+import common  # noqa: F401  (proje kökünü sys.path'e ekler)
+
+from api_service.geo_index import haversine_km
+from rasa_service.actions.api_clients import MOCK_CLINICS, MOCK_FLIGHTS, MOCK_HOTELS
+
+# ============================================
+# PROFİL
+# ============================================
+
+_ROUTE_DEFAULTS = {
+    "latency": {"dist": "fixed", "value": 0.0},
+    "error_rate": 0.0,
+    "error_status": 500,
+    # İstek cevapsız bekletilir (istemci timeout'unu test etmek için)
+    "hang_rate": 0.0,
+    "hang_seconds": 120.0,
+    # Yanıt gövdesi çok yavaş gönderilir
+    "slowloris_rate": 0.0,
+    "slowloris_bytes_per_second": 8,
+}
+
+DEFAULT_PROFILE: Dict[str, Dict[str, Any]] = {
+    "/api/generate": dict(_ROUTE_DEFAULTS,
+                          latency={"dist": "lognormal", "median": 0.3, "sigma": 0.4},
+                          token_rate=30.0,
+                          tokens={"dist": "uniform", "low": 40, "high": 160}),
+    "/api/version": dict(_ROUTE_DEFAULTS),
+    "/clinics/search": dict(_ROUTE_DEFAULTS, latency={"dist": "lognormal", "median": 0.08, "sigma": 0.5}),
+    "/hotels/search": dict(_ROUTE_DEFAULTS, latency={"dist": "lognormal", "median": 0.1, "sigma": 0.5}),
+    "/flights/search": dict(_ROUTE_DEFAULTS, latency={"dist": "lognormal", "median": 0.2, "sigma": 0.6}),
+    # latency: ilk bot mesajına kadar, message_delay: sonraki her mesaj arası (action / LLM süresi)
+    "/webhooks/rest/webhook": dict(_ROUTE_DEFAULTS,
+                                   latency={"dist": "lognormal", "median": 0.05, "sigma": 0.4},
+                                   messages={"dist": "uniform", "low": 1, "high": 3},
+                                   message_delay={"dist": "lognormal", "median": 0.3, "sigma": 0.5}),
+}
+
+
+def load_profile(path: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    """Profil dosyasını varsayılanların üzerine uygula"""
+    profile = copy.deepcopy(DEFAULT_PROFILE)
+    if path:
+        with open(path, encoding="utf-8") as f:
+            overrides = json.load(f)
+        for route, settings in overrides.items():
+            profile.setdefault(route, dict(_ROUTE_DEFAULTS)).update(settings)
+    return profile
+
+
+def sample(spec: Dict[str, Any], rng: random.Random) -> float:
+    """Dağılım tanımından örnek al (saniye / adet)"""
+    dist = spec.get("dist", "fixed")
+    if dist == "fixed":
+        return float(spec.get("value", 0.0))
+    if dist == "uniform":
+        return rng.uniform(spec["low"], spec["high"])
+    if dist == "normal":
+        return max(0.0, rng.gauss(spec["mean"], spec["stddev"]))
+    if dist == "lognormal":
+        return rng.lognormvariate(math.log(spec["median"]), spec["sigma"])
+    if dist == "exponential":
+        return rng.expovariate(1.0 / spec["mean"])
+    raise ValueError(f"Bilinmeyen dağılım: {dist}")
+
+
+# ============================================
+# KAYIT / TEKRAR OYNATMA
+# ============================================
+
+def request_key(method: str, path: str, body: bytes) -> str:
+    """Aynı istek için sabit anahtar (JSON gövde key sırasından bağımsız)"""
+    try:
+        canonical = json.dumps(json.loads(body or b"null"), sort_keys=True, ensure_ascii=False).encode()
+    except ValueError:
+        canonical = body
+    return f"{method} {path} {hashlib.sha1(canonical).hexdigest()}"
+
+
+class Cassette:
+    """JSONL dosyasında saklanan istek -> yanıt kayıtları"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry["key"]] = entry
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(key)
+
+    def add(self, entry: Dict[str, Any]):
+        with self._lock:
+            self.entries[entry["key"]] = entry
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+# ============================================
+# APP
+# ============================================
+
+def _ollama_timestamp() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _lorem_tokens(count: int, rng: random.Random):
+    words = ["Antalya", "klinik", "tedavi", "süreci", "genellikle", "birkaç", "gün", "sürer",
+             "ve", "fiyatlar", "kliniğe", "göre", "değişir", "size", "yardımcı", "olabilirim"]
+    for i in range(count):
+        yield (" " if i else "") + rng.choice(words)
+
+
+def create_app(profile: Dict[str, Dict[str, Any]],
+               seed: Optional[int] = None,
+               record_upstream: Optional[str] = None,
+               cassette: Optional[Cassette] = None,
+               replay: bool = False) -> FastAPI:
+    """Stand-in uygulamasını oluştur"""
+    app = FastAPI(title="Stand-in services")
+    rng = random.Random(seed)
+    stats: Dict[str, Dict[str, int]] = {}
+
+    def count(route: str, outcome: str):
+        stats.setdefault(route, {}).setdefault(outcome, 0)
+        stats[route][outcome] += 1
+
+    async def slow_body(payload: bytes, bytes_per_second: float):
+        chunk = max(1, int(bytes_per_second // 4))
+        for start in range(0, len(payload), chunk):
+            yield payload[start:start + chunk]
+            await asyncio.sleep(chunk / bytes_per_second)
+
+    async def inject(route: str) -> Optional[Response]:
+        """Gecikme / hata / asılı kalma enjeksiyonu; None dönerse normal yanıt verilir"""
+        settings = profile.get(route, _ROUTE_DEFAULTS)
+        roll = rng.random()
+        if roll < settings["hang_rate"]:
+            count(route, "hang")
+            await asyncio.sleep(settings["hang_seconds"])
+            return Response(status_code=504)
+        roll -= settings["hang_rate"]
+        if roll < settings["error_rate"]:
+            count(route, "error")
+            await asyncio.sleep(sample(settings["latency"], rng))
+            return JSONResponse({"error": "injected failure"}, status_code=settings["error_status"])
+        await asyncio.sleep(sample(settings["latency"], rng))
+        return None
+
+    def respond(route: str, payload: Any) -> Response:
+        settings = profile.get(route, _ROUTE_DEFAULTS)
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        if rng.random() < settings["slowloris_rate"]:
+            count(route, "slowloris")
+            return StreamingResponse(slow_body(body, settings["slowloris_bytes_per_second"]),
+                                     media_type="application/json")
+        count(route, "ok")
+        return Response(body, media_type="application/json")
+
+    async def proxy_or_replay(request: Request) -> Optional[Response]:
+        """--record: upstream'e ilet ve kaydet, --replay: kayıttan dön"""
+        if cassette is None:
+            return None
+        body = await request.body()
+        key = request_key(request.method, request.url.path, body)
+
+        if replay:
+            entry = cassette.get(key)
+            if entry is None:
+                count(request.url.path, "replay_miss")
+                return JSONResponse({"error": "not recorded", "key": key}, status_code=404)
+            count(request.url.path, "replay")
+            await asyncio.sleep(entry["elapsed"])
+            return Response(entry["body"].encode("utf-8"), status_code=entry["status"],
+                            media_type=entry["content_type"])
+
+        start = time.perf_counter()
+        async with httpx.AsyncClient(base_url=record_upstream, timeout=300) as client:
+            upstream = await client.request(request.method, request.url.path, content=body,
+                                            headers={k: v for k, v in request.headers.items()
+                                                     if k.lower() in ("authorization", "content-type")})
+        entry = {
+            "key": key,
+            "method": request.method,
+            "path": request.url.path,
+            "request": body.decode("utf-8", "replace"),
+            "status": upstream.status_code,
+            "content_type": upstream.headers.get("content-type", "application/json"),
+            "body": upstream.text,
+            "elapsed": time.perf_counter() - start,
+        }
+        cassette.add(entry)
+        count(request.url.path, "recorded")
+        return Response(upstream.content, status_code=upstream.status_code, media_type=entry["content_type"])
+
+    # ---------- Ollama ----------
+
+    @app.get("/api/version")
+    async def version(request: Request):
+        recorded = await proxy_or_replay(request)
+        if recorded is not None:
+            return recorded
+        injected = await inject("/api/version")
+        return injected or respond("/api/version", {"version": "0.0.0-standin"})
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        recorded = await proxy_or_replay(request)
+        if recorded is not None:
+            return recorded
+
+        payload = await request.json()
+        route = "/api/generate"
+        settings = profile[route]
+        injected = await inject(route)  # ilk token'a kadar geçen süre
+        if injected is not None:
+            return injected
+
+        model = payload.get("model", "llama3")
+        token_count = int(sample(settings["tokens"], rng))
+        token_delay = 1.0 / settings["token_rate"] if settings["token_rate"] > 0 else 0.0
+        tokens = list(_lorem_tokens(token_count, rng))
+        started = time.perf_counter()
+
+        def final_stats() -> Dict[str, Any]:
+            return {
+                "model": model,
+                "created_at": _ollama_timestamp(),
+                "done": True,
+                "total_duration": int((time.perf_counter() - started) * 1e9),
+                "eval_count": token_count,
+            }
+
+        if payload.get("stream", True):
+            async def stream():
+                for token in tokens:
+                    await asyncio.sleep(token_delay)
+                    line = {"model": model, "created_at": _ollama_timestamp(), "response": token, "done": False}
+                    yield (json.dumps(line, ensure_ascii=False) + "\n").encode("utf-8")
+                yield (json.dumps(dict(final_stats(), response=""), ensure_ascii=False) + "\n").encode("utf-8")
+
+            count(route, "stream")
+            return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+        await asyncio.sleep(token_delay * token_count)
+        return respond(route, dict(final_stats(), response="".join(tokens)))
+
+    # ---------- Partner API'leri ----------
+
+    @app.post("/clinics/search")
+    async def clinics_search(request: Request):
+        recorded = await proxy_or_replay(request)
+        if recorded is not None:
+            return recorded
+        injected = await inject("/clinics/search")
+        if injected is not None:
+            return injected
+
+        query = await request.json()
+        category = query.get("treatment_type")
+        city = (query.get("city") or "").title() or None
+        groups = [MOCK_CLINICS[category]] if category in MOCK_CLINICS else list(MOCK_CLINICS.values())
+        results = [clinic for group in groups for group_city, clinics in group.items()
+                   if not city or group_city == city for clinic in clinics]
+        treatment = (query.get("treatment") or "").lower()
+        if treatment:
+            results = [c for c in results if any(treatment in t.lower() for t in c["treatments"])]
+        return respond("/clinics/search", {"total": len(results), "results": results})
+
+    @app.post("/hotels/search")
+    async def hotels_search(request: Request):
+        recorded = await proxy_or_replay(request)
+        if recorded is not None:
+            return recorded
+        injected = await inject("/hotels/search")
+        if injected is not None:
+            return injected
+
+        query = await request.json()
+        region = query.get("region")
+        hotels = MOCK_HOTELS.get(region) if region in MOCK_HOTELS else \
+            [h for region_hotels in MOCK_HOTELS.values() for h in region_hotels]
+        results = [h for h in hotels if h["stars"] >= (query.get("stars") or 0)]
+        if query.get("lat") is not None and query.get("lon") is not None:
+            # Konum sorgusu: radius_km içindekiler, yakından uzağa (düz tarama - stand-in)
+            radius = query.get("radius_km") or math.inf
+            ranked = sorted(((haversine_km(query["lat"], query["lon"], h["lat"], h["lon"]), h)
+                             for h in results if "lat" in h and "lon" in h), key=lambda pair: pair[0])
+            results = [h for distance, h in ranked if distance <= radius][:query.get("limit") or None]
+        return respond("/hotels/search", {"total": len(results), "results": results})
+
+    @app.post("/flights/search")
+    async def flights_search(request: Request):
+        recorded = await proxy_or_replay(request)
+        if recorded is not None:
+            return recorded
+        injected = await inject("/flights/search")
+        if injected is not None:
+            return injected
+
+        query = await request.json()
+        results = [f for f in MOCK_FLIGHTS if f["class"] == query.get("class", "economy")]
+        return respond("/flights/search", {"total": len(results), "results": results})
+
+    # ---------- Rasa ----------
+
+    @app.post("/webhooks/rest/webhook")
+    async def rasa_webhook(request: Request):
+        route = "/webhooks/rest/webhook"
+        settings = profile[route]
+        payload = await request.json()
+        injected = await inject(route)
+        if injected is not None:
+            return injected
+
+        message_count = max(1, round(sample(settings["messages"], rng)))
+        delays = [sample(settings["message_delay"], rng) for _ in range(message_count - 1)]
+        texts = list(_lorem_tokens(8 * message_count, rng))
+
+        def bot_message(i: int) -> Dict[str, Any]:
+            return {"recipient_id": payload.get("sender"), "text": "".join(texts[i * 8:(i + 1) * 8]).strip()}
+
+        if request.query_params.get("stream", "").lower() == "true":
+            async def stream():
+                for i in range(message_count):
+                    if i:
+                        await asyncio.sleep(delays[i - 1])
+                    yield (json.dumps(bot_message(i), ensure_ascii=False) + "\n").encode("utf-8")
+
+            count(route, "stream")
+            return StreamingResponse(stream(), media_type="text/event-stream")
+
+        await asyncio.sleep(sum(delays))
+        return respond(route, [bot_message(i) for i in range(message_count)])
+
+    @app.get("/_standin/stats")
+    async def standin_stats():
+        """Route bazında üretilen sonuç sayıları (ok / error / hang / slowloris / replay)"""
+        return stats
+
+    return app
+
+
+# ============================================
+# THREAD İÇİNDE ÇALIŞTIRMA (benchmark'lar için)
+# ============================================
+
+class StandinServer:
+    """
+    Stand-in'i arka plan thread'inde başlat
+
+    Örnek:
+        with StandinServer(profile, port=11500, seed=1) as server:
+            ... server.url ...
+    """
+
+    def __init__(self, profile: Optional[Dict[str, Dict[str, Any]]] = None, host: str = "127.0.0.1",
+                 port: int = 11500, seed: Optional[int] = None, **app_kwargs):
+        app = create_app(profile or load_profile(None), seed=seed, **app_kwargs)
+        self.url = f"http://{host}:{port}"
+        self._server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, name="standin-server", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        deadline = time.time() + 10
+        while not self._server.started and time.time() < deadline:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ollama / partner API stand-in sunucusu")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--profile", help="Gecikme / hata profili (JSON)")
+    parser.add_argument("--seed", type=int, help="Deterministik gecikme / hata dizisi için")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--record", metavar="UPSTREAM", help="İstekleri bu adrese ilet ve yanıtları kaydet")
+    mode.add_argument("--replay", metavar="CASSETTE", help="Kaydedilmiş yanıtları tekrar oynat")
+    parser.add_argument("--cassette", default="standin_cassette.jsonl", help="--record için kayıt dosyası")
+    args = parser.parse_args()
+
+    cassette = None
+    if args.record:
+        cassette = Cassette(args.cassette)
+    elif args.replay:
+        cassette = Cassette(args.replay)
+
+    app = create_app(load_profile(args.profile), seed=args.seed, record_upstream=args.record,
+                     cassette=cassette, replay=bool(args.replay))
+    uvicorn.run(app, host=args.host, port=args.port, log_level="info")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,11 @@
 
 from rasa_sdk import Action, Tracker
 from rasa_sdk.executor import CollectingDispatcher
-from typing import Any, Text, Dict, List
+from typing import Any, Text, Dict, List, Optional
 import requests
 import logging
+import asyncio
+import functools
 import json
 from datetime import datetime
 from rasa_sdk.events import SlotSet, FollowupAction
@@ -14,16 +16,29 @@ import os
 # MongoDB logger için path ekle
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from api_service.mongodb_logger import MongoDBLogger
+from api_service.lazy_mongo import shared_mongo_logger
+from api_service.pricing import (
+    pricing_engine,
+    build_quote,
+    calculate_treatment_price,
+    calculate_hotel_price,
+    calculate_flight_price,
+)
+from api_service.metrics import timed
+from api_service.profile_buffer import profile_buffer
+from api_service.geo_index import coordinates
+from api_service.catalog_data import canonical_clinic_id
 from rasa_service.actions.api_clients import ClinicAPIClient, FlightAPIClient, HotelAPIClient
+from rasa_service.actions.fair_share import OverQuota, fair_scheduler
+from rasa_service.actions.instrumentation import instrument_actions, start_action_metrics_server
 
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# Logging'i action server (rasa run actions / actions_server.py) yapılandırır
 logger = logging.getLogger(__name__)
 
 # API Adresleri - 127.0.0.1 KULLAN (localhost yerine!)
 API_SERVICE_URL = "http://127.0.0.1:8000/api"
-OLLAMA_API_URL = "http://127.0.0.1:11434/api/generate"
+OLLAMA_API_URL = os.getenv("OLLAMA_API_URL", "http://127.0.0.1:11434/api/generate")
 
 PROXIES = {
     "http": None,
@@ -31,13 +46,13 @@ PROXIES = {
 }
 
 
-# API Client'ları başlat
+# API Client'ları başlat (HTTP client'ları ilk gerçek API çağrısında oluşur)
 clinic_client = ClinicAPIClient()
 hotel_client = HotelAPIClient()
 flight_client = FlightAPIClient()
 # Timeout süreleri (saniye) - AGRESİF DÜŞÜRÜLDÜ
 API_TIMEOUT = 5  # API istekleri için 5 saniye (30s → 5s)
-OLLAMA_TIMEOUT = 30  # Ollama için 30 saniye (90s → 30s)
+OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "30"))  # Ollama için 30 saniye (90s → 30s)
 
 CITY_NORMALIZATION = {
     # Antalya
@@ -94,68 +109,62 @@ def normalize_city(city: str) -> str:
 
 
 
-class ActionAskOllama(Action):
-    """Genel sorular için Ollama'ya sor - Rasa'nın anlayamadığı sorular buraya yönlendirilir"""
-    
-    def name(self) -> Text:
-        return "action_ask_ollama"
+def build_ollama_prompt(tracker: Tracker) -> Text:
+    """Slot'lar ve son mesajlardan Ollama prompt'unu oluştur"""
+    user_message = tracker.latest_message.get('text', '')
 
-    def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
-        user_message = tracker.latest_message.get('text', '')
-        logger.info(f"🤖 Ollama'ya genel soru (fallback): '{user_message}'")
-
-        # ✅ TÜM CONTEXT BİLGİLERİNİ TOPLA
-        # 1. Slot'lardan kullanıcı bilgileri
-        tedavi_adi = tracker.get_slot("tedavi_adi")
-        tedavi_turu = tracker.get_slot("tedavi_turu")
-        sehir = tracker.get_slot("sehir")
-        bolge = tracker.get_slot("bolge")
-        butce = tracker.get_slot("butce")
-        klinik_adi = tracker.get_slot("klinik_adi")
-        tarih = tracker.get_slot("tarih")
-        otel_kategori = tracker.get_slot("otel_kategori")
-        ucus_sinifi = tracker.get_slot("ucus_sinifi")
-        
-        # 2. Sohbet geçmişini al (son 5 mesaj)
-        conversation_history = []
-        for event in list(tracker.events)[-10:]:  # Son 10 event'e bak
-            if event.get('event') == 'user':
-                conversation_history.append(f"Kullanıcı: {event.get('text', '')}")
-            elif event.get('event') == 'bot':
-                conversation_history.append(f"Bot: {event.get('text', '')[:100]}...")  # İlk 100 karakter
-        
-        # 3. Context bilgisini zengin şekilde oluştur
-        context_info = "\n\n📋 **KULLANICI PROFİLİ:**\n"
-        
-        if tedavi_adi or tedavi_turu:
-            context_info += f"• Tedavi: {tedavi_adi or tedavi_turu or 'Belirtilmemiş'}\n"
-        if sehir:
-            context_info += f"• Şehir: {sehir}\n"
-        if bolge:
-            context_info += f"• Bölge: {bolge}\n"
-        if butce:
-            context_info += f"• Bütçe: {butce}\n"
-        if klinik_adi:
-            context_info += f"• İlgilenilen Klinik: {klinik_adi}\n"
-        if tarih:
-            context_info += f"• Tarih: {tarih}\n"
-        if otel_kategori:
-            context_info += f"• Otel Tercihi: {otel_kategori}\n"
-        if ucus_sinifi:
-            context_info += f"• Uçuş Sınıfı: {ucus_sinifi}\n"
-        
-        # Eğer hiç bilgi yoksa
-        if context_info == "\n\n📋 **KULLANICI PROFİLİ:**\n":
-            context_info = "\n\n📋 Kullanıcı henüz profil bilgisi paylaşmadı.\n"
-        
-        # 4. Son 3 mesajı ekle
-        if conversation_history:
-            context_info += f"\n💬 **SON MESAJLAR:**\n"
-            for msg in conversation_history[-3:]:
-                context_info += f"{msg}\n"
+    # ✅ TÜM CONTEXT BİLGİLERİNİ TOPLA
+    # 1. Slot'lardan kullanıcı bilgileri
+    tedavi_adi = tracker.get_slot("tedavi_adi")
+    tedavi_turu = tracker.get_slot("tedavi_turu")
+    sehir = tracker.get_slot("sehir")
+    bolge = tracker.get_slot("bolge")
+    butce = tracker.get_slot("butce")
+    klinik_adi = tracker.get_slot("klinik_adi")
+    tarih = tracker.get_slot("tarih")
+    otel_kategori = tracker.get_slot("otel_kategori")
+    ucus_sinifi = tracker.get_slot("ucus_sinifi")
+    
+    # 2. Sohbet geçmişini al (son 5 mesaj)
+    conversation_history = []
+    for event in list(tracker.events)[-10:]:  # Son 10 event'e bak
+        if event.get('event') == 'user':
+            conversation_history.append(f"Kullanıcı: {event.get('text', '')}")
+        elif event.get('event') == 'bot':
+            conversation_history.append(f"Bot: {event.get('text', '')[:100]}...")  # İlk 100 karakter
+    
+    # 3. Context bilgisini zengin şekilde oluştur
+    context_info = "\n\n📋 **KULLANICI PROFİLİ:**\n"
+    
+    if tedavi_adi or tedavi_turu:
+        context_info += f"• Tedavi: {tedavi_adi or tedavi_turu or 'Belirtilmemiş'}\n"
+    if sehir:
+        context_info += f"• Şehir: {sehir}\n"
+    if bolge:
+        context_info += f"• Bölge: {bolge}\n"
+    if butce:
+        context_info += f"• Bütçe: {butce}\n"
+    if klinik_adi:
+        context_info += f"• İlgilenilen Klinik: {klinik_adi}\n"
+    if tarih:
+        context_info += f"• Tarih: {tarih}\n"
+    if otel_kategori:
+        context_info += f"• Otel Tercihi: {otel_kategori}\n"
+    if ucus_sinifi:
+        context_info += f"• Uçuş Sınıfı: {ucus_sinifi}\n"
+    
+    # Eğer hiç bilgi yoksa
+    if context_info == "\n\n📋 **KULLANICI PROFİLİ:**\n":
+        context_info = "\n\n📋 Kullanıcı henüz profil bilgisi paylaşmadı.\n"
+    
+    # 4. Son 3 mesajı ekle
+    if conversation_history:
+        context_info += f"\n💬 **SON MESAJLAR:**\n"
+        for msg in conversation_history[-3:]:
+            context_info += f"{msg}\n"
 
-        # ✅ GELİŞTİRİLMİŞ PROMPT - Medikal Turizm Odaklı
-        prompt = f"""Sen Türkiye'nin lider sağlık turizmi şirketinin AI asistanısın. Adın "Sağlık Turizmi AI Asistan".
+    # ✅ GELİŞTİRİLMİŞ PROMPT - Medikal Turizm Odaklı
+    prompt = f"""Sen Türkiye'nin lider sağlık turizmi şirketinin AI asistanısın. Adın "Sağlık Turizmi AI Asistan".
 
 🎯 **UZMANLIKLARIN:**
 - Türkiye'deki tüm medikal tedavi türleri (diş, estetik, göz, ortopedi, kardiyoloji, obezite)
@@ -177,6 +186,26 @@ class ActionAskOllama(Action):
 🤔 **ŞİMDİKİ SORU:** {user_message}
 
 💡 **CEVABINI YAZ (Türkçe, samimi, yardımcı):**"""
+    
+    return prompt
+
+
+# Ollama cevap üretemediğinde veya kullanıcı kotasını aştığında gösterilen yönlendirme
+OLLAMA_SUGGESTION_TEXT = "Üzgünüm, bu soruya şu anda cevap veremiyorum. Daha spesifik sorular sorabilirsiniz:\n\n💡 Örnek sorular:\n• 'Antalya'da diş implantı kliniği'\n• 'Rinoplasti fiyatları'\n• 'Göz ameliyatı sonrası bakım'\n• 'Otel önerileri'"
+
+
+class ActionAskOllama(Action):
+    """Genel sorular için Ollama'ya sor - Rasa'nın anlayamadığı sorular buraya yönlendirilir"""
+    
+    def name(self) -> Text:
+        return "action_ask_ollama"
+
+    async def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+        user_message = tracker.latest_message.get('text', '')
+        logger.info(f"🤖 Ollama'ya genel soru (fallback): '{user_message}'")
+
+        prompt = build_ollama_prompt(tracker)
+        butce = tracker.get_slot("butce")
         
         data = {
             "model": "llama3",
@@ -191,10 +220,16 @@ class ActionAskOllama(Action):
             }
         }
 
-        dispatcher.utter_message(text="🤔 Düşünüyorum...")
-
         try:
-            response = requests.post(OLLAMA_API_URL, json=data, timeout=OLLAMA_TIMEOUT, proxies=PROXIES)
+            # Sender başına kota + adil sıra (bkz. fair_share.py); istek event loop'u bloklamadan thread'de çalışır
+            async with fair_scheduler.slot(tracker.sender_id):
+                dispatcher.utter_message(text="🤔 Düşünüyorum...")
+                with timed("ollama", "generate"):
+                    response = await asyncio.get_running_loop().run_in_executor(
+                        None,
+                        functools.partial(requests.post, OLLAMA_API_URL, json=data,
+                                          timeout=OLLAMA_TIMEOUT, proxies=PROXIES)
+                    )
             response.raise_for_status()
             
             generated_text = response.json().get('response', '').strip()
@@ -220,9 +255,14 @@ class ActionAskOllama(Action):
                 
                 return slots_to_set
             else:
-                dispatcher.utter_message(text="Üzgünüm, bu soruya şu anda cevap veremiyorum. Daha spesifik sorular sorabilirsiniz:\n\n💡 Örnek sorular:\n• 'Antalya'da diş implantı kliniği'\n• 'Rinoplasti fiyatları'\n• 'Göz ameliyatı sonrası bakım'\n• 'Otel önerileri'")
+                dispatcher.utter_message(text=OLLAMA_SUGGESTION_TEXT)
                 return []
 
+        except OverQuota as e:
+            # Kotayı aşan kullanıcı beklemeden örnek sorularla yönlendirilir
+            logger.warning(f"🚦 Ollama kotası aşıldı ({tracker.sender_id}: {e.reason})")
+            dispatcher.utter_message(text=OLLAMA_SUGGESTION_TEXT)
+            return []
         except requests.exceptions.ConnectionError:
             logger.error("❌ Ollama servisine bağlanılamadı")
             dispatcher.utter_message(text="❌ Yapay zeka servisi şu anda çalışmıyor.\n\n✅ Şunları deneyebilirsiniz:\n• 'Antalya'da klinik ara'\n• 'Tedavi paketleri'\n• 'Fiyat bilgisi'")
@@ -249,8 +289,8 @@ class ActionLogConversation(Action):
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
-        # MongoDB logger başlat
-        mongo_logger = MongoDBLogger()
+        # Process başına tek MongoDB bağlantısı (ilk kullanımda kurulur)
+        mongo_logger = shared_mongo_logger()
         
         try:
             # User bilgilerini al
@@ -277,7 +317,9 @@ class ActionLogConversation(Action):
                 logger.info(f"✅ MongoDB'ye kaydedildi: {user_id} - {intent_name}")
             
             # User profili güncelle (entity'lerden bilgi çıkar)
+            # Değişiklikler profile_buffer'da birleştirilir ve oturum başına ~1 kez yazılır
             user_updates = {}
+            add_to_set = {}
             for entity in entities:
                 entity_name = entity.get('entity')
                 entity_value = entity.get('value')
@@ -290,43 +332,36 @@ class ActionLogConversation(Action):
                 elif entity_name in ['isim', 'name']:
                     user_updates['name'] = entity_value
                 elif entity_name in ['hastalik', 'health_condition']:
-                    # Health conditions'ı array olarak tut
-                    existing_user = mongo_logger.get_user(user_id)
-                    health_conditions = existing_user.get('health_conditions', []) if existing_user else []
-                    if entity_value not in health_conditions:
-                        health_conditions.append(entity_value)
-                    user_updates['health_conditions'] = health_conditions
+                    # Health conditions array olarak tutulur ($addToSet)
+                    add_to_set.setdefault('health_conditions', []).append(entity_value)
             
             # Preferences güncelle (tedavi, şehir, bütçe vb.)
-            preferences = {}
+            # Noktalı anahtar: diğer preference alanları ezilmez
             for entity in entities:
                 entity_name = entity.get('entity')
                 entity_value = entity.get('value')
                 
                 if entity_name in ['tedavi_adi', 'treatment']:
-                    preferences['treatment'] = entity_value
+                    user_updates['preferences.treatment'] = entity_value
                 elif entity_name in ['sehir', 'city']:
-                    preferences['city'] = entity_value
+                    user_updates['preferences.city'] = entity_value
                 elif entity_name in ['butce', 'budget']:
-                    preferences['budget'] = entity_value
+                    user_updates['preferences.budget'] = entity_value
                 elif entity_name in ['bolge', 'region']:
-                    preferences['region'] = entity_value
+                    user_updates['preferences.region'] = entity_value
             
-            if preferences:
-                user_updates['preferences'] = preferences
+            # Eğer güncellenecek bilgi varsa tampona ekle
+            if user_updates or add_to_set:
+                profile_buffer.add(user_id, user_updates, add_to_set)
+                logger.info(f"📝 User profil değişikliği tamponlandı: {user_id}")
             
-            # Eğer güncellenecek bilgi varsa user'ı güncelle
-            if user_updates:
-                user_updates['user_id'] = user_id
-                mongo_logger.upsert_user(user_updates)
-                logger.info(f"✅ User profili güncellendi: {user_id}")
+            # Oturum sonu: bekleyen profil değişikliklerini hemen yaz
+            if intent_name == 'goodbye':
+                profile_buffer.flush(user_id, reason="session_end")
         
         except Exception as e:
             logger.error(f"❌ MongoDB logging hatası: {e}")
         
-        finally:
-            mongo_logger.close()
-        
         return []
 
 
@@ -342,7 +377,7 @@ class ActionLogBotResponse(Action):
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
-        mongo_logger = MongoDBLogger()
+        mongo_logger = shared_mongo_logger()
         
         try:
             user_id = tracker.sender_id
@@ -374,9 +409,6 @@ class ActionLogBotResponse(Action):
         except Exception as e:
             logger.error(f"❌ Bot response logging hatası: {e}")
         
-        finally:
-            mongo_logger.close()
-        
         return []
 
 
@@ -393,7 +425,7 @@ class ActionSaveUserProfile(Action):
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
-        mongo_logger = MongoDBLogger()
+        mongo_logger = shared_mongo_logger()
         
         try:
             user_id = tracker.sender_id
@@ -419,6 +451,9 @@ class ActionSaveUserProfile(Action):
             if hastalik:
                 user_data["health_conditions"] = [hastalik] if isinstance(hastalik, str) else hastalik
             
+            # Tamponda bekleyen eski değişiklikler bu kaydı sonradan ezmesin
+            profile_buffer.flush(user_id)
+            
             # MongoDB'ye kaydet
             mongo_logger.upsert_user(user_data)
             
@@ -429,12 +464,40 @@ class ActionSaveUserProfile(Action):
             logger.error(f"❌ User profile kaydetme hatası: {e}")
             dispatcher.utter_message(text="⚠️ Bilgileriniz kaydedilirken bir sorun oluştu.")
         
-        finally:
-            mongo_logger.close()
-        
         return []
 
 
+def read_user_profile(user_id: Text) -> Dict[Text, Any]:
+    """
+    Kullanıcı profili - action'lar profili her zaman buradan okur
+
+    profile_buffer'da bekleyen (henüz yazılmamış) değerler de dahildir;
+    MongoDB'ye ulaşılamazsa boş dict döner.
+    """
+    try:
+        return profile_buffer.get_user(user_id) or {}
+    except Exception as e:
+        logger.warning(f"⚠️ Profil okunamadı ({user_id}): {e}")
+        return {}
+
+
+def match_clinic(clinics: List[Dict[Text, Any]], name: Text) -> Optional[Dict[Text, Any]]:
+    """Ada göre klinik: önce tam eşleşme, yoksa adı içeren ilk klinik"""
+    name_lower = name.lower()
+    exact = next((c for c in clinics if c["name"].lower() == name_lower), None)
+    return exact or next((c for c in clinics if name_lower in c["name"].lower()), None)
+
+
+def find_clinic(name: Text) -> Optional[Dict[Text, Any]]:
+    """klinik_adi slot'undaki klinik (action server kataloğu); bulunamazsa None"""
+    try:
+        response = clinic_client.search_clinics(treatment_type=None, city=None, treatment_name=None)
+        return match_clinic(response.get("results", []), name)
+    except Exception as e:
+        logger.warning(f"⚠️ Klinik çözümlenemedi ({name}): {e}")
+        return None
+
+
 class ActionScheduleAppointment(Action):
     """
     Randevu oluştur ve MongoDB'ye booking olarak kaydet
@@ -447,24 +510,41 @@ class ActionScheduleAppointment(Action):
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
-        mongo_logger = MongoDBLogger()
+        mongo_logger = shared_mongo_logger()
         
         try:
             user_id = tracker.sender_id
+            # Boş slot'lar için profildeki tercihler (bu oturumda söylenip henüz yazılmamış olanlar dahil)
+            preferences = read_user_profile(user_id).get("preferences") or {}
+            # Klinik panosu sorguları API'nin clinic_id'siyle çalışır; seçilen klinik action
+            # server kataloğunda bulunur, key'i üzerinden API id'sine çevrilir
+            klinik_adi = tracker.get_slot("klinik_adi")
+            clinic = find_clinic(klinik_adi) if klinik_adi else None
+            clinic_key = clinic.get("key") if clinic else None
+            clinic_id = canonical_clinic_id(clinic_key)
+            if clinic and clinic_id is None:
+                logger.warning(f"⚠️ {clinic['name']} API kataloğunda yok, booking clinic_id'siz kaydediliyor")
             
             # Booking bilgilerini slot'lardan topla
             booking_data = {
                 "user_id": user_id,
-                "clinic_name": tracker.get_slot("klinik_adi") or "Belirtilmedi",
-                "treatment": tracker.get_slot("tedavi_adi") or "Belirtilmedi",
+                "clinic_id": clinic_id,
+                "clinic_key": clinic_key,
+                "clinic_name": clinic["name"] if clinic else (klinik_adi or "Belirtilmedi"),
+                "treatment": tracker.get_slot("tedavi_adi") or preferences.get("treatment") or "Belirtilmedi",
                 "hotel_name": tracker.get_slot("otel_kategori") or "Belirtilecek",
                 "appointment_date": tracker.get_slot("tarih") or "Planlanacak",
                 "status": "pending",
-                "notes": f"Bütçe: {tracker.get_slot('butce')}"
+                "notes": f"Bütçe: {tracker.get_slot('butce') or preferences.get('budget')}"
             }
             
+            # Aynı kullanıcı mesajı için action tekrar çalışırsa (Rasa / istemci retry'ı)
+            # ikinci booking açılmaz
+            message_id = tracker.latest_message.get("message_id")
+            idempotency_key = f"{user_id}:{message_id}:appointment" if message_id else None
+            
             # MongoDB'ye kaydet
-            booking_id = mongo_logger.create_booking(booking_data)
+            booking_id = mongo_logger.create_booking(booking_data, idempotency_key=idempotency_key)
             
             message = f"✅ Randevunuz oluşturuldu!\n\n"
             message += f"📋 Booking ID: {booking_id}\n"
@@ -481,9 +561,6 @@ class ActionScheduleAppointment(Action):
             logger.error(f"❌ Appointment scheduling hatası: {e}")
             dispatcher.utter_message(text="⚠️ Randevu oluşturulurken bir sorun oluştu.")
         
-        finally:
-            mongo_logger.close()
-        
         return []
 
 
@@ -493,51 +570,9 @@ class ActionScheduleAppointment(Action):
 
 
 
-# ============ FİYAT HESAPLAMA FONKSİYONU ============
-def calculate_treatment_price(treatment_name, clinic_rating):
-    """Tedavi fiyatını hesapla"""
-    base_prices = {
-        "dental implant": 1500,
-        "rhinoplasty": 3500,
-        "cataract": 2000,
-        "sleeve gastrectomy": 4500,
-        "knee replacement": 8000,
-        "laser varicose vein": 1800,
-        "teeth whitening": 300,
-        "botox": 400,
-        "face lift": 5000,
-        "breast surgery": 4000
-    }
-    
-    base_price = base_prices.get(treatment_name.lower(), 2000)
-    # Klinik rating'e göre fiyat artışı
-    rating_multiplier = 1 + (clinic_rating - 4.5) * 0.2
-    
-    return int(base_price * rating_multiplier)
-
-def calculate_hotel_price(hotel_info, nights=7):
-    """Otel fiyatını hesapla"""
-    base_prices = {
-        "standard": 100,
-        "premium": 200,
-        "luxury": 400
-    }
-    
-    price_per_night = base_prices.get(hotel_info.get("price_range", "standard"), 150)
-    return price_per_night * nights
-
-def calculate_flight_price(flight_class, flight_type):
-    """Uçuş fiyatını hesapla"""
-    base_prices = {
-        "economy": 300,
-        "business": 1200
-    }
-    
-    price = base_prices.get(flight_class, 300)
-    if flight_type == "direct":
-        price *= 1.3
-    
-    return int(price)
+# ============ FİYAT HESAPLAMA ============
+# calculate_treatment_price / calculate_hotel_price / calculate_flight_price
+# api_service.pricing içindeki ortak fiyat motorundan gelir
 
 
 # ============ CUSTOM ACTIONS ============
@@ -675,6 +710,79 @@ class ActionSearchHotelsByRegion(Action):
         return []
 
 
+def assemble_bundles(user_profile: Dict[Text, Any],
+                     clinics: List[Dict[Text, Any]],
+                     hotels: List[Dict[Text, Any]],
+                     flights: List[Dict[Text, Any]]) -> List[Dict[Text, Any]]:
+    """Klinik / otel / uçuş sonuçlarından fiyatlı paketleri oluştur (en fazla 3)"""
+    pairs = []
+    for i in range(min(3, len(clinics))):
+        clinic = clinics[i] if i < len(clinics) else clinics[0]
+        hotel = hotels[i] if i < len(hotels) else hotels[0]
+        flight = flights[i] if i < len(flights) else flights[0]
+        pairs.append((clinic, hotel, flight))
+    
+    # Fiyat hesapla - tüm paketler tek çağrıda
+    costs = pricing_engine.quote_batch([
+        build_quote(
+            user_profile.get("tedavi_adi") or "dental treatment",
+            clinic,
+            hotel,
+            nights=7,
+            flight_class=user_profile["ucus_sinifi"],
+            flight_type=user_profile["ucus_tipi"],
+            flight=flight
+        )
+        for clinic, hotel, flight in pairs
+    ])
+    
+    bundles = []
+    for i, ((clinic, hotel, flight), bundle_costs) in enumerate(zip(pairs, costs)):
+        bundles.append({
+            "name": f"Paket {i+1} - {['Ekonomik', 'Standart', 'Premium'][i]}",
+            "clinic": clinic["name"],
+            "clinic_rating": clinic["rating"],
+            "hotel": hotel["name"],
+            "hotel_stars": hotel["stars"],
+            "hotel_distance_km": hotel.get("distance_km"),
+            "flight": flight.get("airline", "Turkish Airlines"),
+            "treatment_price": bundle_costs["treatment"],
+            "hotel_price": bundle_costs["hotel"],
+            "flight_price": bundle_costs["flight"],
+            "transfer_price": bundle_costs["transfer"],
+            "total_price": bundle_costs["total"],
+            "currency": "EUR"
+        })
+    
+    return bundles
+
+
+def pair_hotels(clinics: List[Dict[Text, Any]], region: Any, stars: int = 5):
+    """
+    Paket oluşturma için (klinikler, oteller) - aynı sıradaki klinik ve otel eşleşir
+
+    Kullanıcı bölge seçtiyse oteller o bölgeden gelir. Seçmediyse her kliniğe
+    BUNDLE_HOTEL_RADIUS_KM içindeki en yakın otel atanır; yakınında otel
+    olmayan klinik pakete girmez. Hiçbir klinik eşleşmezse (koordinatsız
+    katalog) tüm bölgelerden oteller kullanılır.
+    """
+    if not region:
+        paired_clinics, hotels = [], []
+        for clinic in clinics:
+            point = coordinates(clinic)
+            if point is None:
+                continue
+            nearby = hotel_client.nearest_hotels(*point, limit=1, stars=stars).get("results", [])
+            if nearby:
+                paired_clinics.append(clinic)
+                hotels.append(nearby[0])
+        if paired_clinics:
+            return paired_clinics, hotels
+    
+    hotel_response = hotel_client.search_hotels(region=region or None, stars=stars)
+    return clinics, hotel_response.get("results", [])[:3]
+
+
 class ActionGenerateBundleRecommendation(Action):
     """Yapay zeka destekli paket önerisi oluştur - API Client kullanıyor"""
     
@@ -709,12 +817,8 @@ class ActionGenerateBundleRecommendation(Action):
             )
             clinics = clinic_response.get("results", [])[:3]
             
-            # 2. Otel ara
-            hotel_response = hotel_client.search_hotels(
-                region=user_profile["bolge"] or "Lara",
-                stars=5
-            )
-            hotels = hotel_response.get("results", [])[:3]
+            # 2. Otel ara - bölge seçilmediyse her kliniğin yakınındaki otel
+            clinics, hotels = pair_hotels(clinics, user_profile["bolge"], stars=5)
             
             # 3. Uçuş ara
             flight_response = flight_client.search_flights(
@@ -723,37 +827,7 @@ class ActionGenerateBundleRecommendation(Action):
             flights = flight_response.get("results", [])[:3]
             
             # Paketleri oluştur
-            bundles = []
-            for i in range(min(3, len(clinics))):
-                clinic = clinics[i] if i < len(clinics) else clinics[0]
-                hotel = hotels[i] if i < len(hotels) else hotels[0]
-                flight = flights[i] if i < len(flights) else flights[0]
-                
-                # Fiyat hesapla
-                treatment_price = calculate_treatment_price(
-                    user_profile.get("tedavi_adi", "dental treatment"),
-                    clinic.get("rating", 4.5)
-                )
-                hotel_price = calculate_hotel_price(hotel, nights=7)
-                flight_price = flight.get("price", 300)
-                transfer_price = 150
-                
-                total_price = treatment_price + hotel_price + (flight_price * 2) + transfer_price
-                
-                bundles.append({
-                    "name": f"Paket {i+1} - {['Ekonomik', 'Standart', 'Premium'][i]}",
-                    "clinic": clinic["name"],
-                    "clinic_rating": clinic["rating"],
-                    "hotel": hotel["name"],
-                    "hotel_stars": hotel["stars"],
-                    "flight": flight.get("airline", "Turkish Airlines"),
-                    "treatment_price": treatment_price,
-                    "hotel_price": hotel_price,
-                    "flight_price": flight_price * 2,
-                    "transfer_price": transfer_price,
-                    "total_price": total_price,
-                    "currency": "EUR"
-                })
+            bundles = assemble_bundles(user_profile, clinics, hotels, flights)
             
             # Paketleri göster
             message = "🎁 **Sizin İçin Özel Hazırlanan Paketler:**\n\n"
@@ -762,6 +836,8 @@ class ActionGenerateBundleRecommendation(Action):
                 message += f"**{bundle['name']}** - {bundle['total_price']} {bundle['currency']}\n"
                 message += f"🏥 Klinik: {bundle['clinic']} (⭐{bundle['clinic_rating']})\n"
                 message += f"🏨 Otel: {bundle['hotel']} ({'⭐' * bundle['hotel_stars']})\n"
+                if bundle["hotel_distance_km"] is not None:
+                    message += f"📍 Kliniğe uzaklık: {bundle['hotel_distance_km']} km\n"
                 message += f"✈️ Uçuş: {bundle['flight']}\n"
                 message += f"💰 Detaylar:\n"
                 message += f"   • Tedavi: {bundle['treatment_price']} EUR\n"
@@ -800,13 +876,19 @@ class ActionCalculatePackagePrice(Action):
         
         tedavi_adi = tracker.get_slot("tedavi_adi") or "dental treatment"
         
-        # Basit fiyat hesaplama
-        base_price = calculate_treatment_price(tedavi_adi, 4.7)
-        hotel_price = 700  # 7 gece ortalama
-        flight_price = 600  # Gidiş-dönüş
-        transfer_price = 150
-        
-        total = base_price + hotel_price + flight_price + transfer_price
+        # Ortak fiyat motoru - ortalama klinik (4.7) ve standart otel, 7 gece
+        costs = pricing_engine.quote(build_quote(
+            tedavi_adi,
+            clinic={"rating": 4.7},
+            hotel={"price_range": "standard"},
+            nights=7,
+            flight_class=tracker.get_slot("ucus_sinifi") or "economy"
+        ))
+        base_price = costs["treatment"]
+        hotel_price = costs["hotel"]
+        flight_price = costs["flight"]  # Gidiş-dönüş
+        transfer_price = costs["transfer"]
+        total = costs["total"]
         
         message = f"💰 **Fiyat Detayları:**\n\n"
         message += f"• Tedavi: {base_price} EUR\n"
@@ -851,16 +933,8 @@ class ActionProvideClinicDetails(Action):
             
             all_clinics = response.get("results", [])
             
-            # Klinik adına göre filtrele
-            clinic_found = None
-            for clinic in all_clinics:
-                if clinic["name"].lower() == klinik_adi.lower():
-                    clinic_found = clinic
-                    break
-                # Kısmi eşleşme de kontrol et
-                elif klinik_adi.lower() in clinic["name"].lower():
-                    clinic_found = clinic
-                    break
+            # Klinik adına göre filtrele (randevu da aynı eşleştirmeyle kaydedilir)
+            clinic_found = match_clinic(all_clinics, klinik_adi)
             
             if clinic_found:
                 message = f"🏥 **{clinic_found['name']}**\n\n"
@@ -939,34 +1013,6 @@ class ActionSaveUserProfile(Action):
         return []
 
 
-class ActionScheduleAppointment(Action):
-    """Randevu planla"""
-    
-    def name(self) -> Text:
-        return "action_schedule_appointment"
-    
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
-        
-        klinik_adi = tracker.get_slot("klinik_adi")
-        tarih = tracker.get_slot("tarih")
-        tedavi_adi = tracker.get_slot("tedavi_adi")
-        
-        # Randevu API çağrısı simülasyonu
-        
-        message = f"✅ Randevunuz oluşturuldu!\n\n"
-        message += f"🏥 Klinik: {klinik_adi or 'Seçilecek'}\n"
-        message += f"💉 Tedavi: {tedavi_adi or 'Belirtilecek'}\n"
-        message += f"📅 Tarih: {tarih or 'Planlanacak'}\n\n"
-        message += f"📧 Detaylı bilgilendirme e-posta adresinize gönderilecektir.\n"
-        message += f"📱 Koordinatörümüz 24 saat içinde sizinle iletişime geçecektir."
-        
-        dispatcher.utter_message(text=message)
-        
-        return []
-
-
 class ValidateUserBudget(Action):
     """Kullanıcı bütçesini doğrula"""
     
@@ -1087,3 +1133,9 @@ class ActionDefaultFallback(Action):
         dispatcher.utter_message(text=message)
         
         return []
+
+
+# ============ METRICS ============
+# Tüm action'ların run() süreleri ölçülür, /metrics ayrı portta sunulur
+instrument_actions(__name__)
+start_action_metrics_server()
@@ -9,6 +9,10 @@ import logging
 from typing import Dict, List, Optional, Any
 from dotenv import load_dotenv
 
+from api_service.catalog_mmap import shared_catalog
+from api_service.geo_index import BUNDLE_HOTEL_RADIUS_KM, GeoIndex, GeoIndexCache, coordinates, haversine_km
+from api_service.metrics import timed
+
 load_dotenv()
 logger = logging.getLogger(__name__)
 
@@ -41,6 +45,7 @@ MOCK_CLINICS = {
             {
                 "id": 1,
                 "name": "Antmodern Oral & Dental Health Clinic",
+                "key": "antmodern-dental",
                 "address": "Fener Mah. Bülent Ecevit Blv. No:50 Muratpaşa/Antalya",
                 "city": "Antalya",
                 "district": "Muratpaşa",
@@ -49,11 +54,14 @@ MOCK_CLINICS = {
                 "rating": 4.8,
                 "accreditations": ["JCI", "ISO 9001"],
                 "languages": ["Turkish", "English", "Russian", "Arabic"],
-                "price_range": "medium"
+                "price_range": "medium",
+                "lat": 36.8548,
+                "lon": 30.7609
             },
             {
                 "id": 2,
                 "name": "Dt. Murat Özbıyık Clinic",
+                "key": "murat-ozbiyik-dental",
                 "address": "Yeşilbahçe Mah. Metin Kasapoğlu Cad. 3/1 Muratpaşa/Antalya",
                 "district": "Muratpaşa",
                 "treatments": ["Root Canal Treatment", "Dental Implants", "Smile Restoration", 
@@ -61,11 +69,14 @@ MOCK_CLINICS = {
                 "rating": 4.7,
                 "accreditations": ["ISO 9001"],
                 "languages": ["Turkish", "English", "German"],
-                "price_range": "medium"
+                "price_range": "medium",
+                "lat": 36.8893,
+                "lon": 30.7117
             },
             {
                 "id": 3,
                 "name": "Markasya Oral & Dental Health Clinic",
+                "key": "markasya-dental",
                 "address": "Toros Mah. 805 Sok. Kurgu Plaza No: 14/1 Konyaaltı/Antalya",
                 "district": "Konyaaltı",
                 "treatments": ["Cosmetic Dentistry", "Periodontics", "Gum Disease Treatment", 
@@ -73,7 +84,9 @@ MOCK_CLINICS = {
                 "rating": 4.6,
                 "accreditations": ["ISO 9001"],
                 "languages": ["Turkish", "English"],
-                "price_range": "medium"
+                "price_range": "medium",
+                "lat": 36.8791,
+                "lon": 30.6562
             }
         ]
     },
@@ -82,6 +95,7 @@ MOCK_CLINICS = {
             {
                 "id": 4,
                 "name": "Dr. Gökhan Özerdem Clinic",
+                "key": "gokhan-ozerdem",
                 "address": "Yeşilbahçe Mah. Metin Kasapoğlu Cad. Ayhan Kadam İş Merkezi A blok No: 48/11 Muratpaşa/Antalya",
                 "city": "Antalya",
                 "district": "Muratpaşa",
@@ -90,11 +104,14 @@ MOCK_CLINICS = {
                 "rating": 4.9,
                 "accreditations": ["JCI", "ISO 9001", "ISAPS"],
                 "languages": ["Turkish", "English", "Arabic", "Russian"],
-                "price_range": "premium"
+                "price_range": "premium",
+                "lat": 36.8889,
+                "lon": 30.7123
             },
             {
                 "id": 5,
                 "name": "Dr. Hasan Hüseyin Balıkçı Clinic",
+                "key": "hasan-huseyin-balikci",
                 "address": "Arapsuyu Mah. Atatürk Bulvarı M. Gökay Plaza No:23/41 Konyaaltı/Antalya",
                 "district": "Konyaaltı",
                 "treatments": ["Septoplasty", "Chin Filler", "Eye Contour Aesthetics", 
@@ -102,7 +119,9 @@ MOCK_CLINICS = {
                 "rating": 4.8,
                 "accreditations": ["ISO 9001", "TSAPS"],
                 "languages": ["Turkish", "English", "German"],
-                "price_range": "premium"
+                "price_range": "premium",
+                "lat": 36.8762,
+                "lon": 30.6478
             }
         ]
     },
@@ -111,6 +130,7 @@ MOCK_CLINICS = {
             {
                 "id": 6,
                 "name": "Akdeniz Hospital",
+                "key": "akdeniz-hospital",
                 "address": "Sorgun Mah. 8151 Sk.No:10 Manavgat/Antalya",
                 "city": "Antalya",
                 "district": "Manavgat",
@@ -119,11 +139,14 @@ MOCK_CLINICS = {
                 "rating": 4.7,
                 "accreditations": ["JCI", "ISO 9001"],
                 "languages": ["Turkish", "English", "Russian"],
-                "price_range": "medium"
+                "price_range": "medium",
+                "lat": 36.7622,
+                "lon": 31.4103
             },
             {
                 "id": 7,
                 "name": "Akdeniz Şifa Konyaaltı Medical Center",
+                "key": "akdeniz-sifa-konyaalti",
                 "address": "Kuşkavağı Mah. Atatürk Bulvarı No:81 Konyaaltı/Antalya",
                 "district": "Konyaaltı",
                 "treatments": ["Cataract", "Lazy Eye", "Oculoplastic Surgery", 
@@ -131,7 +154,9 @@ MOCK_CLINICS = {
                 "rating": 4.6,
                 "accreditations": ["ISO 9001"],
                 "languages": ["Turkish", "English"],
-                "price_range": "medium"
+                "price_range": "medium",
+                "lat": 36.8694,
+                "lon": 30.6371
             }
         ]
     }
@@ -147,7 +172,9 @@ MOCK_HOTELS = {
             "stars": 5,
             "features": ["Spa", "Pool", "All Inclusive", "Golf"],
             "price_range": "premium",
-            "price_per_night": 350
+            "price_per_night": 350,
+            "lat": 36.8517,
+            "lon": 31.0321
         },
         {
             "id": 2,
@@ -157,7 +184,9 @@ MOCK_HOTELS = {
             "stars": 5,
             "features": ["Spa", "Pool", "All Inclusive", "Beach"],
             "price_range": "premium",
-            "price_per_night": 320
+            "price_per_night": 320,
+            "lat": 36.8449,
+            "lon": 31.0701
         },
         {
             "id": 3,
@@ -167,7 +196,9 @@ MOCK_HOTELS = {
             "stars": 5,
             "features": ["Spa", "Pool", "All Inclusive", "Golf"],
             "price_range": "luxury",
-            "price_per_night": 450
+            "price_per_night": 450,
+            "lat": 36.8362,
+            "lon": 31.0944
         }
     ],
     "Lara": [
@@ -179,7 +210,9 @@ MOCK_HOTELS = {
             "stars": 5,
             "features": ["Spa", "Pool", "All Inclusive", "Beach"],
             "price_range": "premium",
-            "price_per_night": 200
+            "price_per_night": 200,
+            "lat": 36.8503,
+            "lon": 30.8452
         },
         {
             "id": 5,
@@ -189,7 +222,9 @@ MOCK_HOTELS = {
             "stars": 5,
             "features": ["Spa", "Pool", "All Inclusive", "Aquapark"],
             "price_range": "premium",
-            "price_per_night": 180
+            "price_per_night": 180,
+            "lat": 36.8562,
+            "lon": 30.8671
         }
     ],
     "Side": [
@@ -201,7 +236,9 @@ MOCK_HOTELS = {
             "stars": 5,
             "features": ["Spa", "Pool", "All Inclusive"],
             "price_range": "standard",
-            "price_per_night": 150
+            "price_per_night": 150,
+            "lat": 36.7828,
+            "lon": 31.3797
         },
         {
             "id": 7,
@@ -211,7 +248,9 @@ MOCK_HOTELS = {
             "stars": 5,
             "features": ["Spa", "Pool", "All Inclusive", "Aquapark"],
             "price_range": "premium",
-            "price_per_night": 200
+            "price_per_night": 200,
+            "lat": 36.7262,
+            "lon": 31.512
         }
     ],
     "Alanya": [
@@ -223,7 +262,9 @@ MOCK_HOTELS = {
             "stars": 5,
             "features": ["Spa", "Pool", "All Inclusive"],
             "price_range": "standard",
-            "price_per_night": 120
+            "price_per_night": 120,
+            "lat": 36.5921,
+            "lon": 31.8004
         },
         {
             "id": 9,
@@ -233,7 +274,9 @@ MOCK_HOTELS = {
             "stars": 5,
             "features": ["Spa", "Pool", "All Inclusive", "Beach"],
             "price_range": "premium",
-            "price_per_night": 180
+            "price_per_night": 180,
+            "lat": 36.6603,
+            "lon": 31.6932
         }
     ],
     "Kemer": [
@@ -245,7 +288,9 @@ MOCK_HOTELS = {
             "stars": 5,
             "features": ["Spa", "Pool", "All Inclusive", "Beach"],
             "price_range": "premium",
-            "price_per_night": 250
+            "price_per_night": 250,
+            "lat": 36.7012,
+            "lon": 30.5702
         },
         {
             "id": 11,
@@ -255,7 +300,9 @@ MOCK_HOTELS = {
             "stars": 5,
             "features": ["Spa", "Pool", "All Inclusive"],
             "price_range": "premium",
-            "price_per_night": 220
+            "price_per_night": 220,
+            "lat": 36.6021,
+            "lon": 30.5603
         }
     ],
     "Konyaaltı": [
@@ -267,7 +314,9 @@ MOCK_HOTELS = {
             "stars": 5,
             "features": ["Spa", "Pool", "Beach", "City Center"],
             "price_range": "premium",
-            "price_per_night": 220
+            "price_per_night": 220,
+            "lat": 36.8801,
+            "lon": 30.6731
         },
         {
             "id": 13,
@@ -277,7 +326,9 @@ MOCK_HOTELS = {
             "stars": 4,
             "features": ["Pool", "Beach", "City Center"],
             "price_range": "standard",
-            "price_per_night": 150
+            "price_per_night": 150,
+            "lat": 36.8692,
+            "lon": 30.642
         }
     ]
 }
@@ -292,6 +343,39 @@ MOCK_FLIGHTS = [
     }
 ]
 
+# Treatment name filtresi - Türkçe-İngilizce mapping
+TREATMENT_SEARCH_TERMS = {
+    "diş implantı": ["implant", "dental implant"],
+    "implant": ["implant", "dental implant"],
+    "rinoplasti": ["rhinoplasty"],
+    "burun estetiği": ["rhinoplasty"],
+    "saç ekimi": ["hair transplant"],
+    "göz ameliyatı": ["cataract", "laser eye"],
+    "katarakt": ["cataract"],
+    "botox": ["botox"],
+    "dolgu": ["filler"]
+}
+
+
+def treatment_search_terms(treatment_name: str) -> List[str]:
+    treatment_name_lower = treatment_name.lower()
+    return TREATMENT_SEARCH_TERMS.get(treatment_name_lower, [treatment_name_lower])
+
+
+def matches_treatment(treatments: List[str], search_terms: List[str]) -> bool:
+    return any(any(term in t.lower() for term in search_terms) for t in treatments)
+
+
+def _mmap_catalog(name: str):
+    """
+    CATALOG_PATH ile derlenmiş katalog (compile_catalog.py) verilmişse mock
+    aramalar dict'ler yerine mmap'lenmiş dosyadan yapılır; worker'lar sayfaları paylaşır
+    """
+    catalog_file = shared_catalog()
+    if catalog_file is None or name not in catalog_file:
+        return None
+    return catalog_file[name]
+
 
 # ============================================
 # BASE API CLIENT
@@ -301,16 +385,24 @@ class BaseAPIClient:
     def __init__(self, base_url: str, api_key: str):
         self.base_url = base_url
         self.api_key = api_key
-        self.use_mock = USE_MOCK_API
+        # Anahtar yoksa gerçek API'ye gidilemez, mock'a düş
+        self.use_mock = USE_MOCK_API or not self.api_key
+        self._client: Optional[httpx.Client] = None
         
-        if not self.use_mock and self.api_key:
-            self.client = httpx.Client(
-                timeout=API_TIMEOUT,
-                headers={"Authorization": f"Bearer {self.api_key}"}
-            )
+        if not self.use_mock:
             logger.info(f"✅ Real API: {base_url}")
         else:
             logger.info("🎭 Mock API mode")
+    
+    @property
+    def client(self) -> httpx.Client:
+        """İlk gerçek API çağrısında oluşur (import'ta SSL context / bağlantı havuzu kurulmaz)"""
+        if self._client is None:
+            self._client = httpx.Client(
+                timeout=API_TIMEOUT,
+                headers={"Authorization": f"Bearer {self.api_key}"}
+            )
+        return self._client
 
 
 # ============================================
@@ -320,7 +412,9 @@ class BaseAPIClient:
 class ClinicAPIClient(BaseAPIClient):
     def __init__(self):
         super().__init__(CLINIC_API_URL, CLINIC_API_KEY)
+        self.catalog = _mmap_catalog("clinics")
     
+    @timed("api_clients")
     def search_clinics(self, treatment_type: str = None,city: str = None,treatment_name: str = None):
     
         if self.use_mock:
@@ -333,6 +427,9 @@ class ClinicAPIClient(BaseAPIClient):
         
         logger.info(f"🔍 Mock Search - treatment_type: {treatment_type}, city: {city}, treatment_name: {treatment_name}")
         
+        if self.catalog is not None:
+            return self._catalog_search(treatment_type, city, treatment_name)
+        
         # Şehir adını normalize et (case-insensitive)
         city_normalized = city.title() if city else None
         
@@ -358,32 +455,9 @@ class ClinicAPIClient(BaseAPIClient):
                     clinics.extend(city_clinics)
             logger.info(f"✅ Tüm kategorilerde {len(clinics)} klinik bulundu")
         
-        # Treatment name filtresi - Türkçe-İngilizce mapping
-        treatment_mapping = {
-            "diş implantı": ["implant", "dental implant"],
-            "implant": ["implant", "dental implant"],
-            "rinoplasti": ["rhinoplasty"],
-            "burun estetiği": ["rhinoplasty"],
-            "saç ekimi": ["hair transplant"],
-            "göz ameliyatı": ["cataract", "laser eye"],
-            "katarakt": ["cataract"],
-            "botox": ["botox"],
-            "dolgu": ["filler"]
-        }
-        
         if treatment_name:
-            treatment_name_lower = treatment_name.lower()
-            
-            # Türkçe-İngilizce mapping'den eşleşme bul
-            search_terms = treatment_mapping.get(treatment_name_lower, [treatment_name_lower])
-            
-            results = [
-                c for c in clinics 
-                if any(
-                    any(term in t.lower() for term in search_terms)
-                    for t in c["treatments"]
-                )
-            ]
+            search_terms = treatment_search_terms(treatment_name)
+            results = [c for c in clinics if matches_treatment(c["treatments"], search_terms)]
             logger.info(f"✅ Treatment name filtresinden sonra {len(results)} klinik kaldı (search terms: {search_terms})")
         else:
             results = clinics
@@ -391,19 +465,39 @@ class ClinicAPIClient(BaseAPIClient):
         logger.info(f"🎭 Mock: TOPLAM {len(results)} klinik bulundu")
         return {"total": len(results), "results": results}
     
-    def _real_search(self, treatment, city):
+    def _catalog_search(self, treatment_type, city, treatment_name):
+        """Mock arama ile aynı kurallar, mmap'lenmiş katalogun index'leri üzerinden"""
+        catalog = self.catalog
+        recnos = catalog.lookup("category", treatment_type) if treatment_type else ()
+        if recnos:
+            # Şehir bulunamazsa kategorideki tüm klinikler
+            in_city = catalog.lookup("category+city", (treatment_type, city)) if city else ()
+            recnos = in_city or recnos
+        else:
+            recnos = catalog.all()
+        
+        if treatment_name:
+            search_terms = treatment_search_terms(treatment_name)
+            recnos = [recno for recno in recnos
+                      if matches_treatment(catalog.field(recno, "treatments") or (), search_terms)]
+        
+        results = [catalog.decode(recno) for recno in recnos]
+        logger.info(f"🗂️ Katalog: TOPLAM {len(results)} klinik bulundu")
+        return {"total": len(results), "results": results}
+    
+    def _real_search(self, treatment_type, city, treatment_name):
         """Gerçek API çağrısı"""
         try:
             response = self.client.post(
                 f"{self.base_url}/clinics/search",
-                json={"treatment": treatment, "city": city}
+                json={"treatment_type": treatment_type, "treatment": treatment_name, "city": city}
             )
             response.raise_for_status()
             return response.json()
         except Exception as e:
             logger.error(f"❌ API Error: {e}")
             # Fallback to mock
-            return self._mock_search(treatment, city)
+            return self._mock_search(treatment_type, city, treatment_name)
 
 
 # ============================================
@@ -413,16 +507,31 @@ class ClinicAPIClient(BaseAPIClient):
 class HotelAPIClient(BaseAPIClient):
     def __init__(self):
         super().__init__(HOTEL_API_URL, HOTEL_API_KEY)
+        self.catalog = _mmap_catalog("hotels")
+        self._geo = GeoIndexCache()
     
+    @timed("api_clients")
     def search_hotels(self, region: str = None, stars: int = 4):
         if self.use_mock:
             return self._mock_search(region, stars)
         else:
             return self._real_search(region, stars)
     
+    @timed("api_clients")
+    def nearest_hotels(self, lat: float, lon: float, limit: int = 3,
+                       radius_km: float = BUNDLE_HOTEL_RADIUS_KM, stars: int = 4):
+        """Noktaya (klinik) radius_km içindeki en yakın oteller; her sonuçta distance_km"""
+        if self.use_mock:
+            return self._mock_nearest(lat, lon, limit, radius_km, stars)
+        else:
+            return self._real_nearest(lat, lon, limit, radius_km, stars)
+    
     def _mock_search(self, region, stars):
         results = []
         
+        if self.catalog is not None:
+            return self._catalog_search(region, stars)
+        
         if region and region in MOCK_HOTELS:
             hotels = MOCK_HOTELS[region]
         else:
@@ -435,6 +544,40 @@ class HotelAPIClient(BaseAPIClient):
         logger.info(f"🎭 Mock: {len(results)} otel bulundu")
         return {"total": len(results), "results": results}
     
+    def _catalog_search(self, region, stars):
+        catalog = self.catalog
+        recnos = (catalog.lookup("region", region) if region else ()) or catalog.all()
+        results = [catalog.decode(recno) for recno in recnos
+                   if (catalog.field(recno, "stars") or 0) >= stars]
+        
+        logger.info(f"🗂️ Katalog: {len(results)} otel bulundu")
+        return {"total": len(results), "results": results}
+    
+    def _geo_index(self) -> GeoIndex:
+        """Koordinat index'i; MOCK_HOTELS değiştirilirse (benchmark'lar) yeniden kurulur"""
+        if self.catalog is not None:
+            return self._geo.get(self.catalog.version, lambda: GeoIndex.from_catalog(self.catalog))
+        hotels = MOCK_HOTELS
+        return self._geo.get(hotels, lambda: GeoIndex.from_records(
+            hotel for region_hotels in hotels.values() for hotel in region_hotels
+        ))
+    
+    def _mock_nearest(self, lat, lon, limit, radius_km, stars):
+        catalog = self.catalog
+        if catalog is not None:
+            accept = lambda recno: (catalog.field(recno, "stars") or 0) >= stars
+        else:
+            accept = lambda hotel: hotel["stars"] >= stars
+        nearby = self._geo_index().nearest(lat, lon, k=limit, radius_km=radius_km, accept=accept)
+        
+        results = []
+        for distance, item in nearby:
+            hotel = catalog.decode(item) if catalog is not None else dict(item)
+            hotel["distance_km"] = round(distance, 1)
+            results.append(hotel)
+        logger.info(f"📍 {len(results)} otel {radius_km:g} km içinde")
+        return {"total": len(results), "results": results}
+    
     def _real_search(self, region, stars):
         try:
             response = self.client.post(
@@ -446,6 +589,28 @@ class HotelAPIClient(BaseAPIClient):
         except Exception as e:
             logger.error(f"❌ API Error: {e}")
             return self._mock_search(region, stars)
+    
+    def _real_nearest(self, lat, lon, limit, radius_km, stars):
+        """Konum parametreleri gönderilir; partner API desteklemese de sonuçlar burada süzülüp sıralanır"""
+        try:
+            response = self.client.post(
+                f"{self.base_url}/hotels/search",
+                json={"stars": stars, "lat": lat, "lon": lon, "radius_km": radius_km, "limit": limit}
+            )
+            response.raise_for_status()
+            nearby = []
+            for hotel in response.json().get("results", []):
+                point = coordinates(hotel)
+                if point is None:
+                    continue
+                distance = haversine_km(lat, lon, *point)
+                if distance <= radius_km:
+                    nearby.append(dict(hotel, distance_km=round(distance, 1)))
+            nearby.sort(key=lambda hotel: hotel["distance_km"])
+            return {"total": len(nearby[:limit]), "results": nearby[:limit]}
+        except Exception as e:
+            logger.error(f"❌ API Error: {e}")
+            return self._mock_nearest(lat, lon, limit, radius_km, stars)
 
 
 # ============================================
@@ -456,6 +621,7 @@ class FlightAPIClient(BaseAPIClient):
     def __init__(self):
         super().__init__(FLIGHT_API_URL, FLIGHT_API_KEY)
     
+    @timed("api_clients")
     def search_flights(self, flight_class: str = "economy"):
         if self.use_mock:
             return self._mock_search(flight_class)
@@ -0,0 +1,264 @@
+# actions/fair_share.py
+"""
+LLM fallback kapasitesi için sender bazlı adil paylaşım
+
+ActionAskOllama çağrıları iki aşamadan geçer:
+1. Token bucket: her sender dakikada OLLAMA_USER_RATE isteğe kadar
+   (OLLAMA_USER_BURST kadar ani patlama) kabul edilir; kotayı aşan istek
+   beklemeden reddedilir.
+2. Weighted fair queuing: aynı anda en fazla OLLAMA_CONCURRENCY üretim
+   çalışır. Slot boşaldığında sıradaki istek, sender'ların sanal bitiş
+   zamanına göre seçilir; çok istek gönderen bir sender kendi kuyruğunda
+   bekler, diğer sender'ların gecikmesini artırmaz.
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from api_service.metrics import REGISTRY
+
+OLLAMA_CONCURRENCY = int(os.getenv("OLLAMA_CONCURRENCY", "2"))
+OLLAMA_USER_RATE = float(os.getenv("OLLAMA_USER_RATE", "6"))        # istek / dakika
+OLLAMA_USER_BURST = float(os.getenv("OLLAMA_USER_BURST", "3"))
+OLLAMA_USER_MAX_QUEUED = int(os.getenv("OLLAMA_USER_MAX_QUEUED", "2"))
+OLLAMA_QUEUE_TIMEOUT = float(os.getenv("OLLAMA_QUEUE_TIMEOUT", "20"))  # saniye
+# Bellekte tutulacak en fazla sender (bucket / kullanım sayacı). Sender bazında
+# kullanım metrics sunucusunun /fair-share endpoint'inde (en çok kullanan ilk N sender)
+# görülür; Prometheus metrikleri sender etiketi taşımaz (sınırsız seri olmasın)
+FAIR_SHARE_MAX_SENDERS = int(os.getenv("FAIR_SHARE_MAX_SENDERS", "10000"))
+FAIR_SHARE_USAGE_TOP = int(os.getenv("FAIR_SHARE_USAGE_TOP", "20"))
+FAIR_SHARE_USAGE_TOP_MAX = 200
+
+FAIR_SHARE_REQUESTS = REGISTRY.counter(
+    "llm_fair_share_requests_total",
+    "LLM fallback istekleri (admitted / rate_limited / queue_full / queue_timeout)",
+    ("outcome",)
+)
+FAIR_SHARE_BUSY_SECONDS = REGISTRY.counter(
+    "llm_fair_share_busy_seconds_total",
+    "Slotlarda harcanan toplam üretim süresi"
+)
+FAIR_SHARE_WAIT_SECONDS = REGISTRY.histogram(
+    "llm_fair_share_wait_seconds",
+    "Üretim slotu için kuyrukta bekleme süresi"
+)
+FAIR_SHARE_QUEUED = REGISTRY.gauge(
+    "llm_fair_share_queued",
+    "Slot bekleyen istek sayısı"
+)
+
+
+class OverQuota(Exception):
+    """İstek kota / kuyruk sınırı yüzünden kabul edilmedi"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class TokenBucket:
+    """rate: saniyede eklenen token, burst: kapasite"""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float, cost: float = 1.0) -> bool:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return True
+        return False
+
+
+class _SenderState:
+    __slots__ = ("bucket", "finish_tag", "queued", "usage")
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self.finish_tag = 0.0
+        self.queued = 0
+        self.usage = {"admitted": 0, "rate_limited": 0, "queue_full": 0, "queue_timeout": 0, "busy_seconds": 0.0}
+
+
+class FairShareScheduler:
+    """
+    Token bucket + weighted fair queuing
+
+    Örnek:
+        async with fair_scheduler.slot(tracker.sender_id):
+            ... Ollama çağrısı ...
+    """
+
+    def __init__(self,
+                 concurrency: int = OLLAMA_CONCURRENCY,
+                 rate_per_minute: float = OLLAMA_USER_RATE,
+                 burst: float = OLLAMA_USER_BURST,
+                 max_queued_per_sender: int = OLLAMA_USER_MAX_QUEUED,
+                 queue_timeout: float = OLLAMA_QUEUE_TIMEOUT,
+                 max_senders: int = FAIR_SHARE_MAX_SENDERS):
+        self.concurrency = concurrency
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_queued_per_sender = max_queued_per_sender
+        self.queue_timeout = queue_timeout
+        self.max_senders = max_senders
+
+        self._senders: "OrderedDict[str, _SenderState]" = OrderedDict()
+        # (finish_tag, seq, sender_id, future)
+        self._heap: List[Tuple[float, int, str, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._virtual_time = 0.0
+        self._running = 0
+
+    # ---------- sender durumu ----------
+
+    def _state(self, sender_id: str, now: float) -> _SenderState:
+        state = self._senders.get(sender_id)
+        if state is None:
+            state = self._senders[sender_id] = _SenderState(TokenBucket(self.rate, self.burst, now))
+            # En eski, kuyrukta isteği olmayan sender'ları unut
+            while len(self._senders) > self.max_senders:
+                oldest_id, oldest = next(iter(self._senders.items()))
+                if oldest.queued:
+                    break
+                del self._senders[oldest_id]
+        else:
+            self._senders.move_to_end(sender_id)
+        return state
+
+    def _count(self, state: _SenderState, outcome: str):
+        state.usage[outcome] += 1
+        FAIR_SHARE_REQUESTS.inc(outcome=outcome)
+
+    # ---------- kuyruk ----------
+
+    def _dispatch(self):
+        """Boş slot varsa en küçük sanal bitiş zamanlı isteği başlat"""
+        while self._running < self.concurrency and self._heap:
+            finish_tag, _, _, future = heapq.heappop(self._heap)
+            if future.done():  # timeout / iptal
+                continue
+            self._virtual_time = max(self._virtual_time, finish_tag)
+            self._running += 1
+            future.set_result(None)
+        FAIR_SHARE_QUEUED.set(len(self._heap))
+
+    async def acquire(self, sender_id: str, weight: float = 1.0, cost: float = 1.0):
+        """Slot al; kota aşılırsa OverQuota"""
+        now = time.monotonic()
+        state = self._state(sender_id, now)
+
+        if not state.bucket.take(now):
+            self._count(state, "rate_limited")
+            raise OverQuota("rate_limited")
+        if state.queued >= self.max_queued_per_sender:
+            self._count(state, "queue_full")
+            raise OverQuota("queue_full")
+
+        # Sender'ın yeni isteği, kendi önceki isteklerinin arkasına sıralanır
+        start_tag = max(self._virtual_time, state.finish_tag)
+        state.finish_tag = start_tag + cost / weight
+
+        if self._running < self.concurrency and not self._heap:
+            self._virtual_time = start_tag
+            self._running += 1
+            self._count(state, "admitted")
+            FAIR_SHARE_WAIT_SECONDS.observe(0.0)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (state.finish_tag, next(self._seq), sender_id, future))
+        FAIR_SHARE_QUEUED.set(len(self._heap))
+        state.queued += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if future.done():
+                # Timeout ile aynı anda slot verilmiş - slotu geri bırak
+                self.release(sender_id)
+            else:
+                future.cancel()
+                # Kullanılmayan payı geri al ki sender bir sonraki istekte cezalandırılmasın
+                state.finish_tag -= cost / weight
+            self._count(state, "queue_timeout")
+            raise OverQuota("queue_timeout")
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(sender_id)
+            else:
+                future.cancel()
+            raise
+        finally:
+            state.queued -= 1
+
+        self._count(state, "admitted")
+        FAIR_SHARE_WAIT_SECONDS.observe(time.monotonic() - now)
+
+    def release(self, sender_id: str, busy_seconds: float = 0.0):
+        self._running -= 1
+        state = self._senders.get(sender_id)
+        if state is not None:
+            state.usage["busy_seconds"] += busy_seconds
+        if busy_seconds:
+            FAIR_SHARE_BUSY_SECONDS.inc(busy_seconds)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, sender_id: str, weight: float = 1.0):
+        await self.acquire(sender_id, weight)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(sender_id, time.monotonic() - start)
+
+    # ---------- raporlama ----------
+
+    def usage(self, sender_id: Optional[str] = None, top: int = FAIR_SHARE_USAGE_TOP) -> Dict[str, Any]:
+        """
+        Sender bazında kullanım sayaçları
+
+        sender_id verilmezse slot süresine (sonra kabul edilen isteğe) göre en
+        çok kullanan ilk top sender (en fazla FAIR_SHARE_USAGE_TOP_MAX) döner.
+        """
+        if sender_id is not None:
+            state = self._senders.get(sender_id)
+            return dict(state.usage, queued=state.queued) if state else {}
+        top = max(0, min(top, FAIR_SHARE_USAGE_TOP_MAX))
+        # Metrics sunucusunun thread'inden okunur; dict bir kerede kopyalanır
+        senders = list(self._senders.items())
+        ranked = heapq.nlargest(top, senders,
+                                key=lambda item: (item[1].usage["busy_seconds"], item[1].usage["admitted"]))
+        return {
+            "running": self._running,
+            "queued": len(self._heap),
+            "tracked_senders": len(senders),
+            "top": [dict(state.usage, sender_id=sid, queued=state.queued) for sid, state in ranked]
+        }
+
+
+def usage_route(query: Dict[str, List[str]]) -> Dict[str, Any]:
+    """/fair-share?top=N veya /fair-share?sender=<id>"""
+    if "sender" in query:
+        return fair_scheduler.usage(query["sender"][0])
+    try:
+        top = int(query.get("top", [FAIR_SHARE_USAGE_TOP])[0])
+    except ValueError:
+        raise ValueError("top tamsayı olmalı")
+    return fair_scheduler.usage(top=top)
+
+
+# Action server genelinde paylaşılan scheduler
+fair_scheduler = FairShareScheduler()
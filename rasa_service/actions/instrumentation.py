@@ -0,0 +1,106 @@
+# actions/instrumentation.py
+"""
+Action server için latency enstrümantasyonu
+
+Her Action.run çağrısı action_duration_seconds histogramına yazılır;
+çağrı süresince metrics.current_scope action adına ayarlanır, böylece
+MongoDB / api_clients / Ollama alt çağrıları (span_duration_seconds)
+hangi action içinde çalıştıklarıyla birlikte kaydedilir.
+"""
+
+import functools
+import inspect
+import os
+import time
+from typing import List, Optional, Type
+
+from rasa_sdk import Action
+
+from api_service.metrics import REGISTRY, current_scope, register_json_route, start_metrics_server
+
+ACTION_METRICS_HOST = os.getenv("ACTION_METRICS_HOST", "127.0.0.1")
+ACTION_METRICS_PORT = int(os.getenv("ACTION_METRICS_PORT", "9105"))
+
+ACTION_SECONDS = REGISTRY.histogram(
+    "action_duration_seconds",
+    "Rasa custom action run() süresi",
+    ("action", "status")
+)
+
+
+def _all_subclasses(cls: Type) -> List[Type]:
+    subclasses = []
+    for subclass in cls.__subclasses__():
+        subclasses.append(subclass)
+        subclasses.extend(_all_subclasses(subclass))
+    return subclasses
+
+
+def instrument_action(cls: Type[Action]) -> Type[Action]:
+    """Action sınıfının run() metodunu zamanlayıcı ile sar"""
+    run = cls.__dict__.get("run")
+    if run is None or getattr(run, "_instrumented", False):
+        return cls
+
+    def record(action_name, start, status):
+        ACTION_SECONDS.observe(time.perf_counter() - start, action=action_name, status=status)
+
+    if inspect.iscoroutinefunction(run):
+        @functools.wraps(run)
+        async def wrapper(self, dispatcher, tracker, domain):
+            action_name = self.name()
+            token = current_scope.set(action_name)
+            start = time.perf_counter()
+            status = "error"
+            try:
+                result = await run(self, dispatcher, tracker, domain)
+                status = "ok"
+                return result
+            finally:
+                record(action_name, start, status)
+                current_scope.reset(token)
+    else:
+        @functools.wraps(run)
+        def wrapper(self, dispatcher, tracker, domain):
+            action_name = self.name()
+            token = current_scope.set(action_name)
+            start = time.perf_counter()
+            status = "error"
+            try:
+                result = run(self, dispatcher, tracker, domain)
+                status = "ok"
+                return result
+            finally:
+                record(action_name, start, status)
+                current_scope.reset(token)
+
+    wrapper._instrumented = True
+    cls.run = wrapper
+    return cls
+
+
+def instrument_actions(module_name: str) -> int:
+    """Verilen modülde tanımlı tüm Action sınıflarını enstrümante et"""
+    count = 0
+    for cls in _all_subclasses(Action):
+        if cls.__module__ == module_name:
+            instrument_action(cls)
+            count += 1
+    return count
+
+
+def start_action_metrics_server(port: Optional[int] = None):
+    """
+    Action server metriklerini ACTION_METRICS_PORT üzerinde /metrics olarak sun
+
+    /fair-share?top=N (veya ?sender=<id>) LLM fallback'in sender bazında
+    kullanımını döner. Pre-fork sunucuda her worker kendi portunu verir
+    (ACTION_METRICS_PORT + i).
+    """
+    from rasa_service.actions.fair_share import usage_route
+
+    port = ACTION_METRICS_PORT if port is None else port
+    if port > 0:
+        register_json_route("/fair-share", usage_route)
+        return start_metrics_server(port, ACTION_METRICS_HOST)
+    return None
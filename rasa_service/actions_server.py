@@ -0,0 +1,313 @@
+# rasa_service/actions_server.py
+"""
+Pre-fork çok worker'lı action server
+
+`rasa run actions` tek process'tir ve senkron action'lar (MongoDB,
+partner API'leri, Ollama) event loop'u bloklar; aynı anda tek yavaş çağrı
+servis edilir. Bu sunucu:
+
+- Dinleme soketini master'da açar, action paketini (client'lar, mock
+  kataloglar, pricing tabloları) fork'tan önce import eder ve gc.freeze()
+  ile dondurur; worker'lar bu sayfaları copy-on-write paylaşır
+- ACTION_WORKERS kadar worker fork'lar; hepsi aynı soketten accept eder
+- ACTION_MAX_REQUESTS (+ 0..ACTION_MAX_REQUESTS_JITTER) istekten sonra worker
+  yeni bağlantı almayı bırakır, elindekileri bitirip çıkar; master yerine
+  yenisini başlatır (0 = kapalı)
+- SIGHUP: worker'ları sırayla yeniler, SIGTERM / SIGINT: worker'lara
+  graceful kapanış, ACTION_GRACEFUL_TIMEOUT sonunda SIGKILL
+- Worker i, /metrics'i ACTION_METRICS_PORT + i üzerinde sunar
+
+OLLAMA_CONCURRENCY, fair-share kotaları ve profil tamponu worker başınadır;
+toplam Ollama eşzamanlılığı worker sayısıyla çarpılır.
+
+Kullanım (rasa_service klasöründen, `rasa run actions` yerine):
+    python actions_server.py --workers 4
+    python actions_server.py --workers 4 --port 5055 --max-requests 5000 --max-requests-jitter 500
+"""
+
+import argparse
+import atexit
+import gc
+import inspect
+import logging
+import os
+import random
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List, Optional
+
+# rasa_service (actions paketi) ve proje kökü (api_service) import edilebilsin
+RASA_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, RASA_DIR)
+sys.path.append(os.path.dirname(RASA_DIR))
+
+logger = logging.getLogger("actions_server")
+
+ACTION_WORKERS = int(os.getenv("ACTION_WORKERS", "2"))
+ACTION_MAX_REQUESTS = int(os.getenv("ACTION_MAX_REQUESTS", "0"))
+ACTION_MAX_REQUESTS_JITTER = int(os.getenv("ACTION_MAX_REQUESTS_JITTER", "0"))
+ACTION_GRACEFUL_TIMEOUT = float(os.getenv("ACTION_GRACEFUL_TIMEOUT", "30"))  # saniye
+
+# Bu süreden kısa yaşayan worker çökmüş sayılır, yeniden başlatma geciktirilir
+MIN_WORKER_LIFETIME = 1.0
+
+
+# ============================================
+# WARM-UP (fork'tan önce, master'da)
+# ============================================
+
+def bind_socket(host: str, port: int, backlog: int = 1024) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def load_actions(package: str):
+    """
+    Action paketini import et ve executor'a kaydet
+
+    Metrics sunucusu import sırasında açılmasın diye port geçici olarak
+    kapatılır; her worker kendi portunu fork'tan sonra açar.
+
+    Returns:
+        (executor, metrics_port)
+    """
+    from rasa_sdk.executor import ActionExecutor
+    from rasa_service.actions import instrumentation
+
+    metrics_port = instrumentation.ACTION_METRICS_PORT
+    instrumentation.ACTION_METRICS_PORT = 0
+    try:
+        executor = ActionExecutor()
+        executor.register_package(package)
+    finally:
+        instrumentation.ACTION_METRICS_PORT = metrics_port
+    return executor, metrics_port
+
+
+def create_app(executor, package: str):
+    from rasa_sdk import endpoint
+
+    # rasa-sdk >= 3.8 executor alır; eskileri paket adını alıp modülleri
+    # sys.modules'ten (master'da import edilmiş halleriyle) yükler
+    if "action_executor" in inspect.signature(endpoint.create_app).parameters:
+        return endpoint.create_app(executor, cors_origins="*")
+    return endpoint.create_app(package, cors_origins="*")
+
+
+# ============================================
+# WORKER
+# ============================================
+
+def run_worker(sock: socket.socket, executor, package: str, slot: int,
+               max_requests: int, metrics_port: int, graceful_timeout: float):
+    """Fork edilmiş child'da çalışır; sunucu durunca döner"""
+    gc.enable()
+    random.seed()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, signal.SIG_DFL)
+    # Process grubuna gelen SIGHUP (terminal kapanması, kill -HUP -pgid) worker'ları
+    # öldürmesin; reload'u master sırayla yapar
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+    if metrics_port > 0:
+        from rasa_service.actions.instrumentation import start_action_metrics_server
+        start_action_metrics_server(metrics_port + slot)
+
+    app = create_app(executor, package)
+    app.config.GRACEFUL_SHUTDOWN_TIMEOUT = graceful_timeout
+
+    if max_requests > 0:
+        handled = 0
+
+        @app.on_response
+        async def recycle(request, response):
+            nonlocal handled
+            handled += 1
+            if handled == max_requests:
+                logger.info(f"♻️ Worker {slot} (pid {os.getpid()}) {handled} istekten sonra yenileniyor")
+                app.stop()
+
+    run_kwargs = {"sock": sock, "access_log": False}
+    run_params = inspect.signature(app.run).parameters
+    if "single_process" in run_params:
+        run_kwargs["single_process"] = True
+    if "motd" in run_params:
+        run_kwargs["motd"] = False
+    app.run(**run_kwargs)
+
+
+# ============================================
+# MASTER
+# ============================================
+
+class PreforkMaster:
+    """Worker'ları başlatır, izler, yeniler ve kapatır"""
+
+    def __init__(self, sock: socket.socket, executor, package: str, workers: int,
+                 max_requests: int = ACTION_MAX_REQUESTS,
+                 max_requests_jitter: int = ACTION_MAX_REQUESTS_JITTER,
+                 graceful_timeout: float = ACTION_GRACEFUL_TIMEOUT,
+                 metrics_port: int = 0):
+        self.sock = sock
+        self.executor = executor
+        self.package = package
+        self.worker_count = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.metrics_port = metrics_port
+
+        self.workers: Dict[int, int] = {}        # pid -> slot
+        self.started_at: Dict[int, float] = {}   # pid -> başlangıç
+        self.retiring: List[int] = []            # SIGHUP ile sırayla yenilenecekler
+        self.terminating: Optional[int] = None
+        self.stopping = False
+        self.reload_requested = False
+
+    def spawn(self, slot: int):
+        limit = self.max_requests
+        if limit > 0 and self.max_requests_jitter > 0:
+            # Worker'lar aynı anda yenilenmesin
+            limit += random.randint(0, self.max_requests_jitter)
+
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(self.sock, self.executor, self.package, slot,
+                           limit, self.metrics_port, self.graceful_timeout)
+            except BaseException:
+                logger.exception(f"❌ Worker {slot} hatası")
+                code = 1
+            finally:
+                # Master'ın stack'ine dönmeden çık; atexit (profil tamponu flush'ı) çalışsın
+                atexit._run_exitfuncs()
+                os._exit(code)
+
+        self.workers[pid] = slot
+        self.started_at[pid] = time.monotonic()
+        logger.info(f"👷 Worker {slot} başladı (pid {pid})")
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_reload)
+
+        # Tüm worker'lar aynı frozen heap'i paylaşsın
+        gc.freeze()
+        for slot in range(self.worker_count):
+            self.spawn(slot)
+
+        while not self.stopping:
+            self._reap()
+            if self.reload_requested:
+                self.reload_requested = False
+                self.retiring = list(self.workers)
+                logger.info(f"🔄 {len(self.retiring)} worker sırayla yenilenecek")
+            self._retire_next()
+            time.sleep(0.1)
+
+        self.shutdown()
+
+    def _reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            slot = self.workers.pop(pid, None)
+            started = self.started_at.pop(pid, time.monotonic())
+            if self.terminating == pid:
+                self.terminating = None
+            if slot is None or self.stopping:
+                continue
+
+            code = os.waitstatus_to_exitcode(status)
+            if code != 0:
+                logger.warning(f"⚠️ Worker {slot} (pid {pid}) çıkış kodu {code}, yeniden başlatılıyor")
+            if time.monotonic() - started < MIN_WORKER_LIFETIME:
+                time.sleep(MIN_WORKER_LIFETIME)
+            self.spawn(slot)
+
+    def _retire_next(self):
+        # Aynı anda tek worker kapanır ve yerine gelen ayağa kalkmadan sıradaki kapanmaz
+        if self.terminating is not None:
+            return
+        now = time.monotonic()
+        if any(now - started < MIN_WORKER_LIFETIME for started in self.started_at.values()):
+            return
+        while self.retiring:
+            pid = self.retiring.pop(0)
+            if pid in self.workers:
+                self.terminating = pid
+                os.kill(pid, signal.SIGTERM)
+                return
+
+    def _on_stop(self, signum, frame):
+        self.stopping = True
+
+    def _on_reload(self, signum, frame):
+        self.reload_requested = True
+
+    def shutdown(self):
+        logger.info(f"🛑 {len(self.workers)} worker kapatılıyor")
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        deadline = time.monotonic() + self.graceful_timeout
+        while self.workers and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        for pid in list(self.workers):
+            logger.warning(f"⚠️ Worker pid {pid} zamanında kapanmadı, SIGKILL")
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        while self.workers:
+            pid, _ = os.waitpid(-1, 0)
+            self.workers.pop(pid, None)
+        self.sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork çok worker'lı Rasa action server")
+    parser.add_argument("--host", default=os.getenv("SANIC_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--workers", type=int, default=ACTION_WORKERS)
+    parser.add_argument("--actions", default="actions", help="Action paketi (rasa_service altında)")
+    parser.add_argument("--max-requests", type=int, default=ACTION_MAX_REQUESTS)
+    parser.add_argument("--max-requests-jitter", type=int, default=ACTION_MAX_REQUESTS_JITTER)
+    parser.add_argument("--graceful-timeout", type=float, default=ACTION_GRACEFUL_TIMEOUT)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    # Fork'tan önce oluşan nesneler sonradan serbest kalıp sayfalarda delik açmasın
+    gc.disable()
+    started = time.perf_counter()
+    sock = bind_socket(args.host, args.port)
+    executor, metrics_port = load_actions(args.actions)
+    logger.info(f"🔥 Action paketi '{args.actions}' {time.perf_counter() - started:.2f}s'de yüklendi, "
+                f"{args.workers} worker başlatılıyor: http://{args.host}:{args.port}")
+
+    PreforkMaster(sock, executor, args.actions, args.workers,
+                  max_requests=args.max_requests,
+                  max_requests_jitter=args.max_requests_jitter,
+                  graceful_timeout=args.graceful_timeout,
+                  metrics_port=metrics_port).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+# rasa_service/tracker_store.py
+"""
+LRU cache'li, sadece yeni event'leri yazan MongoDB tracker store
+
+Stok `mongod` tracker store her mesajda sender'ın tüm tracker dokümanını
+okuyup yeni event'leri hesaplar; uzun oturumlarda her tur bir öncekinden
+pahalı olur. Bu store:
+
+- Sıcak tracker'ların serileştirilmiş event'lerini process içi, boyutu
+  sınırlı bir LRU'da tutar (cache hit'te tam doküman okunmaz)
+- Her kayıtta sadece yeni event'leri `tracker_events` collection'ına
+  sıralı (seq) delta kayıtları olarak ekler
+- Delta sayısı eşiği aşınca event'leri `tracker_snapshots` içine tek
+  snapshot olarak sıkıştırır ve eski delta'ları siler
+
+endpoints.yml:
+    tracker_store:
+      type: tracker_store.DeltaMongoTrackerStore
+      url: mongodb://localhost:27017
+      db: health_tourism_db
+      cache_size: 1000
+      compact_every: 200
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Text
+
+from pymongo import ASCENDING, DESCENDING, MongoClient
+from pymongo.errors import BulkWriteError
+
+try:
+    from rasa.core.brokers.broker import EventBroker
+    from rasa.core.tracker_store import SerializedTrackerAsText, TrackerStore
+    from rasa.shared.core.domain import Domain
+    from rasa.shared.core.trackers import DialogueStateTracker
+except ImportError:  # Benchmark'lar DeltaEventLog'u Rasa kurulu olmadan da kullanabilsin
+    TrackerStore = None
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_COLLECTION = "tracker_snapshots"
+EVENTS_COLLECTION = "tracker_events"
+
+
+class TrackerConflictError(RuntimeError):
+    """Başka bir process aynı sender'a bizim event'lerimizle uyuşmayan event'ler yazmış"""
+
+
+def session_start_index(events: List[Dict[str, Any]]) -> int:
+    """
+    Son oturumun başladığı event index'i (stok store'daki gibi
+    action_session_start ActionExecuted event'i dahil)
+    """
+    for index in range(len(events) - 1, -1, -1):
+        if events[index].get("event") == "session_started":
+            previous = events[index - 1] if index > 0 else None
+            if previous and previous.get("event") == "action" and previous.get("name") == "action_session_start":
+                return index - 1
+            return index
+    return 0
+
+
+class _CachedEvents:
+    __slots__ = ("events", "seq", "snapshot_seq", "session_start")
+
+    def __init__(self, events: List[Dict[str, Any]], seq: int, snapshot_seq: int):
+        self.events = events
+        self.seq = seq
+        self.snapshot_seq = snapshot_seq
+        self.session_start = session_start_index(events)
+
+
+class DeltaEventLog:
+    """
+    Serileştirilmiş event'ler üzerinde çalışan kalıcılık katmanı (Rasa'dan bağımsız)
+
+    Args:
+        cache_size: LRU'da tutulacak en fazla sender sayısı (0 = cache kapalı)
+        compact_every: Snapshot'tan sonra bu kadar delta birikince sıkıştır
+        validate_cache: Cache hit'te başka bir process'in yazıp yazmadığını
+            tek bir index sorgusuyla kontrol et (birden fazla Rasa instance'ı için)
+    """
+
+    def __init__(self,
+                 db,
+                 cache_size: int = 1000,
+                 compact_every: int = 200,
+                 validate_cache: bool = False):
+        self.snapshots = db[SNAPSHOT_COLLECTION]
+        self.deltas = db[EVENTS_COLLECTION]
+        self.cache_size = cache_size
+        self.compact_every = compact_every
+        self.validate_cache = validate_cache
+
+        self._cache: "OrderedDict[str, _CachedEvents]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self.deltas.create_index([("sender_id", ASCENDING), ("seq", ASCENDING)], unique=True)
+        self.snapshots.create_index("sender_id", unique=True)
+
+    # ---------- cache ----------
+
+    def _cache_get(self, sender_id: str) -> Optional[_CachedEvents]:
+        with self._lock:
+            entry = self._cache.get(sender_id)
+            if entry is not None:
+                self._cache.move_to_end(sender_id)
+            return entry
+
+    def _cache_put(self, sender_id: str, entry: _CachedEvents):
+        if self.cache_size <= 0:
+            return
+        with self._lock:
+            self._cache[sender_id] = entry
+            self._cache.move_to_end(sender_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def evict(self, sender_id: str):
+        with self._lock:
+            self._cache.pop(sender_id, None)
+
+    # ---------- okuma ----------
+
+    def _head_seq(self, sender_id: str) -> int:
+        latest = self.deltas.find_one({"sender_id": sender_id}, {"seq": 1, "_id": 0},
+                                      sort=[("seq", DESCENDING)])
+        return latest["seq"] if latest else 0
+
+    def _load(self, sender_id: str) -> Optional[_CachedEvents]:
+        snapshot = self.snapshots.find_one({"sender_id": sender_id}, {"_id": 0, "events": 1, "seq": 1})
+        events = list(snapshot["events"]) if snapshot else []
+        snapshot_seq = seq = snapshot["seq"] if snapshot else 0
+        for delta in self.deltas.find({"sender_id": sender_id, "seq": {"$gt": seq}},
+                                      {"_id": 0, "seq": 1, "event": 1}).sort("seq", ASCENDING):
+            events.append(delta["event"])
+            seq = delta["seq"]
+        if snapshot is None and seq == 0:
+            return None
+        return _CachedEvents(events, seq, snapshot_seq)
+
+    def _entry(self, sender_id: str) -> Optional[_CachedEvents]:
+        entry = self._cache_get(sender_id)
+        if entry is not None and (not self.validate_cache or self._head_seq(sender_id) == entry.seq):
+            self.hits += 1
+            return entry
+        self.misses += 1
+        entry = self._load(sender_id)
+        if entry is not None:
+            self._cache_put(sender_id, entry)
+        return entry
+
+    def load_events(self, sender_id: str, fetch_all_sessions: bool = False) -> Optional[List[Dict[str, Any]]]:
+        """Sender'ın event'leri (varsayılan olarak sadece son oturum)"""
+        entry = self._entry(sender_id)
+        if entry is None:
+            return None
+        return entry.events if fetch_all_sessions else entry.events[entry.session_start:]
+
+    def sender_ids(self) -> List[str]:
+        return sorted(set(self.snapshots.distinct("sender_id")) | set(self.deltas.distinct("sender_id")))
+
+    # ---------- yazma ----------
+
+    def append(self,
+               sender_id: str,
+               session_events: Sequence[Any],
+               serialize: Optional[Callable[[Any], Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """
+        Son oturumun event'lerini kaydet, yeni eklenenleri döndür
+
+        session_events, load_events() ile okunan listenin devamı olmalı
+        (Rasa tracker'ı her turda sadece sonuna event ekler). serialize
+        verilirse sadece yeni event'ler serileştirilir.
+        """
+        serialize = serialize or (lambda event: event)
+        entry = self._entry(sender_id) or _CachedEvents([], 0, 0)
+        known = len(entry.events) - entry.session_start
+
+        if len(session_events) < known:
+            # Tracker sıfırlanmış / değiştirilmiş - tamamını snapshot olarak yaz
+            session = [serialize(event) for event in session_events]
+            self._write_snapshot(sender_id, entry.events[:entry.session_start] + session,
+                                 self._head_seq(sender_id) + 1)
+            return session
+
+        new_events = [serialize(event) for event in islice(session_events, known, None)]
+        if not new_events:
+            return []
+
+        try:
+            self._insert_deltas(sender_id, entry.seq, new_events)
+        except BulkWriteError:
+            new_events, entry = self._reconcile(sender_id, session_events, serialize)
+            if not new_events:
+                return []
+            self._insert_deltas(sender_id, entry.seq, new_events)
+
+        events = entry.events + new_events
+        seq = entry.seq + len(new_events)
+        if seq - entry.snapshot_seq >= self.compact_every:
+            self._write_snapshot(sender_id, events, seq)
+        else:
+            self._cache_put(sender_id, _CachedEvents(events, seq, entry.snapshot_seq))
+        return new_events
+
+    def _insert_deltas(self, sender_id: str, seq: int, new_events: List[Dict[str, Any]]):
+        """
+        seq'ten sonrasına delta kayıtları ekle
+
+        Çakışmada (aynı seq'e başka bir process yazmış) bu çağrının yazabildiği
+        kayıtlar geri alınır, cache bırakılır ve BulkWriteError yükseltilir.
+        """
+        records = [
+            {"sender_id": sender_id, "seq": seq + offset, "event": event, "created_at": datetime.now()}
+            for offset, event in enumerate(new_events, start=1)
+        ]
+        try:
+            self.deltas.insert_many(records, ordered=True)
+        except BulkWriteError:
+            # ordered insert çakışmadan önceki kayıtları yazmış olabilir; _id'ler insert_many'de atanır
+            written = [record["_id"] for record in records if "_id" in record]
+            if written:
+                self.deltas.delete_many({"_id": {"$in": written}})
+            self.evict(sender_id)
+            raise
+
+    def _reconcile(self,
+                   sender_id: str,
+                   session_events: Sequence[Any],
+                   serialize: Callable[[Any], Dict[str, Any]]):
+        """
+        Çakışmadan sonra güncel event'leri okuyup bizimkilerle karşılaştır
+
+        Kayıtlı oturum bizim event'lerimizin birebir başlangıcıysa (diğer yazan
+        aynı event'leri yazmışsa) eksik kısım döner; aksi halde event'ler
+        sessizce kaybolmasın diye TrackerConflictError yükseltilir ve tur
+        çağıran tarafından (lock store / istemci) baştan denenir.
+        """
+        entry = self._load(sender_id) or _CachedEvents([], 0, 0)
+        stored = entry.events[entry.session_start:]
+        ours = [serialize(event) for event in session_events]
+        if len(stored) > len(ours) or ours[:len(stored)] != stored:
+            logger.warning(f"⚠️ Tracker çakışması, event'ler uyuşmuyor: {sender_id}")
+            raise TrackerConflictError(f"Tracker {sender_id} başka bir process tarafından değiştirildi")
+        logger.info(f"🔁 Tracker çakışması uzlaştırıldı: {sender_id} ({len(stored)} ortak event)")
+        return ours[len(stored):], entry
+
+    def _write_snapshot(self, sender_id: str, events: List[Dict[str, Any]], seq: int):
+        """
+        Event'leri snapshot'a sıkıştır
+
+        seq'teki son delta silinmez; böylece en güncel seq her zaman
+        tracker_events üzerinden tek index sorgusuyla bulunabilir.
+        """
+        self.snapshots.replace_one(
+            {"sender_id": sender_id},
+            {"sender_id": sender_id, "events": events, "seq": seq, "updated_at": datetime.now()},
+            upsert=True
+        )
+        self.deltas.delete_many({"sender_id": sender_id, "seq": {"$lt": seq}})
+        if self._head_seq(sender_id) < seq:
+            self.deltas.insert_one({"sender_id": sender_id, "seq": seq, "event": events[-1] if events else {},
+                                    "created_at": datetime.now()})
+        self._cache_put(sender_id, _CachedEvents(list(events), seq, seq))
+        logger.info(f"🗜️ Tracker snapshot: {sender_id} ({len(events)} event, seq {seq})")
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {"cached": len(self._cache), "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0}
+
+
+# ============================================
+# RASA TRACKER STORE
+# ============================================
+
+if TrackerStore is not None:
+
+    class DeltaMongoTrackerStore(TrackerStore, SerializedTrackerAsText):
+        """DeltaEventLog üzerinde Rasa TrackerStore (endpoints.yml'den yüklenir)"""
+
+        def __init__(self,
+                     domain: Domain,
+                     host: Optional[Text] = None,
+                     url: Optional[Text] = None,
+                     db: Text = "health_tourism_db",
+                     username: Optional[Text] = None,
+                     password: Optional[Text] = None,
+                     auth_source: Optional[Text] = "admin",
+                     cache_size: int = 1000,
+                     compact_every: int = 200,
+                     validate_cache: bool = False,
+                     event_broker: Optional[EventBroker] = None,
+                     **kwargs: Dict[Text, Any]) -> None:
+            super().__init__(domain, event_broker, **kwargs)
+            uri = host or url or os.getenv("MONGODB_URI", "mongodb://localhost:27017")
+            self.client = MongoClient(uri, username=username, password=password,
+                                      authSource=auth_source, connect=False)
+            self.log = DeltaEventLog(self.client[db], cache_size=int(cache_size),
+                                     compact_every=int(compact_every), validate_cache=bool(validate_cache))
+            logger.info(f"✅ DeltaMongoTrackerStore: {db} (cache {cache_size}, compact {compact_every})")
+
+        def _tracker(self, sender_id: Text, events: List[Dict[str, Any]]) -> DialogueStateTracker:
+            return DialogueStateTracker.from_dict(sender_id, events, self.domain.slots,
+                                                  max_event_history=self.max_event_history)
+
+        async def save(self, tracker: DialogueStateTracker) -> None:
+            serialize = lambda event: event.as_dict()  # noqa: E731
+            # Çakışma append() içinde uzlaştırılır; uzlaştırılamazsa TrackerConflictError /
+            # BulkWriteError yükselir ve tur baştan denenir (hiçbir event sessizce düşmez)
+            new_events = self.log.append(tracker.sender_id, tracker.events, serialize)
+
+            if self.event_broker:
+                for event in new_events:
+                    self.event_broker.publish(dict(event, sender_id=tracker.sender_id))
+
+        async def retrieve(self, sender_id: Text) -> Optional[DialogueStateTracker]:
+            events = self.log.load_events(sender_id)
+            return self._tracker(sender_id, events) if events is not None else None
+
+        async def retrieve_full_tracker(self, conversation_id: Text) -> Optional[DialogueStateTracker]:
+            events = self.log.load_events(conversation_id, fetch_all_sessions=True)
+            return self._tracker(conversation_id, events) if events is not None else None
+
+        async def keys(self) -> Iterable[Text]:
+            return self.log.sender_ids()